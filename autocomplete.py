@@ -0,0 +1,372 @@
+"""
+Autocomplete Module for EMR Chatbot
+====================================
+This module suggests completions while the user types ("blo" ->
+"blood pressure", "blood test").
+It demonstrates:
+- A sorted array plus binary search (bisect) as a compact prefix index:
+  every key starting with a prefix sits in one contiguous slice
+- Ranking by usage frequency: phrases the user has translated before come
+  first, the rest follow in alphabetical order
+- Optional standard-library modules: readline is used when available
+  (Linux/macOS) and silently skipped otherwise (Windows without pyreadline)
+
+Author: EMR Chatbot Team
+Date: 2026-10-19
+"""
+
+import bisect
+import heapq
+
+import utils
+
+
+# ============================================================================
+# MODULE-LEVEL CONSTANTS AND VARIABLES
+# ============================================================================
+
+# Completions returned when no limit is given
+# Data Type: int
+DEFAULT_LIMIT = 10
+
+# Sorts after every character, so prefix + _PREFIX_END bounds a prefix range
+# Data Type: str
+_PREFIX_END = "\U0010ffff"
+
+# Command names offered at the start of a line
+# Data Type: tuple
+COMMANDS = utils.COMMAND_NAMES
+
+# Index over every glossary phrase, built on first use
+# Data Type: CompletionIndex or None
+_INDEX = None
+
+# Phrases added while rebuild_index() runs, replayed into the new index
+# Data Type: list or None
+_REBUILD_LOG = None
+
+# True once install_readline() has hooked completion into the prompt;
+# usage is only tracked in interactive sessions
+# Data Type: bool
+_TRACKING = False
+
+
+# ============================================================================
+# COMPLETION INDEX
+# ============================================================================
+
+class CompletionIndex:
+    """
+    Prefix index over a set of phrases, ranked by how often each was used.
+
+    Attributes:
+        keys (list): Every phrase, sorted
+        counts (dict): Phrase -> times used
+    """
+
+    def __init__(self, phrases=()):
+        self.keys = sorted(set(phrases))
+        self.counts = {}
+        # Data Type: list - phrases with a usage count, sorted, so the used
+        # phrases under a prefix are also one bisect away
+        self._used = []
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, phrase):
+        position = bisect.bisect_left(self.keys, phrase)
+        return position < len(self.keys) and self.keys[position] == phrase
+
+    def add(self, phrase):
+        """
+        Adds one phrase (e.g. a custom translation) to the index.
+
+        Parameters:
+            phrase (str): Normalized phrase
+        """
+        position = bisect.bisect_left(self.keys, phrase)
+        if position == len(self.keys) or self.keys[position] != phrase:
+            self.keys.insert(position, phrase)
+
+    def record_use(self, phrase):
+        """
+        Counts one use of a phrase; unknown phrases are ignored.
+
+        Parameters:
+            phrase (str): Normalized phrase
+
+        Returns:
+            bool: True if the phrase is in the index
+        """
+        if phrase not in self:
+            return False
+        if phrase not in self.counts:
+            bisect.insort(self._used, phrase)
+            self.counts[phrase] = 0
+        self.counts[phrase] += 1
+        return True
+
+    def complete(self, prefix, limit=DEFAULT_LIMIT):
+        """
+        Returns up to `limit` phrases starting with a prefix.
+
+        This function demonstrates:
+        - Binary search for the start of the prefix range
+        - heapq.nsmallest to pick the most-used phrases without sorting
+          the whole range
+
+        Parameters:
+            prefix (str): Normalized prefix
+            limit (int): Maximum number of completions
+
+        Returns:
+            list: Most-used phrases first, then alphabetical
+
+        Example:
+            >>> index.complete("blo")
+            ['blood pressure', 'blood test']
+        """
+        if limit <= 0:
+            return []
+
+        # Step 1: used phrases under the prefix, most used first
+        used = self._used
+        start = bisect.bisect_left(used, prefix)
+        end = bisect.bisect_left(used, prefix + _PREFIX_END, start)
+        counts = self.counts
+        results = heapq.nsmallest(limit, used[start:end],
+                                  key=lambda phrase: (-counts[phrase], phrase))
+        if len(results) >= limit:
+            return results
+
+        # Step 2: fill up with the remaining phrases in alphabetical order
+        chosen = set(results)
+        keys = self.keys
+        position = bisect.bisect_left(keys, prefix)
+        while position < len(keys) and len(results) < limit:
+            phrase = keys[position]
+            if not phrase.startswith(prefix):
+                break
+            if phrase not in chosen:
+                results.append(phrase)
+            position += 1
+        return results
+
+
+# ============================================================================
+# MODULE-LEVEL FUNCTIONS (used by main.py)
+# ============================================================================
+
+def build_index():
+    """
+    Builds a CompletionIndex over every general and medical phrase.
+
+    Returns:
+        CompletionIndex: The new index
+    """
+    import medical_terms
+    import translation_module
+
+    phrases = translation_module.list_all_phrases()
+    phrases.update(medical_terms.list_all_medical_phrases())
+    return CompletionIndex(phrases)
+
+
+def get_index():
+    """Returns the shared index, building it on first use."""
+    global _INDEX
+
+    if _INDEX is None:
+        _INDEX = build_index()
+    return _INDEX
+
+
+def complete(prefix, limit=DEFAULT_LIMIT):
+    """
+    Returns phrase completions for a prefix typed by the user.
+
+    Parameters:
+        prefix (str): Text typed so far (any case)
+        limit (int): Maximum number of completions. Default is DEFAULT_LIMIT.
+
+    Returns:
+        list: Completions, most used first
+
+    Example:
+        >>> complete("Hea")
+        ['headache', 'heart rate']
+    """
+    # Only leading space is dropped: "blood " must not match "bloodwork"
+    return get_index().complete(prefix.lower().lstrip(), limit)
+
+
+def complete_command(prefix):
+    """
+    Returns the command names starting with a prefix.
+
+    Parameters:
+        prefix (str): Text typed so far
+
+    Returns:
+        list: Matching command names
+    """
+    prefix = prefix.lower()
+    return [command for command in COMMANDS if command.startswith(prefix)]
+
+
+def add_phrases(phrases):
+    """
+    Makes new phrases completable (does nothing before the index is built,
+    because build_index() will pick them up).
+
+    Parameters:
+        phrases (list): Phrases, e.g. the forms of a custom translation
+    """
+    phrases = [utils.normalize_text(phrase) for phrase in phrases]
+    log = _REBUILD_LOG
+    if log is not None:
+        log.extend(phrases)
+    index = _INDEX
+    if index is not None:
+        for phrase in phrases:
+            index.add(phrase)
+
+
+def rebuild_index():
+    """
+    Rebuilds the index after the glossary was reloaded and swaps it in
+    (does nothing before the index is first built).
+
+    Completions keep using the old index until the new one is ready, and
+    usage counts carry over to phrases that still exist.
+
+    Returns:
+        CompletionIndex or None: The new index
+    """
+    global _INDEX, _REBUILD_LOG
+
+    old = _INDEX
+    if old is None:
+        return None
+    _REBUILD_LOG = []
+    index = build_index()
+    for phrase, count in old.counts.items():
+        if phrase in index:
+            index.counts[phrase] = count
+    index._used = sorted(index.counts)
+    _INDEX = index
+    # Phrases added during the build went to the old index; adding twice
+    # is harmless
+    for phrase in _REBUILD_LOG:
+        index.add(phrase)
+    _REBUILD_LOG = None
+    return index
+
+
+def record_use(phrase):
+    """
+    Counts a phrase the user translated, so it ranks higher next time.
+    Does nothing outside interactive sessions.
+
+    Parameters:
+        phrase (str): The phrase (any case)
+    """
+    if _TRACKING:
+        get_index().record_use(utils.normalize_text(phrase))
+
+
+# ============================================================================
+# READLINE INTEGRATION
+# ============================================================================
+
+def readline_matches(line, begin, text):
+    """
+    Returns the completions for the word being completed in a prompt.
+
+    Inside an open quote the phrase is completed; at the start of the line
+    the command name is completed.
+
+    Parameters:
+        line (str): Whole input line so far
+        begin (int): Where the text being completed starts in the line
+        text (str): Text being completed
+
+    Returns:
+        list: Strings that replace `text`
+
+    Example:
+        >>> readline_matches('translate "blo', 11, 'blo')
+        ['blood pressure', 'blood test']
+    """
+    before = line[:begin]
+    if before.count('"') % 2 == 1:
+        return complete(text)
+    if not before.strip():
+        return [command + " " for command in complete_command(text)]
+    return []
+
+
+def install_readline():
+    """
+    Hooks completion into input() and starts usage tracking.
+
+    Returns:
+        bool: True if readline is available on this platform
+    """
+    global _TRACKING
+
+    try:
+        import readline
+    except ImportError:
+        return False
+
+    # Data Type: list - matches for the text currently being completed
+    matches = []
+
+    def completer(text, state):
+        if state == 0:
+            matches[:] = readline_matches(readline.get_line_buffer(),
+                                          readline.get_begidx(), text)
+        return matches[state] if state < len(matches) else None
+
+    # Only the quote separates words, so a phrase with spaces is completed
+    # as one piece
+    readline.set_completer_delims('"')
+    readline.set_completer(completer)
+    if "libedit" in (readline.__doc__ or ""):
+        readline.parse_and_bind("bind ^I rl_complete")
+    else:
+        readline.parse_and_bind("tab: complete")
+    _TRACKING = True
+    return True
+
+
+# ============================================================================
+# MODULE TEST (runs only when module is executed directly)
+# ============================================================================
+if __name__ == "__main__":
+    import time
+
+    print("=== Autocomplete Module Test ===\n")
+
+    index = get_index()
+    print(f"Indexed phrases: {len(index)}")
+    for prefix in ["he", "do", "bl", "mal"]:
+        print(f"  '{prefix}' -> {index.complete(prefix, 5)}")
+
+    index.record_use("hello")
+    index.record_use("hello")
+    index.record_use("heart rate")
+    print(f"\nAfter using 'hello' twice and 'heart rate' once:")
+    print(f"  'he' -> {index.complete('he', 5)}")
+
+    big = CompletionIndex(f"term {number:07d}" for number in range(1000000))
+    for number in range(0, 1000000, 997):
+        big.record_use(f"term {number:07d}")
+    rounds = 20000
+    start = time.perf_counter()
+    for round_number in range(rounds):
+        big.complete(f"term {round_number % 100:02d}", 10)
+    elapsed = time.perf_counter() - start
+    print(f"\n1,000,000 phrases: {elapsed / rounds * 1e6:.1f} µs per completion")
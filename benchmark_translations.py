@@ -0,0 +1,356 @@
+"""
+Benchmark Suite for EMR Translation Chatbot
+============================================
+This script measures the speed of every translation and parsing entry point.
+It demonstrates:
+- Synthetic glossaries scaled from the real size (~30 entries) up to 1M
+- Per-call latency percentiles (p50 / p99) and throughput (ops/sec)
+- Peak memory of building each glossary (tracemalloc)
+- Saving results as JSON and comparing them with an earlier run
+
+Usage:
+    python benchmark_translations.py                      # all sizes
+    python benchmark_translations.py --sizes 30 10000     # chosen sizes
+    python benchmark_translations.py --output new.json --compare old.json
+
+Author: EMR Chatbot Team
+Date: 2026-10-19
+"""
+
+# ============================================================================
+# IMPORTS
+# ============================================================================
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import lexicon_store
+import main
+import medical_terms
+import translation_module
+import utils
+
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+# Glossary sizes to benchmark (number of concepts)
+# Data Type: list of int
+DEFAULT_SIZES = [30, 1000, 10000, 100000, 1000000]
+
+# Timed calls per entry point and glossary size
+# Data Type: int
+DEFAULT_ITERATIONS = 20000
+
+# Fraction of queries that are not in the glossary
+# Data Type: float
+MISS_RATIO = 0.1
+
+# A comparison fails when p50 latency grows by more than this fraction
+# Data Type: float
+DEFAULT_REGRESSION_THRESHOLD = 0.25
+
+# Default results file
+# Data Type: str
+DEFAULT_OUTPUT = "benchmark_results.json"
+
+
+# ============================================================================
+# SYNTHETIC GLOSSARIES
+# ============================================================================
+
+def synthetic_rows(size):
+    """
+    Yields synthetic concept rows for a glossary of the given size.
+
+    Rows are generated one at a time so a 1M-entry glossary never needs a
+    second full copy in memory while the snapshot is built.
+
+    Parameters:
+        size (int): Number of concepts
+
+    Example:
+        >>> next(synthetic_rows(1))
+        {'english': 'term 0', 'spanish': 'término 0', 'french': 'terme 0'}
+    """
+    for i in range(size):
+        yield {"english": f"term {i}", "spanish": f"término {i}", "french": f"terme {i}"}
+
+
+def install_synthetic_glossary(size):
+    """
+    Replaces the translation and medical glossaries with synthetic ones.
+
+    Parameters:
+        size (int): Number of concepts in the general glossary; the medical
+                    glossary gets the same number split over its categories
+
+    Returns:
+        int: Peak bytes allocated while building the glossaries
+    """
+    tracemalloc.start()
+    snapshot = lexicon_store.build_snapshot(
+        synthetic_rows(size), translation_module.SUPPORTED_LANGUAGES)
+    per_category = max(1, size // len(medical_terms.MEDICAL_TABLES))
+    stores = {
+        category: lexicon_store.build_snapshot(
+            synthetic_rows(per_category), medical_terms.MEDICAL_LANGUAGES)
+        for category in medical_terms.MEDICAL_TABLES
+    }
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    translation_module._LEXICON = lexicon_store.VersionedLexicon(snapshot)
+    translation_module._DETECTOR = None
+    medical_terms._CATEGORY_STORES = stores
+    return peak
+
+
+def make_queries(size, count, prefix):
+    """
+    Builds a list of lookup keys with MISS_RATIO misses mixed in.
+
+    Parameters:
+        size (int): Glossary size (hits are drawn from 0..size-1)
+        count (int): Number of queries
+        prefix (str): Surface-form prefix ("term", "término" or "terme")
+
+    Returns:
+        list: Query strings
+    """
+    # Data Type: int - spread hits over the whole glossary
+    step = max(1, size // 997)
+    miss_every = int(1 / MISS_RATIO)
+    queries = []
+    for i in range(count):
+        if i % miss_every == 0:
+            queries.append(f"unknown word {i}")
+        else:
+            queries.append(f"{prefix} {(i * step) % size}")
+    return queries
+
+
+# ============================================================================
+# MEASUREMENT
+# ============================================================================
+
+def measure(function, arguments):
+    """
+    Calls a function once per argument tuple and records each latency.
+
+    Parameters:
+        function (callable): The entry point to time
+        arguments (list): One tuple of positional arguments per call
+
+    Returns:
+        dict: p50_ns, p99_ns, mean_ns and ops_per_sec
+    """
+    # Warm-up: lets lazily built structures (e.g. the language detector)
+    # initialize before timing starts
+    for args in arguments[:10]:
+        function(*args)
+
+    perf_counter_ns = time.perf_counter_ns
+    latencies = []
+    append = latencies.append
+
+    started = perf_counter_ns()
+    for args in arguments:
+        before = perf_counter_ns()
+        function(*args)
+        append(perf_counter_ns() - before)
+    total = perf_counter_ns() - started
+
+    latencies.sort()
+    count = len(latencies)
+    return {
+        "p50_ns": latencies[count // 2],
+        "p99_ns": latencies[min(count - 1, (count * 99) // 100)],
+        "mean_ns": sum(latencies) // count,
+        "ops_per_sec": round(count / (total / 1e9), 1),
+    }
+
+
+def benchmark_cases(size, iterations):
+    """
+    Builds the (name, function, arguments) list for one glossary size.
+
+    Parameters:
+        size (int): Glossary size
+        iterations (int): Calls per entry point
+
+    Returns:
+        list: (entry point name, function, list of argument tuples)
+    """
+    english = make_queries(size, iterations, "term")
+    spanish = make_queries(size, iterations, "término")
+    french = make_queries(size, iterations, "terme")
+    medical_size = max(1, size // len(medical_terms.MEDICAL_TABLES))
+    medical = make_queries(medical_size, iterations, "term")
+
+    commands = [f"translate {word} to spanish" for word in english]
+    arguments = [command.split(maxsplit=1)[1] for command in commands]
+
+    return [
+        ("translate_to_spanish", translation_module.translate_to_spanish,
+         [(word,) for word in english]),
+        ("translate_to_french", translation_module.translate_to_french,
+         [(word,) for word in english]),
+        ("translate_from_spanish", translation_module.translate_from_spanish,
+         [(word,) for word in spanish]),
+        ("translate_from_french", translation_module.translate_from_french,
+         [(word,) for word in french]),
+        ("get_medical_translation", medical_terms.get_medical_translation,
+         [(word, "spanish") for word in medical]),
+        ("validate_input", utils.validate_input,
+         [(command,) for command in commands]),
+        ("parse_translation_request", utils.parse_translation_request,
+         [(argument,) for argument in arguments]),
+        ("process_translation_command", main.process_translation_command,
+         [(argument,) for argument in arguments]),
+    ]
+
+
+def run_benchmarks(sizes, iterations):
+    """
+    Runs every entry point against every glossary size.
+
+    Parameters:
+        sizes (list): Glossary sizes
+        iterations (int): Calls per entry point and size
+
+    Returns:
+        list: One result dict per (entry point, size)
+    """
+    saved = (translation_module._LEXICON, translation_module._DETECTOR,
+             medical_terms._CATEGORY_STORES)
+    results = []
+    try:
+        for size in sizes:
+            peak = install_synthetic_glossary(size)
+            print(f"Glossary size {size:>9,}  (build peak {peak / 1e6:8.1f} MB)")
+            for name, function, arguments in benchmark_cases(size, iterations):
+                stats = measure(function, arguments)
+                stats.update({"entry_point": name, "glossary_size": size,
+                              "iterations": iterations, "peak_memory_bytes": peak})
+                results.append(stats)
+                print(f"  {name:<28} p50 {stats['p50_ns']:>7,} ns  "
+                      f"p99 {stats['p99_ns']:>8,} ns  {stats['ops_per_sec']:>12,.0f} ops/s")
+    finally:
+        (translation_module._LEXICON, translation_module._DETECTOR,
+         medical_terms._CATEGORY_STORES) = saved
+    return results
+
+
+# ============================================================================
+# RESULTS FILES
+# ============================================================================
+
+def current_commit():
+    """Returns the current git commit hash, or "unknown" outside a checkout."""
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def save_results(results, path):
+    """
+    Writes benchmark results and run metadata to a JSON file.
+
+    Parameters:
+        results (list): Result dicts from run_benchmarks()
+        path (str): Output file path
+    """
+    document = {
+        "meta": {
+            "commit": current_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        },
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump(document, handle, indent=2)
+
+
+def compare_results(results, baseline_path, threshold=DEFAULT_REGRESSION_THRESHOLD):
+    """
+    Compares results with an earlier JSON file and prints the differences.
+
+    Parameters:
+        results (list): Result dicts from this run
+        baseline_path (str): JSON file written by an earlier run
+        threshold (float): Allowed p50 slowdown before a regression is flagged
+
+    Returns:
+        int: Number of regressions found
+    """
+    with open(baseline_path, "r", encoding="utf-8") as handle:
+        baseline = json.load(handle)
+    previous = {(item["entry_point"], item["glossary_size"]): item
+                for item in baseline["results"]}
+
+    print(f"\nComparison with {baseline_path} "
+          f"(commit {baseline['meta'].get('commit', 'unknown')[:10]}):")
+    regressions = 0
+    for item in results:
+        old = previous.get((item["entry_point"], item["glossary_size"]))
+        if old is None:
+            continue
+        change = (item["p50_ns"] - old["p50_ns"]) / max(1, old["p50_ns"])
+        flag = ""
+        if change > threshold:
+            flag = "  <-- REGRESSION"
+            regressions += 1
+        print(f"  {item['entry_point']:<28} {item['glossary_size']:>9,}  "
+              f"p50 {old['p50_ns']:>7,} -> {item['p50_ns']:>7,} ns ({change:+.0%}){flag}")
+    return regressions
+
+
+# ============================================================================
+# ENTRY POINT
+# ============================================================================
+
+def main_cli(argv=None):
+    """
+    Parses command-line options, runs the benchmarks and saves the results.
+
+    Parameters:
+        argv (list): Command-line arguments. Default is sys.argv[1:].
+
+    Returns:
+        int: Process exit code (1 if a comparison found regressions)
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the EMR chatbot entry points.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="glossary sizes to benchmark")
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS,
+                        help="timed calls per entry point and size")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT,
+                        help="JSON file to write results to")
+    parser.add_argument("--compare", metavar="BASELINE",
+                        help="JSON file from an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD,
+                        help="allowed p50 slowdown (fraction) before flagging")
+    options = parser.parse_args(argv)
+
+    results = run_benchmarks(options.sizes, options.iterations)
+    save_results(results, options.output)
+    print(f"\nResults saved to {options.output}")
+
+    if options.compare:
+        if compare_results(results, options.compare, options.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
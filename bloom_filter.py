@@ -0,0 +1,279 @@
+"""
+Bloom Filter Module for EMR Chatbot
+====================================
+This module provides a Bloom filter: a compact bit array that answers
+"is this phrase definitely NOT in the glossary?" without touching the
+glossary itself.
+It demonstrates:
+- Sizing from a capacity and a target false-positive rate
+  (bits = -n ln p / (ln 2)^2, hash count = bits / n * ln 2)
+- Double hashing: k bit positions derived from one hash value
+- Counters for checks, rejections and observed false positives
+- A stable hash (blake2b) for filters saved to disk, since Python's own
+  str hash changes from one process to the next
+
+A filter never says "no" for a phrase that was added, so a rejected phrase
+can be reported as untranslatable immediately. A phrase that passes may
+still be missing (a false positive) and is looked up normally.
+
+Author: EMR Chatbot Team
+Date: 2026-10-19
+"""
+
+import math
+
+
+# ============================================================================
+# MODULE-LEVEL CONSTANTS
+# ============================================================================
+
+# Target false-positive rate for new filters
+# Data Type: float
+DEFAULT_FALSE_POSITIVE_RATE = 0.01
+
+# Data Type: int
+_MASK_32 = 0xFFFFFFFF
+
+
+# ============================================================================
+# BLOOM FILTER
+# ============================================================================
+
+def stable_hash(item):
+    """
+    Returns a 64-bit hash of a string that is the same in every process.
+
+    Parameters:
+        item (str): Text to hash
+
+    Returns:
+        int: Hash value
+    """
+    import hashlib
+
+    digest = hashlib.blake2b(item.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+class BloomFilter:
+    """
+    Bit-array set membership test with no false negatives.
+
+    Attributes:
+        capacity (int): Items the filter was sized for
+        false_positive_rate (float): Target rate at full capacity
+        bit_count (int): Size of the bit array
+        hash_count (int): Bits set per item
+        items (int): Items added
+        checks (int): Membership tests performed
+        rejected (int): Tests answered "definitely absent"
+        false_positives (int): Tests that passed but the item was missing
+                               (reported by the caller via
+                               record_false_positive())
+    """
+
+    def __init__(self, capacity, false_positive_rate=DEFAULT_FALSE_POSITIVE_RATE,
+                 hash_function=hash):
+        """
+        Parameters:
+            capacity (int): Number of items the filter is sized for
+            false_positive_rate (float): Target rate at full capacity
+            hash_function (callable): Item -> int. Default is the built-in
+                                      hash(); use stable_hash for filters
+                                      written to disk.
+        """
+        if not 0 < false_positive_rate < 1:
+            raise ValueError("false_positive_rate must be between 0 and 1")
+        capacity = max(1, capacity)
+        self.capacity = capacity
+        self.false_positive_rate = false_positive_rate
+        bits = math.ceil(-capacity * math.log(false_positive_rate) / (math.log(2) ** 2))
+        self.bit_count = max(8, bits)
+        self.hash_count = max(1, round(self.bit_count / capacity * math.log(2)))
+        self._hash = hash_function
+        # Data Type: bytearray - 8 bits per byte
+        self._bits = bytearray((self.bit_count + 7) // 8)
+        self.items = 0
+        self.checks = 0
+        self.rejected = 0
+        self.false_positives = 0
+
+    def add(self, item):
+        """
+        Adds an item (any hashable value, usually a phrase).
+
+        Parameters:
+            item (str): Item to add
+        """
+        value = self._hash(item)
+        first = value & _MASK_32
+        step = ((value >> 32) & _MASK_32) | 1
+        bits = self._bits
+        size = self.bit_count
+        for i in range(self.hash_count):
+            position = (first + i * step) % size
+            bits[position >> 3] |= 1 << (position & 7)
+        self.items += 1
+
+    def update(self, items):
+        """Adds every item of an iterable."""
+        for item in items:
+            self.add(item)
+
+    def __contains__(self, item):
+        """
+        Tests membership.
+
+        Returns:
+            bool: False if the item was definitely never added; True if it
+                  probably was
+        """
+        self.checks += 1
+        value = self._hash(item)
+        first = value & _MASK_32
+        step = ((value >> 32) & _MASK_32) | 1
+        bits = self._bits
+        size = self.bit_count
+        for i in range(self.hash_count):
+            position = (first + i * step) % size
+            if not bits[position >> 3] & (1 << (position & 7)):
+                self.rejected += 1
+                return False
+        return True
+
+    def to_bytes(self):
+        """Returns the bit array (to save a stable-hash filter to disk)."""
+        return bytes(self._bits)
+
+    @classmethod
+    def from_bytes(cls, data, capacity, false_positive_rate, items, hash_function=stable_hash):
+        """
+        Rebuilds a filter saved with to_bytes().
+
+        Parameters:
+            data (bytes): Saved bit array
+            capacity (int), false_positive_rate (float): Values the filter
+                was created with (they determine its size)
+            items (int): Number of items it holds
+            hash_function (callable): Hash it was built with. Default is
+                                      stable_hash.
+
+        Returns:
+            BloomFilter: The restored filter
+        """
+        bloom = cls(capacity, false_positive_rate, hash_function)
+        if len(data) != len(bloom._bits):
+            raise ValueError("Saved filter does not match its capacity and rate")
+        bloom._bits = bytearray(data)
+        bloom.items = items
+        return bloom
+
+    def record_false_positive(self):
+        """Counts a passed test whose item turned out to be missing."""
+        self.false_positives += 1
+
+    def expected_false_positive_rate(self):
+        """
+        Returns the theoretical false-positive rate at the current fill.
+
+        Returns:
+            float: (1 - e^(-k n / m))^k
+        """
+        k = self.hash_count
+        return (1 - math.exp(-k * self.items / self.bit_count)) ** k
+
+    def stats(self):
+        """
+        Returns the filter's size and counters.
+
+        Returns:
+            dict: JSON-friendly statistics, including the observed
+                  false-positive rate among absent items
+        """
+        absent = self.rejected + self.false_positives
+        return {
+            "items": self.items,
+            "capacity": self.capacity,
+            "bits": self.bit_count,
+            "bytes": len(self._bits),
+            "hashes": self.hash_count,
+            "target_fp_rate": self.false_positive_rate,
+            "expected_fp_rate": round(self.expected_false_positive_rate(), 6),
+            "checks": self.checks,
+            "rejected": self.rejected,
+            "false_positives": self.false_positives,
+            "observed_fp_rate": round(self.false_positives / absent, 6) if absent else None,
+        }
+
+
+def merge_stats(stats_list):
+    """
+    Adds up the counters of several filters (e.g. one per category).
+
+    Parameters:
+        stats_list (list): Dictionaries from BloomFilter.stats()
+
+    Returns:
+        dict: Summed counters with the observed false-positive rate
+    """
+    total = {key: 0 for key in ("items", "bytes", "checks", "rejected", "false_positives")}
+    for stats in stats_list:
+        for key in total:
+            total[key] += stats[key]
+    absent = total["rejected"] + total["false_positives"]
+    total["observed_fp_rate"] = round(total["false_positives"] / absent, 6) if absent else None
+    return total
+
+
+def format_report(sections):
+    """
+    Formats filter statistics as a text table for the `stats filters` command.
+
+    Parameters:
+        sections (list): (name, {language: stats}) pairs, e.g.
+                         [("general", translation_module.get_filter_stats())]
+
+    Returns:
+        str: Multi-line report
+    """
+    lines = [f"{'filter':<20} {'items':>7} {'KB':>7} {'checks':>8} "
+             f"{'rejected':>9} {'false +':>8} {'FP rate':>8}"]
+    for name, by_language in sections:
+        for language, stats in by_language.items():
+            rate = stats["observed_fp_rate"]
+            rate_text = f"{rate * 100:7.2f}%" if rate is not None else "       -"
+            lines.append(
+                f"{name + '/' + language:<20} {stats['items']:>7} "
+                f"{stats['bytes'] / 1024:>7.1f} {stats['checks']:>8} "
+                f"{stats['rejected']:>9} {stats['false_positives']:>8} {rate_text:>8}"
+            )
+    return "\n".join(lines)
+
+
+# ============================================================================
+# MODULE TEST (runs only when module is executed directly)
+# ============================================================================
+if __name__ == "__main__":
+    import time
+
+    print("=== Bloom Filter Module Test ===\n")
+
+    for rate in (0.1, 0.01, 0.001):
+        bloom = BloomFilter(100000, rate)
+        bloom.update(f"term {number}" for number in range(100000))
+        assert all(f"term {number}" in bloom for number in range(0, 100000, 7))
+        passed = 0
+        for number in range(100000):
+            if f"missing {number}" in bloom:
+                passed += 1
+                bloom.record_false_positive()
+        stats = bloom.stats()
+        print(f"target {rate:<6} -> {stats['bytes']:>7} bytes, {stats['hashes']} hashes, "
+              f"observed {stats['observed_fp_rate']:.4f}, expected {stats['expected_fp_rate']:.4f}")
+
+    probes = [f"missing {number}" for number in range(100000)]
+    start = time.perf_counter()
+    for probe in probes:
+        probe in bloom
+    elapsed = time.perf_counter() - start
+    print(f"\nAverage check time: {elapsed / len(probes) * 1e9:.0f} ns")
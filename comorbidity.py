@@ -0,0 +1,307 @@
+"""
+Comorbidity Module for EMR Chatbot
+===================================
+This module answers "which diagnoses co-occur with hypertension?" from the
+diagnoses table (PatientID, AdmissionID, PrimaryDiagnosisCode).
+It demonstrates:
+- Integer-coded ICD codes: each code string is stored once and numbered
+- A sparse patient x diagnosis incidence matrix in CSR form (sorted
+  patient IDs, an offsets array and one array of code numbers), so a
+  patient with 3 diagnoses costs 3 entries, not one per known code
+- Co-occurrence counts as the sparse product A^T x A: every patient row
+  adds 1 to each pair of its codes, and only pairs that occur are stored
+  (one dict per code)
+- Incremental updates: new diagnosis rows go to a small delta next to the
+  CSR arrays and update the counts directly; the delta is folded into new
+  CSR arrays once it grows (the same base + delta idea as lexicon_store)
+- Top-k lookups with heapq.nlargest()
+
+Counts are per patient: a code diagnosed at several admissions of the
+same patient counts once.
+
+Author: EMR Chatbot Team
+Date: 2026-10-19
+"""
+
+import bisect
+import heapq
+from array import array
+
+
+# ============================================================================
+# MODULE-LEVEL CONSTANTS AND VARIABLES
+# ============================================================================
+
+# Fold the delta into the CSR arrays once it holds this share of entries
+# Data Type: float
+COMPACT_RATIO = 0.1
+
+# Default number of co-occurring diagnoses listed
+# Data Type: int
+DEFAULT_TOP = 5
+
+# Matrix built from the diagnoses table on first use
+# Data Type: ComorbidityMatrix or None
+_MATRIX = None
+
+
+# ============================================================================
+# COMORBIDITY MATRIX
+# ============================================================================
+
+class ComorbidityMatrix:
+    """
+    Patient x diagnosis incidence (CSR + delta) and diagnosis co-occurrence.
+
+    Attributes:
+        codes (list): ICD code by code number
+        descriptions (dict): ICD code -> description
+        patients (list): Patients in the CSR arrays, sorted
+        offsets (array): Codes of patients[p] are code_ids[offsets[p]:offsets[p + 1]]
+        code_ids (array): Sorted code numbers of each patient, concatenated
+        delta (dict): PatientID -> set of code numbers added since the last
+                      compaction (patients new or already in the CSR)
+        cooccurrence (list): Per code number, {other code number: patients
+                             with both}; the entry for the code itself is
+                             its own patient count
+    """
+
+    def __init__(self, patient_ids=(), diagnosis_codes=(), descriptions=()):
+        """
+        Parameters:
+            patient_ids (list): PatientID column
+            diagnosis_codes (list): PrimaryDiagnosisCode column
+            descriptions (list): PrimaryDiagnosisDescription column
+                                 (optional, same order)
+        """
+        self.codes = []
+        self._number = {}
+        self.descriptions = {}
+        self.cooccurrence = []
+        self._delta_entries = 0
+        for code, description in zip(diagnosis_codes, descriptions):
+            self.descriptions.setdefault(code, description)
+
+        # Incidence: each patient's distinct code numbers
+        rows = {}
+        for patient, code in zip(patient_ids, diagnosis_codes):
+            rows.setdefault(patient, set()).add(self._code_number(code))
+        self.delta = {}
+        self._set_csr(rows)
+
+        # A^T x A, one patient row at a time
+        for position in range(len(self.patients)):
+            row = self.code_ids[self.offsets[position]:self.offsets[position + 1]]
+            for first in row:
+                counts = self.cooccurrence[first]
+                for second in row:
+                    counts[second] = counts.get(second, 0) + 1
+
+    def _code_number(self, code):
+        """Returns a code's number, numbering new codes."""
+        number = self._number.get(code)
+        if number is None:
+            number = len(self.codes)
+            self._number[code] = number
+            self.codes.append(code)
+            self.cooccurrence.append({})
+        return number
+
+    def _set_csr(self, rows):
+        """Stores {patient: code numbers} as the CSR arrays."""
+        self.patients = sorted(rows)
+        self.offsets = array("L", [0])
+        self.code_ids = array("L")
+        for patient in self.patients:
+            self.code_ids.extend(sorted(rows[patient]))
+            self.offsets.append(len(self.code_ids))
+
+    def patient_codes(self, patient):
+        """
+        Returns the code numbers of one patient's diagnoses.
+
+        Parameters:
+            patient (str): e.g. "P000001"
+
+        Returns:
+            set: Code numbers (empty if the patient has none)
+        """
+        position = bisect.bisect_left(self.patients, patient)
+        codes = set()
+        if position < len(self.patients) and self.patients[position] == patient:
+            codes.update(self.code_ids[self.offsets[position]:self.offsets[position + 1]])
+        codes.update(self.delta.get(patient, ()))
+        return codes
+
+    def add_diagnosis(self, patient, code, description=None):
+        """
+        Records one new diagnosis row and updates the co-occurrence counts.
+
+        Parameters:
+            patient (str): PatientID
+            code (str): ICD code
+            description (str): Description of a code not seen before
+
+        Returns:
+            bool: True if the patient did not have this code yet
+        """
+        if description is not None:
+            self.descriptions.setdefault(code, description)
+        number = self._code_number(code)
+        existing = self.patient_codes(patient)
+        if number in existing:
+            return False
+        # New entry in row `patient`: one new pair with each existing code
+        counts = self.cooccurrence[number]
+        for other in existing:
+            counts[other] = counts.get(other, 0) + 1
+            other_counts = self.cooccurrence[other]
+            other_counts[number] = other_counts.get(number, 0) + 1
+        counts[number] = counts.get(number, 0) + 1
+        self.delta.setdefault(patient, set()).add(number)
+        self._delta_entries += 1
+        if self._delta_entries > COMPACT_RATIO * max(len(self.code_ids), 1000):
+            self.compact()
+        return True
+
+    def compact(self):
+        """Folds the delta into new CSR arrays."""
+        if not self.delta:
+            return
+        rows = {patient: self.patient_codes(patient)
+                for patient in set(self.patients) | set(self.delta)}
+        self.delta = {}
+        self._delta_entries = 0
+        self._set_csr(rows)
+
+    def patient_count(self, code):
+        """Returns how many patients have a code (0 if unknown)."""
+        number = self._number.get(code)
+        return self.cooccurrence[number].get(number, 0) if number is not None else 0
+
+    def top_cooccurring(self, code, count=DEFAULT_TOP):
+        """
+        Returns the diagnoses most often found in patients with a code.
+
+        Parameters:
+            code (str): ICD code, e.g. "I10"
+            count (int): Number of diagnoses returned
+
+        Returns:
+            list: (code, patients with both, share of the code's patients
+                  in percent), most frequent first; empty if the code is
+                  unknown
+
+        Example:
+            >>> get_matrix().top_cooccurring("I10", 2)
+            [('J18.9', 17, 19.3), ('F41.9', 13, 14.8)]
+        """
+        number = self._number.get(code)
+        if number is None:
+            return []
+        counts = self.cooccurrence[number]
+        total = counts.get(number, 0)
+        top = heapq.nlargest(count, ((together, other) for other, together in counts.items()
+                                     if other != number))
+        return [(self.codes[other], together, round(together / total * 100, 1))
+                for together, other in top]
+
+    def find_codes(self, text):
+        """
+        Finds ICD codes by code or by words of their description.
+
+        Parameters:
+            text (str): e.g. "I10" or "hypertension"
+
+        Returns:
+            list: Matching codes (the code itself for an exact code match)
+        """
+        wanted = text.strip()
+        for code in self.codes:
+            if code.lower() == wanted.lower():
+                return [code]
+        words = wanted.lower().split()
+        return [code for code in self.codes
+                if words and all(word in self.descriptions.get(code, "").lower()
+                                 for word in words)]
+
+    def nonzero(self):
+        """Returns the stored entries: (incidence, co-occurrence)."""
+        incidence = len(self.code_ids) + sum(len(codes) for codes in self.delta.values())
+        return incidence, sum(len(counts) for counts in self.cooccurrence)
+
+
+def get_matrix():
+    """
+    Returns the comorbidity matrix of the EMR diagnoses, building it on
+    first use.
+
+    Returns:
+        ComorbidityMatrix: Matrix of the diagnoses table
+    """
+    global _MATRIX
+
+    if _MATRIX is None:
+        import emr_data
+        diagnoses = emr_data.get_table("diagnoses")
+        _MATRIX = ComorbidityMatrix(diagnoses.column("PatientID"),
+                                    diagnoses.column("PrimaryDiagnosisCode"),
+                                    diagnoses.column("PrimaryDiagnosisDescription"))
+    return _MATRIX
+
+
+def format_top(matrix, code, count=DEFAULT_TOP):
+    """
+    Formats top_cooccurring() for the `comorbid` command.
+
+    Parameters:
+        matrix (ComorbidityMatrix): Matrix
+        code (str): ICD code
+        count (int): Number of diagnoses listed
+
+    Returns:
+        str: Multi-line report
+    """
+    lines = [f"{code} {matrix.descriptions.get(code, '')} - "
+             f"{matrix.patient_count(code)} patients; also diagnosed with:"]
+    for other, together, share in matrix.top_cooccurring(code, count):
+        lines.append(f"  {other:<8} {together:>5} patients ({share:>5.1f}%)  "
+                     f"{matrix.descriptions.get(other, '')}")
+    if len(lines) == 1:
+        lines.append("  (no other diagnoses)")
+    return "\n".join(lines)
+
+
+# ============================================================================
+# MODULE TEST (runs only when module is executed directly)
+# ============================================================================
+if __name__ == "__main__":
+    import random
+    import time
+
+    print("=== Comorbidity Module Test ===\n")
+
+    matrix = get_matrix()
+    print(format_top(matrix, matrix.find_codes("hypertension")[0], 3))
+
+    # Millions of admissions: 2M diagnosis rows, 500k patients, 5,000 codes
+    size = 2000000
+    generator = random.Random(3)
+    weights = [1 / (rank + 1) for rank in range(5000)]
+    codes = [f"C{number:04d}" for number in
+             generator.choices(range(5000), weights=weights, k=size)]
+    patients = [f"P{generator.randrange(500000):07d}" for _ in range(size)]
+    start = time.perf_counter()
+    big = ComorbidityMatrix(patients, codes)
+    built = time.perf_counter() - start
+    incidence, pairs = big.nonzero()
+    print(f"\n{size:,} rows: built in {built:.2f} s, {incidence:,} incidence entries, "
+          f"{pairs:,} co-occurring pairs (dense: {len(big.codes) ** 2:,})")
+
+    start = time.perf_counter()
+    for number in range(100000):
+        big.add_diagnosis(f"P{generator.randrange(600000):07d}", codes[number])
+    print(f"100,000 incremental rows in {time.perf_counter() - start:.2f} s")
+    start = time.perf_counter()
+    top = big.top_cooccurring("C0000", 5)
+    print(f"Top 5 for C0000 in {(time.perf_counter() - start) * 1000:.1f} ms: {top}")
@@ -0,0 +1,349 @@
+"""
+EMR Analytics Module for EMR Chatbot
+=====================================
+This module answers the most common questions about admissions: how long
+patients stay, how long they are out of hospital between stays, and how
+many come back within 30 days of a discharge.
+It demonstrates:
+- CSR (compressed sparse row) layout: admissions sorted ONCE by patient and
+  start time into flat arrays, plus one offsets array; a patient's
+  admissions are the slice offsets[p]:offsets[p + 1]
+- Vectorized differences: length of stay is ends - starts and the gap to
+  the next admission is starts[1:] - ends[:-1], each computed with map()
+  over whole arrays instead of comparing admissions pairwise
+- Patient boundaries handled by position: the gap after each patient's
+  last admission is simply blanked (NaN), one write per patient
+
+Times are kept as seconds since 1970 in array('d') columns; results are in
+days. Admissions that overlap the previous stay of the same patient
+(negative gap) are counted separately and never as readmissions.
+
+Author: EMR Chatbot Team
+Date: 2026-10-19
+"""
+
+import bisect
+import itertools
+import operator
+from array import array
+from datetime import datetime, timedelta
+
+
+# ============================================================================
+# MODULE-LEVEL CONSTANTS AND VARIABLES
+# ============================================================================
+
+# Default readmission window
+# Data Type: int
+READMISSION_DAYS = 30
+
+# Seconds in a day
+# Data Type: int
+SECONDS_PER_DAY = 86400
+
+# Reference point of the stored times (naive, like the EMR timestamps)
+# Data Type: datetime
+EPOCH = datetime(1970, 1, 1)
+
+# History built from the admissions table on first use
+# Data Type: AdmissionHistory or None
+_HISTORY = None
+
+
+# ============================================================================
+# ADMISSION HISTORY (CSR ARRAYS)
+# ============================================================================
+
+def to_seconds(timestamps):
+    """
+    Converts ISO timestamps into seconds since EPOCH.
+
+    Parameters:
+        timestamps (list): Strings such as "2022-09-03 10:08:23"
+
+    Returns:
+        array: array('d') of seconds
+    """
+    deltas = map(operator.sub, map(datetime.fromisoformat, timestamps),
+                 itertools.repeat(EPOCH))
+    return array("d", map(timedelta.total_seconds, deltas))
+
+
+def format_time(seconds):
+    """Formats seconds since EPOCH as "YYYY-MM-DD HH:MM"."""
+    return (EPOCH + timedelta(seconds=seconds)).strftime("%Y-%m-%d %H:%M")
+
+
+class AdmissionHistory:
+    """
+    Every patient's admissions in start-time order, as flat arrays.
+
+    Attributes:
+        patients (list): PatientIDs in sorted order
+        offsets (array): Admissions of patients[p] are rows
+                         offsets[p]:offsets[p + 1]
+        admission_ids (array): AdmissionID per row
+        starts (array): Admission start per row (seconds)
+        ends (array): Admission end per row (seconds)
+    """
+
+    def __init__(self, patient_ids, admission_ids, start_times, end_times):
+        """
+        Parameters:
+            patient_ids (list): PatientID column
+            admission_ids (list): AdmissionID column
+            start_times (list): AdmissionStartDate column (ISO strings)
+            end_times (list): AdmissionEndDate column (ISO strings)
+        """
+        starts = to_seconds(start_times)
+        ends = to_seconds(end_times)
+        # The one sort: by patient, then by start time
+        order = sorted(range(len(patient_ids)),
+                       key=list(zip(patient_ids, starts)).__getitem__)
+
+        self.patients = []
+        self.offsets = array("L", [0])
+        previous = None
+        for row, position in enumerate(order):
+            patient = patient_ids[position]
+            if patient != previous:
+                if previous is not None:
+                    self.offsets.append(row)
+                self.patients.append(patient)
+                previous = patient
+        if order:
+            self.offsets.append(len(order))
+        self.admission_ids = array("L", map(admission_ids.__getitem__, order))
+        self.starts = array("d", map(starts.__getitem__, order))
+        self.ends = array("d", map(ends.__getitem__, order))
+
+    def __len__(self):
+        return len(self.admission_ids)
+
+    def patient_rows(self, patient):
+        """
+        Returns the rows of one patient's admissions.
+
+        Parameters:
+            patient (str): e.g. "P000001"
+
+        Returns:
+            range: Row positions in start-time order (empty if unknown)
+        """
+        position = bisect.bisect_left(self.patients, patient)
+        if position == len(self.patients) or self.patients[position] != patient:
+            return range(0)
+        return range(self.offsets[position], self.offsets[position + 1])
+
+    def length_of_stay(self):
+        """
+        Returns every admission's length of stay.
+
+        Returns:
+            array: array('d') of days, one per row
+        """
+        return array("d", map(operator.mul,
+                              map(operator.sub, self.ends, self.starts),
+                              itertools.repeat(1 / SECONDS_PER_DAY)))
+
+    def gaps(self):
+        """
+        Returns the time from each discharge to the same patient's next
+        admission.
+
+        Returns:
+            array: array('d') of days, one per row; NaN after a patient's
+                   last admission, negative when the next stay overlaps
+        """
+        gaps = array("d", map(operator.mul,
+                              map(operator.sub, self.starts[1:], self.ends[:-1]),
+                              itertools.repeat(1 / SECONDS_PER_DAY)))
+        gaps.append(float("nan"))
+        # The difference across a patient boundary is meaningless
+        for end in self.offsets[1:]:
+            gaps[end - 1] = float("nan")
+        return gaps
+
+    def readmissions(self, window_days=READMISSION_DAYS, gaps=None):
+        """
+        Flags discharges followed by a readmission within a window.
+
+        Parameters:
+            window_days (float): Readmission window. Default is 30 days.
+            gaps (array): Result of gaps(), if already computed
+
+        Returns:
+            array: array('B'), 1 where the patient's next admission starts
+                   0 to window_days days after this discharge
+        """
+        if gaps is None:
+            gaps = self.gaps()
+        return array("B", map(operator.and_,
+                              map(operator.ge, gaps, itertools.repeat(0.0)),
+                              map(operator.le, gaps, itertools.repeat(window_days))))
+
+
+def get_history():
+    """
+    Returns the admission history, building it on first use.
+
+    Returns:
+        AdmissionHistory: History of the EMR admissions table
+    """
+    global _HISTORY
+
+    if _HISTORY is None:
+        import emr_data
+        admissions = emr_data.get_table("admissions")
+        _HISTORY = AdmissionHistory(admissions.column("PatientID"),
+                                    admissions.column("AdmissionID"),
+                                    admissions.column("AdmissionStartDate"),
+                                    admissions.column("AdmissionEndDate"))
+    return _HISTORY
+
+
+# ============================================================================
+# REPORTS
+# ============================================================================
+
+def _percentile(ordered, fraction):
+    """Returns a percentile of an already sorted list (nearest rank)."""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def summary(history, window_days=READMISSION_DAYS):
+    """
+    Computes length-of-stay and readmission statistics.
+
+    Parameters:
+        history (AdmissionHistory): Admissions
+        window_days (float): Readmission window. Default is 30 days.
+
+    Returns:
+        dict: {"patients", "admissions", "los_mean", "los_median",
+               "los_p90", "los_max", "gap_median", "readmissions",
+               "readmission_rate", "overlaps", "window_days",
+               "top_patients": [(patient, readmissions), ...]}
+    """
+    stays = sorted(history.length_of_stay())
+    gaps = history.gaps()
+    flags = history.readmissions(window_days, gaps)
+    measured = sorted(gap for gap in gaps if gap >= 0)
+    overlaps = sum(map(operator.lt, gaps, itertools.repeat(0.0)))
+
+    # Readmissions per patient: sum of the flags in each CSR slice
+    offsets = history.offsets
+    per_patient = [(sum(flags[offsets[p]:offsets[p + 1]]), patient)
+                   for p, patient in enumerate(history.patients)]
+    top = sorted((item for item in per_patient if item[0]), key=lambda item: -item[0])[:5]
+
+    readmitted = sum(flags)
+    return {
+        "patients": len(history.patients),
+        "admissions": len(history),
+        "los_mean": sum(stays) / len(stays) if stays else 0.0,
+        "los_median": _percentile(stays, 0.5),
+        "los_p90": _percentile(stays, 0.9),
+        "los_max": stays[-1] if stays else 0.0,
+        "gap_median": _percentile(measured, 0.5),
+        "readmissions": readmitted,
+        "readmission_rate": readmitted / len(history) * 100 if len(history) else 0.0,
+        "overlaps": overlaps,
+        "window_days": window_days,
+        "top_patients": [(patient, count) for count, patient in top],
+    }
+
+
+def format_summary(stats):
+    """
+    Formats summary() for the `los` and `readmissions` commands.
+
+    Parameters:
+        stats (dict): summary() result
+
+    Returns:
+        str: Multi-line report
+    """
+    lines = [
+        f"Admissions: {stats['admissions']:,} for {stats['patients']:,} patients",
+        f"Length of stay (days): mean {stats['los_mean']:.1f}, median "
+        f"{stats['los_median']:.1f}, 90th percentile {stats['los_p90']:.1f}, "
+        f"longest {stats['los_max']:.1f}",
+        f"Median time to next admission: {stats['gap_median']:.0f} days",
+        f"{stats['window_days']:g}-day readmissions: {stats['readmissions']:,} "
+        f"({stats['readmission_rate']:.1f}% of discharges)",
+    ]
+    if stats["overlaps"]:
+        lines.append(f"Overlapping stays (not counted): {stats['overlaps']:,}")
+    if stats["top_patients"]:
+        lines.append("Most readmissions: " + ", ".join(
+            f"{patient} ({count})" for patient, count in stats["top_patients"]))
+    return "\n".join(lines)
+
+
+def format_patient(history, patient, window_days=READMISSION_DAYS):
+    """
+    Lists one patient's admissions with stay, gap and readmission flag.
+
+    Parameters:
+        history (AdmissionHistory): Admissions
+        patient (str): e.g. "P000001"
+        window_days (float): Readmission window. Default is 30 days.
+
+    Returns:
+        str or None: Multi-line report, or None if the patient has no
+                     admissions
+    """
+    rows = history.patient_rows(patient)
+    if not rows:
+        return None
+    starts, ends = history.starts, history.ends
+    lines = [f"{patient}: {len(rows)} admission(s)"]
+    for row in rows:
+        stay = (ends[row] - starts[row]) / SECONDS_PER_DAY
+        if row + 1 == rows.stop:
+            next_text = "last admission"
+        else:
+            gap = (starts[row + 1] - ends[row]) / SECONDS_PER_DAY
+            if gap < 0:
+                next_text = "next stay overlaps"
+            else:
+                readmitted = " (readmission)" if gap <= window_days else ""
+                next_text = f"next in {gap:.0f} days{readmitted}"
+        lines.append(f"  {history.admission_ids[row]}  {format_time(starts[row])} -> "
+                     f"{format_time(ends[row])}  {stay:5.1f} days  {next_text}")
+    return "\n".join(lines)
+
+
+# ============================================================================
+# MODULE TEST (runs only when module is executed directly)
+# ============================================================================
+if __name__ == "__main__":
+    import random
+    import time
+
+    print("=== EMR Analytics Module Test ===\n")
+
+    history = get_history()
+    print(format_summary(summary(history)))
+    print()
+    print(format_patient(history, "P000001"))
+
+    # A synthetic table of one million admissions, built and analyzed
+    size = 1000000
+    generator = random.Random(7)
+    patients = [f"P{generator.randrange(200000):06d}" for _ in range(size)]
+    begin = [generator.randrange(1262304000, 1672531200) for _ in range(size)]
+    starts = [(EPOCH + timedelta(seconds=second)).isoformat(" ") for second in begin]
+    ends = [(EPOCH + timedelta(seconds=second + generator.randrange(3600, 20 * SECONDS_PER_DAY))
+             ).isoformat(" ") for second in begin]
+    start = time.perf_counter()
+    big = AdmissionHistory(patients, list(range(size)), starts, ends)
+    built = time.perf_counter()
+    stats = summary(big)
+    finished = time.perf_counter()
+    print(f"\n{size:,} admissions: CSR arrays built in {built - start:.2f} s, "
+          f"statistics in {finished - built:.2f} s "
+          f"({stats['readmissions']:,} readmissions)")
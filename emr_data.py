@@ -0,0 +1,221 @@
+"""
+EMR Data Module for EMR Chatbot
+================================
+This module loads the artificial EMR tables (artificial_emr/*.csv).
+It demonstrates:
+- Column-oriented tables: one list per column instead of one dict per row
+- Type conversion of numeric columns at load time
+- Derived columns computed once at load (canonical lab IDs, values in
+  canonical units)
+- Lazy loading: each table is read from disk the first time it is used
+
+Tables (module-level, built on first use):
+    PATIENTS    - PatientCorePopulatedTable.csv
+    ADMISSIONS  - AdmissionsCorePopulatedTable.csv
+    DIAGNOSES   - AdmissionsDiagnosesCorePopulatedTable.csv
+    LABS        - LabsCorePopulatedTable.csv
+
+Author: EMR Chatbot Team
+Date: 2026-10-19
+"""
+
+import csv
+import os
+
+import lazy_loading
+
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+# Directory holding the CSV files
+# Can be overridden with the EMR_DATA_DIR environment variable
+# Data Type: str
+EMR_DIRECTORY = os.environ.get(
+    "EMR_DATA_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "artificial_emr"),
+)
+
+# Data Type: dict - table name -> CSV file name
+TABLE_FILES = {
+    "patients": "PatientCorePopulatedTable.csv",
+    "admissions": "AdmissionsCorePopulatedTable.csv",
+    "diagnoses": "AdmissionsDiagnosesCorePopulatedTable.csv",
+    "labs": "LabsCorePopulatedTable.csv",
+}
+
+# Columns converted from text when a table is loaded (all others stay str;
+# dates stay as ISO strings, which sort chronologically)
+# Data Type: dict - column name -> conversion function
+COLUMN_TYPES = {
+    "AdmissionID": int,
+    "LabValue": float,
+    "PatientPopulationPercentageBelowPoverty": float,
+}
+
+
+def _lab_ids(data):
+    """LabName -> canonical lab IDs (see lab_catalog)."""
+    import lab_catalog
+    return (lab_catalog.resolve_column(data["LabName"])[0],)
+
+
+def _canonical_lab_values(data):
+    """LabValue in each lab's canonical unit, plus a flag per row (see lab_units)."""
+    import lab_units
+    converted, flags, _ = lab_units.convert_column(data["LabID"], data["LabUnits"],
+                                                   data["LabValue"])
+    return converted, flags
+
+
+# Columns computed once when a table is loaded, appended after the file's
+# own columns (in this order, so a function can use earlier ones)
+# Data Type: dict - table name -> list of (column names, function(data)
+#            returning one value per name)
+DERIVED_COLUMNS = {
+    "labs": [
+        (("LabID",), _lab_ids),
+        (("LabValueCanonical", "LabUnitFlag"), _canonical_lab_values),
+    ],
+}
+
+
+# ============================================================================
+# TABLE
+# ============================================================================
+
+class Table:
+    """
+    A column-oriented table.
+
+    Attributes:
+        name (str): Table name (e.g. "labs")
+        columns (tuple): Column names in file order
+        data (dict): Column name -> list of values
+    """
+
+    def __init__(self, name, columns, data):
+        self.name = name
+        self.columns = tuple(columns)
+        self.data = data
+
+    def column(self, name):
+        """
+        Returns one column as a list.
+
+        Parameters:
+            name (str): Column name
+
+        Returns:
+            list: The column values (shared, do not modify)
+        """
+        return self.data[name]
+
+    def rows(self, *names):
+        """
+        Iterates over rows as tuples.
+
+        Parameters:
+            *names (str): Columns to include. Default is every column.
+
+        Returns:
+            iterator: Tuples of values, one per row
+        """
+        names = names or self.columns
+        return zip(*(self.data[name] for name in names))
+
+    def __len__(self):
+        return len(self.data[self.columns[0]]) if self.columns else 0
+
+
+def load_table(name, directory=None):
+    """
+    Reads one EMR table from its CSV file.
+
+    Parameters:
+        name (str): Table name, one of TABLE_FILES
+        directory (str): Directory holding the CSV files.
+                         Default is EMR_DIRECTORY.
+
+    Returns:
+        Table: The loaded table
+
+    Example:
+        >>> len(load_table("patients"))
+        500
+    """
+    path = os.path.join(directory or EMR_DIRECTORY, TABLE_FILES[name])
+    with open(path, "r", encoding="utf-8", newline="") as handle:
+        reader = csv.reader(handle)
+        columns = next(reader)
+        # Data Type: list of list - one list per column
+        values = [[] for _ in columns]
+        appends = [column_values.append for column_values in values]
+        for row in reader:
+            if not row:
+                continue
+            for append, value in zip(appends, row):
+                append(value)
+
+    data = {}
+    for column, column_values in zip(columns, values):
+        convert = COLUMN_TYPES.get(column)
+        if convert is not None:
+            column_values = [convert(value) if value else None for value in column_values]
+        data[column] = column_values
+    for names, derive in DERIVED_COLUMNS.get(name, ()):
+        for column, column_values in zip(names, derive(data)):
+            data[column] = column_values
+            columns.append(column)
+    return Table(name, columns, data)
+
+
+# ============================================================================
+# LAZY MODULE-LEVEL TABLES
+# ============================================================================
+
+PATIENTS = lazy_loading.LazyGlobal(__name__, "PATIENTS", lambda: load_table("patients"))
+ADMISSIONS = lazy_loading.LazyGlobal(__name__, "ADMISSIONS", lambda: load_table("admissions"))
+DIAGNOSES = lazy_loading.LazyGlobal(__name__, "DIAGNOSES", lambda: load_table("diagnoses"))
+LABS = lazy_loading.LazyGlobal(__name__, "LABS", lambda: load_table("labs"))
+
+# Data Type: dict - table name -> module-level variable name
+_TABLE_VARIABLES = {
+    "patients": "PATIENTS",
+    "admissions": "ADMISSIONS",
+    "diagnoses": "DIAGNOSES",
+    "labs": "LABS",
+}
+
+
+def get_table(name):
+    """
+    Returns a loaded table by name, reading it on first use.
+
+    Parameters:
+        name (str): Table name, one of TABLE_FILES
+
+    Returns:
+        Table: The table
+    """
+    value = globals()[_TABLE_VARIABLES[name]]
+    if isinstance(value, lazy_loading.LazyGlobal):
+        value = value.materialize()
+    return value
+
+
+# ============================================================================
+# MODULE TEST (runs only when module is executed directly)
+# ============================================================================
+if __name__ == "__main__":
+    import time
+
+    print("=== EMR Data Module Test ===\n")
+
+    for table_name in TABLE_FILES:
+        start = time.perf_counter()
+        table = get_table(table_name)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"  {table_name:<11} {len(table):>6} rows  {len(table.columns)} columns  "
+              f"loaded in {elapsed:.1f} ms")
@@ -0,0 +1,546 @@
+"""
+EMR Query Module for EMR Chatbot
+=================================
+This module runs simple SQL queries over the EMR tables, e.g.
+
+    SELECT PatientID, LabValue, LabDateTime FROM labs
+    WHERE LabName = 'METABOLIC: GLUCOSE' AND LabValue > 150
+    ORDER BY LabDateTime DESC LIMIT 5
+
+    SELECT L.LabValue, A.AdmissionStartDate, P.PatientRace
+    FROM LAB_OBSERVATION L
+    JOIN ADMISSION A ON L.AdmissionID = A.AdmissionID
+    JOIN PATIENT P ON A.PatientID = P.PatientID
+    WHERE P.PatientRace = 'Asian' ORDER BY L.LabDateTime
+
+It demonstrates:
+- Recognizing ORDER BY + LIMIT: chatbot answers almost always want only the
+  latest few rows, so the whole result is never sorted
+- Four plans, cheapest first:
+    index - a sorted index covers the ORDER BY column: walk it in order and
+            stop as soon as LIMIT matching rows are found
+    heap  - no index: one pass keeping the best LIMIT rows in a bounded
+            heap (heapq.nlargest / nsmallest, O(n log k) instead of
+            O(n log n))
+    sort  - no LIMIT: filter, then sort the matches; beyond the memory
+            budget this is an external merge sort (see spill_operators)
+    scan  - no ORDER BY: rows in table order, stopping at LIMIT matches
+- Joins as memory-budgeted grace hash joins: the joined table is the build
+  side, so the largest table belongs in FROM
+- Conditions pushed down: each WHERE condition runs right after the table
+  it needs has been joined, before any later join
+- Reporting rows scanned against rows returned, and what was spilled to
+  disk, so the effect of the plan is visible
+
+WHERE conditions are joined with AND. Columns of the patients table
+(PatientRace, PatientGender, ...) can also be used without a join on any
+table with a PatientID column. LabName conditions compare canonical lab
+IDs (see lab_catalog), so 'METABOLIC: GLUCOSE' matches the CSV's "Glucose".
+
+Author: EMR Chatbot Team
+Date: 2026-10-19
+"""
+
+import heapq
+import itertools
+import operator
+import re
+from array import array
+
+
+# ============================================================================
+# MODULE-LEVEL CONSTANTS AND VARIABLES
+# ============================================================================
+
+# Table names accepted in FROM and JOIN (the SQL schema's names included)
+# Data Type: dict - lowercase name -> emr_data table name
+TABLE_NAMES = {
+    "patients": "patients", "patient": "patients",
+    "admissions": "admissions", "admission": "admissions",
+    "diagnoses": "diagnoses", "diagnosis": "diagnoses",
+    "labs": "labs", "lab_observation": "labs",
+}
+
+# Columns with a sorted index, built on first use
+# Data Type: dict - table name -> tuple of column names
+INDEXED_COLUMNS = {
+    "labs": ("LabDateTime",),
+    "admissions": ("AdmissionStartDate", "AdmissionEndDate"),
+}
+
+# Comparison operators
+# Data Type: dict - SQL operator -> function
+OPERATORS = {
+    "=": operator.eq, "!=": operator.ne, "<>": operator.ne,
+    "<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge,
+}
+
+# Data Type: re.Pattern
+_QUERY_PATTERN = re.compile(
+    r"^\s*SELECT\s+(?P<columns>.+?)\s+FROM\s+(?P<source>.+?)"
+    r"(?:\s+WHERE\s+(?P<where>.+?))?"
+    r"(?:\s+ORDER\s+BY\s+(?P<order>[\w.]+)(?:\s+(?P<direction>ASC|DESC))?)?"
+    r"(?:\s+LIMIT\s+(?P<limit>\d+))?\s*;?\s*$",
+    re.IGNORECASE | re.DOTALL,
+)
+_TABLE_PATTERN = re.compile(
+    r"\s*(?P<table>\w+)(?:\s+(?:AS\s+)?(?!(?:INNER|JOIN|ON)\b)(?P<alias>\w+))?",
+    re.IGNORECASE,
+)
+_JOIN_PATTERN = re.compile(
+    r"\s+(?:INNER\s+)?JOIN\s+(?P<table>\w+)(?:\s+(?:AS\s+)?(?!ON\b)(?P<alias>\w+))?"
+    r"\s+ON\s+(?P<left>[\w.]+)\s*=\s*(?P<right>[\w.]+)",
+    re.IGNORECASE,
+)
+_CONDITION_PATTERN = re.compile(
+    r"\s*(?P<column>[\w.]+)\s*(?P<operator><=|>=|!=|<>|=|<|>)\s*"
+    r"(?P<value>'[^']*'|\"[^\"]*\"|-?\d+(?:\.\d+)?)\s*(?:AND\b|$)",
+    re.IGNORECASE,
+)
+
+# Sorted indexes built so far
+# Data Type: dict - (table name, column) -> array of row positions
+_INDEXES = {}
+
+
+# ============================================================================
+# PARSING
+# ============================================================================
+
+def _table_name(name):
+    """Returns the emr_data name of a FROM/JOIN table name."""
+    table = TABLE_NAMES.get(name.lower())
+    if table is None:
+        raise ValueError(f"Unknown table '{name}'")
+    return table
+
+
+def parse_query(text):
+    """
+    Parses a SELECT statement.
+
+    Parameters:
+        text (str): SELECT ... FROM ... [JOIN ... ON a = b ...] [WHERE ...]
+                    [ORDER BY ... [ASC|DESC]] [LIMIT n]
+
+    Returns:
+        dict: {"tables": [(table name, alias)], "joins": [(column,
+               column)] for tables[1:], "columns" (None for *), "where":
+               [(column, operator, value)], "order_by", "descending",
+               "limit"}; columns may keep an alias prefix ("L.LabValue")
+
+    Raises:
+        ValueError: If the statement is not in the supported subset
+
+    Example:
+        >>> parse_query("SELECT * FROM labs ORDER BY LabDateTime DESC LIMIT 5")["limit"]
+        5
+    """
+    match = _QUERY_PATTERN.match(text)
+    if match is None:
+        raise ValueError("Supported: SELECT <columns> FROM <table> [JOIN <table> ON a = b] "
+                         "[WHERE a = 'x' AND b > 1] [ORDER BY <column> [ASC|DESC]] "
+                         "[LIMIT <n>]")
+
+    source = match.group("source")
+    first = _TABLE_PATTERN.match(source)
+    tables = [(_table_name(first.group("table")), first.group("alias") or first.group("table"))]
+    joins = []
+    position = first.end()
+    while position < len(source):
+        join = _JOIN_PATTERN.match(source, position)
+        if join is None:
+            raise ValueError(f"Cannot read '{source[position:].strip()}' "
+                             f"(expected JOIN <table> ON a = b)")
+        tables.append((_table_name(join.group("table")),
+                       join.group("alias") or join.group("table")))
+        joins.append((join.group("left"), join.group("right")))
+        position = join.end()
+
+    columns = [column.strip() for column in match.group("columns").split(",")]
+    conditions = []
+    where = match.group("where")
+    if where:
+        position = 0
+        while position < len(where):
+            condition = _CONDITION_PATTERN.match(where, position)
+            if condition is None:
+                raise ValueError(f"Cannot read the condition '{where[position:].strip()}'")
+            value = condition.group("value")
+            if value[0] in "'\"":
+                value = value[1:-1]
+            else:
+                value = float(value) if "." in value else int(value)
+            conditions.append((condition.group("column"), condition.group("operator"), value))
+            position = condition.end()
+
+    return {
+        "tables": tables,
+        "joins": joins,
+        "columns": None if columns == ["*"] else columns,
+        "where": conditions,
+        "order_by": match.group("order"),
+        "descending": (match.group("direction") or "").upper() == "DESC",
+        "limit": int(match.group("limit")) if match.group("limit") else None,
+    }
+
+
+# ============================================================================
+# EXECUTION
+# ============================================================================
+
+def _sort_key(value):
+    """Orders NULL (None) before every value, as MySQL does."""
+    return (value is not None, value)
+
+
+def sorted_index(table_name, column):
+    """
+    Returns a column's sorted index, building it on first use.
+
+    Parameters:
+        table_name (str): emr_data table name
+        column (str): Column listed in INDEXED_COLUMNS
+
+    Returns:
+        array: Row positions in ascending column order
+    """
+    import emr_data
+
+    key = (table_name, column)
+    index = _INDEXES.get(key)
+    if index is None:
+        values = emr_data.get_table(table_name).column(column)
+        index = array("L", sorted(range(len(values)),
+                                  key=lambda row: _sort_key(values[row])))
+        _INDEXES[key] = index
+    return index
+
+
+def _locate(sources, reference):
+    """
+    Finds the table a column reference belongs to.
+
+    Parameters:
+        sources (list): (alias, Table) pairs in FROM/JOIN order
+        reference (str): "LabValue" or "L.LabValue"
+
+    Returns:
+        tuple: (position in sources, column name, function(table row) ->
+               value)
+
+    Raises:
+        ValueError: If no such column is reachable
+    """
+    import emr_data
+
+    prefix, _, name = reference.rpartition(".")
+    if prefix:
+        positions = [position for position, (alias, table) in enumerate(sources)
+                     if prefix.lower() == alias.lower()
+                     or TABLE_NAMES.get(prefix.lower()) == table.name]
+        if not positions:
+            raise ValueError(f"Unknown table or alias '{prefix}'")
+    else:
+        positions = range(len(sources))
+
+    for position in positions:
+        if name in sources[position][1].data:
+            return position, name, sources[position][1].data[name].__getitem__
+    # Patients-table columns reach any table with a PatientID
+    patients = emr_data.get_table("patients")
+    if name in patients.data:
+        for position in positions:
+            table = sources[position][1]
+            if "PatientID" in table.data:
+                value_of = dict(zip(patients.column("PatientID"), patients.column(name)))
+                patient_ids = table.data["PatientID"]
+                return position, name, lambda row: value_of.get(patient_ids[row])
+    table_names = ", ".join(table.name for _, table in sources)
+    raise ValueError(f"Unknown column '{reference}' in {table_names}")
+
+
+def _column_getter(sources, reference):
+    """
+    Returns (source position, row -> value) for a column reference; rows
+    are row positions for one table and tuples of them for joins.
+    """
+    position, _, get = _locate(sources, reference)
+    if len(sources) == 1:
+        return position, get
+    return position, lambda row: get(row[position])
+
+
+def _predicate(sources, reference, symbol, value):
+    """Compiles one WHERE condition into (source position, row -> bool)."""
+    compare = OPERATORS[symbol]
+    position, name, column = _locate(sources, reference)
+    table = sources[position][1]
+    # Check the literal against the column's values, so a mismatch is
+    # reported here instead of failing mid-scan
+    sample = next((current for current in map(column, range(len(table)))
+                   if current is not None), None)
+    if isinstance(sample, (int, float)) and isinstance(value, str):
+        try:
+            value = float(value)
+        except ValueError:
+            raise ValueError(f"{reference} holds numbers; '{value}' is not a number") from None
+    elif isinstance(sample, str) and not isinstance(value, str):
+        raise ValueError(f"{reference} holds text; quote the value ('{value}')")
+    if name == "LabName" and "LabID" in table.data and symbol in ("=", "!=", "<>"):
+        # Compare canonical lab IDs instead of spellings
+        import lab_catalog
+        lab_id = lab_catalog.resolve(value) if isinstance(value, str) else None
+        if lab_id is None:
+            lab_id = lab_catalog.UNKNOWN_LAB
+        reference = reference[:len(reference) - len(name)] + "LabID"
+        value = lab_id
+    _, get = _column_getter(sources, reference)
+
+    def matches(row):
+        current = get(row)
+        # NULL matches no comparison
+        return current is not None and compare(current, value)
+    return position, matches
+
+
+def _all_of(predicates):
+    """Returns row -> True when every predicate holds."""
+    def accept(row):
+        for predicate in predicates:
+            if not predicate(row):
+                return False
+        return True
+    return accept
+
+
+def _counted(rows, counter):
+    """Yields rows, counting them in counter[0]."""
+    for row in rows:
+        counter[0] += 1
+        yield row
+
+
+def _joined_rows(sources, joins, stages, counter, memory_rows, stats):
+    """
+    Streams the FROM table joined with each JOIN table in turn.
+
+    Parameters:
+        sources (list): (alias, Table) pairs
+        joins (list): (column, column) per JOIN
+        stages (list): Per source, the predicates that run once it is joined
+        counter (list): counter[0] counts rows read from every table
+        memory_rows (int): Memory budget of each join
+        stats (SpillStats): Receives the spill volume
+
+    Returns:
+        iterator: Tuples of row positions, one per source
+
+    Raises:
+        ValueError: If a JOIN condition does not link the joined table to
+                    an earlier one
+    """
+    import spill_operators
+
+    rows = ((row,) for row in _counted(range(len(sources[0][1])), counter))
+    if stages[0]:
+        rows = filter(_all_of(stages[0]), rows)
+    for position, (left, right) in enumerate(joins, start=1):
+        known = sources[:position + 1]
+        left_position, _, left_get = _locate(known, left)
+        right_position, _, right_get = _locate(known, right)
+        if left_position == position:
+            left_position, left_get, right_position, right_get = (
+                right_position, right_get, left_position, left_get)
+        if right_position != position or left_position == position:
+            raise ValueError(f"JOIN {sources[position][0]} ON {left} = {right} must compare "
+                             f"{sources[position][0]} with an earlier table")
+
+        def probe_key(row, position=left_position, get=left_get):
+            return get(row[position])
+        build = _counted(range(len(sources[position][1])), counter)
+        pairs = spill_operators.grace_hash_join(rows, build, probe_key, right_get,
+                                                memory_rows=memory_rows, stats=stats)
+        rows = (probe + (match,) for probe, match in pairs)
+        if stages[position]:
+            rows = filter(_all_of(stages[position]), rows)
+    return rows
+
+
+def run_query(query, memory_rows=None):
+    """
+    Runs a parsed query.
+
+    Parameters:
+        query (dict): parse_query() result
+        memory_rows (int): Rows each join or sort may hold in memory before
+                           spilling to disk. Default is
+                           spill_operators.MEMORY_ROWS.
+
+    Returns:
+        dict: {"columns", "rows" (list of tuples), "scanned", "returned",
+               "plan" ("index", "heap", "sort" or "scan"), "spill" (text),
+               "spilled_rows", "elapsed_ms"}
+
+    Raises:
+        ValueError: If a table, alias or column does not exist
+    """
+    import time
+
+    import emr_data
+    import spill_operators
+
+    start = time.perf_counter()
+    sources = [(alias, emr_data.get_table(name)) for name, alias in query["tables"]]
+    joined = len(sources) > 1
+    if query["columns"]:
+        columns = query["columns"]
+    elif joined:
+        columns = [f"{alias}.{column}" for alias, table in sources for column in table.columns]
+    else:
+        columns = list(sources[0][1].columns)
+    getters = [_column_getter(sources, column)[1] for column in columns]
+    stages = [[] for _ in sources]
+    for condition in query["where"]:
+        position, predicate = _predicate(sources, *condition)
+        stages[position].append(predicate)
+    limit = query["limit"]
+    order_by = query["order_by"]
+    memory_rows = memory_rows or spill_operators.MEMORY_ROWS
+    stats = spill_operators.SpillStats()
+
+    counter = [0]
+    order_column = _locate(sources, order_by)[1] if order_by is not None else None
+    table_name = sources[0][1].name
+    if not joined and order_column in INDEXED_COLUMNS.get(table_name, ()):
+        # Walk the index in the requested order; stop after `limit` matches
+        plan = "index"
+        accept = _all_of(stages[0])
+        index = sorted_index(table_name, order_column)
+        rows = []
+        if limit != 0:
+            for row in _counted(reversed(index) if query["descending"] else index, counter):
+                if accept(row):
+                    rows.append(row)
+                    if len(rows) == limit:
+                        break
+    else:
+        if joined:
+            matches = _joined_rows(sources, query["joins"], stages, counter, memory_rows, stats)
+        else:
+            matches = filter(_all_of(stages[0]),
+                             _counted(range(len(sources[0][1])), counter))
+        if order_by is None:
+            plan = "scan"
+            rows = list(itertools.islice(matches, limit))
+        else:
+            _, get = _column_getter(sources, order_by)
+
+            def key(row):
+                return _sort_key(get(row))
+            if limit is not None:
+                plan = "heap"
+                select = heapq.nlargest if query["descending"] else heapq.nsmallest
+                rows = select(limit, matches, key=key)
+            else:
+                plan = "sort"
+                rows = list(spill_operators.external_sort(
+                    matches, key=key, reverse=query["descending"],
+                    memory_rows=memory_rows, stats=stats))
+
+    result_rows = [tuple(get(row) for get in getters) for row in rows]
+    return {
+        "columns": columns,
+        "rows": result_rows,
+        "scanned": counter[0],
+        "returned": len(result_rows),
+        "plan": plan,
+        "spill": stats.summary(),
+        "spilled_rows": stats.rows,
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 2),
+    }
+
+
+def query(text, memory_rows=None):
+    """
+    Parses and runs a SELECT statement.
+
+    Parameters:
+        text (str): SQL text (see parse_query())
+        memory_rows (int): Memory budget (see run_query())
+
+    Returns:
+        dict: run_query() result
+
+    Example:
+        >>> result = query("SELECT LabValue FROM labs WHERE LabName = 'Glucose' "
+        ...                "ORDER BY LabDateTime DESC LIMIT 5")
+        >>> result["returned"], result["plan"]
+        (5, 'index')
+    """
+    return run_query(parse_query(text), memory_rows)
+
+
+def format_result(result):
+    """
+    Formats a query result as a text table for the `query` command.
+
+    Parameters:
+        result (dict): run_query() result
+
+    Returns:
+        str: Header, one line per row, and the scanned/returned summary
+    """
+    rows = [[("" if value is None else f"{value:g}" if isinstance(value, float) else str(value))
+             for value in row] for row in result["rows"]]
+    widths = [max([len(column)] + [len(row[position]) for row in rows])
+              for position, column in enumerate(result["columns"])]
+    lines = ["  ".join(column.ljust(width) for column, width in zip(result["columns"], widths))]
+    for row in rows:
+        lines.append("  ".join(value.ljust(width) for value, width in zip(row, widths)))
+    spill = f", {result['spill']}" if result["spilled_rows"] else ""
+    lines.append(f"{result['returned']:,} row(s) returned, {result['scanned']:,} scanned "
+                 f"({result['plan']} plan, {result['elapsed_ms']} ms{spill})")
+    return "\n".join(line.rstrip() for line in lines)
+
+
+# ============================================================================
+# MODULE TEST (runs only when module is executed directly)
+# ============================================================================
+if __name__ == "__main__":
+    import time
+
+    import emr_data
+
+    print("=== EMR Query Module Test ===\n")
+
+    cohort = ("SELECT PatientID, LabName, LabValue, LabDateTime FROM LAB_OBSERVATION L "
+              "WHERE PatientRace = 'Black or African American' "
+              "AND L.LabName = 'METABOLIC: GLUCOSE' AND L.LabValue > 150 "
+              "ORDER BY L.LabDateTime DESC LIMIT 5")
+    print(format_result(query(cohort)))
+    print()
+    print(format_result(query("SELECT PatientID, LabValue FROM labs WHERE LabName = 'WBC' "
+                              "ORDER BY LabValue DESC LIMIT 3")))
+
+    # Heap against full sort on a larger copy of the labs table
+    labs = emr_data.get_table("labs")
+    values = labs.column("LabValue") * 100
+    start = time.perf_counter()
+    top = heapq.nlargest(10, range(len(values)), key=values.__getitem__)
+    heap_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    full = sorted(range(len(values)), key=values.__getitem__, reverse=True)[:10]
+    sort_ms = (time.perf_counter() - start) * 1000
+    print(f"\nTop 10 of {len(values):,} values: bounded heap {heap_ms:.0f} ms, "
+          f"full sort {sort_ms:.0f} ms (same rows: {sorted(top) == sorted(full)})")
+
+    # The three-table cohort join, in memory and with a 200-row budget
+    joined = ("SELECT L.PatientID, L.LabValue, A.AdmissionStartDate, P.PatientRace "
+              "FROM LAB_OBSERVATION L JOIN ADMISSION A ON L.AdmissionID = A.AdmissionID "
+              "JOIN PATIENT P ON A.PatientID = P.PatientID "
+              "WHERE P.PatientRace = 'Asian' ORDER BY L.LabDateTime")
+    for memory_rows in (None, 200):
+        result = query(joined, memory_rows)
+        print(f"\nJoin, memory budget {memory_rows or 'default'}: "
+              + format_result(result).splitlines()[-1])
@@ -0,0 +1,516 @@
+"""
+Glossary Layers Module for EMR Chatbot
+=======================================
+This module lets each hospital (and each user) override translations
+without changing them for everybody else.
+It demonstrates:
+- Named overlay layers in a tree: base -> region -> site -> user
+- A read-through base: the base layer IS the current lexicon snapshot
+  (lexicon_store.LexiconSnapshot), so the shared glossary is held once
+- A precomputed merged view per layer, kept as differences from the base,
+  so a lookup is at most TWO probes (the layer's differences, then the
+  snapshot) no matter how many layers are stacked
+- Incremental rebuilds: changing one entry in a layer (or in the lexicon)
+  recomputes only that entry, in the layers stacked on top of it
+- Memory sharing: a site or user layer costs memory only for the entries
+  and forms it changes
+- Shared forms: when two entries have the same form ("alta" for both
+  "discharge" and "high"), the older one owns it, and the next one takes
+  over when the owner is overridden
+
+An override may replace only some languages: a site can change the Spanish
+word for "discharge" and keep the base French one.
+
+Author: EMR Chatbot Team
+Date: 2026-10-19
+"""
+
+import sys
+import threading
+
+
+# ============================================================================
+# MODULE-LEVEL CONSTANTS
+# ============================================================================
+
+# Name of the root layer
+# Data Type: str
+BASE_LAYER = "base"
+
+# Marks a form a layer does not override (lookups fall through to the base)
+# Data Type: object
+_INHERIT = object()
+
+
+# ============================================================================
+# LAYER
+# ============================================================================
+
+class GlossaryLayer:
+    """
+    One overlay layer and its merged view.
+
+    The base layer stores nothing: it reads the current lexicon snapshot.
+    Every other layer holds only what differs from the base, so a lookup
+    probes the layer's differences and, if the form is not there, the
+    snapshot: two probes at most, no matter how many layers are stacked.
+
+    Attributes:
+        name (str): Layer name, e.g. "site-ottawa"
+        parent (GlossaryLayer or None): Layer underneath (None for the base)
+        base (GlossaryLayer): Root layer (the layer itself for the base)
+        snapshot (lexicon_store.LexiconSnapshot or None): The base's lexicon
+                 (None above the base)
+        entries (dict): This layer's own entries, pivot phrase -> {lang: form}
+        children (list): Layers stacked directly on this one
+        resolved (dict): Pivot phrase -> merged forms tuple, for entries
+                         whose merged forms differ from the base
+        index (dict): Language -> {form: merged forms of the entry owning
+                      the form}, for forms whose owner differs from the
+                      base (None: no entry has the form here)
+        owners (dict): Language -> {form: pivot phrases holding the form,
+                       in the order they took it}; on the base only for
+                       shared forms, above it only for entries in resolved
+    """
+
+    def __init__(self, name, parent, languages, snapshot=None):
+        self.name = name
+        self.parent = parent
+        self.base = self if parent is None else parent.base
+        self.snapshot = snapshot
+        self.entries = {}
+        self.children = []
+        self._languages = languages
+        self.resolved = {}
+        self.index = {language: {} for language in languages}
+        self.owners = {language: {} for language in languages}
+        if parent is not None:
+            parent.children.append(self)
+            # A new layer has no entries yet: its view is its parent's
+            if parent.parent is not None:
+                self.resolved = dict(parent.resolved)
+                self.index = {language: dict(table) for language, table in parent.index.items()}
+                self.owners = {language: {form: list(keys) for form, keys in table.items()}
+                               for language, table in parent.owners.items()}
+
+    def _concept_forms(self, concept):
+        """Returns a snapshot concept's forms as a tuple (None if absent)."""
+        if concept is None:
+            return None
+        snapshot = self.base.snapshot
+        return tuple(snapshot.form(language, concept) for language in self._languages)
+
+    def _base_entry(self, key):
+        """Returns an entry's forms in the base (None if absent)."""
+        snapshot = self.base.snapshot
+        return self._concept_forms(snapshot.find_concept(snapshot.pivot, key))
+
+    def _base_owner(self, position, form):
+        """Returns the forms of the base entry owning a form (None if none)."""
+        return self._concept_forms(
+            self.base.snapshot.find_concept(self._languages[position], form))
+
+    def view(self, key):
+        """Returns an entry's merged forms in this layer (None if absent)."""
+        forms = self.resolved.get(key)
+        if forms is None:
+            forms = self._base_entry(key)
+        return forms
+
+    def lookup(self, source_language, target_position, text):
+        """Returns a translation from the merged view (one or two probes)."""
+        forms = self.index[source_language].get(text, _INHERIT)
+        if forms is None:
+            return None
+        if forms is not _INHERIT:
+            return forms[target_position]
+        snapshot = self.base.snapshot
+        concept = snapshot.find_concept(source_language, text)
+        if concept is None:
+            return None
+        return snapshot.form(self._languages[target_position], concept)
+
+    def _merge(self, key):
+        """Combines the parent's entry with this layer's override."""
+        inherited = self.parent.view(key)
+        own = self.entries.get(key)
+        if own is None:
+            return inherited
+        return tuple(
+            own.get(language) or (inherited[position] if inherited is not None else None)
+            for position, language in enumerate(self._languages)
+        )
+
+    def _form_owners(self, position, form):
+        """Returns the entries holding a form in this view, oldest first."""
+        language = self._languages[position]
+        owner = self._base_owner(position, form)
+        if owner is None:
+            keys = []
+        else:
+            # The snapshot's owner first, then the other base holders
+            keys = [owner[0]]
+            keys.extend(key for key in self.base.owners[language].get(form, ())
+                        if key != owner[0])
+        if self is not self.base:
+            keys = [key for key in keys if self.view(key)[position] == form]
+            keys.extend(key for key in self.owners[language].get(form, ()) if key not in keys)
+        return keys
+
+    def _refresh(self, key, forms=()):
+        """
+        Recomputes one entry here and in every layer stacked on top.
+
+        Parameters:
+            key (str): Pivot phrase of the entry
+            forms (iterable): (language position, form) pairs whose owner
+                              may have changed in the layer underneath
+        """
+        old = self.view(key)
+        new = self._merge(key)
+        affected = set(forms)
+        for position in range(len(self._languages)):
+            for forms_tuple in (old, new):
+                if forms_tuple is not None and forms_tuple[position] is not None:
+                    affected.add((position, forms_tuple[position]))
+
+        # Owner lists of the entries stored here, kept in the order the
+        # entries took each form
+        base_forms = self._base_entry(key)
+        was_stored = key in self.resolved
+        is_stored = new is not None and new != base_forms
+        for position, language in enumerate(self._languages):
+            old_form = old[position] if old is not None else None
+            new_form = new[position] if new is not None else None
+            table = self.owners[language]
+            if was_stored and old_form is not None and (old_form != new_form or not is_stored):
+                table[old_form].remove(key)
+                if not table[old_form]:
+                    del table[old_form]
+            if is_stored and new_form is not None and (old_form != new_form or not was_stored):
+                table.setdefault(new_form, []).append(key)
+        if is_stored:
+            self.resolved[key] = new
+        else:
+            self.resolved.pop(key, None)
+
+        # The oldest remaining holder owns each form; only owners that
+        # differ from the base are stored
+        for position, form in affected:
+            table = self.index[self._languages[position]]
+            keys = self._form_owners(position, form)
+            forms = self.view(keys[0]) if keys else None
+            if forms == self._base_owner(position, form):
+                table.pop(form, None)
+            else:
+                table[form] = forms
+
+        for child in self.children:
+            child._refresh(key, affected)
+
+
+# ============================================================================
+# LAYERED GLOSSARY
+# ============================================================================
+
+class LayeredGlossary:
+    """
+    A tree of glossary layers with merged views, on top of a lexicon snapshot.
+
+    Example:
+        >>> snapshot = lexicon_store.build_snapshot(
+        ...     [{"english": "discharge", "spanish": "alta"}], ["english", "spanish"])
+        >>> glossary = LayeredGlossary(["english", "spanish"], snapshot)
+        >>> glossary.create_layer("site-a")
+        >>> glossary.set_entry("site-a", {"english": "discharge", "spanish": "egreso"})
+        >>> glossary.translate("site-a", "english", "spanish", "discharge")
+        'egreso'
+        >>> glossary.translate("base", "english", "spanish", "discharge")
+        'alta'
+    """
+
+    def __init__(self, languages, snapshot):
+        """
+        Parameters:
+            languages (list): Languages stored, pivot first (the snapshot's
+                              languages)
+            snapshot (lexicon_store.LexiconSnapshot): Current lexicon, read
+                     as the base layer
+        """
+        self.languages = tuple(languages)
+        self._positions = {language: position
+                           for position, language in enumerate(self.languages)}
+        self._lock = threading.Lock()
+        base = GlossaryLayer(BASE_LAYER, None, self.languages, snapshot)
+        self._layers = {BASE_LAYER: base}
+
+        # The snapshot indexes one owner per form; the other holders of a
+        # shared form are listed here (a small table: shared forms only,
+        # see LexiconSnapshot.shared_forms())
+        pivot = snapshot.pivot
+        for language in self.languages:
+            base.owners[language] = {
+                form: [snapshot.form(pivot, concept) for concept in concepts]
+                for form, concepts in snapshot.shared_forms(language).items()
+            }
+
+    def create_layer(self, name, parent=BASE_LAYER):
+        """
+        Adds an empty layer on top of an existing one.
+
+        Parameters:
+            name (str): New layer name
+            parent (str): Layer to stack on. Default is the base layer.
+
+        Returns:
+            GlossaryLayer: The new layer
+        """
+        with self._lock:
+            if name in self._layers:
+                raise ValueError(f"Layer '{name}' already exists")
+            if parent not in self._layers:
+                raise KeyError(f"Unknown layer '{parent}'")
+            layer = GlossaryLayer(name, self._layers[parent], self.languages)
+            self._layers[name] = layer
+            return layer
+
+    def set_entry(self, layer_name, forms):
+        """
+        Adds or overrides one entry in an overlay layer.
+
+        Parameters:
+            layer_name (str): Layer to change (not the base: it is the
+                              lexicon, see update_base())
+            forms (dict): Language -> normalized phrase; must include the
+                          pivot language. Missing languages are inherited.
+        """
+        if layer_name == BASE_LAYER:
+            raise ValueError("The base layer is the lexicon; publish to it instead")
+        key = sys.intern(forms[self.languages[0]])
+        own = {language: sys.intern(form) for language, form in forms.items()
+               if language in self._positions and form}
+        with self._lock:
+            layer = self._layers[layer_name]
+            existing = layer.entries.get(key)
+            if existing is not None:
+                own = dict(existing, **own)
+            layer.entries[key] = own
+            layer._refresh(key)
+
+    def remove_entry(self, layer_name, pivot_phrase):
+        """
+        Removes a layer's own entry, so the one underneath shows through.
+
+        Parameters:
+            layer_name (str): Layer to change
+            pivot_phrase (str): Pivot-language phrase of the entry
+
+        Returns:
+            bool: True if the layer had such an entry
+        """
+        with self._lock:
+            layer = self._layers[layer_name]
+            if layer.entries.pop(pivot_phrase, None) is None:
+                return False
+            layer._refresh(pivot_phrase)
+            return True
+
+    def update_base(self, snapshot, keys):
+        """
+        Moves the base to a newer snapshot in which a few entries changed.
+
+        Parameters:
+            snapshot (lexicon_store.LexiconSnapshot): The newer lexicon
+            keys (iterable): Pivot phrases of the changed entries
+        """
+        with self._lock:
+            base = self._layers[BASE_LAYER]
+            if snapshot.version <= base.snapshot.version:
+                return
+            old = {key: base.view(key) for key in keys}
+            # Every entry that held one of the touched forms before the
+            # update; a batch can move a form away and back, so the lists
+            # are rebuilt from these rather than from old/new differences
+            touched = {}
+            for key, forms in old.items():
+                for position, form in enumerate(forms or ()):
+                    if form is not None:
+                        touched.setdefault((position, form), []).append(key)
+            for (position, form), holders in touched.items():
+                owner = base._base_owner(position, form)
+                if owner is not None:
+                    holders.append(owner[0])
+            base.snapshot = snapshot
+            affected = {}
+            for key in old:
+                forms = base.view(key)
+                for position, form in enumerate(forms or ()):
+                    if form is not None:
+                        touched.setdefault((position, form), []).append(key)
+                affected[key] = {(position, form)
+                                 for forms in (old[key], base.view(key))
+                                 for position, form in enumerate(forms or ())
+                                 if form is not None}
+            for (position, form), holders in touched.items():
+                self._list_shared_form(position, form, holders)
+            for key, forms in affected.items():
+                for child in base.children:
+                    child._refresh(key, forms)
+
+    def _list_shared_form(self, position, form, candidates):
+        """Rebuilds one form's shared-holder list (called under lock)."""
+        base = self._layers[BASE_LAYER]
+        table = base.owners[self.languages[position]]
+        owner = base._base_owner(position, form)
+        ordered = ([owner[0]] if owner is not None else []) + \
+            table.get(form, []) + candidates
+        holders = []
+        for key in ordered:
+            forms = base.view(key)
+            if key not in holders and forms is not None \
+                    and forms[position] == form:
+                holders.append(key)
+        # A lone holder the snapshot does not index stays listed, so it is
+        # found again when another entry takes the form
+        if len(holders) > 1 or (holders and owner is None):
+            table[form] = holders
+        else:
+            table.pop(form, None)
+
+    def rebase(self, snapshot):
+        """
+        Replaces the base with a new lexicon and rebuilds every layer on it.
+
+        The new tree is built aside and swapped in with one assignment, so
+        lookups keep using the old views meanwhile. Layer edits wait for
+        the rebuild and then apply to the new tree.
+
+        Parameters:
+            snapshot (lexicon_store.LexiconSnapshot): The new lexicon
+        """
+        with self._lock:
+            fresh = LayeredGlossary(self.languages, snapshot)
+            # Parents come before their children in creation order
+            for name, layer in self._layers.items():
+                if layer.parent is None:
+                    continue
+                fresh.create_layer(name, layer.parent.name)
+                for forms in layer.entries.values():
+                    fresh.set_entry(name, forms)
+            self._layers = fresh._layers
+
+    def translate(self, layer_name, source_language, target_language, text):
+        """
+        Translates a normalized phrase through a layer's merged view.
+
+        Parameters:
+            layer_name (str): Layer whose view is used
+            source_language (str): Language of the text
+            target_language (str): Language to translate into
+            text (str): Normalized phrase
+
+        Returns:
+            str or None: The translation, or None if not found
+        """
+        return self._layers[layer_name].lookup(
+            source_language, self._positions[target_language], text)
+
+    def has_layer(self, name):
+        """Returns True if a layer with this name exists."""
+        return name in self._layers
+
+    def layer_path(self, name):
+        """
+        Returns the stack of layer names from the base up to a layer.
+
+        Example:
+            >>> glossary.layer_path("user-42")
+            ['base', 'region-east', 'site-ottawa', 'user-42']
+        """
+        layer = self._layers[name]
+        path = []
+        while layer is not None:
+            path.append(layer.name)
+            layer = layer.parent
+        return path[::-1]
+
+    def stats(self):
+        """
+        Returns entry counts per layer.
+
+        Returns:
+            list: One dict per layer with its own entry count, merged view
+                  size, and how many merged entries it stores because they
+                  differ from the base (everything else is read from the
+                  lexicon)
+        """
+        base = self._layers[BASE_LAYER]
+        base_entries = len(base.snapshot)
+        report = []
+        for name, layer in self._layers.items():
+            parent = layer.parent
+            report.append({
+                "layer": name,
+                "parent": parent.name if parent is not None else None,
+                "own_entries": len(layer.entries),
+                "view_entries": base_entries + sum(
+                    1 for key in layer.resolved if layer._base_entry(key) is None),
+                "differs_from_base": len(layer.resolved),
+            })
+        return report
+
+
+# ============================================================================
+# MODULE TEST (runs only when module is executed directly)
+# ============================================================================
+if __name__ == "__main__":
+    import time
+    import tracemalloc
+
+    import lexicon_store
+
+    print("=== Glossary Layers Module Test ===\n")
+
+    languages = ["english", "spanish", "french"]
+    glossary = LayeredGlossary(languages, lexicon_store.build_snapshot([
+        {"english": "discharge", "spanish": "alta", "french": "sortie"},
+        {"english": "nurse", "spanish": "enfermera", "french": "infirmière"},
+    ], languages))
+    glossary.create_layer("region-latam")
+    glossary.create_layer("site-bogota", "region-latam")
+    glossary.create_layer("user-ana", "site-bogota")
+
+    glossary.set_entry("region-latam", {"english": "nurse", "spanish": "enfermero/a"})
+    glossary.set_entry("site-bogota", {"english": "discharge", "spanish": "egreso"})
+    for layer in ["base", "region-latam", "site-bogota", "user-ana"]:
+        print(f"  {layer:<13} discharge -> "
+              f"{glossary.translate(layer, 'english', 'spanish', 'discharge'):<8} "
+              f"nurse -> {glossary.translate(layer, 'english', 'spanish', 'nurse'):<12} "
+              f"egreso -> {glossary.translate(layer, 'spanish', 'french', 'egreso')}")
+
+    size = 200000
+    rows = [{"english": f"term {number}", "spanish": f"término {number}",
+             "french": f"terme {number}"} for number in range(size)]
+    snapshot = lexicon_store.build_snapshot(rows, languages)
+    start = time.perf_counter()
+    tracemalloc.start()
+    big = LayeredGlossary(languages, snapshot)
+    big.create_layer("region")
+    big.create_layer("site", "region")
+    layer_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"\nLayers on a {size:,}-entry lexicon set up in "
+          f"{time.perf_counter() - start:.2f} s; base and two layers cost "
+          f"{layer_bytes / 1024:.1f} KB")
+
+    start = time.perf_counter()
+    for number in range(1000):
+        big.set_entry("region", {"english": f"term {number}", "spanish": f"vocablo {number}"})
+    print(f"1,000 region overrides applied in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    start = time.perf_counter()
+    for number in range(100000):
+        big.translate("site", "english", "spanish", f"term {number % 5000}")
+    print(f"Lookup through 3 layers: {(time.perf_counter() - start) / 100000 * 1e9:.0f} ns")
+    for item in big.stats():
+        print(f"  {item}")
@@ -0,0 +1,399 @@
+"""
+Glossary Reloader Module for EMR Chatbot
+=========================================
+This module picks up edited glossary files while the chatbot is running,
+without a restart.
+It demonstrates:
+- Polling a directory for changes (file name, size and modification time
+  per file; the standard library has no portable file-change events)
+- Debouncing: a change is loaded only once the files have stayed the same
+  for one polling interval, so a half-written file is never read
+- A background thread that rebuilds the lexicon, the language detector,
+  the overlay layers and the completion/search indexes, then swaps each
+  one in with a single reference assignment
+- Readers never wait: lookups keep using the previous version until the
+  new one is complete, and a reload that fails keeps the previous version
+
+Glossary files are CSV files (*.csv) whose header names the languages, for
+example:
+
+    english,spanish,french
+    discharge,alta,sortie
+
+Files are read in name order; a later entry for the same English phrase
+overrides an earlier one, and every file entry overrides the built-in
+glossary. Custom translations added with `add` still win over both.
+
+Author: EMR Chatbot Team
+Date: 2026-10-19
+"""
+
+import csv
+import os
+import threading
+import time
+
+
+# ============================================================================
+# MODULE-LEVEL CONSTANTS AND VARIABLES
+# ============================================================================
+
+# Only files with this extension are glossary files
+# Data Type: str
+GLOSSARY_EXTENSION = ".csv"
+
+# Seconds between two directory scans
+# Data Type: float
+DEFAULT_INTERVAL = 1.0
+
+# Reloader started by start() (main.py --glossary-dir)
+# Data Type: GlossaryReloader or None
+_RELOADER = None
+
+
+# ============================================================================
+# READING GLOSSARY FILES
+# ============================================================================
+
+def scan(directory):
+    """
+    Returns a fingerprint of every glossary file in a directory.
+
+    Parameters:
+        directory (str): Directory to scan
+
+    Returns:
+        dict: File name -> (size, modification time in nanoseconds)
+    """
+    fingerprint = {}
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.name.endswith(GLOSSARY_EXTENSION) and entry.is_file():
+                info = entry.stat()
+                fingerprint[entry.name] = (info.st_size, info.st_mtime_ns)
+    return fingerprint
+
+
+def read_glossary_files(directory, languages):
+    """
+    Reads every glossary file of a directory.
+
+    Parameters:
+        directory (str): Directory holding *.csv glossary files
+        languages (list): Languages to keep, pivot first; other columns
+                          are ignored
+
+    Returns:
+        list: One normalized {language: phrase} dict per row
+
+    Raises:
+        ValueError: If a file has no column for the pivot language
+    """
+    pivot = languages[0]
+    rows = []
+    for name in sorted(scan(directory)):
+        path = os.path.join(directory, name)
+        with open(path, "r", encoding="utf-8", newline="") as handle:
+            # csv.reader rather than DictReader: no dict per record
+            reader = csv.reader(handle)
+            header = [column.lower().strip() for column in next(reader, ())]
+            if pivot not in header:
+                raise ValueError(f"{name}: no '{pivot}' column")
+            # Data Type: list of (column position, language) pairs
+            wanted = [(position, column) for position, column in enumerate(header)
+                      if column in languages]
+            for record in reader:
+                row = {}
+                for position, language in wanted:
+                    if position < len(record):
+                        phrase = record[position].lower().strip()
+                        if phrase:
+                            row[language] = phrase
+                if row.get(pivot):
+                    rows.append(row)
+    return rows
+
+
+def reload_glossary(directory):
+    """
+    Loads a glossary directory into the chatbot and swaps in every index
+    built from it.
+
+    Parameters:
+        directory (str): Directory holding *.csv glossary files
+
+    Returns:
+        dict: {"files", "rows", "concepts", "read_ms", "build_ms",
+               "indexes_ms"} - what was loaded and how long each step took
+    """
+    import autocomplete
+    import search_index
+    import translation_module
+
+    start = time.perf_counter()
+    files = len(scan(directory))
+    rows = read_glossary_files(directory, translation_module.SUPPORTED_LANGUAGES)
+    read_done = time.perf_counter()
+    concepts = translation_module.replace_glossary(rows)
+    build_done = time.perf_counter()
+    # Only indexes already in use are rebuilt; the others are built on
+    # first use from the new lexicon anyway
+    autocomplete.rebuild_index()
+    search_index.rebuild_index()
+    finished = time.perf_counter()
+    return {
+        "files": files,
+        "rows": len(rows),
+        "concepts": concepts,
+        "read_ms": round((read_done - start) * 1000, 1),
+        "build_ms": round((build_done - read_done) * 1000, 1),
+        "indexes_ms": round((finished - build_done) * 1000, 1),
+    }
+
+
+# ============================================================================
+# RELOADER
+# ============================================================================
+
+class GlossaryReloader:
+    """
+    Watches a glossary directory and reloads it after every change.
+
+    Attributes:
+        directory (str): Watched directory
+        interval (float): Seconds between scans
+        reloads (int): Successful reloads (including the first load)
+        failures (int): Reloads that raised an error
+        last_result (dict or None): reload_glossary() result of the last
+                                    successful reload
+        last_error (str or None): Message of the last failed reload
+    """
+
+    def __init__(self, directory, interval=DEFAULT_INTERVAL, reload_function=reload_glossary):
+        """
+        Parameters:
+            directory (str): Directory holding *.csv glossary files
+            interval (float): Seconds between scans. Default is 1 second.
+            reload_function (callable): directory -> result dict. Default is
+                                        reload_glossary().
+        """
+        self.directory = directory
+        self.interval = interval
+        self._reload = reload_function
+        self.reloads = 0
+        self.failures = 0
+        self.last_result = None
+        self.last_error = None
+        # Data Type: dict - fingerprint of the files last loaded
+        self._loaded = None
+        # Data Type: dict or None - changed fingerprint waiting to settle
+        self._pending = None
+        # One reload at a time (the watcher thread or the `reload` command)
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def reload_now(self):
+        """
+        Loads the directory immediately (used for the first load and by the
+        `reload` command).
+
+        Returns:
+            bool: True if the reload succeeded
+        """
+        with self._reload_lock:
+            fingerprint = scan(self.directory)
+            try:
+                self.last_result = self._reload(self.directory)
+            except (OSError, ValueError, KeyError, UnicodeDecodeError, csv.Error) as e:
+                # Keep serving the previous glossary
+                self.failures += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+                return False
+            finally:
+                # A broken file is not retried until it changes again
+                self._loaded = fingerprint
+                self._pending = None
+            self.reloads += 1
+            self.last_error = None
+            return True
+
+    def check(self):
+        """
+        Scans the directory once and reloads it if the files changed and
+        have stayed unchanged since the previous scan.
+
+        Returns:
+            bool: True if a reload happened
+        """
+        try:
+            fingerprint = scan(self.directory)
+        except OSError as e:
+            self.last_error = f"{type(e).__name__}: {e}"
+            return False
+        if fingerprint == self._loaded:
+            self._pending = None
+            return False
+        if fingerprint != self._pending:
+            # Still being written (or just changed): wait one more interval
+            self._pending = fingerprint
+            return False
+        return self.reload_now()
+
+    def _run(self):
+        """Background thread: scan every `interval` seconds until stopped."""
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def start(self):
+        """
+        Loads the directory once (so the first command already sees it) and
+        starts the background watcher thread.
+
+        Returns:
+            bool: True if the first load succeeded
+        """
+        loaded = self.reload_now()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="glossary-reloader",
+                                        daemon=True)
+        self._thread.start()
+        return loaded
+
+    def stop(self):
+        """Stops the watcher thread (waits for a running reload to finish)."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def stats(self):
+        """
+        Returns the reloader's counters and the last reload's timings.
+
+        Returns:
+            dict: JSON-friendly statistics
+        """
+        return {
+            "directory": self.directory,
+            "interval": self.interval,
+            "reloads": self.reloads,
+            "failures": self.failures,
+            "last_result": self.last_result,
+            "last_error": self.last_error,
+        }
+
+
+# ============================================================================
+# MODULE-LEVEL FUNCTIONS (used by main.py)
+# ============================================================================
+
+def start(directory, interval=DEFAULT_INTERVAL):
+    """
+    Starts watching a glossary directory (replacing any earlier watcher).
+
+    Parameters:
+        directory (str): Directory holding *.csv glossary files
+        interval (float): Seconds between scans
+
+    Returns:
+        GlossaryReloader: The running reloader
+    """
+    global _RELOADER
+
+    stop()
+    reloader = GlossaryReloader(directory, interval)
+    reloader.start()
+    _RELOADER = reloader
+    return reloader
+
+
+def stop():
+    """Stops the watcher started by start(), if any."""
+    global _RELOADER
+
+    reloader, _RELOADER = _RELOADER, None
+    if reloader is not None:
+        reloader.stop()
+
+
+def get_reloader():
+    """Returns the running reloader, or None."""
+    return _RELOADER
+
+
+def format_report(stats):
+    """
+    Formats reloader statistics for the `reload` command.
+
+    Parameters:
+        stats (dict): GlossaryReloader.stats()
+
+    Returns:
+        str: Multi-line report
+    """
+    lines = [f"Directory: {stats['directory']} (checked every {stats['interval']:g} s)",
+             f"Reloads: {stats['reloads']}, failures: {stats['failures']}"]
+    result = stats["last_result"]
+    if result is not None:
+        lines.append(
+            f"Last reload: {result['files']} files, {result['rows']:,} rows -> "
+            f"{result['concepts']:,} concepts (read {result['read_ms']} ms, "
+            f"lexicon {result['build_ms']} ms, indexes {result['indexes_ms']} ms)"
+        )
+    if stats["last_error"]:
+        lines.append(f"Last error: {stats['last_error']} (previous glossary kept)")
+    return "\n".join(lines)
+
+
+# ============================================================================
+# MODULE TEST (runs only when module is executed directly)
+# ============================================================================
+if __name__ == "__main__":
+    import sys
+    import tempfile
+
+    import translation_module
+
+    print("=== Glossary Reloader Module Test ===\n")
+
+    size = 1000000
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "terminology.csv")
+        with open(path, "w", encoding="utf-8", newline="") as handle:
+            writer = csv.writer(handle)
+            writer.writerow(["english", "spanish", "french"])
+            for number in range(size):
+                writer.writerow([f"term {number}", f"término {number}", f"terme {number}"])
+
+        # A reader thread translates non-stop; its slowest lookup shows
+        # whether the reload ever blocked it
+        stop_reading = threading.Event()
+        latencies = []
+
+        def read_continuously():
+            while not stop_reading.is_set():
+                begin = time.perf_counter()
+                translation_module.translate("hello", "english", "spanish")
+                latencies.append(time.perf_counter() - begin)
+
+        reader = threading.Thread(target=read_continuously)
+        reader.start()
+        reloader = GlossaryReloader(directory)
+        reloader.reload_now()
+        stop_reading.set()
+        reader.join()
+
+        print(format_report(reloader.stats()))
+        print(f"\n'término 123456' -> french: "
+              f"{translation_module.translate('término 123456', 'spanish', 'french')}")
+        print(f"Lookups during the reload: {len(latencies):,}, slowest "
+              f"{max(latencies) * 1000:.2f} ms (thread switch interval "
+              f"{sys.getswitchinterval() * 1000:.0f} ms)")
+
+        # Edit the file: the change is loaded on the second scan
+        with open(path, "a", encoding="utf-8", newline="") as handle:
+            csv.writer(handle).writerow(["term 0", "vocablo 0", ""])
+        print(f"\nScan 1 after edit reloads: {reloader.check()}")
+        print(f"Scan 2 after edit reloads: {reloader.check()}")
+        print(f"'term 0' -> spanish: {translation_module.translate('term 0', 'english', 'spanish')}")
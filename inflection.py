@@ -0,0 +1,265 @@
+"""
+Inflection Module for EMR Chatbot
+==================================
+This module lets plural forms ("headaches", "doctores", "médecins") find
+the dictionary form stored in the glossary.
+It demonstrates:
+- Rule tables: ordered (suffix, replacement) pairs per language, plus a
+  small dictionary of irregular words
+- Phrase-level rules: English pluralizes the last word ("blood tests"),
+  Spanish and French every word before the first preposition
+  ("dolores de cabeza", "tensions artérielles")
+- Work done at index-build time: every stored phrase gets its plural
+  listed in a plural -> lemma table, so a lookup at runtime is still one
+  dictionary probe instead of running a stemmer on every request
+
+Only number (singular/plural) is handled; verb conjugations would need a
+tense and person mapping between the languages, which the glossary does
+not record.
+
+Author: EMR Chatbot Team
+Date: 2026-10-19
+"""
+
+
+# ============================================================================
+# MODULE-LEVEL CONSTANTS
+# ============================================================================
+
+# Irregular plurals per language
+# Data Type: dict - language -> {singular: plural}
+IRREGULAR_PLURALS = {
+    "english": {
+        "man": "men", "woman": "women", "child": "children", "person": "people",
+        "foot": "feet", "tooth": "teeth", "mouse": "mice", "louse": "lice",
+        "knife": "knives", "life": "lives", "wife": "wives", "leaf": "leaves",
+        "half": "halves", "calf": "calves", "thief": "thieves",
+        "vertebra": "vertebrae", "bacterium": "bacteria", "datum": "data",
+        "criterion": "criteria", "phenomenon": "phenomena",
+    },
+    "spanish": {
+        "examen": "exámenes", "joven": "jóvenes", "origen": "orígenes",
+        "imagen": "imágenes", "volumen": "volúmenes", "régimen": "regímenes",
+        "carácter": "caracteres",
+    },
+    "french": {
+        "œil": "yeux", "oeil": "yeux", "ciel": "cieux", "travail": "travaux",
+        "vitrail": "vitraux", "bijou": "bijoux", "caillou": "cailloux",
+        "chou": "choux", "genou": "genoux", "hibou": "hiboux", "joujou": "joujoux",
+        "pou": "poux", "pneu": "pneus", "bleu": "bleus", "bal": "bals",
+        "carnaval": "carnavals", "festival": "festivals", "final": "finals",
+        "natal": "natals", "naval": "navals", "fatal": "fatals", "banal": "banals",
+    },
+}
+
+# Ordered suffix rules; the first matching suffix wins. A replacement of
+# None means the word does not change in the plural.
+# Data Type: dict - language -> tuple of (suffix, replacement)
+PLURAL_RULES = {
+    "english": (
+        ("sis", "ses"),
+        ("ss", "sses"), ("s", None), ("x", "xes"), ("z", "zes"),
+        ("ch", "ches"), ("sh", "shes"),
+        ("ay", "ays"), ("ey", "eys"), ("oy", "oys"), ("uy", "uys"), ("y", "ies"),
+        ("", "s"),
+    ),
+    "spanish": (
+        # Stressed final syllable loses its written accent: "infección" ->
+        # "infecciones", "inglés" -> "ingleses"
+        ("ión", "iones"), ("ón", "ones"), ("án", "anes"), ("én", "enes"),
+        ("ín", "ines"), ("ún", "unes"), ("és", "eses"), ("ás", "ases"),
+        ("ós", "oses"), ("ís", "ises"), ("ús", "uses"),
+        ("s", None), ("x", None),
+        ("z", "ces"),
+        ("a", "as"), ("e", "es"), ("i", "is"), ("o", "os"), ("u", "us"),
+        ("á", "ás"), ("é", "és"), ("ó", "ós"), ("í", "íes"), ("ú", "úes"),
+        ("", "es"),
+    ),
+    "french": (
+        ("s", None), ("x", None), ("z", None),
+        ("eau", "eaux"), ("au", "aux"), ("eu", "eux"),
+        ("al", "aux"),
+        ("", "s"),
+    ),
+}
+
+# PLURAL_RULES grouped by the last letter of the suffix, so a word is only
+# compared with the few rules that can match it. Each group ends with the
+# default rule (empty suffix), which is also stored alone under "".
+# Data Type: dict - language -> {letter: tuple of (suffix, replacement)}
+_RULES_BY_LETTER = {}
+for _language, _rules in PLURAL_RULES.items():
+    _default = tuple(rule for rule in _rules if rule[0] == "")
+    _grouped = {"": _default}
+    for _rule in _rules:
+        if _rule[0]:
+            _grouped[_rule[0][-1]] = _grouped.get(_rule[0][-1], ()) + (_rule,)
+    _RULES_BY_LETTER[_language] = {letter: rules if letter == "" else rules + _default
+                                   for letter, rules in _grouped.items()}
+
+# Words that end the inflected part of a Spanish or French phrase
+# ("dolor | de cabeza", "mal | de tête")
+# Data Type: dict - language -> set
+PHRASE_BREAKS = {
+    "spanish": {"de", "del", "a", "al", "en", "con", "sin", "para", "por", "y", "o"},
+    "french": {"de", "du", "des", "à", "au", "aux", "en", "et", "ou",
+               "pour", "sans", "avec", "sur"},
+}
+
+# Articles and their plurals
+# Data Type: dict - language -> {singular: plural}
+ARTICLE_PLURALS = {
+    "english": {"a": "", "an": ""},
+    "spanish": {"el": "los", "la": "las", "un": "unos", "una": "unas"},
+    "french": {"le": "les", "la": "les", "un": "des", "une": "des"},
+}
+
+
+# ============================================================================
+# PLURAL FORMS
+# ============================================================================
+
+def pluralize_word(word, language):
+    """
+    Returns the plural of one word.
+
+    Parameters:
+        word (str): Lowercase word
+        language (str): "english", "spanish" or "french"
+
+    Returns:
+        str: The plural (the word itself if it does not change, or if the
+             language has no rules)
+
+    Example:
+        >>> pluralize_word("infección", "spanish")
+        'infecciones'
+        >>> pluralize_word("hôpital", "french")
+        'hôpitaux'
+    """
+    irregular = IRREGULAR_PLURALS.get(language, {}).get(word)
+    if irregular is not None:
+        return irregular
+    rules = _RULES_BY_LETTER.get(language)
+    # Numbers and codes ("type 2", "b12") have no plural
+    if rules is None or not word or not word[-1].isalpha():
+        return word
+    for suffix, replacement in rules.get(word[-1]) or rules[""]:
+        if word.endswith(suffix):
+            if replacement is None:
+                return word
+            return word[:len(word) - len(suffix)] + replacement
+    return word
+
+
+def pluralize(phrase, language):
+    """
+    Returns the plural of a (normalized) phrase.
+
+    Parameters:
+        phrase (str): Lowercase phrase, e.g. "dolor de cabeza"
+        language (str): "english", "spanish" or "french"
+
+    Returns:
+        str: The plural phrase, or the phrase itself if nothing changes
+
+    Example:
+        >>> pluralize("blood test", "english")
+        'blood tests'
+        >>> pluralize("dolor de cabeza", "spanish")
+        'dolores de cabeza'
+        >>> pluralize("tension artérielle", "french")
+        'tensions artérielles'
+    """
+    if language not in PLURAL_RULES:
+        return phrase
+    words = phrase.split(" ")
+    articles = ARTICLE_PLURALS[language]
+
+    if language == "english":
+        # The head noun is the last word, or the one before "of"
+        # ("shortness of breath" -> "shortnesses of breath")
+        head = words.index("of", 1) - 1 if "of" in words[1:] else len(words) - 1
+        words[head] = pluralize_word(words[head], language)
+        if words[0] in articles and len(words) > 1:
+            words = words[1:]
+        return " ".join(words)
+
+    # Spanish and French: nouns and their adjectives agree in number
+    breaks = PHRASE_BREAKS[language]
+    for position, word in enumerate(words):
+        if word in breaks or word.startswith(("d'", "l'")) and position > 0:
+            break
+        words[position] = articles.get(word) or pluralize_word(word, language)
+    return " ".join(words)
+
+
+def plural_table(language, phrases, known=()):
+    """
+    Lists the plural of every phrase (the index-build step).
+
+    Parameters:
+        language (str): Language of the phrases
+        phrases (iterable): Dictionary forms
+        known (container): Phrases already stored; a plural that is itself
+                           a stored phrase is left out, so the exact entry
+                           always wins
+
+    Returns:
+        dict: Plural -> dictionary form (the first phrase wins when two
+              share a plural)
+
+    Example:
+        >>> plural_table("english", ["headache", "nurse"])
+        {'headaches': 'headache', 'nurses': 'nurse'}
+    """
+    table = {}
+    if language not in PLURAL_RULES:
+        return table
+    for phrase in phrases:
+        add_plural(table, language, phrase, known)
+    return table
+
+
+def add_plural(table, language, phrase, known=()):
+    """
+    Adds one phrase's plural to a table built by plural_table().
+
+    Parameters:
+        table (dict): Plural -> dictionary form
+        language (str): Language of the phrase
+        phrase (str): Dictionary form
+        known (container): Phrases already stored (see plural_table())
+    """
+    plural = pluralize(phrase, language)
+    if plural != phrase and plural not in known:
+        table.setdefault(plural, phrase)
+
+
+# ============================================================================
+# MODULE TEST (runs only when module is executed directly)
+# ============================================================================
+if __name__ == "__main__":
+    import time
+
+    print("=== Inflection Module Test ===\n")
+
+    samples = {
+        "english": ["headache", "patient", "nurse", "x-ray", "diagnosis",
+                    "emergency", "blood test", "shortness of breath", "child"],
+        "spanish": ["dolor de cabeza", "doctor", "enfermera", "infección",
+                    "presión arterial", "análisis", "nariz", "análisis de sangre"],
+        "french": ["médecin", "mal de tête", "hôpital", "tension artérielle",
+                   "genou", "radiographie", "prise de sang", "nez"],
+    }
+    for language, phrases in samples.items():
+        print(f"{language}:")
+        for phrase in phrases:
+            print(f"  {phrase:<22} -> {pluralize(phrase, language)}")
+
+    phrases = [f"condition {number:06d} syndrome" for number in range(300000)]
+    start = time.perf_counter()
+    table = plural_table("english", phrases)
+    elapsed = time.perf_counter() - start
+    print(f"\nPlural table for {len(phrases):,} phrases: "
+          f"{elapsed / len(phrases) * 1e9:.0f} ns per phrase")
@@ -0,0 +1,392 @@
+"""
+Instrumentation Module for EMR Chatbot
+=======================================
+This module measures where time goes inside the chatbot.
+It demonstrates:
+- Counters for calls, hits and misses
+- HDR-style latency histograms (log-linear buckets, fixed memory)
+- Zero cost while disabled: functions are only wrapped by enable()
+- Optional allocation tracking per command with tracemalloc
+
+Instrumented entry points (wrapped by enable()):
+    utils.parse_translation_request / utils.parse_translation_pair
+    translation_module.translate (covers every translate_to_* / translate_from_*)
+    medical_terms.get_medical_translation
+Command dispatch in main.run_chatbot reports through command_started() and
+command_finished().
+
+Author: EMR Chatbot Team
+Date: 2026-10-19
+"""
+
+import functools
+import time
+
+# json and tracemalloc are imported inside the functions that use them, so
+# importing this module adds nothing to chatbot startup
+
+
+# ============================================================================
+# MODULE-LEVEL VARIABLES
+# ============================================================================
+
+# True while instrumentation is collecting data
+# Data Type: bool
+ENABLED = False
+
+# True while allocation tracking (tracemalloc) is on
+# Data Type: bool
+TRACK_ALLOCATIONS = False
+
+# True if enable() started tracemalloc itself (and so must stop it); a
+# profiler that started it first keeps it running
+# Data Type: bool
+_STARTED_TRACEMALLOC = False
+
+# Each power of two is split into 2**SUB_BUCKET_BITS buckets, so a recorded
+# latency is off by at most 1/8 (12.5%) of its value
+# Data Type: int
+SUB_BUCKET_BITS = 3
+
+# Data Type: dict - metric name -> Metric
+_METRICS = {}
+
+# Original functions replaced while enabled - (module, name, original)
+# Data Type: list of tuple
+_WRAPPED = []
+
+
+# ============================================================================
+# HISTOGRAM AND METRIC
+# ============================================================================
+
+class LatencyHistogram:
+    """
+    Fixed-size histogram of nanosecond latencies with log-linear buckets.
+
+    Recording is a few integer operations and one list increment, and the
+    memory used does not grow with the number of samples.
+    """
+
+    # Data Type: int - enough buckets for values up to 2**63 ns
+    BUCKET_COUNT = 64 << SUB_BUCKET_BITS
+
+    def __init__(self):
+        self.counts = [0] * self.BUCKET_COUNT
+        self.total = 0
+        self.max_value = 0
+
+    def record(self, value):
+        """Adds one latency sample (in nanoseconds)."""
+        self.counts[_bucket_index(value)] += 1
+        self.total += 1
+        if value > self.max_value:
+            self.max_value = value
+
+    def percentile(self, fraction):
+        """
+        Returns the upper bound of the bucket holding the given percentile.
+
+        Parameters:
+            fraction (float): Percentile as a fraction, e.g. 0.99
+
+        Returns:
+            int: Latency in nanoseconds (0 if nothing was recorded)
+        """
+        if not self.total:
+            return 0
+        rank = max(1, int(self.total * fraction + 0.5))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(_bucket_upper_bound(index), self.max_value)
+        return self.max_value
+
+
+def _bucket_index(value):
+    """Maps a non-negative integer to its log-linear bucket."""
+    if value < (1 << SUB_BUCKET_BITS):
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS - 1
+    return ((shift + 1) << SUB_BUCKET_BITS) + ((value >> shift) & ((1 << SUB_BUCKET_BITS) - 1))
+
+
+def _bucket_upper_bound(index):
+    """Returns the largest value that falls into a bucket."""
+    if index < (1 << SUB_BUCKET_BITS):
+        return index
+    shift = (index >> SUB_BUCKET_BITS) - 1
+    mantissa = (1 << SUB_BUCKET_BITS) | (index & ((1 << SUB_BUCKET_BITS) - 1))
+    return ((mantissa + 1) << shift) - 1
+
+
+class Metric:
+    """Counters and a latency histogram for one instrumented operation."""
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.hits = 0
+        self.misses = 0
+        self.bytes_allocated = 0
+        self.latency = LatencyHistogram()
+
+    def to_dict(self):
+        """Returns the metric as a JSON-friendly dictionary."""
+        lookups = self.hits + self.misses
+        return {
+            "name": self.name,
+            "calls": self.calls,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "p50_ns": self.latency.percentile(0.50),
+            "p95_ns": self.latency.percentile(0.95),
+            "p99_ns": self.latency.percentile(0.99),
+            "max_ns": self.latency.max_value,
+            "bytes_allocated": self.bytes_allocated,
+        }
+
+
+def get_metric(name):
+    """Returns the Metric for a name, creating it on first use."""
+    metric = _METRICS.get(name)
+    if metric is None:
+        metric = _METRICS[name] = Metric(name)
+    return metric
+
+
+def record(name, elapsed_ns, hit=None, allocated=0):
+    """
+    Records one call of an instrumented operation.
+
+    Parameters:
+        name (str): Metric name, e.g. "command.translate"
+        elapsed_ns (int): Latency in nanoseconds
+        hit (bool): True/False for lookups, None when not applicable
+        allocated (int): Bytes allocated during the call. Default is 0.
+    """
+    metric = get_metric(name)
+    metric.calls += 1
+    metric.latency.record(elapsed_ns)
+    if hit is True:
+        metric.hits += 1
+    elif hit is False:
+        metric.misses += 1
+    metric.bytes_allocated += allocated
+
+
+# ============================================================================
+# FUNCTION WRAPPING
+# ============================================================================
+
+def _wrap(module, attribute, name, is_hit=None):
+    """
+    Replaces module.attribute with a timed version of itself.
+
+    Because callers look functions up on the module at call time, the
+    wrapper is seen everywhere (including calls from inside the module).
+    """
+    original = getattr(module, attribute)
+    perf_counter_ns = time.perf_counter_ns
+
+    @functools.wraps(original)
+    def timed(*args, **kwargs):
+        started = perf_counter_ns()
+        result = original(*args, **kwargs)
+        record(name, perf_counter_ns() - started,
+               is_hit(result) if is_hit is not None else None)
+        return result
+
+    setattr(module, attribute, timed)
+    _WRAPPED.append((module, attribute, original))
+
+
+def _default_targets():
+    """Returns (module, attribute, metric name, hit test) for every hot path."""
+    import medical_terms
+    import translation_module
+    import utils
+
+    def translation_hit(result):
+        return not result.endswith("(translation not available)") \
+            and not result.startswith("Language '")
+
+    def medical_hit(result):
+        return not result.startswith("Medical term '") and not result.startswith("Language '")
+
+    def found(result):
+        return result is not None
+
+    def parse_hit(result):
+        return result[0]
+
+    return [
+        (utils, "parse_translation_request", "utils.parse_translation_request", parse_hit),
+        (utils, "parse_translation_pair", "utils.parse_translation_pair", parse_hit),
+        (translation_module, "translate", "translation_module.translate", translation_hit),
+        (translation_module, "find_translation", "translation_module.find_translation", found),
+        (medical_terms, "get_medical_translation", "medical_terms.get_medical_translation",
+         medical_hit),
+        (medical_terms, "find_medical_translation", "medical_terms.find_medical_translation",
+         found),
+    ]
+
+
+# ============================================================================
+# PUBLIC CONTROL FUNCTIONS
+# ============================================================================
+
+def enable(track_allocations=False):
+    """
+    Starts collecting metrics.
+
+    Parameters:
+        track_allocations (bool): Also record bytes allocated per command
+                                  (uses tracemalloc, which slows Python
+                                  noticeably). Default is False.
+    """
+    global ENABLED, TRACK_ALLOCATIONS, _STARTED_TRACEMALLOC
+    import tracemalloc
+
+    if not ENABLED:
+        for module, attribute, name, is_hit in _default_targets():
+            _wrap(module, attribute, name, is_hit)
+        ENABLED = True
+
+    if track_allocations and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _STARTED_TRACEMALLOC = True
+    TRACK_ALLOCATIONS = track_allocations and tracemalloc.is_tracing()
+
+
+def disable():
+    """Stops collecting metrics and restores the original functions."""
+    global ENABLED, TRACK_ALLOCATIONS, _STARTED_TRACEMALLOC
+
+    while _WRAPPED:
+        module, attribute, original = _WRAPPED.pop()
+        setattr(module, attribute, original)
+    if _STARTED_TRACEMALLOC:
+        import tracemalloc
+        tracemalloc.stop()
+        _STARTED_TRACEMALLOC = False
+    ENABLED = False
+    TRACK_ALLOCATIONS = False
+
+
+def reset():
+    """Forgets every recorded metric."""
+    _METRICS.clear()
+
+
+def command_started():
+    """
+    Marks the start of a chatbot command.
+
+    Returns:
+        tuple or None: Token for command_finished(), or None when disabled
+    """
+    if not ENABLED:
+        return None
+    if TRACK_ALLOCATIONS:
+        import tracemalloc
+        tracemalloc.reset_peak()
+        return (time.perf_counter_ns(), tracemalloc.get_traced_memory()[0])
+    return (time.perf_counter_ns(), 0)
+
+
+def command_finished(command, token):
+    """
+    Records a chatbot command started with command_started().
+
+    Parameters:
+        command (str): Command name, e.g. "translate"
+        token (tuple): Value returned by command_started()
+    """
+    if token is None:
+        return
+    started, memory_before = token
+    elapsed = time.perf_counter_ns() - started
+    allocated = 0
+    if TRACK_ALLOCATIONS:
+        import tracemalloc
+        allocated = max(0, tracemalloc.get_traced_memory()[1] - memory_before)
+    record(f"command.{command}", elapsed, allocated=allocated)
+
+
+# ============================================================================
+# REPORTING
+# ============================================================================
+
+def snapshot():
+    """
+    Returns every metric as a machine-readable dictionary.
+
+    Returns:
+        dict: {"enabled": bool, "track_allocations": bool, "metrics": [...]}
+    """
+    return {
+        "enabled": ENABLED,
+        "track_allocations": TRACK_ALLOCATIONS,
+        "metrics": [_METRICS[name].to_dict() for name in sorted(_METRICS)],
+    }
+
+
+def dump_json(path=None):
+    """
+    Writes the metrics as JSON to a file, or returns the JSON text.
+
+    Parameters:
+        path (str): Output file. Default is None (return a string).
+
+    Returns:
+        str: The JSON text
+    """
+    import json
+
+    text = json.dumps(snapshot(), indent=2)
+    if path:
+        with open(path, "w", encoding="utf-8") as handle:
+            handle.write(text)
+    return text
+
+
+def format_report():
+    """
+    Formats the metrics as a text table for the `stats` command.
+
+    Returns:
+        str: Multi-line report
+    """
+    if not _METRICS:
+        state = "on" if ENABLED else "off"
+        return f"No statistics recorded (instrumentation is {state}; use 'stats on')."
+
+    lines = [f"{'metric':<40} {'calls':>7} {'hit%':>6} {'p50 µs':>9} "
+             f"{'p95 µs':>9} {'p99 µs':>9} {'alloc KB':>9}"]
+    for item in snapshot()["metrics"]:
+        hit_ratio = item["hit_ratio"]
+        hit_text = f"{hit_ratio * 100:5.1f}" if hit_ratio is not None else "    -"
+        lines.append(
+            f"{item['name']:<40} {item['calls']:>7} {hit_text:>6} "
+            f"{item['p50_ns'] / 1000:>9.1f} {item['p95_ns'] / 1000:>9.1f} "
+            f"{item['p99_ns'] / 1000:>9.1f} {item['bytes_allocated'] / 1024:>9.1f}"
+        )
+    return "\n".join(lines)
+
+
+# ============================================================================
+# MODULE TEST (runs only when module is executed directly)
+# ============================================================================
+if __name__ == "__main__":
+    import translation_module
+
+    print("=== Instrumentation Module Test ===\n")
+
+    enable()
+    for word in ["hello", "patient", "xyz", "doctor"] * 250:
+        translation_module.translate_to_spanish(word)
+    disable()
+    print(format_report())
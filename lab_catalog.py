@@ -0,0 +1,243 @@
+"""
+Lab Catalog Module for EMR Chatbot
+===================================
+This module gives every lab test one canonical ID, whatever name a source
+uses for it. The CSV files say "Glucose" and "WBC"; the SQL schema tests
+filter on 'METABOLIC: GLUCOSE' and 'CBC: WHITE BLOOD CELL COUNT'. Compared
+as strings they never match, so the same cohort query would silently
+return nothing on one of the two sources.
+It demonstrates:
+- A catalog of canonical labs with their panel, SQL name and aliases
+  (abbreviations such as WBC/ALT/AST, full names, older names like SGPT)
+- Name normalization: case, spacing and punctuation variants and an
+  optional panel prefix ("metabolic:glucose", "Metabolic: Glucose ")
+  all reduce to the same key
+- Interned integer IDs: every alias key maps to a small int, compiled
+  once into one dictionary; a lab column is resolved at load time into an
+  array('H') of IDs, so filters compare integers instead of strings
+- Resolving each distinct name once (dictionary encoding from
+  column_translation), not once per row
+
+Author: EMR Chatbot Team
+Date: 2026-10-19
+"""
+
+import itertools
+from array import array
+
+import column_translation
+
+
+# ============================================================================
+# MODULE-LEVEL CONSTANTS
+# ============================================================================
+
+# ID stored for lab names that are not in the catalog
+# Data Type: int
+UNKNOWN_LAB = 0xFFFF
+
+# Canonical labs: (canonical name, panel, SQL name, aliases). The lab ID is
+# the position in this tuple, so new labs are only ever appended.
+# Data Type: tuple of tuples
+LABS = (
+    ("Glucose", "METABOLIC", "METABOLIC: GLUCOSE", ("GLU", "BLOOD GLUCOSE")),
+    ("Sodium", "METABOLIC", "METABOLIC: SODIUM", ("NA", "SERUM SODIUM")),
+    ("Potassium", "METABOLIC", "METABOLIC: POTASSIUM", ("K", "SERUM POTASSIUM")),
+    ("Chloride", "METABOLIC", "METABOLIC: CHLORIDE", ("CL",)),
+    ("Bicarbonate", "METABOLIC", "METABOLIC: CARBON DIOXIDE",
+     ("HCO3", "CO2", "TOTAL CO2", "CARBON DIOXIDE")),
+    ("BUN", "METABOLIC", "METABOLIC: BUN", ("BLOOD UREA NITROGEN", "UREA NITROGEN")),
+    ("Creatinine", "METABOLIC", "METABOLIC: CREATININE", ("CR", "CREAT")),
+    ("Calcium", "METABOLIC", "METABOLIC: CALCIUM", ("CA",)),
+    ("ALT", "METABOLIC", "METABOLIC: ALT/SGPT",
+     ("SGPT", "ALANINE AMINOTRANSFERASE", "ALANINE TRANSAMINASE")),
+    ("AST", "METABOLIC", "METABOLIC: AST/SGOT",
+     ("SGOT", "ASPARTATE AMINOTRANSFERASE", "ASPARTATE TRANSAMINASE")),
+    ("Alkaline Phosphatase", "METABOLIC", "METABOLIC: ALK PHOS", ("ALP", "ALK PHOS")),
+    ("Total Bilirubin", "METABOLIC", "METABOLIC: BILI TOTAL",
+     ("TBIL", "BILI TOTAL", "BILIRUBIN TOTAL", "BILIRUBIN")),
+    ("WBC", "CBC", "CBC: WHITE BLOOD CELL COUNT",
+     ("WHITE BLOOD CELL COUNT", "WHITE BLOOD CELLS", "LEUKOCYTES")),
+    ("Hemoglobin", "CBC", "CBC: HEMOGLOBIN", ("HGB", "HB", "HAEMOGLOBIN")),
+    ("Platelets", "CBC", "CBC: PLATELET COUNT", ("PLT", "PLATELET COUNT")),
+)
+
+# Panels used as name prefixes ("METABOLIC: GLUCOSE")
+# Data Type: set
+PANELS = {panel for _, panel, _, _ in LABS}
+
+# Characters treated as spaces when names are normalized
+# Data Type: dict - str.translate() table
+_SEPARATORS = str.maketrans({"_": " ", "-": " ", ",": " ", ".": " "})
+
+
+# ============================================================================
+# NAME NORMALIZATION
+# ============================================================================
+
+def normalize_name(name):
+    """
+    Reduces a lab name to its lookup key.
+
+    Parameters:
+        name (str): Lab name as written in some source
+
+    Returns:
+        tuple: (panel or None, key), e.g. ("METABOLIC", "GLUCOSE")
+
+    Example:
+        >>> normalize_name(" metabolic:glucose ")
+        ('METABOLIC', 'GLUCOSE')
+        >>> normalize_name("Alkaline-Phosphatase")
+        (None, 'ALKALINE PHOSPHATASE')
+    """
+    key = " ".join(name.upper().translate(_SEPARATORS).split())
+    panel, colon, rest = key.partition(":")
+    if colon and panel.strip() in PANELS:
+        return panel.strip(), rest.strip()
+    return None, key
+
+
+def _compile_aliases():
+    """
+    Builds the alias key -> lab ID dictionary (once, at import).
+
+    The canonical name, the SQL name without its panel, every alias and
+    each half of "ALT/SGPT"-style names all point at the same ID.
+    """
+    aliases = {}
+    for lab_id, (name, panel, sql_name, extra) in enumerate(LABS):
+        sql_key = normalize_name(sql_name)[1]
+        for alias in (name, sql_key) + extra + tuple(sql_key.split("/")):
+            key = normalize_name(alias)[1]
+            if aliases.setdefault(key, lab_id) != lab_id:
+                raise ValueError(f"Alias '{alias}' names two labs")
+    return aliases
+
+
+# Data Type: dict - normalized alias -> lab ID
+_ALIASES = _compile_aliases()
+
+
+# ============================================================================
+# RESOLVING NAMES
+# ============================================================================
+
+def resolve(name):
+    """
+    Returns the canonical lab ID of a lab name.
+
+    Parameters:
+        name (str): Lab name from the CSV, the SQL schema or a user
+
+    Returns:
+        int or None: Lab ID, or None if the name is unknown (or its panel
+                     prefix is the wrong panel for that lab)
+
+    Example:
+        >>> resolve("METABOLIC: GLUCOSE") == resolve("Glucose") == resolve("glu")
+        True
+        >>> resolve("CBC: GLUCOSE") is None
+        True
+    """
+    if not name:
+        return None
+    panel, key = normalize_name(name)
+    lab_id = _ALIASES.get(key)
+    if lab_id is None or (panel is not None and panel != LABS[lab_id][1]):
+        return None
+    return lab_id
+
+
+def canonical_name(lab_id):
+    """Returns the CSV-style name of a lab ID, e.g. "Glucose"."""
+    return LABS[lab_id][0]
+
+
+def sql_name(lab_id):
+    """Returns the SQL-schema name of a lab ID, e.g. "METABOLIC: GLUCOSE"."""
+    return LABS[lab_id][2]
+
+
+def resolve_column(names):
+    """
+    Resolves a whole LabName column to lab IDs (the ingest step).
+
+    Each distinct name is resolved once; the rows are then mapped through
+    the per-name IDs in C.
+
+    Parameters:
+        names (list): LabName values
+
+    Returns:
+        tuple: (array('H') of lab IDs with UNKNOWN_LAB for unknown names,
+                list of the distinct unknown names)
+    """
+    column = column_translation.encode(names)
+    ids = []
+    unknown = []
+    for name in column.dictionary:
+        lab_id = resolve(name)
+        if lab_id is None:
+            lab_id = UNKNOWN_LAB
+            if name:
+                unknown.append(name)
+        ids.append(lab_id)
+    return array("H", map(ids.__getitem__, column.codes)), unknown
+
+
+def matching_rows(lab_ids, name):
+    """
+    Returns the positions of rows for one lab (an integer compare per row).
+
+    Parameters:
+        lab_ids (array): LabID column from resolve_column()
+        name (str): Any name or alias of the lab
+
+    Returns:
+        list: Row positions (empty if the name is unknown)
+
+    Example:
+        >>> labs = emr_data.get_table("labs")
+        >>> len(matching_rows(labs.column("LabID"), "METABOLIC: GLUCOSE")) > 0
+        True
+    """
+    lab_id = resolve(name)
+    if lab_id is None:
+        return []
+    return list(itertools.compress(range(len(lab_ids)), map(lab_id.__eq__, lab_ids)))
+
+
+# ============================================================================
+# MODULE TEST (runs only when module is executed directly)
+# ============================================================================
+if __name__ == "__main__":
+    import time
+
+    import emr_data
+
+    print("=== Lab Catalog Module Test ===\n")
+
+    for name in ["Glucose", "METABOLIC: GLUCOSE", "metabolic:glucose", "WBC",
+                 "CBC: WHITE BLOOD CELL COUNT", "sgpt", "Alkaline-Phosphatase",
+                 "CBC: GLUCOSE", "Troponin"]:
+        lab_id = resolve(name)
+        label = f"{lab_id:>2} {canonical_name(lab_id)}" if lab_id is not None else " - unknown"
+        print(f"  {name:<30} -> {label}")
+
+    labs = emr_data.get_table("labs")
+    lab_ids = labs.column("LabID")
+    print(f"\nLabs table: {len(lab_ids):,} rows resolved at load, "
+          f"{len(lab_ids) * lab_ids.itemsize:,} bytes of IDs")
+
+    names = labs.column("LabName") * 100
+    ids = array("H", lab_ids) * 100
+    target = resolve("METABOLIC: GLUCOSE")
+    start = time.perf_counter()
+    by_string = sum(1 for name in names if name == "METABOLIC: GLUCOSE")
+    string_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    by_id = ids.count(target)
+    id_ms = (time.perf_counter() - start) * 1000
+    print(f"'METABOLIC: GLUCOSE' over {len(names):,} rows: string compare {by_string:,} "
+          f"matches in {string_ms:.1f} ms, lab ID {by_id:,} matches in {id_ms:.1f} ms")
@@ -0,0 +1,282 @@
+"""
+Lab Units Module for EMR Chatbot
+=================================
+This module converts lab values into one unit per lab, so a threshold
+such as "glucose > 150" means the same thing for every row, whichever unit
+the value was reported in (mg/dL or mmol/L, 10^3/uL or 10^9/L, ...).
+It demonstrates:
+- A conversion catalog keyed by (canonical lab, unit), with unit
+  spellings ("mg/dl", "K/uL", "IU/L") normalized first
+- Columnar conversion: the factor is worked out once per distinct
+  (lab, unit) pair, then the whole LabValue column is multiplied in one
+  pass of map() calls over arrays, with no Python-level loop per row
+- Flags instead of silent errors: a row whose unit cannot be converted
+  keeps NaN as its value, is flagged, and its (lab, unit) pair is counted
+  in a report
+
+Only multiplicative conversions are listed; every lab here has a zero
+point common to its units.
+
+Author: EMR Chatbot Team
+Date: 2026-10-19
+"""
+
+import itertools
+import operator
+from array import array
+
+import lab_catalog
+
+
+# ============================================================================
+# MODULE-LEVEL CONSTANTS
+# ============================================================================
+
+# Unit every lab is converted into (the unit the EMR files use)
+# Data Type: dict - canonical lab name -> unit
+CANONICAL_UNITS = {
+    "Glucose": "mg/dL",
+    "Sodium": "mmol/L",
+    "Potassium": "mmol/L",
+    "Chloride": "mmol/L",
+    "Bicarbonate": "mmol/L",
+    "BUN": "mg/dL",
+    "Creatinine": "mg/dL",
+    "Calcium": "mg/dL",
+    "ALT": "U/L",
+    "AST": "U/L",
+    "Alkaline Phosphatase": "U/L",
+    "Total Bilirubin": "mg/dL",
+    "WBC": "10^3/uL",
+    "Hemoglobin": "g/dL",
+    "Platelets": "10^3/uL",
+}
+
+# Factor from another unit to the lab's canonical unit
+# (canonical value = value * factor)
+# Data Type: dict - (canonical lab name, unit) -> float
+CONVERSIONS = {
+    ("Glucose", "mmol/L"): 18.016,
+    ("Sodium", "mEq/L"): 1.0,
+    ("Potassium", "mEq/L"): 1.0,
+    ("Chloride", "mEq/L"): 1.0,
+    ("Bicarbonate", "mEq/L"): 1.0,
+    ("BUN", "mmol/L"): 2.801,
+    ("Creatinine", "umol/L"): 1 / 88.42,
+    ("Calcium", "mmol/L"): 4.008,
+    ("Calcium", "mEq/L"): 2.004,
+    ("ALT", "ukat/L"): 60.0,
+    ("AST", "ukat/L"): 60.0,
+    ("Alkaline Phosphatase", "ukat/L"): 60.0,
+    ("Total Bilirubin", "umol/L"): 1 / 17.104,
+    ("WBC", "10^9/L"): 1.0,
+    ("Hemoglobin", "g/L"): 0.1,
+    ("Hemoglobin", "mmol/L"): 1.611,
+    ("Platelets", "10^9/L"): 1.0,
+}
+
+# Spellings of each unit, keyed by the normalized spelling (see
+# normalize_unit())
+# Data Type: dict - normalized spelling -> unit as used in CONVERSIONS
+UNIT_ALIASES = {
+    "mg/dl": "mg/dL",
+    "g/dl": "g/dL",
+    "g/l": "g/L",
+    "mmol/l": "mmol/L",
+    "umol/l": "umol/L",
+    "meq/l": "mEq/L",
+    "u/l": "U/L",
+    "iu/l": "U/L",
+    "ukat/l": "ukat/L",
+    "10^3/ul": "10^3/uL",
+    "x10^3/ul": "10^3/uL",
+    "10*3/ul": "10^3/uL",
+    "k/ul": "10^3/uL",
+    "thou/ul": "10^3/uL",
+    "10^9/l": "10^9/L",
+    "x10^9/l": "10^9/L",
+    "10*9/l": "10^9/L",
+}
+
+# Row flags stored by convert_column()
+# Data Type: int
+CONVERTED = 0
+UNKNOWN_UNIT = 1
+MISSING_VALUE = 2
+
+
+# ============================================================================
+# CONVERSION CATALOG
+# ============================================================================
+
+def normalize_unit(unit):
+    """
+    Returns the standard spelling of a unit.
+
+    Parameters:
+        unit (str): Unit as written in some source, e.g. " mg/dl"
+
+    Returns:
+        str or None: e.g. "mg/dL", or None if the spelling is unknown
+
+    Example:
+        >>> normalize_unit("K/uL")
+        '10^3/uL'
+    """
+    if not unit:
+        return None
+    key = unit.strip().lower().replace(" ", "").replace("µ", "u").replace("μ", "u")
+    return UNIT_ALIASES.get(key)
+
+
+def conversion_factor(lab_id, unit):
+    """
+    Returns the factor that converts one lab's values into its canonical
+    unit.
+
+    Parameters:
+        lab_id (int): Canonical lab ID (see lab_catalog)
+        unit (str): Unit of the values, any spelling
+
+    Returns:
+        float or None: The factor, or None if the lab or unit is unknown
+                       or there is no conversion between the units
+
+    Example:
+        >>> conversion_factor(lab_catalog.resolve("Glucose"), "mmol/l")
+        18.016
+    """
+    if lab_id is None or lab_id == lab_catalog.UNKNOWN_LAB:
+        return None
+    name = lab_catalog.canonical_name(lab_id)
+    spelling = normalize_unit(unit)
+    if spelling is None:
+        return None
+    if spelling == CANONICAL_UNITS.get(name):
+        return 1.0
+    return CONVERSIONS.get((name, spelling))
+
+
+def canonical_unit(lab_id):
+    """Returns the unit a lab's values are converted into (None if unknown)."""
+    if lab_id == lab_catalog.UNKNOWN_LAB:
+        return None
+    return CANONICAL_UNITS.get(lab_catalog.canonical_name(lab_id))
+
+
+# ============================================================================
+# COLUMN CONVERSION
+# ============================================================================
+
+def convert_column(lab_ids, units, values):
+    """
+    Converts a LabValue column into canonical units.
+
+    Parameters:
+        lab_ids (array): LabID column (lab_catalog.resolve_column())
+        units (list): LabUnits column
+        values (list): LabValue column (float or None)
+
+    Returns:
+        tuple: (array('d') of canonical values, NaN where a value is
+                missing or could not be converted;
+                array('B') of row flags: CONVERTED, UNKNOWN_UNIT or
+                MISSING_VALUE;
+                dict (lab ID, unit) -> row count for unconvertible pairs)
+    """
+    nan = float("nan")
+    rows = len(values)
+    # Data Type: list - distinct units; their position is the unit code
+    unit_names = list(set(units))
+    unit_code = {unit: code for code, unit in enumerate(unit_names)}
+    unit_count = len(unit_names)
+
+    # One integer key per row for its (lab, unit) pair:
+    # lab ID * number of units + unit code
+    keys = array("L", map(operator.add,
+                          map(operator.mul, lab_ids, itertools.repeat(unit_count)),
+                          map(unit_code.__getitem__, units)))
+
+    # The factor of each distinct pair, looked up once
+    factors = {}
+    unknown_keys = set()
+    for key in set(keys):
+        lab_id, code = divmod(key, unit_count)
+        factor = conversion_factor(lab_id, unit_names[code])
+        if factor is None:
+            unknown_keys.add(key)
+            factor = nan
+        factors[key] = factor
+
+    # Flags start as CONVERTED; only the (rare) other rows are visited
+    flags = array("B", bytes(rows))
+    unknown = {}
+    if unknown_keys:
+        for row in itertools.compress(range(rows), map(unknown_keys.__contains__, keys)):
+            flags[row] = UNKNOWN_UNIT
+            lab_id, code = divmod(keys[row], unit_count)
+            pair = (lab_id, unit_names[code])
+            unknown[pair] = unknown.get(pair, 0) + 1
+    if None in values:
+        for row in itertools.compress(range(rows),
+                                      map(operator.is_, values, itertools.repeat(None))):
+            flags[row] = MISSING_VALUE
+        values = [nan if value is None else value for value in values]
+
+    converted = array("d", map(operator.mul, values, map(factors.__getitem__, keys)))
+    return converted, flags, unknown
+
+
+def format_unknown(unknown):
+    """
+    Formats the unconvertible (lab, unit) pairs of convert_column().
+
+    Parameters:
+        unknown (dict): (lab ID, unit) -> row count
+
+    Returns:
+        str: One line per pair, most rows first ("" if there are none)
+    """
+    lines = []
+    for (lab_id, unit), count in sorted(unknown.items(), key=lambda item: -item[1]):
+        name = (lab_catalog.canonical_name(lab_id)
+                if lab_id != lab_catalog.UNKNOWN_LAB else "(unknown lab)")
+        lines.append(f"{name} in '{unit}': {count:,} rows not converted")
+    return "\n".join(lines)
+
+
+# ============================================================================
+# MODULE TEST (runs only when module is executed directly)
+# ============================================================================
+if __name__ == "__main__":
+    import sys
+    import time
+
+    import emr_data
+
+    print("=== Lab Units Module Test ===\n")
+
+    glucose = lab_catalog.resolve("Glucose")
+    for unit in ["mg/dL", "mmol/l", "MG/DL", "mg%"]:
+        print(f"  Glucose in {unit!r:<9} factor {conversion_factor(glucose, unit)}")
+
+    labs = emr_data.get_table("labs")
+    values = labs.column("LabValueCanonical")
+    flags = labs.column("LabUnitFlag")
+    print(f"\nLabs table: {len(values):,} rows, {flags.count(CONVERTED):,} converted, "
+          f"{flags.count(UNKNOWN_UNIT):,} unknown units, {flags.count(MISSING_VALUE):,} missing")
+
+    # The full lab volume in the schema is ~107M rows; time a scaled copy
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10000000
+    repeat = rows // len(labs) + 1
+    ids = (labs.column("LabID") * repeat)[:rows]
+    units = (labs.column("LabUnits") * repeat)[:rows]
+    raw = (labs.column("LabValue") * repeat)[:rows]
+    units[::100000] = ["mg%"] * len(units[::100000])
+
+    start = time.perf_counter()
+    converted, flags, unknown = convert_column(ids, units, raw)
+    elapsed = time.perf_counter() - start
+    print(f"\n{rows:,} rows converted in {elapsed:.2f} s "
+          f"({rows / elapsed / 1e6:.1f}M rows/s)")
+    print(format_unknown(unknown))
@@ -0,0 +1,204 @@
+"""
+Language Detector Module for EMR Chatbot
+=========================================
+This module guesses which language a phrase is written in, so users can
+type `translate "dolor de cabeza"` without naming the source language.
+It demonstrates:
+- Exact membership checks against the loaded lexicon (one dict probe per
+  language)
+- Character trigram profiles with log-probabilities for phrases that are
+  not in the lexicon (or are in more than one language)
+- Precomputing everything once so each detection costs a few microseconds
+
+Author: EMR Chatbot Team
+Date: 2026-10-19
+"""
+
+import math
+
+
+# ============================================================================
+# MODULE-LEVEL CONSTANTS
+# ============================================================================
+
+# Length of the character n-grams used by the profiles
+# Data Type: int
+NGRAM_SIZE = 3
+
+# Profiles are built from at most this many phrases per language; a sample
+# is enough to learn letter patterns and keeps startup fast on 1M-entry
+# glossaries
+# Data Type: int
+MAX_PROFILE_PHRASES = 50000
+
+# Extra log-score per word of the text found in a language's lexicon
+# Data Type: float
+WORD_MATCH_BONUS = 4.0
+
+# Short samples of common words, so the profiles also know the function
+# words ("de", "la", "le", "the") that rarely appear alone in a glossary
+# Data Type: dict - language -> str
+SEED_TEXT = {
+    "english": "the of and to in is for with on at by this that from patient pain",
+    "spanish": "el la los las de del que y en por para con una un es dolor señor",
+    "french": "le la les des du de et en pour avec une un est au aux douleur où",
+}
+
+
+# ============================================================================
+# HELPER FUNCTIONS
+# ============================================================================
+
+def iter_ngrams(text, size=NGRAM_SIZE):
+    """
+    Yields the character n-grams of a phrase padded with spaces.
+
+    Parameters:
+        text (str): Normalized text
+        size (int): N-gram length. Default is NGRAM_SIZE.
+
+    Example:
+        >>> list(iter_ngrams("tos"))
+        [' to', 'tos', 'os ']
+    """
+    padded = f" {text} "
+    for start in range(len(padded) - size + 1):
+        yield padded[start:start + size]
+
+
+# ============================================================================
+# DETECTOR
+# ============================================================================
+
+class LanguageDetector:
+    """
+    Detects the language of short phrases.
+
+    Detection order:
+    1. If the whole phrase is in exactly one language's lexicon, use it.
+    2. Otherwise score each candidate language (all languages, or just the
+       ones whose lexicon contains the phrase) with its trigram profile,
+       plus a bonus for every word found in that language's lexicon.
+
+    Attributes:
+        languages (tuple): Languages the detector can return
+    """
+
+    def __init__(self, snapshot, seed_text=None):
+        """
+        Builds trigram profiles from every surface form in a snapshot.
+
+        Parameters:
+            snapshot (lexicon_store.LexiconSnapshot): Source of phrases
+            seed_text (dict): Extra text per language. Default is SEED_TEXT.
+        """
+        self.languages = snapshot.languages
+        seed_text = SEED_TEXT if seed_text is None else seed_text
+
+        # Data Type: list of dict - trigram counts per language
+        counts = []
+        for language in self.languages:
+            language_counts = {}
+            phrases = snapshot.sample_forms(language, MAX_PROFILE_PHRASES)
+            phrases.extend(seed_text.get(language, "").split())
+            for phrase in phrases:
+                for gram in iter_ngrams(phrase):
+                    language_counts[gram] = language_counts.get(gram, 0) + 1
+            counts.append(language_counts)
+
+        vocabulary = set()
+        for language_counts in counts:
+            vocabulary.update(language_counts)
+        totals = [sum(language_counts.values()) + len(vocabulary)
+                  for language_counts in counts]
+
+        # One tuple of log-probabilities per trigram (add-one smoothing)
+        # Data Type: dict - trigram -> tuple of float
+        self._scores = {
+            gram: tuple(math.log((language_counts.get(gram, 0) + 1) / total)
+                        for language_counts, total in zip(counts, totals))
+            for gram in vocabulary
+        }
+        # Data Type: tuple of float - score of a trigram never seen anywhere
+        self._unseen = tuple(math.log(1 / total) for total in totals)
+
+    def detect(self, text, snapshot, glossaries=()):
+        """
+        Returns the most likely language of a normalized phrase.
+
+        Parameters:
+            text (str): Normalized phrase (lowercase, trimmed)
+            snapshot (lexicon_store.LexiconSnapshot): Current lexicon used
+                     for membership checks
+            glossaries (iterable): Other snapshots whose phrases also count
+                     as known (e.g. the medical category stores).
+                     Default is none.
+
+        Returns:
+            str: One of self.languages
+
+        Example:
+            >>> detector.detect("dolor de cabeza", snapshot)
+            'spanish'
+        """
+        languages = self.languages
+        # Data Type: tuple of LexiconSnapshot - every store checked for
+        # membership (contains() leaves the Bloom filter counters alone)
+        stores = (snapshot, *glossaries)
+
+        def known(language, phrase):
+            return any(store.contains(language, phrase) for store in stores)
+
+        # Step 1: exact membership in each language's lexicon
+        # Data Type: list of int - indexes of languages containing the text
+        matches = [position for position, language in enumerate(languages)
+                   if known(language, text)]
+        if len(matches) == 1:
+            return languages[matches[0]]
+        candidates = matches or range(len(languages))
+
+        # Step 2: trigram log-likelihood per candidate language
+        scores = [0.0] * len(languages)
+        unseen = self._unseen
+        lookup = self._scores.get
+        for gram in iter_ngrams(text):
+            row = lookup(gram, unseen)
+            for position in candidates:
+                scores[position] += row[position]
+
+        # Step 3: bonus for words that are known in a language
+        words = text.split()
+        if len(words) > 1:
+            for word in words:
+                for position in candidates:
+                    if known(languages[position], word):
+                        scores[position] += WORD_MATCH_BONUS
+
+        return languages[max(candidates, key=scores.__getitem__)]
+
+
+# ============================================================================
+# MODULE TEST (runs only when module is executed directly)
+# ============================================================================
+if __name__ == "__main__":
+    import time
+
+    import translation_module
+
+    print("=== Language Detector Module Test ===\n")
+
+    snapshot = translation_module._LEXICON.snapshot()
+    detector = LanguageDetector(snapshot)
+
+    samples = ["dolor de cabeza", "mal de tête", "blood pressure",
+               "dolor de espalda", "douleur thoracique", "headaches"]
+    for sample in samples:
+        print(f"  '{sample}' -> {detector.detect(sample, snapshot)}")
+
+    rounds = 20000
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for sample in samples:
+            detector.detect(sample, snapshot)
+    elapsed = time.perf_counter() - start
+    print(f"\nAverage detection time: {elapsed / (rounds * len(samples)) * 1e6:.1f} µs")
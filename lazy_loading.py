@@ -0,0 +1,107 @@
+"""
+Lazy Loading Module for EMR Chatbot
+====================================
+This module defers building large data structures until they are used.
+It demonstrates:
+- Module-level proxies: a placeholder object stands in for a global
+  variable and builds the real value on first use
+- Self-replacement: once built, the real value is written back into the
+  module, so later lookups cost nothing extra
+- Thread-safe one-time initialization with a lock
+
+Example:
+    # In translation_module.py
+    _LEXICON = lazy_loading.LazyGlobal(__name__, "_LEXICON", _build_lexicon)
+
+    # The first _LEXICON.snapshot() call runs _build_lexicon(); afterwards
+    # translation_module._LEXICON is the real VersionedLexicon.
+
+Author: EMR Chatbot Team
+Date: 2026-10-19
+"""
+
+import sys
+import threading
+
+
+# Marker for "not built yet"
+# Data Type: object (unique sentinel, compared with "is")
+_UNSET = object()
+
+
+class LazyGlobal:
+    """
+    Placeholder for a module-level variable that is built on first use.
+
+    Attribute access, iteration, len(), "in" and [] are forwarded to the
+    real value, so code written for the real object works unchanged.
+    """
+
+    def __init__(self, module_name, attribute, factory):
+        """
+        Parameters:
+            module_name (str): Module holding the variable (use __name__)
+            attribute (str): Name of the module-level variable
+            factory (callable): Builds the real value (no arguments)
+        """
+        self._module_name = module_name
+        self._attribute = attribute
+        self._factory = factory
+        self._value = _UNSET
+        self._lock = threading.Lock()
+
+    def materialize(self):
+        """
+        Builds the value if needed and returns it.
+
+        Returns:
+            object: The real value
+        """
+        value = self._value
+        if value is not _UNSET:
+            return value
+        with self._lock:
+            if self._value is _UNSET:
+                self._value = self._factory()
+                # Replace the proxy in its module so later lookups skip it
+                module = sys.modules.get(self._module_name)
+                if module is not None and getattr(module, self._attribute, None) is self:
+                    setattr(module, self._attribute, self._value)
+            return self._value
+
+    def is_materialized(self):
+        """Returns True once the real value has been built."""
+        return self._value is not _UNSET
+
+    def __getattr__(self, name):
+        # Only called for attributes the proxy itself does not have
+        return getattr(self.materialize(), name)
+
+    def __iter__(self):
+        return iter(self.materialize())
+
+    def __len__(self):
+        return len(self.materialize())
+
+    def __contains__(self, item):
+        return item in self.materialize()
+
+    def __getitem__(self, key):
+        return self.materialize()[key]
+
+    def __repr__(self):
+        state = "built" if self.is_materialized() else "not built"
+        return f"<LazyGlobal {self._module_name}.{self._attribute} ({state})>"
+
+
+def is_materialized(value):
+    """
+    Returns True if a value is real (or a LazyGlobal that has been built).
+
+    Parameters:
+        value (object): A module-level variable that may be a LazyGlobal
+
+    Returns:
+        bool: False only for a LazyGlobal that has not been built yet
+    """
+    return not isinstance(value, LazyGlobal) or value.is_materialized()
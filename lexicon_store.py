@@ -0,0 +1,658 @@
+"""
+Lexicon Store Module for EMR Chatbot
+=====================================
+This module keeps the translation data in a versioned, copy-on-write store
+of language-independent concepts.
+It demonstrates:
+- Concept IDs: one entry per concept with a surface form in N languages
+- Immutable snapshots: readers grab one object and never take a lock
+- Copy-on-write: writers build a new snapshot and publish it in one step
+- Batching: several updates are published together as one new version
+- Thread safety: a single writer lock serializes publishers
+- Negative caching: per-language Bloom filters, built whenever a snapshot
+  is compiled, reject most unknown phrases before any table is probed
+- Inflection tables, also built at compile time, map plural forms to the
+  stored phrase ("headaches" -> "headache"); translations found that way
+  are pluralized in the target language
+
+Readers always see either the old or the new version of the lexicon, never
+a half-applied update (e.g. a term that exists in Spanish but not in French).
+
+Author: EMR Chatbot Team
+Date: 2026-10-19
+"""
+
+import collections
+import math
+import threading
+from contextlib import contextmanager
+from types import MappingProxyType
+
+import bloom_filter
+import inflection
+
+
+# ============================================================================
+# MODULE-LEVEL CONSTANTS
+# ============================================================================
+
+# Marker stored in a delta reverse table when a base entry has been replaced
+# Data Type: object (unique sentinel, compared with "is")
+_TOMBSTONE = object()
+
+# The delta layer is merged into the base once it grows past this many
+# entries (or past 2 * sqrt(base size), whichever is larger). Each write
+# copies the delta and each compaction copies the base, so a square-root
+# sized delta balances the two costs while lookups stay at two probes.
+# Data Type: int
+MIN_COMPACTION_SIZE = 256
+
+
+# ============================================================================
+# SNAPSHOT (concept-ID store)
+# ============================================================================
+
+class LexiconSnapshot:
+    """
+    One immutable version of the lexicon, stored as numbered concepts.
+
+    Every concept (e.g. "headache") has an integer ID and one surface form
+    per language. Each language keeps two structures:
+    - forms: concept ID -> surface form (a tuple indexed by ID)
+    - index: surface form -> concept ID (a dict)
+    so translating between ANY two languages is one index probe on the
+    source side and one form lookup on the target side, and memory grows
+    with concepts x languages rather than with language pairs.
+
+    A snapshot is made of a large "base" layer and a small "delta" layer of
+    recent updates. Both layers are read-only; a snapshot is never modified
+    after it is published.
+
+    Attributes:
+        version (int): Monotonically increasing version number
+        languages (tuple): Languages stored for each concept. The first one
+                           (the pivot, "english") identifies a concept when
+                           translations are added.
+    """
+
+    __slots__ = ("version", "languages", "_base_forms", "_base_index",
+                 "_delta_forms", "_delta_index", "_size", "_filters",
+                 "false_positive_rate", "_plurals")
+
+    def __init__(self, version, languages, base_forms, base_index,
+                 delta_forms=None, delta_index=None, size=None, filters=None,
+                 false_positive_rate=bloom_filter.DEFAULT_FALSE_POSITIVE_RATE,
+                 plurals=None):
+        self.version = version
+        self.languages = tuple(languages)
+        # Data Type: dict of tuple (ID -> form) / MappingProxyType (form -> ID)
+        self._base_forms = {lang: tuple(base_forms[lang]) for lang in self.languages}
+        self._base_index = _freeze_all(base_index)
+        self._delta_forms = _freeze_all(
+            delta_forms or {lang: {} for lang in self.languages})
+        self._delta_index = _freeze_all(
+            delta_index or {lang: {} for lang in self.languages})
+        if size is None:
+            size = max((len(forms) for forms in self._base_forms.values()), default=0)
+        self._size = size
+        self.false_positive_rate = false_positive_rate
+        # Data Type: dict - language -> BloomFilter over every indexed form.
+        # Delta snapshots share their parent's filters (writers only ever
+        # set bits, which older snapshots can safely see).
+        if filters is None:
+            filters = {lang: self._build_filter(lang) for lang in self.languages}
+        self._filters = filters
+        # Data Type: dict - language -> {plural form: stored phrase}, shared
+        # with delta snapshots like the filters
+        if plurals is None:
+            plurals = {lang: self._build_plurals(lang) for lang in self.languages}
+        self._plurals = plurals
+
+    def _build_filter(self, language):
+        """Builds the Bloom filter for one language (the compile step)."""
+        # Room for the delta layer to fill up before the next compaction
+        forms = len(self._base_index[language]) + len(self._delta_index[language])
+        headroom = max(MIN_COMPACTION_SIZE, 2 * math.isqrt(self._size))
+        bloom = bloom_filter.BloomFilter(forms + headroom, self.false_positive_rate)
+        bloom.update(self._base_index[language])
+        bloom.update(self._delta_index[language])
+        return bloom
+
+    def _build_plurals(self, language):
+        """Builds the plural -> phrase table for one language (compile step)."""
+        known = self._base_index[language]
+        table = inflection.plural_table(language, known, known)
+        for text, concept in self._delta_index[language].items():
+            if concept is not _TOMBSTONE:
+                inflection.add_plural(table, language, text, known)
+        return table
+
+    @property
+    def pivot(self):
+        """The language whose surface form identifies a concept."""
+        return self.languages[0]
+
+    def concept_id(self, language, text):
+        """
+        Returns the concept ID for a normalized surface form.
+
+        Parameters:
+            language (str): Language of the text (e.g. "spanish")
+            text (str): Normalized phrase in that language
+
+        Returns:
+            int or None: The concept ID, or None if not found
+        """
+        bloom = self._filters[language]
+        if text not in bloom:
+            return None
+        concept = self._delta_index[language].get(text)
+        if concept is None:
+            concept = self._base_index[language].get(text)
+        elif concept is _TOMBSTONE:
+            concept = None
+        if concept is None:
+            bloom.record_false_positive()
+        return concept
+
+    def contains(self, language, text):
+        """
+        Checks whether a normalized surface form is in the lexicon.
+
+        Unlike concept_id(), this skips the Bloom filter, so membership
+        checks (e.g. language detection) do not count as lookups in the
+        filter statistics.
+
+        Parameters:
+            language (str): Language of the text (any language; one the
+                            snapshot does not have never matches)
+            text (str): Normalized phrase in that language
+
+        Returns:
+            bool: True if the phrase is a current surface form
+        """
+        return self.find_concept(language, text) is not None
+
+    def find_concept(self, language, text):
+        """
+        Returns the concept ID for a normalized surface form, like
+        concept_id() but without the Bloom filter or its counters (for
+        bookkeeping that is not a user lookup).
+
+        Parameters:
+            language (str): Language of the text (one the snapshot does
+                            not have never matches)
+            text (str): Normalized phrase in that language
+
+        Returns:
+            int or None: The concept ID, or None if not found
+        """
+        if language not in self._base_index:
+            return None
+        concept = self._delta_index[language].get(text)
+        if concept is None:
+            return self._base_index[language].get(text)
+        return None if concept is _TOMBSTONE else concept
+
+    def form(self, language, concept):
+        """
+        Returns the surface form of a concept in one language.
+
+        Parameters:
+            language (str): Target language
+            concept (int): Concept ID from concept_id()
+
+        Returns:
+            str or None: The surface form, or None if the concept has no
+                         form in that language
+        """
+        value = self._delta_forms[language].get(concept)
+        if value is not None:
+            return value
+        forms = self._base_forms[language]
+        return forms[concept] if concept < len(forms) else None
+
+    def translate(self, source_language, target_language, text):
+        """
+        Translates a normalized phrase between any two stored languages.
+
+        Parameters:
+            source_language (str): Language of the text
+            target_language (str): Language to translate into
+            text (str): Normalized phrase in the source language
+
+        Returns:
+            str or None: The translation, or None if not found. A plural
+                         of a stored phrase is translated to the plural
+                         of its translation.
+
+        Example:
+            >>> snapshot.translate("spanish", "french", "dolor de cabeza")
+            'mal de tête'
+            >>> snapshot.translate("english", "spanish", "headaches")
+            'dolores de cabeza'
+        """
+        concept = self.concept_id(source_language, text)
+        if concept is not None:
+            return self.form(target_language, concept)
+        lemma = self.lemma(source_language, text)
+        if lemma is None:
+            return None
+        concept = self.concept_id(source_language, lemma)
+        translation = self.form(target_language, concept) if concept is not None else None
+        if translation is None:
+            return None
+        return inflection.pluralize(translation, target_language)
+
+    def lemma(self, language, text):
+        """
+        Returns the stored phrase a plural was made from.
+
+        Parameters:
+            language (str): Language of the text
+            text (str): Normalized phrase that may be a plural
+
+        Returns:
+            str or None: The singular phrase, or None if the text is not
+                         the plural of a stored phrase
+
+        Example:
+            >>> snapshot.lemma("english", "headaches")
+            'headache'
+        """
+        plurals = self._plurals.get(language)
+        return plurals.get(text) if plurals is not None else None
+
+    def shared_forms(self, language):
+        """
+        Lists the surface forms the index alone cannot resolve.
+
+        The index maps a form to one concept only (the first), so this
+        finds the others: forms held by several concepts ("alta" for both
+        "discharge" and "high"), and forms whose holder is no longer
+        indexed because an earlier owner gave the form up.
+
+        Parameters:
+            language (str): Language to scan
+
+        Returns:
+            dict: Form -> list of concept IDs holding it, lowest first
+        """
+        forms = list(self._base_forms[language])
+        forms.extend([None] * (self._size - len(forms)))
+        for concept, text in self._delta_forms[language].items():
+            forms[concept] = text
+        # Counting and the set operations run in C; the second pass only
+        # happens if some form needs listing
+        counts = collections.Counter(forms)
+        counts.pop(None, None)
+        indexed = set(self._base_index[language])
+        for text, concept in self._delta_index[language].items():
+            if concept is _TOMBSTONE:
+                indexed.discard(text)
+            else:
+                indexed.add(text)
+        listed = {text for text, count in counts.items() if count > 1}
+        listed.update(counts.keys() - indexed)
+        shared = {text: [] for text in listed}
+        if shared:
+            for concept, text in enumerate(forms):
+                holders = shared.get(text)
+                if holders is not None:
+                    holders.append(concept)
+        return shared
+
+    def phrases(self, language=None):
+        """
+        Returns every surface form stored for one language.
+
+        Parameters:
+            language (str): Language to list. Default is the pivot language.
+
+        Returns:
+            set: Surface forms (base plus delta)
+        """
+        language = language or self.pivot
+        # Data Type: set - None marks concepts without a form in this language
+        phrases = set(self._base_forms[language])
+        phrases.update(self._delta_forms[language].values())
+        phrases.discard(None)
+        return phrases
+
+    def sample_forms(self, language, limit):
+        """
+        Returns an evenly spaced sample of a language's base surface forms.
+
+        The sample is taken by stride from the base form list, so it is the
+        same on every run and no set of all forms is built.
+
+        Parameters:
+            language (str): Language to sample
+            limit (int): Largest number of forms to return
+
+        Returns:
+            list: Up to limit surface forms, in concept order
+        """
+        forms = self._base_forms[language]
+        step = max(1, -(-len(forms) // max(limit, 1)))
+        # Data Type: list - concepts without a form in this language are skipped
+        return [form for form in forms[::step] if form is not None][:limit]
+
+    def concepts(self):
+        """
+        Iterates over every concept with its surface forms.
+
+        Returns:
+            iterator: (concept ID, dict of language -> form) pairs; languages
+                      without a form are left out
+        """
+        languages = self.languages
+        for concept in range(self._size):
+            forms = {}
+            for language in languages:
+                value = self.form(language, concept)
+                if value is not None:
+                    forms[language] = value
+            if forms:
+                yield concept, forms
+
+    def filter_stats(self):
+        """
+        Returns the Bloom filter statistics for each language.
+
+        Returns:
+            dict: Language -> BloomFilter.stats() dictionary
+        """
+        return {lang: self._filters[lang].stats() for lang in self.languages}
+
+    def delta_size(self):
+        """Returns the largest number of per-language forms in the delta layer."""
+        return max(len(forms) for forms in self._delta_forms.values())
+
+    def __len__(self):
+        return self._size
+
+
+def _freeze_all(tables):
+    """Wraps each table in a read-only view (existing views are shared)."""
+    return {lang: table if isinstance(table, MappingProxyType)
+            else MappingProxyType(table)
+            for lang, table in tables.items()}
+
+
+def build_snapshot(rows, languages, version=0,
+                   false_positive_rate=bloom_filter.DEFAULT_FALSE_POSITIVE_RATE):
+    """
+    Builds a snapshot from concept rows.
+
+    Parameters:
+        rows (iterable): One dict per concept, mapping language -> surface
+                         form. Every row must contain the pivot language
+                         (languages[0]); other languages are optional.
+        languages (list): Languages to store, pivot first
+        version (int): Version number for the snapshot. Default is 0.
+        false_positive_rate (float): Target rate of the Bloom filters.
+                                     Default is 0.01.
+
+    Returns:
+        LexiconSnapshot: A compacted snapshot with an empty delta layer
+
+    Example:
+        >>> snap = build_snapshot([{"english": "hello", "spanish": "hola"}],
+        ...                       ["english", "spanish"])
+        >>> snap.translate("spanish", "english", "hola")
+        'hello'
+    """
+    pivot = languages[0]
+    forms = {lang: [] for lang in languages}
+    index = {lang: {} for lang in languages}
+
+    for row in rows:
+        concept = index[pivot].get(row[pivot])
+        if concept is None:
+            concept = len(forms[pivot])
+            for lang in languages:
+                forms[lang].append(None)
+        for lang in languages:
+            text = row.get(lang)
+            if text is None:
+                continue
+            forms[lang][concept] = text
+            # setdefault keeps the first concept for a shared surface form,
+            # e.g. "bonjour" -> "hello" rather than "good morning"
+            index[lang].setdefault(text, concept)
+
+    return LexiconSnapshot(version, languages, forms, index,
+                           false_positive_rate=false_positive_rate)
+
+
+def rows_from_tables(pivot, tables):
+    """
+    Converts pivot-to-X dictionaries into concept rows.
+
+    Parameters:
+        pivot (str): The pivot language (e.g. "english")
+        tables (dict): Mapping of language -> {pivot phrase: translation}
+
+    Returns:
+        list: One dict per pivot phrase, e.g.
+              {"english": "hello", "spanish": "hola", "french": "bonjour"}
+    """
+    # Data Type: dict - pivot phrase -> row (keeps first-seen order)
+    rows = {}
+    for lang, table in tables.items():
+        for phrase, translated in table.items():
+            rows.setdefault(phrase, {pivot: phrase})[lang] = translated
+    return list(rows.values())
+
+
+# ============================================================================
+# VERSIONED LEXICON (single writer lock, lock-free readers)
+# ============================================================================
+
+class VersionedLexicon:
+    """
+    Holds the current LexiconSnapshot and publishes new versions atomically.
+
+    Readers call snapshot() and use the returned object for the whole
+    request. Writers call apply_batch() (or use the batch() context
+    manager); each call copies only the small delta layer, applies all of
+    its updates and replaces the published snapshot with a single reference
+    assignment.
+
+    Example:
+        >>> lexicon = VersionedLexicon(build_snapshot([], ["english", "french"]))
+        >>> with lexicon.batch() as batch:
+        ...     batch.add({"english": "cough", "french": "toux"})
+        >>> lexicon.snapshot().translate("english", "french", "cough")
+        'toux'
+    """
+
+    def __init__(self, snapshot):
+        self._write_lock = threading.Lock()
+        self._snapshot = snapshot
+
+    def snapshot(self):
+        """
+        Returns the current snapshot without locking.
+
+        Returns:
+            LexiconSnapshot: The most recently published version
+        """
+        # Reading one attribute is atomic, so no lock is needed here
+        return self._snapshot
+
+    def apply_batch(self, updates):
+        """
+        Applies a batch of updates and publishes them as one new version.
+
+        Parameters:
+            updates (list): One dict per concept, mapping language -> surface
+                            form. The pivot language form identifies the
+                            concept; it is created if it does not exist yet.
+
+        Returns:
+            LexiconSnapshot: The newly published snapshot
+        """
+        with self._write_lock:
+            published = self._apply(self._snapshot, updates)
+            self._snapshot = published
+            return published
+
+    def publish(self, snapshot, replay=()):
+        """
+        Replaces the whole lexicon with a snapshot built elsewhere (e.g. by a
+        background reload) and publishes it as the next version.
+
+        The snapshot can take seconds to build; only this swap (plus the
+        replayed updates) runs under the writer lock, and readers keep using
+        the previous version until the single reference assignment.
+
+        Parameters:
+            snapshot (LexiconSnapshot): New contents, from build_snapshot()
+            replay (list): Updates re-applied on top of the new contents
+                           (e.g. custom translations that must survive the
+                           reload). Default is none.
+
+        Returns:
+            LexiconSnapshot: The newly published snapshot
+        """
+        with self._write_lock:
+            current = self._snapshot
+            published = LexiconSnapshot(
+                current.version + 1, snapshot.languages,
+                snapshot._base_forms, snapshot._base_index,
+                snapshot._delta_forms, snapshot._delta_index, len(snapshot),
+                snapshot._filters, snapshot.false_positive_rate,
+                snapshot._plurals,
+            )
+            if replay:
+                published = self._apply(published, replay)
+            self._snapshot = published
+            return published
+
+    def _apply(self, current, updates):
+        """Builds the snapshot that follows `current` (called under lock)."""
+        languages = current.languages
+        pivot = current.pivot
+
+        # Copy-on-write: only the delta layer is copied
+        delta_forms = {lang: dict(current._delta_forms[lang])
+                       for lang in languages}
+        delta_index = {lang: dict(current._delta_index[lang])
+                       for lang in languages}
+        size = len(current)
+
+        def find_concept(lang, text):
+            concept = delta_index[lang].get(text)
+            if concept is _TOMBSTONE:
+                return None
+            if concept is not None:
+                return concept
+            return current._base_index[lang].get(text)
+
+        for forms in updates:
+            concept = find_concept(pivot, forms[pivot])
+            if concept is None:
+                concept = size
+                size += 1
+            for lang in languages:
+                new_value = forms.get(lang)
+                if new_value is None:
+                    continue
+                old_value = delta_forms[lang].get(concept)
+                if old_value is None:
+                    old_value = current.form(lang, concept)
+                if old_value == new_value:
+                    continue
+                # Hide the index entry of a replaced surface form
+                if old_value is not None and find_concept(lang, old_value) == concept:
+                    delta_index[lang][old_value] = _TOMBSTONE
+                delta_forms[lang][concept] = new_value
+                if find_concept(lang, new_value) is None:
+                    delta_index[lang][new_value] = concept
+                    current._filters[lang].add(new_value)
+                    inflection.add_plural(current._plurals[lang], lang, new_value,
+                                          current._base_index[lang])
+
+        delta_count = max(len(table) for table in delta_forms.values())
+        limit = max(MIN_COMPACTION_SIZE, 2 * math.isqrt(size))
+        if delta_count > limit:
+            published = self._compact(current, delta_forms, delta_index, size)
+        else:
+            published = LexiconSnapshot(
+                current.version + 1, languages,
+                current._base_forms, current._base_index,
+                delta_forms, delta_index, size,
+                current._filters, current.false_positive_rate,
+                current._plurals,
+            )
+        return published
+
+    @contextmanager
+    def batch(self):
+        """
+        Context manager that collects updates and publishes them on exit.
+
+        Yields:
+            _PendingBatch: Object with an add(forms) method
+        """
+        pending = _PendingBatch()
+        yield pending
+        if pending.updates:
+            self.apply_batch(pending.updates)
+
+    def _compact(self, current, delta_forms, delta_index, size):
+        """Merges the delta layer into a new base layer (called under lock)."""
+        forms = {}
+        index = {}
+        for lang in current.languages:
+            table = list(current._base_forms[lang])
+            table.extend([None] * (size - len(table)))
+            for concept, text in delta_forms[lang].items():
+                table[concept] = text
+            forms[lang] = table
+
+            index_table = dict(current._base_index[lang])
+            for text, concept in delta_index[lang].items():
+                if concept is _TOMBSTONE:
+                    index_table.pop(text, None)
+                else:
+                    index_table[text] = concept
+            index[lang] = index_table
+        return LexiconSnapshot(current.version + 1, current.languages, forms, index, size=size,
+                               false_positive_rate=current.false_positive_rate)
+
+
+class _PendingBatch:
+    """Collects updates for VersionedLexicon.batch()."""
+
+    def __init__(self):
+        self.updates = []
+
+    def add(self, forms):
+        """Queues one concept given as a language -> surface form dict."""
+        self.updates.append(forms)
+
+
+# ============================================================================
+# MODULE TEST (runs only when module is executed directly)
+# ============================================================================
+if __name__ == "__main__":
+    print("=== Lexicon Store Module Test ===\n")
+
+    lexicon = VersionedLexicon(build_snapshot(
+        [{"english": "hello", "spanish": "hola", "french": "bonjour"}],
+        ["english", "spanish", "french"],
+    ))
+    before = lexicon.snapshot()
+
+    with lexicon.batch() as batch:
+        batch.add({"english": "cough", "spanish": "tos", "french": "toux"})
+        batch.add({"english": "fever", "spanish": "fiebre", "french": "fièvre"})
+
+    after = lexicon.snapshot()
+    print(f"Version before: {before.version}, after: {after.version}")
+    print(f"Old snapshot sees 'cough': {before.translate('english', 'spanish', 'cough')}")
+    print(f"New snapshot sees 'cough': {after.translate('english', 'spanish', 'cough')}")
+    print(f"Spanish 'tos' -> French: {after.translate('spanish', 'french', 'tos')}")
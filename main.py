@@ -17,14 +17,52 @@ Date: 2026-01-31
 # IMPORTS - Demonstrates modularization and code reuse
 # ============================================================================
 # Import our custom modules
+import autocomplete
+import search_index
 import translation_module
 import medical_terms
 import utils
+import instrumentation
+import bloom_filter
+import profiling
 
 # Import standard library modules
+import argparse
+import os
 import sys
 
 
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+# Directory where custom translations are journaled between runs
+# Can be overridden with the EMR_CHATBOT_DATA_DIR environment variable
+# Data Type: str
+DATA_DIRECTORY = os.environ.get(
+    "EMR_CHATBOT_DATA_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "custom_translations"),
+)
+
+# Set EMR_CHATBOT_STATS=1 to collect statistics from the first command
+# Data Type: bool
+STATS_AT_STARTUP = os.environ.get("EMR_CHATBOT_STATS", "") not in ("", "0")
+
+# Commands reported under their own name in statistics; anything else is
+# reported as "unknown" so typos cannot create unbounded metric names
+# Data Type: frozenset
+KNOWN_COMMANDS = frozenset(utils.COMMAND_NAMES)
+
+# Overlay layer used by translate and add ("base" is the shared glossary;
+# the `layer use` command selects another one)
+# Data Type: str
+ACTIVE_LAYER = "base"
+
+# Directory for profiler output (--profile-dir overrides it)
+# Data Type: str
+PROFILE_DIRECTORY = "profiles"
+
+
 # ============================================================================
 # MAIN CHATBOT FUNCTIONS
 # ============================================================================
@@ -37,17 +75,19 @@ def process_translation_command(arguments):
     - Integration of multiple modules
     - Function composition (calling functions from other modules)
     - Error handling
-    - Conditional logic
+    - Language-agnostic translation (any supported language pair)
     
     Parameters:
         arguments (str): The translation command arguments
+                        Format: "text", "text to X", "text from X" or
+                        "text from X to Y" (missing source is detected)
     
     Returns:
         str: The translation result or error message
     """
     # Parse the translation request using utils module
     # Data Type: tuple (bool, str, str, str)
-    success, text, direction, language = utils.parse_translation_request(arguments)
+    success, text, source, target = utils.parse_translation_pair(arguments)
     
     if not success:
         return utils.format_response(
@@ -59,38 +99,55 @@ def process_translation_command(arguments):
     # Data Type: list
     supported_langs = translation_module.get_supported_languages()
     
-    if language not in supported_langs:
-        return utils.format_response(
-            f"Language '{language}' not supported. Available: {', '.join(supported_langs)}",
-            "error"
-        )
-    
-    # Perform translation based on direction
-    # Data Type: str
-    result = ""
+    for language in (source, target):
+        if language != "auto" and language not in supported_langs:
+            return utils.format_response(
+                f"Language '{language}' not supported. Available: {', '.join(supported_langs)}",
+                "error"
+            )
     
     try:
-        if direction == "to":
-            # Translate TO target language
-            if language == "spanish":
-                result = translation_module.translate_to_spanish(text)
-            elif language == "french":
-                result = translation_module.translate_to_french(text)
+        # Detect the source language when the user did not name it
+        if source == "auto":
+            source = translation_module.detect_language(text)
         
-        elif direction == "from":
-            # Translate FROM target language
-            if language == "spanish":
-                result = translation_module.translate_from_spanish(text)
-            elif language == "french":
-                result = translation_module.translate_from_french(text)
+        # Without a target, foreign text goes to English and English text
+        # goes to every other language
+        # Data Type: list
+        if target != "auto":
+            targets = [target]
+        elif source != translation_module.PIVOT_LANGUAGE:
+            targets = [translation_module.PIVOT_LANGUAGE]
+        else:
+            targets = [lang for lang in supported_langs if lang != source]
+        
+        # One generic call handles every language pair
+        # Data Type: list of str
+        results = [_translate_phrase(text, source, lang) for lang in targets]
+        autocomplete.record_use(text)
         
         # Format success response
-        return utils.format_response(f"'{text}' → {result}", "success")
+        if len(results) == 1:
+            return utils.format_response(f"'{text}' → {results[0]}", "success")
+        details = ", ".join(f"{lang}: {result}" for lang, result in zip(targets, results))
+        return utils.format_response(f"'{text}' ({source}) → {details}", "success")
         
     except Exception as e:
         return utils.format_response(f"Translation error: {str(e)}", "error")
 
 
+def _translate_phrase(text, source, target):
+    """Translates with the active layer, falling back to the medical glossary."""
+    translation = translation_module.find_translation(text, source, target,
+                                                      layer=ACTIVE_LAYER)
+    if translation is None:
+        translation = medical_terms.find_medical_translation(
+            text.lower().strip(), target, "all", source)
+    if translation is None:
+        return f"{text} (translation not available)"
+    return translation
+
+
 def process_medical_command(arguments):
     """
     Processes medical term translation commands.
@@ -117,11 +174,12 @@ def process_medical_command(arguments):
             "error"
         )
     
-    term = parts[0].strip()
+    term = utils.strip_quotes(parts[0])
     language = parts[1].strip()
     
     # Get medical translation
     result = medical_terms.get_medical_translation(term, language)
+    autocomplete.record_use(term)
     
     return utils.format_response(f"Medical: '{term}' → {result}", "success")
 
@@ -160,11 +218,26 @@ def process_add_command(arguments):
     spanish = phrases[1]
     french = phrases[2]
     
-    # Add the translation
+    # Add the translation (to the active overlay layer, if one is selected)
     # Data Type: bool
+    if ACTIVE_LAYER != "base":
+        success = translation_module.add_layer_translation(
+            ACTIVE_LAYER, {"english": english, "spanish": spanish, "french": french})
+        if success:
+            return utils.format_response(
+                f"Added to layer '{ACTIVE_LAYER}': {english} → ES: {spanish}, FR: {french}",
+                "success"
+            )
+        return utils.format_response("Failed to add translation", "error")
     success = translation_module.add_custom_translation(english, spanish, french)
     
     if success:
+        autocomplete.add_phrases([english, spanish, french])
+        search_index.add_entry({
+            "english": utils.normalize_text(english),
+            "spanish": utils.normalize_text(spanish),
+            "french": utils.normalize_text(french),
+        })
         return utils.format_response(
             f"Added translation: {english} → ES: {spanish}, FR: {french}",
             "success"
@@ -173,6 +246,619 @@ def process_add_command(arguments):
         return utils.format_response("Failed to add translation", "error")
 
 
+def process_search_command(arguments):
+    """
+    Processes full-text search over glossary entries and diagnoses.
+    
+    Parameters:
+        arguments (str): Words to search for, e.g. "pain" or "dolor cabeza"
+    
+    Returns:
+        str: Matching entries, one per line, or a message if none match
+    """
+    query = utils.strip_quotes(arguments)
+    if not query:
+        return utils.format_response("Invalid format. Use: search word [word ...]", "error")
+    
+    # Data Type: tuple (int, list)
+    total, results = search_index.search(query)
+    if not total:
+        return utils.format_response(f"No entries contain '{query}'", "warning")
+    
+    lines = [utils.format_response(f"{total} entries contain '{query}':", "info")]
+    lines.extend(f"  {search_index.format_result(result)}" for result in results)
+    if total > len(results):
+        lines.append(f"  ... and {total - len(results)} more")
+    return "\n".join(lines)
+
+
+def process_layer_command(arguments):
+    """
+    Processes glossary overlay layer commands.
+    
+    This function demonstrates:
+    - Sub-command parsing
+    - Modifying a module-level variable with the global keyword
+    
+    Parameters:
+        arguments (str): "" (show layers), "use <name>",
+                         "create <name> [on <parent>]" or "remove <english>"
+    
+    Returns:
+        str: Status message or layer listing
+    """
+    global ACTIVE_LAYER
+    
+    # Data Type: list
+    parts = arguments.split()
+    action = parts[0].lower() if parts else ""
+    
+    if action == "":
+        lines = [utils.format_response(f"Active layer: {ACTIVE_LAYER}", "info")]
+        for item in translation_module.get_layer_stats():
+            parent = f" on {item['parent']}" if item["parent"] else ""
+            lines.append(f"  {item['layer']}{parent}: {item['own_entries']} own entries, "
+                         f"{item['view_entries']} visible")
+        return "\n".join(lines)
+    elif action == "use" and len(parts) == 2:
+        if not translation_module.has_layer(parts[1]):
+            return utils.format_response(f"Unknown layer '{parts[1]}'", "error")
+        ACTIVE_LAYER = parts[1]
+        return utils.format_response(f"Using layer '{ACTIVE_LAYER}'", "success")
+    elif action == "create" and len(parts) in (2, 4) and (len(parts) == 2 or parts[2] == "on"):
+        parent = parts[3] if len(parts) == 4 else "base"
+        try:
+            path = translation_module.create_layer(parts[1], parent)
+        except (KeyError, ValueError) as e:
+            return utils.format_response(e.args[0], "error")
+        return utils.format_response(f"Created layer {' → '.join(path)}", "success")
+    elif action == "remove" and len(parts) > 1:
+        english = utils.strip_quotes(arguments.split(None, 1)[1])
+        if translation_module.remove_layer_translation(ACTIVE_LAYER, english):
+            return utils.format_response(f"Removed '{english}' from layer '{ACTIVE_LAYER}'", "success")
+        return utils.format_response(f"Layer '{ACTIVE_LAYER}' has no entry '{english}'", "warning")
+    else:
+        return utils.format_response(
+            "Invalid format. Use: layer [use <name> | create <name> [on <parent>] | remove \"english\"]",
+            "error"
+        )
+
+
+def process_reload_command(arguments):
+    """
+    Processes the reload command (reload glossary files now and report).
+    
+    Parameters:
+        arguments (str): Ignored
+    
+    Returns:
+        str: The reload report or a status message
+    """
+    # Imported here so sessions without --glossary-dir never load it
+    import glossary_reloader
+    
+    reloader = glossary_reloader.get_reloader()
+    if reloader is None:
+        return utils.format_response("No glossary directory watched (use --glossary-dir)", "info")
+    status = "success" if reloader.reload_now() else "error"
+    return utils.format_response(
+        "Glossary reloaded:\n" + glossary_reloader.format_report(reloader.stats()), status)
+
+
+def process_localize_command(arguments):
+    """
+    Processes the localize command (every patient's packet in the patient's
+    own language, in one pass).
+    
+    Parameters:
+        arguments (str): "" (coverage report only) or an output file for
+                         the packets (JSON Lines)
+    
+    Returns:
+        str: The coverage report
+    """
+    # Imported here: only this command needs the EMR tables
+    import patient_localization
+    
+    output_path = utils.strip_quotes(arguments) if arguments else None
+    try:
+        report = patient_localization.run(output_path)
+    except OSError as e:
+        return utils.format_response(f"Could not write packets: {e}", "error")
+    heading = f"Packets written to {output_path}" if output_path else "Localization coverage"
+    return utils.format_response(
+        f"{heading}:\n" + patient_localization.coverage_report(report), "success")
+
+
+def process_los_command(arguments):
+    """
+    Processes the los command (length of stay, overall or for one patient).
+    
+    Parameters:
+        arguments (str): "" (all admissions) or a PatientID, e.g. "P000001"
+    
+    Returns:
+        str: The report or an error message
+    """
+    # Imported here: only the analytics commands need the admissions table
+    import emr_analytics
+    
+    history = emr_analytics.get_history()
+    patient = utils.strip_quotes(arguments).upper() if arguments else ""
+    if not patient:
+        return utils.format_response(
+            "Length of stay:\n" + emr_analytics.format_summary(emr_analytics.summary(history)),
+            "info")
+    report = emr_analytics.format_patient(history, patient)
+    if report is None:
+        return utils.format_response(f"No admissions for patient '{patient}'", "error")
+    return utils.format_response(report, "info")
+
+
+def process_readmissions_command(arguments):
+    """
+    Processes the readmissions command (readmissions within a window).
+    
+    Parameters:
+        arguments (str): "" (30 days) or a window in days, e.g. "90"
+    
+    Returns:
+        str: The report or an error message
+    """
+    import emr_analytics
+    
+    window = emr_analytics.READMISSION_DAYS
+    if arguments:
+        try:
+            window = float(arguments.split()[0])
+        except ValueError:
+            return utils.format_response("Usage: readmissions [days]", "error")
+        if window < 0:
+            return utils.format_response("The window must be 0 days or more", "error")
+    stats = emr_analytics.summary(emr_analytics.get_history(), window)
+    return utils.format_response(
+        "Readmissions:\n" + emr_analytics.format_summary(stats), "info")
+
+
+def process_timeline_command(arguments):
+    """
+    Processes the timeline command (one patient's events in time order, or
+    every patient's timeline written to a file).
+    
+    Events are printed as the merge produces them, so the first lines
+    appear before the rest of the timeline is assembled.
+    
+    Parameters:
+        arguments (str): "<PatientID> [max events]" or "export <file>"
+    
+    Returns:
+        str or None: An error or export summary, or None after printing
+    """
+    import patient_timeline
+    
+    # Data Type: list
+    parts = arguments.split()
+    if not parts:
+        return utils.format_response("Usage: timeline <PatientID> [max events] | "
+                                     "timeline export <file>", "error")
+    if parts[0].lower() == "export":
+        if len(parts) < 2:
+            return utils.format_response("Usage: timeline export <file>", "error")
+        path = utils.strip_quotes(arguments.split(None, 1)[1])
+        try:
+            patients, events = patient_timeline.export(path)
+        except OSError as e:
+            return utils.format_response(f"Could not write timelines: {e}", "error")
+        return utils.format_response(
+            f"Wrote {events:,} events for {patients} patients to {path}", "success")
+    
+    patient = parts[0].upper()
+    limit = None
+    if len(parts) > 1:
+        if not parts[1].isdigit():
+            return utils.format_response("The event limit must be a number", "error")
+        limit = int(parts[1])
+    shown = 0
+    for event in patient_timeline.patient_timeline(patient):
+        if limit is not None and shown == limit:
+            print("  ...")
+            break
+        if shown == 0:
+            print(utils.format_response(f"Timeline of {patient}:", "info"))
+        print(f"  {patient_timeline.format_event(event)}")
+        shown += 1
+    if shown == 0:
+        return utils.format_response(f"No events for patient '{patient}'", "error")
+    return None
+
+
+def process_comorbid_command(arguments):
+    """
+    Processes the comorbid command (diagnoses that co-occur with one).
+    
+    Parameters:
+        arguments (str): ICD code or description words, optionally followed
+                         by how many diagnoses to list, e.g. "I10 3" or
+                         "hypertension"
+    
+    Returns:
+        str: The report or an error message
+    """
+    import comorbidity
+    
+    # Data Type: list
+    parts = utils.strip_quotes(arguments).split()
+    count = comorbidity.DEFAULT_TOP
+    if len(parts) > 1 and parts[-1].isdigit():
+        count = int(parts.pop())
+    if not parts:
+        return utils.format_response("Usage: comorbid <code or words> [count]", "error")
+    
+    matrix = comorbidity.get_matrix()
+    text = " ".join(parts)
+    codes = matrix.find_codes(text)
+    if not codes:
+        return utils.format_response(f"No diagnosis matches '{text}'", "error")
+    if len(codes) > 1:
+        return utils.format_response(
+            f"'{text}' matches several diagnoses: {', '.join(codes)}", "warning")
+    return utils.format_response(comorbidity.format_top(matrix, codes[0], count), "info")
+
+
+def process_approx_command(arguments):
+    """
+    Processes the approx command (answers from the EMR sketches).
+    
+    Parameters:
+        arguments (str): "distinct <lab>", "median <lab> [by race]",
+                         "p<N> <lab> [by race]" or "top [count]"
+    
+    Returns:
+        str: The approximate answer with its error bound, or an error
+    """
+    import lab_catalog
+    import sketches
+    
+    usage = "Usage: approx distinct <lab> | approx median|p<N> <lab> [by race] | approx top [count]"
+    # Data Type: list
+    parts = arguments.split()
+    if not parts:
+        return utils.format_response(usage, "error")
+    action = parts[0].lower()
+    
+    if action == "top":
+        count = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else 5
+        frequent = sketches.get_sketches().diagnoses
+        lines = [f"Most frequent diagnosis codes (each count at most "
+                 f"+{frequent.error_bound():.0f} too high):"]
+        for code, estimate in frequent.heavy_hitters(count):
+            lines.append(f"  {code:<8} ~{estimate:,}")
+        return utils.format_response("\n".join(lines), "info")
+    
+    # Check the action and that a lab was named before resolving it
+    if action == "median":
+        fraction = 0.5
+    elif action.startswith("p") and action[1:].isdigit() and 0 < int(action[1:]) < 100:
+        fraction = int(action[1:]) / 100
+    elif action != "distinct":
+        return utils.format_response(usage, "error")
+    by_race = len(parts) > 3 and [word.lower() for word in parts[-2:]] == ["by", "race"]
+    lab_name = " ".join(parts[1:-2] if by_race else parts[1:])
+    if not lab_name:
+        return utils.format_response(usage, "error")
+    lab_id = lab_catalog.resolve(lab_name)
+    if lab_id is None:
+        return utils.format_response(f"Unknown lab '{lab_name}'", "error")
+    name = lab_catalog.canonical_name(lab_id)
+    emr_sketches = sketches.get_sketches()
+    
+    if action == "distinct":
+        patients = emr_sketches.distinct_patients(lab_id)
+        error = sketches.HyperLogLog().relative_error() * 100
+        return utils.format_response(
+            f"Patients with a {name} test: ~{patients:,} (standard error {error:.1f}%)", "info")
+    
+    import lab_units
+    unit = lab_units.canonical_unit(lab_id)
+    error = sketches.KLLSketch().rank_error() * 100
+    heading = f"{action} {name} ({unit}, rank error ±{error:.1f}%)"
+    groups = emr_sketches.races(lab_id) if by_race else [None]
+    lines = [heading + ":"]
+    for race in groups:
+        value = emr_sketches.lab_quantile(lab_id, fraction, race)
+        if value is not None:
+            lines.append(f"  {race or 'all patients'}: {value:.1f}")
+    if len(lines) == 1:
+        return utils.format_response(f"No {name} values", "error")
+    return utils.format_response("\n".join(lines), "info")
+
+
+def process_query_command(arguments):
+    """
+    Processes the query command (SELECT over the EMR tables).
+    
+    Parameters:
+        arguments (str): SELECT statement, e.g. "SELECT * FROM labs
+                         ORDER BY LabDateTime DESC LIMIT 5", or
+                         "memory [rows]" to show or set the memory budget
+                         of joins and sorts
+    
+    Returns:
+        str: The result rows with rows scanned and returned, or an error
+    """
+    import emr_query
+    import spill_operators
+    
+    # Data Type: list
+    parts = arguments.split()
+    if not parts:
+        return utils.format_response(
+            "Usage: query SELECT <columns> FROM <table> [JOIN <table> ON a = b] [WHERE ...] "
+            "[ORDER BY <column> [ASC|DESC]] [LIMIT <n>] | query memory [rows]", "error")
+    if parts[0].lower() == "memory":
+        if len(parts) > 1:
+            if not parts[1].isdigit() or int(parts[1]) < 1:
+                return utils.format_response("Memory budget must be a positive row count",
+                                             "error")
+            spill_operators.MEMORY_ROWS = int(parts[1])
+        return utils.format_response(
+            f"Joins and sorts hold up to {spill_operators.MEMORY_ROWS:,} rows in memory "
+            f"before spilling to disk", "info")
+    try:
+        result = emr_query.query(arguments)
+    except ValueError as error:
+        return utils.format_response(str(error), "error")
+    return utils.format_response(emr_query.format_result(result), "info")
+
+
+def process_stats_command(arguments):
+    """
+    Processes the stats command (instrumentation control and reports).
+    
+    This function demonstrates:
+    - Sub-command parsing
+    - Integration with the instrumentation module
+    
+    Parameters:
+        arguments (str): "" (show report), "on [alloc]", "off", "reset",
+                         "filters", "tiers" or "json [file]"
+    
+    Returns:
+        str: The report or a status message
+    """
+    # Data Type: list
+    parts = arguments.split()
+    action = parts[0].lower() if parts else ""
+    
+    if action == "":
+        return utils.format_response("Statistics:\n" + instrumentation.format_report(), "info")
+    elif action == "on":
+        track_allocations = len(parts) > 1 and parts[1].lower() == "alloc"
+        instrumentation.enable(track_allocations=track_allocations)
+        suffix = " (with allocation tracking)" if track_allocations else ""
+        return utils.format_response(f"Statistics enabled{suffix}", "success")
+    elif action == "off":
+        instrumentation.disable()
+        return utils.format_response("Statistics disabled", "success")
+    elif action == "reset":
+        instrumentation.reset()
+        return utils.format_response("Statistics reset", "success")
+    elif action == "filters":
+        report = bloom_filter.format_report([
+            ("general", translation_module.get_filter_stats()),
+            ("medical", medical_terms.get_medical_filter_stats()),
+        ])
+        return utils.format_response("Bloom filters (misses rejected before lookup):\n" + report, "info")
+    elif action == "tiers":
+        tier_stats = translation_module.get_tier_stats()
+        if tier_stats is None:
+            return utils.format_response("No disk-backed glossary attached (use --cold-glossary)", "info")
+        # Imported here so sessions without a cold tier never load it
+        import tiered_lexicon
+        return utils.format_response("Hot/cold glossary tiers:\n" + tiered_lexicon.format_report(tier_stats), "info")
+    elif action == "json":
+        if len(parts) > 1:
+            instrumentation.dump_json(parts[1])
+            return utils.format_response(f"Statistics written to {parts[1]}", "success")
+        return instrumentation.dump_json()
+    else:
+        return utils.format_response(
+            "Invalid format. Use: stats [on [alloc] | off | reset | filters | tiers | json [file]]",
+            "error"
+        )
+
+
+def process_profile_command(arguments):
+    """
+    Processes the profile command (start/stop the profiler at runtime).
+    
+    Parameters:
+        arguments (str): "on [sampling|deterministic]", "off", or "" (status)
+    
+    Returns:
+        str: Status message (including the files written by "off")
+    """
+    # Data Type: list
+    parts = arguments.split()
+    action = parts[0].lower() if parts else ""
+    
+    if action == "on":
+        mode = parts[1].lower() if len(parts) > 1 else "sampling"
+        if mode not in profiling.MODES:
+            return utils.format_response(
+                f"Unknown profiler mode '{mode}'. Use: {', '.join(profiling.MODES)}",
+                "error"
+            )
+        profiling.start(PROFILE_DIRECTORY, mode)
+        return utils.format_response(f"Profiling on ({mode}), output in {PROFILE_DIRECTORY}/", "success")
+    elif action == "off":
+        files = profiling.stop()
+        if not files:
+            return utils.format_response("Profiling was not running", "warning")
+        return utils.format_response("Profile written: " + ", ".join(files), "success")
+    elif action == "":
+        state = "on" if profiling.is_active() else "off"
+        return utils.format_response(f"Profiling is {state}", "info")
+    else:
+        return utils.format_response(
+            "Invalid format. Use: profile on [sampling|deterministic] | profile off",
+            "error"
+        )
+
+
+def dispatch_command(command, arguments):
+    """
+    Runs one validated command.
+    
+    This function demonstrates:
+    - Command routing with if/elif
+    - Multiple return values using a tuple
+    
+    Parameters:
+        command (str): Command name (lowercase)
+        arguments (str): Rest of the input line
+    
+    Returns:
+        tuple: (response, keep_running)
+               response (str or None): Reply to show the user, or None when
+                                       the command printed its own output
+               keep_running (bool): False after quit/exit/bye
+    """
+    # Translation command
+    if command == "translate":
+        return process_translation_command(arguments), True
+    
+    # Medical translation command
+    if command == "medical":
+        return process_medical_command(arguments), True
+    
+    # Help command
+    if command == "help":
+        utils.display_help()
+        return None, True
+    
+    # List supported languages
+    if command == "languages":
+        langs = translation_module.get_supported_languages()
+        return utils.format_response(f"Supported languages: {', '.join(langs)}", "info"), True
+    
+    # List all translations
+    if command == "list":
+        translations = translation_module.list_all_translations()
+        print(utils.format_response(
+            f"Available translations ({len(translations)}):",
+            "info"
+        ))
+        # Display in columns for readability
+        for i, term in enumerate(translations, 1):
+            print(f"  {i}. {term}")
+        return None, True
+    
+    # Show translation count
+    if command == "count":
+        count = translation_module.get_translation_count()
+        medical_count = medical_terms.get_medical_term_count()
+        return utils.format_response(
+            f"Total translations: {count} general + {medical_count} medical = {count + medical_count}",
+            "info"
+        ), True
+    
+    # Add custom translation
+    if command == "add":
+        return process_add_command(arguments), True
+    
+    # Glossary overlay layers
+    if command == "layer":
+        return process_layer_command(arguments), True
+    
+    # Reload glossary files
+    if command == "reload":
+        return process_reload_command(arguments), True
+    
+    # Bulk patient localization
+    if command == "localize":
+        return process_localize_command(arguments), True
+    
+    # Admission analytics
+    if command == "los":
+        return process_los_command(arguments), True
+    if command == "readmissions":
+        return process_readmissions_command(arguments), True
+    
+    # Chronological patient timeline
+    if command == "timeline":
+        return process_timeline_command(arguments), True
+    
+    # Diagnosis co-occurrence
+    if command == "comorbid":
+        return process_comorbid_command(arguments), True
+    
+    # Approximate answers from sketches
+    if command == "approx":
+        return process_approx_command(arguments), True
+    
+    # SQL queries with ORDER BY ... LIMIT
+    if command == "query":
+        return process_query_command(arguments), True
+    
+    # Full-text search
+    if command == "search":
+        return process_search_command(arguments), True
+    
+    # Statistics and instrumentation control
+    if command == "stats":
+        return process_stats_command(arguments), True
+    
+    # Runtime profiler control
+    if command == "profile":
+        return process_profile_command(arguments), True
+    
+    # Medical categories
+    if command == "categories":
+        categories = medical_terms.list_medical_categories()
+        return utils.format_response(f"Medical categories: {', '.join(categories)}", "info"), True
+    
+    # Quit/Exit commands
+    if command in ["quit", "exit", "bye"]:
+        print(utils.format_response("Goodbye! Thank you for using EMR Chatbot.", "success"))
+        return None, False
+    
+    # Unknown command
+    return utils.format_response(
+        f"Unknown command: '{command}'. Type 'help' for available commands.",
+        "error"
+    ), True
+
+
+def execute_command(user_input):
+    """
+    Validates, times and runs one line of user input.
+    
+    Parameters:
+        user_input (str): Raw input line
+    
+    Returns:
+        tuple: (response, keep_running) - see dispatch_command()
+    """
+    # Validate input
+    # Data Type: tuple (bool, str, str)
+    is_valid, command, arguments = utils.validate_input(user_input)
+    if not is_valid:
+        return utils.format_response("Please enter a command", "warning"), True
+    
+    # Start timing the command (does nothing unless stats are on)
+    command_token = instrumentation.command_started()
+    profiling.command_started()
+    try:
+        return dispatch_command(command, arguments)
+    finally:
+        # Record the command's latency (also runs when the command fails)
+        profiling.command_finished()
+        if command_token is not None:
+            label = command if command in KNOWN_COMMANDS else "unknown"
+            instrumentation.command_finished(label, command_token)
+
+
 def run_chatbot():
     """
     Main chatbot loop - handles user interaction.
@@ -189,6 +875,9 @@ def run_chatbot():
     # Display welcome message
     utils.display_welcome()
     
+    # Tab completes commands and quoted terms (where readline exists)
+    autocomplete.install_readline()
+    
     # Main loop - Data Type: bool
     running = True
     
@@ -201,90 +890,16 @@ def run_chatbot():
             # Data Type: str
             user_input = input("\n🤖 You: ").strip()
             
-            # Validate input
-            # Data Type: tuple (bool, str, str)
-            is_valid, command, arguments = utils.validate_input(user_input)
-            
-            if not is_valid:
-                print(utils.format_response("Please enter a command", "warning"))
-                continue
-            
-            # Process commands
-            # Data Type: str
-            response = ""
-            
-            # Translation command
-            if command == "translate":
-                response = process_translation_command(arguments)
-            
-            # Medical translation command
-            elif command == "medical":
-                response = process_medical_command(arguments)
-            
-            # Help command
-            elif command == "help":
-                utils.display_help()
-                continue
-            
-            # List supported languages
-            elif command == "languages":
-                langs = translation_module.get_supported_languages()
-                response = utils.format_response(
-                    f"Supported languages: {', '.join(langs)}",
-                    "info"
-                )
-            
-            # List all translations
-            elif command == "list":
-                translations = translation_module.list_all_translations()
-                print(utils.format_response(
-                    f"Available translations ({len(translations)}):",
-                    "info"
-                ))
-                # Display in columns for readability
-                for i, term in enumerate(translations, 1):
-                    print(f"  {i}. {term}")
-                continue
-            
-            # Show translation count
-            elif command == "count":
-                count = translation_module.get_translation_count()
-                medical_count = medical_terms.get_medical_term_count()
-                response = utils.format_response(
-                    f"Total translations: {count} general + {medical_count} medical = {count + medical_count}",
-                    "info"
-                )
-            
-            # Add custom translation
-            elif command == "add":
-                response = process_add_command(arguments)
-            
-            # Medical categories
-            elif command == "categories":
-                categories = medical_terms.list_medical_categories()
-                response = utils.format_response(
-                    f"Medical categories: {', '.join(categories)}",
-                    "info"
-                )
-            
-            # Quit/Exit commands
-            elif command in ["quit", "exit", "bye"]:
-                print(utils.format_response("Goodbye! Thank you for using EMR Chatbot.", "success"))
-                running = False
-                continue
-            
-            # Unknown command
-            else:
-                response = utils.format_response(
-                    f"Unknown command: '{command}'. Type 'help' for available commands.",
-                    "error"
-                )
+            # Process the command
+            # Data Type: tuple (str or None, bool)
+            response, running = execute_command(user_input)
             
             # Display response
-            print(f"\n🤖 Bot: {response}")
+            if response is not None:
+                print(f"\n🤖 Bot: {response}")
             
-        except KeyboardInterrupt:
-            # Handle Ctrl+C gracefully
+        except (KeyboardInterrupt, EOFError):
+            # Handle Ctrl+C / Ctrl+D (or the end of piped input) gracefully
             print("\n" + utils.format_response("Interrupted. Goodbye!", "warning"))
             running = False
         
@@ -294,24 +909,128 @@ def run_chatbot():
             print(utils.format_response("Type 'help' for usage information", "info"))
 
 
+def run_batch(stream=None):
+    """
+    Runs commands read from a stream, one per line, without banners or
+    prompts (e.g. `python main.py --batch < commands.txt`).
+    
+    Parameters:
+        stream (file): Where commands are read from. Default is sys.stdin.
+    
+    Returns:
+        int: Number of commands that raised an error
+    """
+    stream = stream if stream is not None else sys.stdin
+    errors = 0
+    for line in stream:
+        user_input = line.strip()
+        if not user_input or user_input.startswith("#"):
+            continue
+        try:
+            response, running = execute_command(user_input)
+        except Exception as e:
+            errors += 1
+            print(utils.format_response(f"Unexpected error: {str(e)}", "error"))
+            continue
+        if response is not None:
+            print(response)
+        if not running:
+            break
+    return errors
+
+
 # ============================================================================
 # MAIN ENTRY POINT
 # ============================================================================
 
+def parse_arguments(argv=None):
+    """
+    Parses command-line options.
+    
+    Parameters:
+        argv (list): Arguments to parse. Default is sys.argv[1:].
+    
+    Returns:
+        argparse.Namespace: Parsed options
+    """
+    parser = argparse.ArgumentParser(description="EMR Translation Chatbot")
+    parser.add_argument(
+        "--profile", nargs="?", const="sampling", choices=profiling.MODES,
+        help="profile command processing (default mode: sampling)",
+    )
+    parser.add_argument(
+        "--profile-dir", default=PROFILE_DIRECTORY,
+        help="directory for profiler output files",
+    )
+    parser.add_argument(
+        "--cold-glossary", metavar="DIR",
+        help="attach a disk-backed terminology built by tiered_lexicon.py",
+    )
+    parser.add_argument(
+        "--glossary-dir", metavar="DIR",
+        help="load *.csv glossary files from DIR and reload them when they change",
+    )
+    parser.add_argument(
+        "--batch", action="store_true",
+        help="read commands from standard input, one per line, and exit",
+    )
+    parser.add_argument(
+        "--startup-report", action="store_true",
+        help="show which imports dominate startup time and exit",
+    )
+    return parser.parse_args(argv)
+
+
 def main():
     """
     Main entry point for the application.
     
     This function demonstrates:
     - Program entry point
+    - Command-line options (argparse)
     - Top-level error handling
-    - Clean program exit
+    - Clean program exit (custom translations and profiles are flushed to disk)
     """
+    global PROFILE_DIRECTORY
+    
+    options = parse_arguments()
+    PROFILE_DIRECTORY = options.profile_dir
+    
+    if options.startup_report:
+        print(profiling.startup_report(os.path.abspath(__file__)))
+        return
+    
+    # Data Type: int - exit status (non-zero if a batch command failed)
+    status = 0
     try:
-        run_chatbot()
+        # Restore custom translations saved by earlier sessions
+        translation_module.enable_journal(DATA_DIRECTORY)
+        if options.cold_glossary:
+            translation_module.enable_cold_tier(options.cold_glossary)
+        if options.glossary_dir:
+            import glossary_reloader
+            glossary_reloader.start(options.glossary_dir)
+        if STATS_AT_STARTUP:
+            instrumentation.enable()
+        if options.profile:
+            profiling.start(PROFILE_DIRECTORY, options.profile)
+        if options.batch:
+            status = 1 if run_batch() else 0
+        else:
+            run_chatbot()
     except Exception as e:
         print(f"Fatal error: {e}")
         sys.exit(1)
+    finally:
+        for path in profiling.stop():
+            print(f"Profile written: {path}")
+        if options.glossary_dir:
+            import glossary_reloader
+            glossary_reloader.stop()
+        translation_module.close_journal()
+        translation_module.disable_cold_tier()
+    if status:
+        sys.exit(status)
 
 
 # Run the chatbot when script is executed directly
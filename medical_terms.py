@@ -6,11 +6,16 @@ It demonstrates:
 - Specialized dictionaries for medical terms
 - Category-based organization
 - Integration with main translation module
+- Concept-ID stores (lexicon_store) so any language pair is one lookup
 
 Author: EMR Chatbot Team
 Date: 2026-01-31
 """
 
+import bloom_filter
+import lazy_loading
+import lexicon_store
+
 # ============================================================================
 # MEDICAL TERMINOLOGY DICTIONARIES
 # ============================================================================
@@ -91,12 +96,126 @@ DEPARTMENTS_FRENCH = {
     "intensive care": "soins intensifs",
 }
 
+# Primary diagnoses recorded in the EMR (ICD-10 descriptions, lowercase)
+DIAGNOSES_SPANISH = {
+    "pneumonia, unspecified organism": "neumonía, organismo no especificado",
+    "type 2 diabetes mellitus without complications": "diabetes mellitus tipo 2 sin complicaciones",
+    "low back pain": "lumbago",
+    "anxiety disorder, unspecified": "trastorno de ansiedad, no especificado",
+    "urinary tract infection, site not specified": "infección de vías urinarias, sitio no especificado",
+    "essential (primary) hypertension": "hipertensión esencial (primaria)",
+    "chest pain, unspecified": "dolor en el pecho, no especificado",
+    "hyperlipidemia, unspecified": "hiperlipidemia, no especificada",
+    "gastro-esophageal reflux disease without esophagitis": "enfermedad del reflujo gastroesofágico sin esofagitis",
+    "unspecified asthma, uncomplicated": "asma no especificada, sin complicaciones",
+}
+
+DIAGNOSES_FRENCH = {
+    "pneumonia, unspecified organism": "pneumonie, micro-organisme non précisé",
+    "type 2 diabetes mellitus without complications": "diabète sucré de type 2 sans complication",
+    "low back pain": "lombalgie",
+    "anxiety disorder, unspecified": "trouble anxieux, sans précision",
+    "urinary tract infection, site not specified": "infection des voies urinaires, siège non précisé",
+    "essential (primary) hypertension": "hypertension essentielle (primitive)",
+    "chest pain, unspecified": "douleur thoracique, sans précision",
+    "hyperlipidemia, unspecified": "hyperlipidémie, sans précision",
+    "gastro-esophageal reflux disease without esophagitis": "reflux gastro-œsophagien sans œsophagite",
+    "unspecified asthma, uncomplicated": "asthme, sans précision, non compliqué",
+}
+
+# Laboratory tests recorded in the EMR
+LABS_SPANISH = {
+    "platelets": "plaquetas",
+    "alkaline phosphatase": "fosfatasa alcalina",
+    "creatinine": "creatinina",
+    "calcium": "calcio",
+    "bicarbonate": "bicarbonato",
+    "bun": "nitrógeno ureico en sangre",
+    "ast": "aspartato aminotransferasa",
+    "hemoglobin": "hemoglobina",
+    "wbc": "leucocitos",
+    "alt": "alanina aminotransferasa",
+    "glucose": "glucosa",
+    "potassium": "potasio",
+    "chloride": "cloruro",
+    "sodium": "sodio",
+    "total bilirubin": "bilirrubina total",
+}
+
+LABS_FRENCH = {
+    "platelets": "plaquettes",
+    "alkaline phosphatase": "phosphatase alcaline",
+    "creatinine": "créatinine",
+    "calcium": "calcium",
+    "bicarbonate": "bicarbonate",
+    "bun": "azote uréique sanguin",
+    "ast": "aspartate aminotransférase",
+    "hemoglobin": "hémoglobine",
+    "wbc": "leucocytes",
+    "alt": "alanine aminotransférase",
+    "glucose": "glucose",
+    "potassium": "potassium",
+    "chloride": "chlorure",
+    "sodium": "sodium",
+    "total bilirubin": "bilirubine totale",
+}
+
+# Lab result flags
+RESULTS_SPANISH = {
+    "high": "alto",
+    "low": "bajo",
+    "normal": "normal",
+}
+
+RESULTS_FRENCH = {
+    "high": "élevé",
+    "low": "bas",
+    "normal": "normal",
+}
+
+
+# Data Type: dict - category -> {language: English-to-language dictionary}
+# A new language only needs one more dictionary per category here.
+MEDICAL_TABLES = {
+    "symptoms": {"spanish": SYMPTOMS_SPANISH, "french": SYMPTOMS_FRENCH},
+    "procedures": {"spanish": PROCEDURES_SPANISH, "french": PROCEDURES_FRENCH},
+    "departments": {"spanish": DEPARTMENTS_SPANISH, "french": DEPARTMENTS_FRENCH},
+    "diagnoses": {"spanish": DIAGNOSES_SPANISH, "french": DIAGNOSES_FRENCH},
+    "labs": {"spanish": LABS_SPANISH, "french": LABS_FRENCH},
+    "results": {"spanish": RESULTS_SPANISH, "french": RESULTS_FRENCH},
+}
+
+# Data Type: list - languages of the medical glossary (English first)
+MEDICAL_LANGUAGES = ["english", "spanish", "french"]
+
+# Target false-positive rate of each category's Bloom filters (change it
+# before the first medical lookup)
+# Data Type: float
+BLOOM_FALSE_POSITIVE_RATE = 0.01
+
+
+def _build_category_stores():
+    """Builds one concept store per category on first use."""
+    return {
+        category: lexicon_store.build_snapshot(
+            lexicon_store.rows_from_tables("english", tables), MEDICAL_LANGUAGES,
+            false_positive_rate=BLOOM_FALSE_POSITIVE_RATE)
+        for category, tables in MEDICAL_TABLES.items()
+    }
+
+
+# One concept store per category, built from MEDICAL_TABLES on first use
+# Data Type: dict - category -> lexicon_store.LexiconSnapshot
+#            (a LazyGlobal until first use)
+_CATEGORY_STORES = lazy_loading.LazyGlobal(__name__, "_CATEGORY_STORES",
+                                           _build_category_stores)
+
 
 # ============================================================================
 # MEDICAL TRANSLATION FUNCTIONS
 # ============================================================================
 
-def get_medical_translation(term, target_language, category="all"):
+def get_medical_translation(term, target_language, category="all", source_language="english"):
     """
     Translates medical terms to the specified language.
     
@@ -108,9 +227,11 @@ def get_medical_translation(term, target_language, category="all"):
     
     Parameters:
         term (str): The medical term to translate
-        target_language (str): Target language ("spanish" or "french")
-        category (str): Medical category ("symptoms", "procedures", "departments", or "all")
+        target_language (str): Target language ("english", "spanish" or "french")
+        category (str): Medical category ("symptoms", "procedures", "departments",
+                       "diagnoses", "labs", "results", or "all")
                        Default is "all"
+        source_language (str): Language of the term. Default is "english".
     
     Returns:
         str: Translated term or message if not found
@@ -120,43 +241,71 @@ def get_medical_translation(term, target_language, category="all"):
         'dolor de cabeza'
         >>> get_medical_translation("x-ray", "french", "procedures")
         'radiographie'
+        >>> get_medical_translation("mareo", "french", source_language="spanish")
+        'vertige'
     """
     # Normalize inputs
     # Data Type: str
     normalized_term = term.lower().strip()
     normalized_language = target_language.lower().strip()
     normalized_category = category.lower().strip()
+    normalized_source = source_language.lower().strip()
     
-    # Select appropriate dictionaries based on target language
-    # Data Type: dict
-    if normalized_language == "spanish":
-        symptom_dict = SYMPTOMS_SPANISH
-        procedure_dict = PROCEDURES_SPANISH
-        department_dict = DEPARTMENTS_SPANISH
-    elif normalized_language == "french":
-        symptom_dict = SYMPTOMS_FRENCH
-        procedure_dict = PROCEDURES_FRENCH
-        department_dict = DEPARTMENTS_FRENCH
-    else:
+    # Validate both languages against the medical glossary
+    if normalized_language not in MEDICAL_LANGUAGES:
         return f"Language '{target_language}' not supported"
+    if normalized_source not in MEDICAL_LANGUAGES:
+        return f"Language '{source_language}' not supported"
     
-    # Search in appropriate category
-    if normalized_category == "symptoms" or normalized_category == "all":
-        if normalized_term in symptom_dict:
-            return symptom_dict[normalized_term]
-    
-    if normalized_category == "procedures" or normalized_category == "all":
-        if normalized_term in procedure_dict:
-            return procedure_dict[normalized_term]
-    
-    if normalized_category == "departments" or normalized_category == "all":
-        if normalized_term in department_dict:
-            return department_dict[normalized_term]
+    translation = find_medical_translation(normalized_term, normalized_language,
+                                           normalized_category, normalized_source)
+    if translation is not None:
+        return translation
     
     # Not found
     return f"Medical term '{term}' not found in category '{category}'"
 
 
+def find_medical_translation(term, target_language, category="all", source_language="english"):
+    """
+    Looks up a normalized medical term without any message text.
+    
+    Parameters:
+        term (str): Normalized (lowercase, stripped) term
+        target_language (str): Target language
+        category (str): Medical category, or "all" (default)
+        source_language (str): Language of the term. Default is "english".
+    
+    Returns:
+        str or None: The translation, or None if the term or either
+                     language is not in the medical glossary
+    
+    Example:
+        >>> find_medical_translation("glucose", "spanish", "labs")
+        'glucosa'
+        >>> find_medical_translation("glucose", "hindi") is None
+        True
+    """
+    if target_language not in MEDICAL_LANGUAGES or source_language not in MEDICAL_LANGUAGES:
+        return None
+    
+    # Search the requested category, or every category in order for "all"
+    # Data Type: list
+    if category == "all":
+        categories = list(_CATEGORY_STORES)
+    else:
+        categories = [category]
+    
+    for category_name in categories:
+        store = _CATEGORY_STORES.get(category_name)
+        if store is None:
+            continue
+        translation = store.translate(source_language, target_language, term)
+        if translation is not None:
+            return translation
+    return None
+
+
 def list_medical_categories():
     """
     Returns list of available medical term categories.
@@ -170,10 +319,10 @@ def list_medical_categories():
         
     Example:
         >>> list_medical_categories()
-        ['symptoms', 'procedures', 'departments']
+        ['symptoms', 'procedures', 'departments', 'diagnoses', 'labs', 'results']
     """
     # Data Type: list
-    return ["symptoms", "procedures", "departments"]
+    return list(MEDICAL_TABLES)
 
 
 def get_category_terms(category):
@@ -198,17 +347,75 @@ def get_category_terms(category):
     # Normalize input
     normalized_category = category.lower().strip()
     
-    # Return appropriate list based on category
-    if normalized_category == "symptoms":
-        return sorted(SYMPTOMS_SPANISH.keys())
-    elif normalized_category == "procedures":
-        return sorted(PROCEDURES_SPANISH.keys())
-    elif normalized_category == "departments":
-        return sorted(DEPARTMENTS_SPANISH.keys())
+    # Return the English terms of the matching category store
+    if normalized_category in _CATEGORY_STORES:
+        return sorted(_CATEGORY_STORES[normalized_category].phrases("english"))
     else:
         return []
 
 
+def iter_category_stores():
+    """
+    Returns the concept store of every medical category.
+    
+    Returns:
+        iterator: lexicon_store.LexiconSnapshot objects, one per category
+                  (built on first use)
+    
+    Example:
+        >>> any(store.contains("french", "toux") for store in iter_category_stores())
+        True
+    """
+    return iter(_CATEGORY_STORES.values())
+
+
+def get_medical_filter_stats():
+    """
+    Returns the Bloom filter statistics of every category, per language.
+    
+    Returns:
+        dict: Language -> counters summed over the categories
+    """
+    return {
+        language: bloom_filter.merge_stats(
+            [store.filter_stats()[language] for store in _CATEGORY_STORES.values()])
+        for language in MEDICAL_LANGUAGES
+    }
+
+
+def list_all_medical_entries():
+    """
+    Returns every medical term with its category and translations.
+    
+    Returns:
+        list: (category, forms) tuples, where forms is a dict such as
+              {"english": "fever", "spanish": "fiebre", "french": "fièvre"}
+    """
+    # Data Type: list of tuple
+    return [(category, forms)
+            for category, store in _CATEGORY_STORES.items()
+            for _, forms in store.concepts()]
+
+
+def list_all_medical_phrases():
+    """
+    Returns every medical term in every language and category.
+    
+    Returns:
+        set: Surface forms in English, Spanish and French
+        
+    Example:
+        >>> "fiebre" in list_all_medical_phrases()
+        True
+    """
+    # Data Type: set
+    phrases = set()
+    for store in _CATEGORY_STORES.values():
+        for language in store.languages:
+            phrases.update(store.phrases(language))
+    return phrases
+
+
 def get_medical_term_count():
     """
     Returns total number of medical terms available.
@@ -223,11 +430,11 @@ def get_medical_term_count():
         
     Example:
         >>> get_medical_term_count()
-        27
+        55
     """
     # Count terms across all categories
     # Data Type: int
-    total = len(SYMPTOMS_SPANISH) + len(PROCEDURES_SPANISH) + len(DEPARTMENTS_SPANISH)
+    total = sum(len(store) for store in _CATEGORY_STORES.values())
     return total
 
 
@@ -0,0 +1,427 @@
+"""
+Patient Localization Module for EMR Chatbot
+============================================
+This module produces every patient's discharge packet in the patient's own
+language (PatientCorePopulatedTable.PatientLanguage) in one run, instead
+of one `medical ... to <language>` command per term.
+It demonstrates:
+- A compact lookup array: PatientID -> language code in an array('B')
+  (one byte per patient, indexed by the number in "P000123")
+- Resolving each distinct term once per language before the pass, so the
+  pass itself is only list and dictionary indexing
+- A streaming merge over tables sorted by PatientID: patients, diagnoses
+  and labs are walked side by side, one packet is produced at a time and
+  written out immediately
+- A coverage report: per language, how many items were localized and
+  which terms fell back to English
+
+Each packet holds the patient's diagnoses, lab names and lab flags (high /
+low / normal against an adult reference range). Languages without a
+glossary (e.g. Hindi) get English text, and every item counts as a gap.
+
+Author: EMR Chatbot Team
+Date: 2026-10-19
+"""
+
+from array import array
+
+
+# ============================================================================
+# MODULE-LEVEL CONSTANTS
+# ============================================================================
+
+# Language used when a patient's language has no glossary entry
+# Data Type: str
+FALLBACK_LANGUAGE = "english"
+
+# Code stored for patients with no recorded language
+# Data Type: int
+NO_LANGUAGE = 255
+
+# Languages recorded as "Other" (or left empty) have no code
+# Data Type: set
+UNSPECIFIED_LANGUAGES = {"", "other", "unknown"}
+
+# Adult reference ranges used to flag lab values, keyed by (lab, units)
+# Data Type: dict - (LabName, LabUnits) -> (low, high)
+REFERENCE_RANGES = {
+    ("ALT", "U/L"): (7.0, 56.0),
+    ("AST", "U/L"): (10.0, 40.0),
+    ("Alkaline Phosphatase", "U/L"): (44.0, 147.0),
+    ("BUN", "mg/dL"): (7.0, 20.0),
+    ("Bicarbonate", "mmol/L"): (22.0, 29.0),
+    ("Calcium", "mg/dL"): (8.5, 10.2),
+    ("Chloride", "mmol/L"): (96.0, 106.0),
+    ("Creatinine", "mg/dL"): (0.6, 1.3),
+    ("Glucose", "mg/dL"): (70.0, 140.0),
+    ("Hemoglobin", "g/dL"): (12.0, 17.5),
+    ("Platelets", "10^3/uL"): (150.0, 400.0),
+    ("Potassium", "mmol/L"): (3.5, 5.1),
+    ("Sodium", "mmol/L"): (135.0, 145.0),
+    ("Total Bilirubin", "mg/dL"): (0.1, 1.2),
+    ("WBC", "10^3/uL"): (4.5, 11.0),
+}
+
+# Medical glossary category of each kind of localized item
+# Data Type: dict - item kind -> medical_terms category
+ITEM_CATEGORIES = {
+    "diagnosis": "diagnoses",
+    "lab": "labs",
+    "flag": "results",
+}
+
+
+# ============================================================================
+# PATIENT LANGUAGES
+# ============================================================================
+
+def patient_number(patient_id):
+    """
+    Returns the number inside a patient ID.
+
+    Parameters:
+        patient_id (str): e.g. "P000123"
+
+    Returns:
+        int: e.g. 123
+    """
+    return int(patient_id[1:])
+
+
+class PatientLanguageMap:
+    """
+    PatientID -> language, stored as one byte per patient.
+
+    Attributes:
+        languages (list): Language names (lowercase) by code
+        codes (array): Language code per patient number (NO_LANGUAGE when
+                       unknown)
+    """
+
+    def __init__(self, patient_ids, recorded_languages):
+        """
+        Parameters:
+            patient_ids (list): PatientID column
+            recorded_languages (list): PatientLanguage column (same order)
+        """
+        self.languages = []
+        # Data Type: dict - language name -> code
+        self._code_of = {}
+        size = max((patient_number(patient) for patient in patient_ids), default=0) + 1
+        self.codes = array("B", [NO_LANGUAGE]) * size
+        for patient, recorded in zip(patient_ids, recorded_languages):
+            language = (recorded or "").lower().strip()
+            if language in UNSPECIFIED_LANGUAGES:
+                continue
+            code = self._code_of.get(language)
+            if code is None:
+                code = len(self.languages)
+                if code >= NO_LANGUAGE:
+                    raise ValueError("More than 254 patient languages")
+                self._code_of[language] = code
+                self.languages.append(language)
+            self.codes[patient_number(patient)] = code
+
+    def code(self, patient_id):
+        """Returns a patient's language code (NO_LANGUAGE if unknown)."""
+        number = patient_number(patient_id)
+        return self.codes[number] if number < len(self.codes) else NO_LANGUAGE
+
+    def language(self, patient_id):
+        """
+        Returns a patient's language.
+
+        Parameters:
+            patient_id (str): e.g. "P000001"
+
+        Returns:
+            str or None: Lowercase language name, or None if not recorded
+        """
+        code = self.code(patient_id)
+        return self.languages[code] if code != NO_LANGUAGE else None
+
+    def size_in_bytes(self):
+        """Returns the size of the code array."""
+        return len(self.codes) * self.codes.itemsize
+
+
+def lab_flag(lab_name, value, units):
+    """
+    Flags a lab value against its reference range.
+
+    Parameters:
+        lab_name (str): e.g. "Glucose"
+        value (float or None): Measured value
+        units (str): e.g. "mg/dL"
+
+    Returns:
+        str or None: "high", "low" or "normal"; None if the value is
+                     missing or there is no range for the lab and units
+
+    Example:
+        >>> lab_flag("Glucose", 212.0, "mg/dL")
+        'high'
+    """
+    limits = REFERENCE_RANGES.get((lab_name, units))
+    if limits is None or value is None:
+        return None
+    if value < limits[0]:
+        return "low"
+    if value > limits[1]:
+        return "high"
+    return "normal"
+
+
+# ============================================================================
+# BULK LOCALIZATION
+# ============================================================================
+
+def _patient_runs(patient_ids):
+    """
+    Yields (patient ID, row positions) for each patient of a table.
+
+    Rows sorted by PatientID (as in the EMR files) are split into runs
+    without copying; otherwise the positions are sorted first.
+    """
+    count = len(patient_ids)
+    if all(patient_ids[i] <= patient_ids[i + 1] for i in range(count - 1)):
+        order = range(count)
+    else:
+        order = sorted(range(count), key=patient_ids.__getitem__)
+    start = 0
+    while start < count:
+        patient = patient_ids[order[start]]
+        end = start + 1
+        while end < count and patient_ids[order[end]] == patient:
+            end += 1
+        yield patient, order[start:end]
+        start = end
+
+
+def _resolve_vocabulary(language_map, terms):
+    """
+    Translates every distinct term once for every patient language.
+
+    Parameters:
+        language_map (PatientLanguageMap): Patient languages
+        terms (dict): Item kind -> set of English terms
+
+    Returns:
+        list: One {kind: {term: localized text or None}} dict per code
+    """
+    import medical_terms
+
+    vocabulary = []
+    for language in language_map.languages:
+        resolved = {}
+        for kind, kind_terms in terms.items():
+            category = ITEM_CATEGORIES[kind]
+            table = {}
+            for term in kind_terms:
+                if language == FALLBACK_LANGUAGE:
+                    table[term] = term
+                else:
+                    table[term] = medical_terms.find_medical_translation(
+                        term.lower().strip(), language, category)
+            resolved[kind] = table
+        vocabulary.append(resolved)
+    return vocabulary
+
+
+def localize_patients(report=None):
+    """
+    Streams one localized discharge packet per patient.
+
+    Parameters:
+        report (dict): Optional dict filled with coverage counters per
+                       language (see coverage_report())
+
+    Yields:
+        dict: {"patient", "language", "output_language", "diagnoses",
+               "labs"}; each diagnosis is {"admission", "code", "text"} and
+               each lab is {"admission", "name", "value", "units", "flag",
+               "time"}, with text in output_language
+    """
+    import emr_data
+    import medical_terms
+
+    patients = emr_data.get_table("patients")
+    diagnoses = emr_data.get_table("diagnoses")
+    labs = emr_data.get_table("labs")
+
+    # Step 1: PatientID -> language code, once
+    language_map = PatientLanguageMap(patients.column("PatientID"),
+                                      patients.column("PatientLanguage"))
+
+    # Step 2: every distinct term, translated once per language
+    lab_names = labs.column("LabName")
+    lab_values = labs.column("LabValue")
+    lab_units = labs.column("LabUnits")
+    flags = [lab_flag(name, value, units)
+             for name, value, units in zip(lab_names, lab_values, lab_units)]
+    descriptions = diagnoses.column("PrimaryDiagnosisDescription")
+    vocabulary = _resolve_vocabulary(language_map, {
+        "diagnosis": set(descriptions),
+        "lab": set(lab_names),
+        "flag": {flag for flag in flags if flag is not None},
+    })
+    fallback = {kind: {} for kind in ITEM_CATEGORIES}
+
+    if report is not None:
+        for language in language_map.languages + [None]:
+            report.setdefault(language, {"patients": 0, "items": 0,
+                                         "localized": 0, "missing": {}})
+
+    def localize(kind, term, resolved, counters):
+        """Returns the localized term (English when missing) and counts it."""
+        text = resolved[kind].get(term)
+        if counters is not None:
+            counters["items"] += 1
+            if text is None:
+                missing = counters["missing"]
+                missing[term] = missing.get(term, 0) + 1
+            else:
+                counters["localized"] += 1
+        return text if text is not None else term
+
+    # Step 3: one merge pass over the three tables (sorted by PatientID)
+    diagnosis_runs = _patient_runs(diagnoses.column("PatientID"))
+    lab_runs = _patient_runs(labs.column("PatientID"))
+    next_diagnoses = next(diagnosis_runs, None)
+    next_labs = next(lab_runs, None)
+    codes = diagnoses.column("PrimaryDiagnosisCode")
+    diagnosis_admissions = diagnoses.column("AdmissionID")
+    lab_admissions = labs.column("AdmissionID")
+    lab_times = labs.column("LabDateTime")
+
+    for patient in sorted(patients.column("PatientID")):
+        code = language_map.code(patient)
+        language = language_map.languages[code] if code != NO_LANGUAGE else None
+        resolved = vocabulary[code] if code != NO_LANGUAGE else fallback
+        counters = report[language] if report is not None else None
+        if counters is not None:
+            counters["patients"] += 1
+        supported = language in medical_terms.MEDICAL_LANGUAGES
+
+        # Skip rows of patients missing from the patients table
+        while next_diagnoses is not None and next_diagnoses[0] < patient:
+            next_diagnoses = next(diagnosis_runs, None)
+        while next_labs is not None and next_labs[0] < patient:
+            next_labs = next(lab_runs, None)
+
+        packet_diagnoses = []
+        if next_diagnoses is not None and next_diagnoses[0] == patient:
+            for row in next_diagnoses[1]:
+                packet_diagnoses.append({
+                    "admission": diagnosis_admissions[row],
+                    "code": codes[row],
+                    "text": localize("diagnosis", descriptions[row], resolved, counters),
+                })
+            next_diagnoses = next(diagnosis_runs, None)
+
+        packet_labs = []
+        if next_labs is not None and next_labs[0] == patient:
+            for row in next_labs[1]:
+                flag = flags[row]
+                packet_labs.append({
+                    "admission": lab_admissions[row],
+                    "name": localize("lab", lab_names[row], resolved, counters),
+                    "value": lab_values[row],
+                    "units": lab_units[row],
+                    "flag": localize("flag", flag, resolved, counters) if flag else None,
+                    "time": lab_times[row],
+                })
+            next_labs = next(lab_runs, None)
+
+        yield {
+            "patient": patient,
+            "language": language,
+            "output_language": language if supported else FALLBACK_LANGUAGE,
+            "diagnoses": packet_diagnoses,
+            "labs": packet_labs,
+        }
+
+
+def run(output_path=None):
+    """
+    Localizes every patient, optionally writing the packets to a file.
+
+    Parameters:
+        output_path (str): JSON Lines file for the packets (one per line).
+                           Default is None (report only).
+
+    Returns:
+        dict: Coverage report (see coverage_report())
+    """
+    import json
+
+    report = {}
+    packets = localize_patients(report)
+    if output_path is None:
+        for _ in packets:
+            pass
+    else:
+        with open(output_path, "w", encoding="utf-8") as handle:
+            for packet in packets:
+                handle.write(json.dumps(packet, ensure_ascii=False))
+                handle.write("\n")
+    return report
+
+
+def coverage_report(report):
+    """
+    Formats the coverage counters filled by localize_patients().
+
+    Parameters:
+        report (dict): Language (None for unrecorded) -> {"patients",
+                       "items", "localized", "missing": {term: count}}
+
+    Returns:
+        str: One line per language, most patients first, followed by the
+             terms missing from each partially covered glossary
+    """
+    lines = [f"{'language':<12} {'patients':>8} {'items':>7} {'localized':>9} {'coverage':>9}"]
+    gaps = []
+    ordered = sorted(report.items(), key=lambda item: -item[1]["patients"])
+    for language, counters in ordered:
+        if not counters["patients"]:
+            continue
+        items = counters["items"]
+        coverage = counters["localized"] / items * 100 if items else 100.0
+        name = language or "(none)"
+        lines.append(f"{name:<12} {counters['patients']:>8} {items:>7} "
+                     f"{counters['localized']:>9} {coverage:>8.1f}%")
+        if counters["missing"] and counters["localized"]:
+            terms = sorted(counters["missing"], key=lambda term: -counters["missing"][term])
+            gaps.append(f"  {name} missing: {', '.join(terms)}")
+    unsupported = [language or "(none)" for language, counters in ordered
+                   if counters["patients"] and not counters["localized"]]
+    if gaps:
+        lines.append("Gaps:")
+        lines.extend(gaps)
+    if unsupported:
+        lines.append(f"No glossary (English used): {', '.join(unsupported)}")
+    return "\n".join(lines)
+
+
+# ============================================================================
+# MODULE TEST (runs only when module is executed directly)
+# ============================================================================
+if __name__ == "__main__":
+    import time
+
+    print("=== Patient Localization Module Test ===\n")
+
+    start = time.perf_counter()
+    report = {}
+    packets = list(localize_patients(report))
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"{len(packets)} packets in {elapsed:.1f} ms\n")
+    print(coverage_report(report))
+
+    spanish = next(packet for packet in packets if packet["language"] == "spanish")
+    print(f"\n{spanish['patient']} ({spanish['language']}):")
+    for diagnosis in spanish["diagnoses"][:2]:
+        print(f"  {diagnosis['code']:<8} {diagnosis['text']}")
+    for lab in spanish["labs"][:3]:
+        print(f"  {lab['name']:<28} {lab['value']:>7} {lab['units']:<8} {lab['flag']}")
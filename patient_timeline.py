@@ -0,0 +1,301 @@
+"""
+Patient Timeline Module for EMR Chatbot
+========================================
+This module builds a patient's chronological timeline from three EMR
+tables: admissions (admitted / discharged), diagnoses (dated by their
+admission) and labs (LabDateTime).
+It demonstrates:
+- Per-patient indexes: each source's rows sorted ONCE by (patient, time)
+  into a CSR layout (row positions + offsets), so one patient's events are
+  an already sorted slice
+- A lazy k-way merge: heapq.merge() keeps one pending event per source in
+  a heap and yields the earliest, so the first events come out before the
+  rest of the timeline is even looked at
+- Generators end to end: `timeline P000001` prints events as they are
+  produced, and a bulk export walks every source once, patient by patient
+
+Timestamps stay ISO strings ("2022-09-03 10:08:23"), which sort in
+chronological order without being parsed.
+
+Author: EMR Chatbot Team
+Date: 2026-10-19
+"""
+
+import bisect
+import heapq
+from array import array
+
+
+# ============================================================================
+# MODULE-LEVEL CONSTANTS AND VARIABLES
+# ============================================================================
+
+# Order of events that share a timestamp (diagnoses are dated with their
+# admission's start, so they must come right after it)
+# Data Type: dict - event kind -> rank
+EVENT_RANKS = {
+    "admission": 0,
+    "diagnosis": 1,
+    "lab": 2,
+    "discharge": 3,
+}
+
+# Indexes built from the EMR tables on first use
+# Data Type: dict or None - source name -> (PatientIndex, event function)
+_SOURCES = None
+
+
+# ============================================================================
+# PER-PATIENT INDEX
+# ============================================================================
+
+class PatientIndex:
+    """
+    One table's rows grouped by patient and sorted by time (CSR layout).
+
+    Attributes:
+        patients (list): PatientIDs in sorted order
+        offsets (array): Rows of patients[p] are rows[offsets[p]:offsets[p + 1]]
+        rows (array): Table row positions, by patient then time
+    """
+
+    def __init__(self, patient_ids, times):
+        """
+        Parameters:
+            patient_ids (list): PatientID column
+            times (list): Sort time per row (ISO strings)
+        """
+        order = sorted(range(len(patient_ids)), key=list(zip(patient_ids, times)).__getitem__)
+        self.rows = array("L", order)
+        self.patients = []
+        self.offsets = array("L")
+        previous = None
+        for position, row in enumerate(order):
+            if patient_ids[row] != previous:
+                previous = patient_ids[row]
+                self.patients.append(previous)
+                self.offsets.append(position)
+        self.offsets.append(len(order))
+
+    def patient_rows(self, patient):
+        """
+        Returns one patient's rows in time order.
+
+        Parameters:
+            patient (str): e.g. "P000001"
+
+        Returns:
+            array: Row positions (empty if the patient has none)
+        """
+        position = bisect.bisect_left(self.patients, patient)
+        if position == len(self.patients) or self.patients[position] != patient:
+            return self.rows[0:0]
+        return self.rows[self.offsets[position]:self.offsets[position + 1]]
+
+    def runs(self):
+        """
+        Yields (patient, rows) for every patient, in patient order.
+
+        Returns:
+            generator: One sequential pass over the index
+        """
+        offsets = self.offsets
+        for position, patient in enumerate(self.patients):
+            yield patient, self.rows[offsets[position]:offsets[position + 1]]
+
+
+# ============================================================================
+# EVENT SOURCES
+# ============================================================================
+
+def _build_sources():
+    """
+    Indexes the admissions, diagnoses and labs tables by patient and time.
+
+    Returns:
+        dict: Source name -> (PatientIndex, function(rows) yielding events)
+    """
+    import emr_data
+
+    admissions = emr_data.get_table("admissions")
+    diagnoses = emr_data.get_table("diagnoses")
+    labs = emr_data.get_table("labs")
+
+    admission_ids = admissions.column("AdmissionID")
+    starts = admissions.column("AdmissionStartDate")
+    ends = admissions.column("AdmissionEndDate")
+    # Diagnoses have no time of their own: they take their admission's start
+    start_of = dict(zip(admission_ids, starts))
+    diagnosis_admissions = diagnoses.column("AdmissionID")
+    diagnosis_times = [start_of.get(admission, "") for admission in diagnosis_admissions]
+    codes = diagnoses.column("PrimaryDiagnosisCode")
+    descriptions = diagnoses.column("PrimaryDiagnosisDescription")
+    lab_admissions = labs.column("AdmissionID")
+    lab_times = labs.column("LabDateTime")
+    lab_names = labs.column("LabName")
+    lab_values = labs.column("LabValue")
+    lab_units = labs.column("LabUnits")
+
+    # Each function turns a patient's sorted rows into sorted events:
+    # (time, rank, admission ID, kind, detail)
+    admission_rank, diagnosis_rank, lab_rank, discharge_rank = (
+        EVENT_RANKS[kind] for kind in ("admission", "diagnosis", "lab", "discharge"))
+
+    def admitted(rows):
+        for row in rows:
+            yield (starts[row], admission_rank, admission_ids[row], "admission", "")
+
+    def discharged(rows):
+        for row in rows:
+            yield (ends[row], discharge_rank, admission_ids[row], "discharge", "")
+
+    def diagnosed(rows):
+        for row in rows:
+            yield (diagnosis_times[row], diagnosis_rank, diagnosis_admissions[row], "diagnosis",
+                   f"{codes[row]} {descriptions[row]}")
+
+    def measured(rows):
+        for row in rows:
+            value = lab_values[row]
+            value_text = f"{value:g}" if value is not None else "?"
+            yield (lab_times[row], lab_rank, lab_admissions[row], "lab",
+                   f"{lab_names[row]} {value_text} {lab_units[row]}")
+
+    patients = admissions.column("PatientID")
+    return {
+        "admissions": (PatientIndex(patients, starts), admitted),
+        "discharges": (PatientIndex(patients, ends), discharged),
+        "diagnoses": (PatientIndex(diagnoses.column("PatientID"), diagnosis_times), diagnosed),
+        "labs": (PatientIndex(labs.column("PatientID"), lab_times), measured),
+    }
+
+
+def get_sources():
+    """Returns the event sources, indexing the EMR tables on first use."""
+    global _SOURCES
+
+    if _SOURCES is None:
+        _SOURCES = _build_sources()
+    return _SOURCES
+
+
+# ============================================================================
+# TIMELINES
+# ============================================================================
+
+def patient_timeline(patient):
+    """
+    Streams one patient's events in chronological order.
+
+    Parameters:
+        patient (str): e.g. "P000001"
+
+    Returns:
+        iterator: (time, rank, admission ID, kind, detail) tuples; kind is
+                  one of EVENT_RANKS
+
+    Example:
+        >>> next(patient_timeline("P000001"))[3]
+        'admission'
+    """
+    streams = [events(index.patient_rows(patient)) for index, events in get_sources().values()]
+    return heapq.merge(*streams)
+
+
+def all_timelines():
+    """
+    Streams every patient's timeline in one sequential pass.
+
+    Each source is walked once in patient order; the patients' slices are
+    merged as they come.
+
+    Yields:
+        tuple: (patient, event) with events as in patient_timeline()
+    """
+    sources = list(get_sources().values())
+    runs = [index.runs() for index, _ in sources]
+    pending = [next(run, None) for run in runs]
+    while True:
+        current = [item[0] for item in pending if item is not None]
+        if not current:
+            return
+        patient = min(current)
+        streams = []
+        for position, (_, events) in enumerate(sources):
+            item = pending[position]
+            if item is not None and item[0] == patient:
+                streams.append(events(item[1]))
+                pending[position] = next(runs[position], None)
+        for event in heapq.merge(*streams):
+            yield patient, event
+
+
+def format_event(event):
+    """
+    Formats one event for the `timeline` command.
+
+    Parameters:
+        event (tuple): Event from patient_timeline()
+
+    Returns:
+        str: e.g. "2022-09-03 10:08  admission  100000"
+    """
+    time, _, admission, kind, detail = event
+    return f"{time[:16]}  {kind:<9}  {admission}  {detail}".rstrip()
+
+
+def export(path):
+    """
+    Writes every patient's timeline to a JSON Lines file (one event per
+    line).
+
+    Parameters:
+        path (str): Output file
+
+    Returns:
+        tuple: (patients, events) written
+    """
+    import json
+
+    patients = 0
+    events = 0
+    previous = None
+    with open(path, "w", encoding="utf-8") as handle:
+        for patient, (time, _, admission, kind, detail) in all_timelines():
+            if patient != previous:
+                patients += 1
+                previous = patient
+            handle.write(json.dumps({"patient": patient, "time": time, "event": kind,
+                                     "admission": admission, "detail": detail}))
+            handle.write("\n")
+            events += 1
+    return patients, events
+
+
+# ============================================================================
+# MODULE TEST (runs only when module is executed directly)
+# ============================================================================
+if __name__ == "__main__":
+    import os
+    import tempfile
+    import time
+
+    print("=== Patient Timeline Module Test ===\n")
+
+    start = time.perf_counter()
+    get_sources()
+    print(f"Indexes built in {(time.perf_counter() - start) * 1000:.1f} ms\n")
+
+    start = time.perf_counter()
+    timeline = patient_timeline("P000001")
+    first = next(timeline)
+    print(f"First event after {(time.perf_counter() - start) * 1e6:.0f} µs:")
+    print(f"  {format_event(first)}")
+    for event in timeline:
+        print(f"  {format_event(event)}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        patients, events = export(os.path.join(directory, "timelines.jsonl"))
+        print(f"\nExported {events:,} events for {patients} patients in "
+              f"{(time.perf_counter() - start) * 1000:.0f} ms")
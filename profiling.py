@@ -0,0 +1,333 @@
+"""
+Profiling Module for EMR Chatbot
+=================================
+This module profiles the command-processing path of a running chatbot.
+It demonstrates:
+- A sampling profiler: a background thread records the call stack of the
+  chatbot thread every few milliseconds, but only while a command is being
+  processed (cheap enough to leave on for minutes)
+- A deterministic profiler (cProfile) for exact call counts, enabled only
+  around command processing
+- Memory tracing with tracemalloc
+- Output files that standard tools can read:
+    <name>.collapsed    - collapsed stacks ("a;b;c 12") for flamegraph.pl,
+                          speedscope or inferno
+    <name>.pstats       - cProfile statistics for pstats / snakeviz
+    <name>.memory.txt   - top allocation sites from tracemalloc
+
+Author: EMR Chatbot Team
+Date: 2026-10-19
+"""
+
+import os
+import sys
+import threading
+import time
+
+# cProfile and tracemalloc are imported when a session starts, so importing
+# this module adds nothing to chatbot startup
+
+
+# ============================================================================
+# MODULE-LEVEL CONSTANTS AND VARIABLES
+# ============================================================================
+
+# Seconds between stack samples in sampling mode
+# Data Type: float
+DEFAULT_SAMPLE_INTERVAL = 0.005
+
+# Stack frames kept per allocation by tracemalloc
+# Data Type: int
+TRACEMALLOC_FRAMES = 16
+
+# Allocation sites written to the memory report
+# Data Type: int
+MEMORY_REPORT_LINES = 25
+
+# Supported profiler modes
+# Data Type: tuple
+MODES = ("sampling", "deterministic")
+
+# The running session, if any
+# Data Type: ProfilingSession or None
+_SESSION = None
+
+
+# ============================================================================
+# PROFILING SESSION
+# ============================================================================
+
+class ProfilingSession:
+    """
+    Profiles every command processed between start() and stop().
+
+    Attributes:
+        mode (str): "sampling" or "deterministic"
+        output_prefix (str): Path prefix for the output files
+        commands (int): Commands profiled so far
+        samples (int): Stack samples taken (sampling mode)
+    """
+
+    def __init__(self, output_directory=".", mode="sampling",
+                 interval=DEFAULT_SAMPLE_INTERVAL, trace_memory=True):
+        if mode not in MODES:
+            raise ValueError(f"Unknown profiler mode '{mode}'. Use one of: {', '.join(MODES)}")
+        import cProfile
+
+        self.mode = mode
+        self.interval = interval
+        self.trace_memory = trace_memory
+        stamp = time.strftime("%Y%m%d-%H%M%S") + f"-{int(time.time() * 1000) % 1000:03d}"
+        self.output_prefix = os.path.join(output_directory, f"profile-{stamp}")
+        self.commands = 0
+        self.samples = 0
+
+        # Data Type: dict - collapsed stack string -> sample count
+        self._stacks = {}
+        self._profiler = cProfile.Profile() if mode == "deterministic" else None
+        self._target_thread = threading.get_ident()
+        self._in_command = False
+        self._stopped = threading.Event()
+        self._sampler = None
+        self._started_tracemalloc = False
+
+    def start(self):
+        """Starts the sampler thread and memory tracing."""
+        import tracemalloc
+
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+            self._started_tracemalloc = True
+        if self.mode == "sampling":
+            self._sampler = threading.Thread(target=self._sample_loop, daemon=True,
+                                             name="profiling-sampler")
+            self._sampler.start()
+
+    def command_started(self):
+        """Begins profiling one command (called from the chatbot thread)."""
+        self.commands += 1
+        self._in_command = True
+        if self._profiler is not None:
+            self._profiler.enable()
+
+    def command_finished(self):
+        """Ends profiling of the current command."""
+        if self._profiler is not None:
+            self._profiler.disable()
+        self._in_command = False
+
+    def stop(self):
+        """
+        Stops profiling and writes the output files.
+
+        Returns:
+            list: Paths of the files written
+        """
+        import tracemalloc
+
+        self._stopped.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        written = []
+
+        if self._stacks:
+            path = self.output_prefix + ".collapsed"
+            with open(path, "w", encoding="utf-8") as handle:
+                for stack, count in sorted(self._stacks.items()):
+                    handle.write(f"{stack} {count}\n")
+            written.append(path)
+
+        if self._profiler is not None:
+            path = self.output_prefix + ".pstats"
+            self._profiler.dump_stats(path)
+            written.append(path)
+
+        if tracemalloc.is_tracing() and self.trace_memory:
+            path = self.output_prefix + ".memory.txt"
+            snapshot = tracemalloc.take_snapshot()
+            with open(path, "w", encoding="utf-8") as handle:
+                handle.write(f"Top {MEMORY_REPORT_LINES} allocation sites "
+                             f"({self.commands} commands profiled)\n")
+                for stat in snapshot.statistics("traceback")[:MEMORY_REPORT_LINES]:
+                    handle.write(f"\n{stat.size / 1024:.1f} KiB in {stat.count} blocks\n")
+                    for line in stat.traceback.format():
+                        handle.write(f"{line}\n")
+            written.append(path)
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+
+        return written
+
+    def _sample_loop(self):
+        """Records the chatbot thread's stack while a command is running."""
+        while not self._stopped.wait(self.interval):
+            if not self._in_command:
+                continue
+            frame = sys._current_frames().get(self._target_thread)
+            if frame is None:
+                continue
+            # Walk from the innermost frame outwards, then reverse to get
+            # the root-first order flamegraph tools expect
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            stack = ";".join(reversed(names))
+            self._stacks[stack] = self._stacks.get(stack, 0) + 1
+            self.samples += 1
+
+
+# ============================================================================
+# MODULE-LEVEL CONTROL FUNCTIONS (used by main.py)
+# ============================================================================
+
+def is_active():
+    """Returns True while a profiling session is running."""
+    return _SESSION is not None
+
+
+def start(output_directory=".", mode="sampling", **options):
+    """
+    Starts a profiling session (stopping any running one first).
+
+    Parameters:
+        output_directory (str): Where output files are written. Default ".".
+        mode (str): "sampling" (default) or "deterministic"
+        **options: interval, trace_memory
+
+    Returns:
+        ProfilingSession: The new session
+    """
+    global _SESSION
+
+    if _SESSION is not None:
+        stop()
+    os.makedirs(output_directory, exist_ok=True)
+    session = ProfilingSession(output_directory, mode, **options)
+    session.start()
+    _SESSION = session
+    return session
+
+
+def stop():
+    """
+    Stops the running session and writes its files.
+
+    Returns:
+        list: Paths of the files written (empty if nothing was running)
+    """
+    global _SESSION
+
+    session = _SESSION
+    _SESSION = None
+    if session is None:
+        return []
+    return session.stop()
+
+
+def command_started():
+    """Marks the start of a command; does nothing when not profiling."""
+    if _SESSION is not None:
+        _SESSION.command_started()
+
+
+def command_finished():
+    """Marks the end of a command; does nothing when not profiling."""
+    if _SESSION is not None:
+        _SESSION.command_finished()
+
+
+# ============================================================================
+# STARTUP REPORT
+# ============================================================================
+
+def startup_report(script, arguments=("--batch",), runs=5, top=12):
+    """
+    Measures how long a script takes to start and which imports dominate.
+
+    The script is run in a subprocess with empty input: first a few times
+    to time the whole process (best run is reported), then once with
+    Python's `-X importtime` option to attribute time to modules.
+
+    Parameters:
+        script (str): Path of the script (e.g. main.py)
+        arguments (tuple): Command-line arguments. Default is ("--batch",).
+        runs (int): Timed runs. Default is 5.
+        top (int): Modules listed in the report. Default is 12.
+
+    Returns:
+        str: Multi-line report
+
+    Example:
+        >>> print(startup_report("main.py"))
+        Startup (best of 5 runs): 38.2 ms wall clock ...
+    """
+    import subprocess
+
+    command = [sys.executable, script, *arguments]
+    best = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(command, input=b"", stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL, check=False)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+
+    baseline = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"], check=False)
+        elapsed = time.perf_counter() - started
+        baseline = elapsed if baseline is None else min(baseline, elapsed)
+
+    result = subprocess.run([sys.executable, "-X", "importtime", *command[1:]],
+                            input=b"", stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE, check=False)
+
+    # Lines look like "import time:  self [us] |  cumulative | imported package"
+    # Data Type: list of tuple (self_us, cumulative_us, module name)
+    modules = []
+    for line in result.stderr.decode("utf-8", "replace").splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        modules.append((int(fields[0]), int(fields[1]), fields[2].strip()))
+
+    total_us = sum(item[0] for item in modules)
+    lines = [
+        f"Startup (best of {runs} runs): {best * 1000:.1f} ms wall clock "
+        f"({(best - baseline) * 1000:.1f} ms more than an empty interpreter)",
+        f"Imports: {len(modules)} modules, {total_us / 1000:.1f} ms total (-X importtime)",
+        "",
+        f"{'self ms':>8} {'cumulative ms':>14}  module",
+    ]
+    for self_us, cumulative_us, name in sorted(modules, reverse=True)[:top]:
+        lines.append(f"{self_us / 1000:>8.2f} {cumulative_us / 1000:>14.2f}  {name}")
+    return "\n".join(lines)
+
+
+# ============================================================================
+# MODULE TEST (runs only when module is executed directly)
+# ============================================================================
+if __name__ == "__main__":
+    import tempfile
+
+    import translation_module
+
+    print("=== Profiling Module Test ===\n")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for mode in MODES:
+            session = start(directory, mode)
+            for _ in range(200):
+                command_started()
+                for word in ["hello", "patient", "xyz"] * 100:
+                    translation_module.translate_to_spanish(word)
+                command_finished()
+            files = stop()
+            print(f"{mode}: {session.commands} commands, {session.samples} samples")
+            for path in files:
+                print(f"  wrote {os.path.basename(path)} ({os.path.getsize(path)} bytes)")
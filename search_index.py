@@ -0,0 +1,422 @@
+"""
+Search Index Module for EMR Chatbot
+====================================
+This module answers `search pain` with every glossary entry and diagnosis
+description containing the word, in any language.
+It demonstrates:
+- A tokenized inverted index: word -> list of documents containing it
+- Compressed posting lists: document IDs are stored as the gaps between
+  them (small numbers), each written as a variable-length integer (varint)
+  in a bytearray - usually one byte per posting
+- Multi-word queries answered by intersecting posting lists, rarest word
+  first
+- Accent folding, so "tete" also finds "tête"
+
+Documents indexed:
+    glossary    - each general translation entry (all languages)
+    medical     - each medical term (all languages)
+    diagnosis   - each distinct PrimaryDiagnosisDescription in
+                  AdmissionsDiagnosesCorePopulatedTable.csv
+
+Author: EMR Chatbot Team
+Date: 2026-10-19
+"""
+
+import re
+import unicodedata
+
+
+# ============================================================================
+# MODULE-LEVEL CONSTANTS AND VARIABLES
+# ============================================================================
+
+# Results shown by the search command
+# Data Type: int
+DEFAULT_LIMIT = 10
+
+# Data Type: re.Pattern - a token is a run of letters or digits
+_TOKEN_PATTERN = re.compile(r"[^\W_]+")
+
+# Shared index, built on first search
+# Data Type: SearchIndex or None
+_INDEX = None
+
+# Entries added while rebuild_index() runs, replayed into the new index
+# Data Type: list or None
+_REBUILD_LOG = None
+
+
+# ============================================================================
+# TOKENIZING AND VARINT ENCODING
+# ============================================================================
+
+def fold_accents(text):
+    """
+    Removes accents from text ("tête" -> "tete").
+
+    Parameters:
+        text (str): Any text
+
+    Returns:
+        str: Text without combining accent marks
+    """
+    if text.isascii():
+        return text
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def tokenize(text):
+    """
+    Splits text into lowercase, accent-free words.
+
+    Parameters:
+        text (str): Any text
+
+    Returns:
+        list: Tokens in order
+
+    Example:
+        >>> tokenize("Mal de Tête, unspecified")
+        ['mal', 'de', 'tete', 'unspecified']
+    """
+    return _TOKEN_PATTERN.findall(fold_accents(text.lower()))
+
+
+def encode_varint(value, output):
+    """
+    Appends a non-negative integer to a bytearray as a varint
+    (7 bits per byte, high bit set on every byte except the last).
+
+    Parameters:
+        value (int): Number to write
+        output (bytearray): Destination
+    """
+    while value >= 0x80:
+        output.append((value & 0x7F) | 0x80)
+        value >>= 7
+    output.append(value)
+
+
+def decode_postings(data):
+    """
+    Decodes a posting list of delta-encoded varints.
+
+    Parameters:
+        data (bytes or bytearray): Encoded posting list
+
+    Returns:
+        list: Document IDs in increasing order
+
+    Example:
+        >>> output = bytearray()
+        >>> for gap in (3, 1, 200): encode_varint(gap, output)
+        >>> decode_postings(output)
+        [3, 4, 204]
+    """
+    documents = []
+    current = 0
+    value = 0
+    shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        current += value
+        documents.append(current)
+        value = 0
+        shift = 0
+    return documents
+
+
+def intersect_sorted(left, right):
+    """
+    Returns the items present in both of two increasing lists.
+
+    Parameters:
+        left (list): Increasing document IDs
+        right (list): Increasing document IDs
+
+    Returns:
+        list: Common document IDs, increasing
+    """
+    if len(left) > len(right):
+        left, right = right, left
+    # A set probe is faster than a merge walk when one list is much shorter
+    if len(left) * 8 < len(right):
+        members = set(right)
+        return [document for document in left if document in members]
+    result = []
+    i = j = 0
+    while i < len(left) and j < len(right):
+        a, b = left[i], right[j]
+        if a == b:
+            result.append(a)
+            i += 1
+            j += 1
+        elif a < b:
+            i += 1
+        else:
+            j += 1
+    return result
+
+
+# ============================================================================
+# SEARCH INDEX
+# ============================================================================
+
+class SearchIndex:
+    """
+    Inverted index over short documents.
+
+    Attributes:
+        documents (list): (kind, title, payload) per document ID
+        postings (dict): Token -> bytearray of delta-encoded varints
+    """
+
+    def __init__(self):
+        self.documents = []
+        self.postings = {}
+        # Data Type: dict - token -> (last document ID, posting count)
+        self._tails = {}
+        # Data Type: set - document IDs replaced by a newer version
+        self._removed = set()
+        # Data Type: dict - (kind, key) -> latest document ID with that key
+        self._keys = {}
+
+    def add(self, kind, title, texts, payload=None, key=None):
+        """
+        Adds one document.
+
+        Parameters:
+            kind (str): Document type, e.g. "glossary" or "diagnosis"
+            title (str): Text shown in search results
+            texts (list): Strings whose words are indexed
+            payload (object): Extra data returned with results
+            key (str): Identity of the document; adding another document
+                       with the same kind and key replaces this one
+
+        Returns:
+            int: The new document ID
+        """
+        document = len(self.documents)
+        self.documents.append((kind, title, payload))
+        if key is not None:
+            previous = self._keys.get((kind, key))
+            if previous is not None:
+                self._removed.add(previous)
+            self._keys[(kind, key)] = document
+
+        tokens = set()
+        for text in texts:
+            tokens.update(tokenize(text))
+        postings = self.postings
+        tails = self._tails
+        for token in tokens:
+            last, count = tails.get(token, (0, 0))
+            data = postings.get(token)
+            if data is None:
+                data = postings[token] = bytearray()
+            # Gaps are measured from the previous document (from 0 for the first)
+            encode_varint(document - last, data)
+            tails[token] = (document, count + 1)
+        return document
+
+    def document_frequency(self, token):
+        """Returns how many documents contain a token."""
+        return self._tails.get(token, (0, 0))[1]
+
+    def search(self, query, limit=None):
+        """
+        Returns the documents containing every word of a query.
+
+        Parameters:
+            query (str): One or more words, in any language
+            limit (int): Maximum number of results. Default is no limit.
+
+        Returns:
+            tuple: (total, results)
+                   total (int): Number of matching documents
+                   results (list): (kind, title, payload) tuples in the
+                                   order documents were added
+
+        Example:
+            >>> index.search("pain")
+            (12, [('diagnosis', 'Pain, unspecified', ...), ...])
+        """
+        tokens = sorted(set(tokenize(query)), key=self.document_frequency)
+        if not tokens or self.document_frequency(tokens[0]) == 0:
+            return 0, []
+
+        # Rarest word first keeps the intermediate result as small as possible
+        matches = decode_postings(self.postings[tokens[0]])
+        for token in tokens[1:]:
+            if not matches:
+                break
+            matches = intersect_sorted(matches, decode_postings(self.postings[token]))
+
+        if self._removed:
+            matches = [document for document in matches if document not in self._removed]
+        selected = matches if limit is None else matches[:limit]
+        return len(matches), [self.documents[document] for document in selected]
+
+    def size_in_bytes(self):
+        """Returns the total size of the encoded posting lists."""
+        return sum(len(data) for data in self.postings.values())
+
+
+# ============================================================================
+# MODULE-LEVEL FUNCTIONS (used by main.py)
+# ============================================================================
+
+def _glossary_title(forms):
+    """Formats an entry's forms as "english | spanish | french"."""
+    return " | ".join(forms.values())
+
+
+def build_index():
+    """
+    Indexes every glossary entry, medical term and diagnosis description.
+
+    Returns:
+        SearchIndex: The new index
+    """
+    import emr_data
+    import medical_terms
+    import translation_module
+
+    index = SearchIndex()
+    for forms in translation_module.list_all_entries():
+        index.add("glossary", _glossary_title(forms), forms.values(),
+                  key=forms.get(translation_module.PIVOT_LANGUAGE))
+    for category, forms in medical_terms.list_all_medical_entries():
+        index.add("medical", _glossary_title(forms), forms.values(), payload=category)
+
+    # One document per distinct description; the payload counts admissions
+    diagnoses = emr_data.get_table("diagnoses")
+    # Data Type: dict - description -> [code, admissions]
+    distinct = {}
+    for code, description in diagnoses.rows("PrimaryDiagnosisCode",
+                                             "PrimaryDiagnosisDescription"):
+        entry = distinct.get(description)
+        if entry is None:
+            distinct[description] = [code, 1]
+        else:
+            entry[1] += 1
+    for description, (code, admissions) in distinct.items():
+        index.add("diagnosis", description, [description, code],
+                  payload={"code": code, "admissions": admissions})
+    return index
+
+
+def get_index():
+    """Returns the shared index, building it on first use."""
+    global _INDEX
+
+    if _INDEX is None:
+        _INDEX = build_index()
+    return _INDEX
+
+
+def add_entry(forms):
+    """
+    Indexes a new or changed glossary entry (does nothing before the index
+    is built, because build_index() will pick it up).
+
+    Parameters:
+        forms (dict): Language -> phrase
+    """
+    import translation_module
+
+    log = _REBUILD_LOG
+    if log is not None:
+        log.append(forms)
+    index = _INDEX
+    if index is not None:
+        index.add("glossary", _glossary_title(forms), forms.values(),
+                  key=forms.get(translation_module.PIVOT_LANGUAGE))
+
+
+def rebuild_index():
+    """
+    Rebuilds the index after the glossary was reloaded and swaps it in
+    (does nothing before the index is first built).
+
+    Searches keep using the old index until the new one is ready.
+
+    Returns:
+        SearchIndex or None: The new index
+    """
+    global _INDEX, _REBUILD_LOG
+    import translation_module
+
+    if _INDEX is None:
+        return None
+    _REBUILD_LOG = []
+    index = build_index()
+    _INDEX = index
+    # Entries added during the build went to the old index; re-adding one
+    # simply replaces it (same key)
+    for forms in _REBUILD_LOG:
+        index.add("glossary", _glossary_title(forms), forms.values(),
+                  key=forms.get(translation_module.PIVOT_LANGUAGE))
+    _REBUILD_LOG = None
+    return index
+
+
+def search(query, limit=DEFAULT_LIMIT):
+    """
+    Searches glossary entries, medical terms and diagnoses.
+
+    Parameters:
+        query (str): Words to look for (all must match)
+        limit (int): Maximum number of results. Default is DEFAULT_LIMIT.
+
+    Returns:
+        tuple: (total, results) - see SearchIndex.search()
+
+    Example:
+        >>> search("dolor")
+        (6, [('medical', 'headache | dolor de cabeza | mal de tête', 'symptoms'), ...])
+    """
+    return get_index().search(query, limit)
+
+
+def format_result(result):
+    """
+    Formats one search result as a line of text.
+
+    Parameters:
+        result (tuple): (kind, title, payload) from search()
+
+    Returns:
+        str: e.g. "[diagnosis] R52 Pain, unspecified (3 admissions)"
+    """
+    kind, title, payload = result
+    if kind == "diagnosis":
+        return f"[diagnosis] {payload['code']} {title} ({payload['admissions']} admissions)"
+    if kind == "medical":
+        return f"[medical/{payload}] {title}"
+    return f"[{kind}] {title}"
+
+
+# ============================================================================
+# MODULE TEST (runs only when module is executed directly)
+# ============================================================================
+if __name__ == "__main__":
+    import time
+
+    print("=== Search Index Module Test ===\n")
+
+    start = time.perf_counter()
+    index = get_index()
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"Indexed {len(index.documents)} documents, {len(index.postings)} words, "
+          f"{index.size_in_bytes()} bytes of postings in {elapsed:.1f} ms\n")
+
+    for query in ["pain", "dolor", "tete", "diabetes", "tract infection"]:
+        total, results = search(query, 3)
+        print(f"'{query}': {total} matches")
+        for result in results:
+            print(f"  {format_result(result)}")
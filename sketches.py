@@ -0,0 +1,559 @@
+"""
+Sketches Module for EMR Chatbot
+================================
+This module answers approximate questions about large lab volumes ("how
+many distinct patients had a WBC test?", "median glucose by race", "most
+frequent diagnosis codes") from small summaries kept while the tables are
+loaded, instead of scanning every row for every question.
+It demonstrates:
+- HyperLogLog: distinct counts from 4,096 one-byte registers
+  (standard error 1.04 / sqrt(registers), about 1.6%)
+- KLL: quantiles from a few hundred retained values arranged in levels of
+  doubling weight (rank error about 2.3 / k^0.97, 1.3% for k = 200)
+- Count-Min: frequencies from a small table of counters that never
+  under-counts (over-count at most epsilon x total with probability
+  1 - delta), plus a short list of heavy-hitter candidates
+- Mergeable summaries: each sketch of one partition can be merged with
+  the sketch of another (register max, level concatenation, counter sum),
+  so partitions can be summarized by parallel workers and combined
+- Stable hashing (bloom_filter.stable_hash) so sketches built in different
+  processes agree
+
+Queries do a fixed amount of work whatever the number of rows summarized.
+
+Author: EMR Chatbot Team
+Date: 2026-10-19
+"""
+
+import bisect
+import heapq
+import itertools
+import math
+import random
+from array import array
+
+from bloom_filter import stable_hash
+
+
+# ============================================================================
+# MODULE-LEVEL CONSTANTS AND VARIABLES
+# ============================================================================
+
+# HyperLogLog register count = 2 ** HLL_PRECISION
+# Data Type: int
+HLL_PRECISION = 12
+
+# KLL accuracy parameter (retained values grow with k)
+# Data Type: int
+KLL_K = 200
+
+# Count-Min error (epsilon x total rows) and failure probability
+# Data Type: float
+COUNT_MIN_EPSILON = 0.001
+COUNT_MIN_DELTA = 0.01
+
+# Heavy-hitter candidates kept next to a Count-Min sketch
+# Data Type: int
+HEAVY_HITTER_CANDIDATES = 32
+
+# Sketches of the EMR tables, built on first use
+# Data Type: EMRSketches or None
+_SKETCHES = None
+
+
+# ============================================================================
+# HYPERLOGLOG (DISTINCT COUNTS)
+# ============================================================================
+
+class HyperLogLog:
+    """
+    Approximate count of distinct items.
+
+    Each item's 64-bit hash picks a register (first `precision` bits) and
+    a rank (position of the first 1 bit in the rest); a register keeps the
+    highest rank it has seen.
+
+    Example:
+        >>> sketch = HyperLogLog()
+        >>> sketch.update(f"P{number:06d}" for number in range(10000))
+        >>> abs(sketch.count() - 10000) < 500
+        True
+    """
+
+    def __init__(self, precision=HLL_PRECISION):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+        self._estimate = None
+
+    def add(self, item):
+        """Adds one item (a string)."""
+        value = stable_hash(item)
+        register = value >> (64 - self.precision)
+        rest = value & ((1 << (64 - self.precision)) - 1)
+        rank = 64 - self.precision - rest.bit_length() + 1
+        if rank > self.registers[register]:
+            self.registers[register] = rank
+            self._estimate = None
+
+    def update(self, items):
+        """
+        Adds many items. Duplicates cannot change a register, so each
+        distinct item of the batch is hashed once.
+        """
+        for item in set(items):
+            self.add(item)
+
+    def merge(self, other):
+        """Adds every item of another sketch with the same precision."""
+        if other.precision != self.precision:
+            raise ValueError("HyperLogLog precisions differ")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        self._estimate = None
+
+    def count(self):
+        """
+        Returns the estimated number of distinct items.
+
+        Returns:
+            int: Estimate (within about 1.04 / sqrt(registers) relative
+                 standard error)
+        """
+        if self._estimate is None:
+            size = len(self.registers)
+            alpha = 0.7213 / (1 + 1.079 / size)
+            estimate = alpha * size * size / sum(2.0 ** -rank for rank in self.registers)
+            zeros = self.registers.count(0)
+            if estimate <= 2.5 * size and zeros:
+                # Small range: linear counting over the empty registers
+                estimate = size * math.log(size / zeros)
+            self._estimate = round(estimate)
+        return self._estimate
+
+    def relative_error(self):
+        """Returns the relative standard error of count()."""
+        return 1.04 / math.sqrt(len(self.registers))
+
+
+# ============================================================================
+# KLL (QUANTILES)
+# ============================================================================
+
+class KLLSketch:
+    """
+    Approximate quantiles of a stream of numbers.
+
+    Values enter level 0. When a level is full it is sorted and every
+    other value (odd or even positions, at random) moves up one level with
+    twice the weight; the rest are dropped. Upper levels get capacity k,
+    lower ones shrink by 2/3 per level.
+
+    Example:
+        >>> sketch = KLLSketch()
+        >>> sketch.update(range(100000))
+        >>> abs(sketch.quantile(0.5) - 50000) < 2000
+        True
+    """
+
+    def __init__(self, k=KLL_K, seed=0):
+        self.k = k
+        self.levels = [[]]
+        self.count = 0
+        self.minimum = None
+        self.maximum = None
+        self._random = random.Random(seed)
+        # Data Type: tuple or None - (sorted values, cumulative weights)
+        self._cumulative = None
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, int(math.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self):
+        """Compacts every level that is over capacity."""
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) >= self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append([])
+                items.sort()
+                # An odd item out stays, so total weight is kept exactly
+                keep = [items.pop()] if len(items) % 2 else []
+                self.levels[level + 1].extend(items[self._random.getrandbits(1)::2])
+                self.levels[level] = keep
+                # A new top level changes every capacity: start again
+                level = 0
+                continue
+            level += 1
+
+    def update(self, values):
+        """Adds many numbers."""
+        iterator = iter(values)
+        while True:
+            # Chunks of k: a full level 0 is compacted however small its
+            # capacity has become, so chunks need not match it
+            chunk = list(itertools.islice(iterator, self.k))
+            if not chunk:
+                break
+            low, high = min(chunk), max(chunk)
+            if self.minimum is None or low < self.minimum:
+                self.minimum = low
+            if self.maximum is None or high > self.maximum:
+                self.maximum = high
+            self.count += len(chunk)
+            self.levels[0].extend(chunk)
+            self._compress()
+        self._cumulative = None
+
+    def add(self, value):
+        """Adds one number."""
+        self.update((value,))
+
+    def merge(self, other):
+        """Adds every value summarized by another sketch."""
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        for level, items in enumerate(other.levels):
+            self.levels[level].extend(items)
+        self.count += other.count
+        for value in (other.minimum, other.maximum):
+            if value is not None:
+                self.minimum = value if self.minimum is None else min(self.minimum, value)
+                self.maximum = value if self.maximum is None else max(self.maximum, value)
+        self._compress()
+        self._cumulative = None
+
+    def quantile(self, fraction):
+        """
+        Returns an approximate quantile.
+
+        Parameters:
+            fraction (float): 0.5 for the median, 0.9 for the 90th percentile
+
+        Returns:
+            float or None: A value whose rank is within rank_error() of the
+                           requested one; None if the sketch is empty
+        """
+        if not self.count:
+            return None
+        if fraction <= 0:
+            return self.minimum
+        if fraction >= 1:
+            return self.maximum
+        if self._cumulative is None:
+            weighted = sorted((value, 1 << level)
+                              for level, items in enumerate(self.levels) for value in items)
+            self._cumulative = ([value for value, _ in weighted],
+                                list(itertools.accumulate(weight for _, weight in weighted)))
+        values, cumulative = self._cumulative
+        position = bisect.bisect_left(cumulative, fraction * cumulative[-1])
+        return values[min(position, len(values) - 1)]
+
+    def retained(self):
+        """Returns how many values the sketch holds."""
+        return sum(len(items) for items in self.levels)
+
+    def rank_error(self):
+        """Returns the normalized rank error of quantile() (as a fraction)."""
+        return 2.296 / self.k ** 0.9723
+
+
+# ============================================================================
+# COUNT-MIN (FREQUENCIES AND HEAVY HITTERS)
+# ============================================================================
+
+class CountMinSketch:
+    """
+    Approximate item frequencies; an estimate is never below the true
+    count.
+
+    Example:
+        >>> sketch = CountMinSketch()
+        >>> sketch.update(["I10", "I10", "E11.9"])
+        >>> sketch.estimate("I10")
+        2
+    """
+
+    def __init__(self, epsilon=COUNT_MIN_EPSILON, delta=COUNT_MIN_DELTA,
+                 candidates=HEAVY_HITTER_CANDIDATES):
+        self.epsilon = epsilon
+        self.delta = delta
+        self.width = int(math.ceil(math.e / epsilon))
+        self.depth = int(math.ceil(math.log(1 / delta)))
+        self.rows = [array("Q", bytes(8 * self.width)) for _ in range(self.depth)]
+        self.total = 0
+        self._capacity = candidates
+        # Data Type: dict - item -> estimated count (heavy-hitter candidates)
+        self.candidates = {}
+
+    def _positions(self, item):
+        """Column of the item in each row (double hashing, as in bloom_filter)."""
+        value = stable_hash(item)
+        first = value & 0xFFFFFFFF
+        second = (value >> 32) | 1
+        return [(first + row * second) % self.width for row in range(self.depth)]
+
+    def add(self, item, count=1):
+        """Counts one item `count` times."""
+        estimate = None
+        for row, position in zip(self.rows, self._positions(item)):
+            row[position] += count
+            if estimate is None or row[position] < estimate:
+                estimate = row[position]
+        self.total += count
+        self._offer(item, estimate)
+
+    def update(self, items):
+        """Counts many items (each distinct item of the batch hashed once)."""
+        counts = {}
+        for item in items:
+            counts[item] = counts.get(item, 0) + 1
+        for item, count in counts.items():
+            self.add(item, count)
+
+    def _offer(self, item, estimate):
+        """Keeps the item if it is among the largest candidates."""
+        candidates = self.candidates
+        if item in candidates or len(candidates) < self._capacity:
+            candidates[item] = estimate
+            return
+        smallest = min(candidates, key=candidates.get)
+        if estimate > candidates[smallest]:
+            del candidates[smallest]
+            candidates[item] = estimate
+
+    def estimate(self, item):
+        """
+        Returns an item's estimated count.
+
+        Returns:
+            int: At least the true count; at most epsilon x total more,
+                 with probability 1 - delta
+        """
+        return min(row[position] for row, position in zip(self.rows, self._positions(item)))
+
+    def merge(self, other):
+        """Adds the counts of another sketch with the same dimensions."""
+        if (other.width, other.depth) != (self.width, self.depth):
+            raise ValueError("Count-Min dimensions differ")
+        self.rows = [array("Q", map(int.__add__, mine, theirs))
+                     for mine, theirs in zip(self.rows, other.rows)]
+        self.total += other.total
+        # Re-estimate every candidate against the merged counters
+        items = set(self.candidates) | set(other.candidates)
+        estimates = {item: self.estimate(item) for item in items}
+        self.candidates = dict(heapq.nlargest(self._capacity, estimates.items(),
+                                              key=lambda pair: pair[1]))
+
+    def heavy_hitters(self, count):
+        """
+        Returns the most frequent items.
+
+        Parameters:
+            count (int): Number of items (at most the candidate list size)
+
+        Returns:
+            list: (item, estimated count), most frequent first
+        """
+        return heapq.nlargest(count, self.candidates.items(), key=lambda pair: pair[1])
+
+    def error_bound(self):
+        """Returns the maximum over-count (epsilon x total rows)."""
+        return self.epsilon * self.total
+
+
+# ============================================================================
+# EMR SKETCHES
+# ============================================================================
+
+class EMRSketches:
+    """
+    The sketches kept for the EMR tables (one set per partition; sets are
+    merged with merge()).
+
+    Attributes:
+        lab_patients (dict): Lab ID -> HyperLogLog of PatientIDs tested
+        lab_values (dict): (lab ID, race) -> KLLSketch of canonical values
+        diagnoses (CountMinSketch): PrimaryDiagnosisCode frequencies
+        lab_rows (int): Lab rows ingested
+    """
+
+    def __init__(self):
+        self.lab_patients = {}
+        self.lab_values = {}
+        self.diagnoses = CountMinSketch()
+        self.lab_rows = 0
+
+    def ingest_labs(self, lab_ids, patient_ids, values, race_of):
+        """
+        Summarizes lab rows.
+
+        Parameters:
+            lab_ids (sequence): LabID column (lab_catalog)
+            patient_ids (sequence): PatientID column
+            values (sequence): LabValueCanonical column (NaN when unknown)
+            race_of (dict): PatientID -> PatientRace
+        """
+        patients_by_lab = {}
+        values_by_group = {}
+        for lab_id, patient, value in zip(lab_ids, patient_ids, values):
+            patients = patients_by_lab.get(lab_id)
+            if patients is None:
+                patients = patients_by_lab[lab_id] = set()
+            patients.add(patient)
+            if value == value:
+                key = (lab_id, race_of.get(patient, "Unknown"))
+                group = values_by_group.get(key)
+                if group is None:
+                    group = values_by_group[key] = []
+                group.append(value)
+        for lab_id, patients in patients_by_lab.items():
+            self.lab_patients.setdefault(lab_id, HyperLogLog()).update(patients)
+        for key, group in values_by_group.items():
+            self.lab_values.setdefault(key, KLLSketch()).update(group)
+        self.lab_rows += len(lab_ids)
+
+    def ingest_diagnoses(self, codes):
+        """Counts PrimaryDiagnosisCode values."""
+        self.diagnoses.update(codes)
+
+    def merge(self, other):
+        """Adds another partition's sketches."""
+        for lab_id, sketch in other.lab_patients.items():
+            self.lab_patients.setdefault(lab_id, HyperLogLog()).merge(sketch)
+        for key, sketch in other.lab_values.items():
+            self.lab_values.setdefault(key, KLLSketch()).merge(sketch)
+        self.diagnoses.merge(other.diagnoses)
+        self.lab_rows += other.lab_rows
+
+    def distinct_patients(self, lab_id):
+        """Returns the estimated number of patients with a lab (0 if none)."""
+        sketch = self.lab_patients.get(lab_id)
+        return sketch.count() if sketch is not None else 0
+
+    def lab_quantile(self, lab_id, fraction, race=None):
+        """
+        Returns an approximate quantile of a lab's canonical values.
+
+        Parameters:
+            lab_id (int): Lab ID
+            fraction (float): 0.5 for the median
+            race (str): Only patients of this race. Default is every race.
+
+        Returns:
+            float or None: The quantile, or None without values
+        """
+        if race is not None:
+            sketch = self.lab_values.get((lab_id, race))
+            return sketch.quantile(fraction) if sketch is not None else None
+        # Every race: merge the (few) per-race sketches, a fixed-size step
+        merged = KLLSketch()
+        for (key_lab, _), sketch in self.lab_values.items():
+            if key_lab == lab_id:
+                merged.merge(sketch)
+        return merged.quantile(fraction)
+
+    def races(self, lab_id):
+        """Returns the races with values for a lab, sorted."""
+        return sorted(race for key_lab, race in self.lab_values if key_lab == lab_id)
+
+
+def build_sketches(partitions=1):
+    """
+    Summarizes the EMR tables, one EMRSketches per partition of rows, and
+    merges the partitions (as a coordinator would merge parallel workers'
+    results).
+
+    Parameters:
+        partitions (int): Number of row ranges summarized separately
+
+    Returns:
+        EMRSketches: Merged sketches
+    """
+    import emr_data
+
+    patients = emr_data.get_table("patients")
+    labs = emr_data.get_table("labs")
+    diagnoses = emr_data.get_table("diagnoses")
+    race_of = dict(zip(patients.column("PatientID"), patients.column("PatientRace")))
+
+    columns = [labs.column("LabID"), labs.column("PatientID"), labs.column("LabValueCanonical")]
+    codes = diagnoses.column("PrimaryDiagnosisCode")
+    results = []
+    for part in range(partitions):
+        sketches = EMRSketches()
+        lab_start, lab_stop = (len(labs) * part // partitions,
+                               len(labs) * (part + 1) // partitions)
+        sketches.ingest_labs(*(column[lab_start:lab_stop] for column in columns),
+                             race_of=race_of)
+        sketches.ingest_diagnoses(codes[len(codes) * part // partitions:
+                                        len(codes) * (part + 1) // partitions])
+        results.append(sketches)
+    merged = results[0]
+    for sketches in results[1:]:
+        merged.merge(sketches)
+    return merged
+
+
+def get_sketches():
+    """Returns the EMR sketches, building them on first use."""
+    global _SKETCHES
+
+    if _SKETCHES is None:
+        _SKETCHES = build_sketches()
+    return _SKETCHES
+
+
+# ============================================================================
+# MODULE TEST (runs only when module is executed directly)
+# ============================================================================
+if __name__ == "__main__":
+    import time
+
+    import lab_catalog
+
+    print("=== Sketches Module Test ===\n")
+
+    sketches = build_sketches(partitions=4)
+    wbc = lab_catalog.resolve("WBC")
+    glucose = lab_catalog.resolve("Glucose")
+    print(f"Patients with a WBC test: ~{sketches.distinct_patients(wbc)} "
+          f"(±{HyperLogLog().relative_error() * 100:.1f}%)")
+    for race in sketches.races(glucose):
+        print(f"  median glucose, {race:<35} {sketches.lab_quantile(glucose, 0.5, race):.0f} mg/dL")
+    print("Most frequent diagnoses:", sketches.diagnoses.heavy_hitters(3))
+
+    # 10M synthetic rows in 4 partitions, merged, against the exact answers
+    rows = 10000000
+    generator = random.Random(5)
+    parts = []
+    start = time.perf_counter()
+    for part in range(4):
+        distinct = HyperLogLog()
+        quantiles = KLLSketch(seed=part)
+        frequent = CountMinSketch()
+        chunk = [generator.gauss(120, 30) for _ in range(rows // 4)]
+        distinct.update(f"P{number:07d}" for number in range(part * 600000, part * 600000 + 1000000))
+        quantiles.update(chunk)
+        frequent.update(f"C{int(abs(value)) % 50}" for value in chunk[:200000])
+        parts.append((distinct, quantiles, frequent))
+    distinct, quantiles, frequent = parts[0]
+    for other in parts[1:]:
+        distinct.merge(other[0])
+        quantiles.merge(other[1])
+        frequent.merge(other[2])
+    print(f"\n4 partitions of {rows // 4:,} values summarized and merged in "
+          f"{time.perf_counter() - start:.1f} s")
+    print(f"  distinct: {distinct.count():,} (exact 2,800,000, off by "
+          f"{(distinct.count() / 2800000 - 1) * 100:+.1f}%; standard error "
+          f"{distinct.relative_error() * 100:.1f}%)")
+    print(f"  median: {quantiles.quantile(0.5):.2f} (exact ~120), p99 "
+          f"{quantiles.quantile(0.99):.1f} (exact ~189.8), {quantiles.retained()} values kept, "
+          f"rank error ±{quantiles.rank_error() * 100:.1f}%")
+    print(f"  heavy hitters: {frequent.heavy_hitters(3)} (±{frequent.error_bound():.0f})")
+    start = time.perf_counter()
+    for _ in range(1000):
+        quantiles.quantile(0.9)
+        distinct.count()
+        frequent.estimate("C16")
+    print(f"  one query of each: {(time.perf_counter() - start) * 1000:.1f} µs")
@@ -0,0 +1,400 @@
+"""
+Spill Operators Module for EMR Chatbot
+=======================================
+This module provides the two query operators that must keep working when
+their input is larger than memory: sorting and joining.
+It demonstrates:
+- A memory budget counted in rows: no operator holds more records than
+  that at once, however long its input
+- External merge sort: sorted runs of at most `memory_rows` records are
+  written to run files, then read back block by block and combined with a
+  k-way merge (heapq.merge()); more than MAX_FAN_IN runs are merged in
+  several passes
+- Grace hash join: when the build side does not fit, both inputs are
+  hash-partitioned into partition files so that matching keys land in the
+  same partition, and each partition pair is joined in memory;
+  partitions that are still too large are partitioned again with another
+  hash
+- Spill accounting: every operator reports the files, rows and bytes it
+  wrote (SpillStats)
+
+Records are any picklable values (emr_query passes tuples of row
+positions). Spill files live in a temporary directory that is removed when
+the operator finishes or is abandoned.
+
+Author: EMR Chatbot Team
+Date: 2026-10-19
+"""
+
+import heapq
+import itertools
+import os
+import pickle
+import shutil
+import tempfile
+
+
+# ============================================================================
+# MODULE-LEVEL CONSTANTS AND VARIABLES
+# ============================================================================
+
+# Records an operator may hold in memory at once
+# Can be overridden with the EMR_QUERY_MEMORY_ROWS environment variable
+# Data Type: int
+MEMORY_ROWS = int(os.environ.get("EMR_QUERY_MEMORY_ROWS", "1000000"))
+
+# Most spill files read at the same time (merge fan-in, join partitions)
+# Data Type: int
+MAX_FAN_IN = 64
+
+# Partitions per level of a grace hash join
+# Data Type: int
+JOIN_PARTITIONS = 16
+
+# Re-partitioning levels before an oversized partition (one very frequent
+# key) is joined in memory anyway
+# Data Type: int
+MAX_JOIN_DEPTH = 3
+
+# Largest block of records pickled in one piece
+# Data Type: int
+BLOCK_ROWS = 4096
+
+
+# ============================================================================
+# SPILL FILES
+# ============================================================================
+
+class SpillStats:
+    """
+    What one or more operators wrote to disk.
+
+    Attributes:
+        files (int): Spill files written
+        rows (int): Records written (a record merged twice counts twice)
+        bytes (int): Bytes written
+        runs (int): Sorted runs written by external sorts
+        passes (int): Extra merge passes (more than MAX_FAN_IN runs)
+        partitions (int): Partition files written by hash joins
+    """
+
+    def __init__(self):
+        self.files = 0
+        self.rows = 0
+        self.bytes = 0
+        self.runs = 0
+        self.passes = 0
+        self.partitions = 0
+
+    def __bool__(self):
+        return self.files > 0
+
+    def summary(self):
+        """
+        Describes the spill volume.
+
+        Returns:
+            str: e.g. "spilled 120,000 rows (1,210 KB) to 12 files (12 runs)"
+        """
+        if not self:
+            return "no spill"
+        details = []
+        if self.runs:
+            details.append(f"{self.runs} runs")
+        if self.passes:
+            details.append(f"{self.passes} extra merge passes")
+        if self.partitions:
+            details.append(f"{self.partitions} join partitions")
+        return (f"spilled {self.rows:,} rows ({self.bytes / 1024:,.0f} KB) to "
+                f"{self.files} files ({', '.join(details)})")
+
+
+class SpillFile:
+    """
+    Records appended to a file in pickled blocks, read back in order.
+
+    Attributes:
+        path (str): File path
+        rows (int): Records written
+    """
+
+    def __init__(self, directory, block_rows, stats):
+        """
+        Parameters:
+            directory (str): Spill directory
+            block_rows (int): Records per pickled block; reading holds one
+                              block in memory
+            stats (SpillStats): Receives the file's rows and bytes on close
+        """
+        handle, self.path = tempfile.mkstemp(dir=directory, suffix=".spill")
+        self._handle = os.fdopen(handle, "wb")
+        self._block_rows = max(1, block_rows)
+        self._buffer = []
+        self._stats = stats
+        self.rows = 0
+
+    def append(self, record):
+        """Adds one record."""
+        self._buffer.append(record)
+        if len(self._buffer) >= self._block_rows:
+            self._flush()
+
+    def extend(self, records):
+        """Adds records in order."""
+        for record in records:
+            self.append(record)
+
+    def _flush(self):
+        if self._buffer:
+            pickle.dump(self._buffer, self._handle, pickle.HIGHEST_PROTOCOL)
+            self.rows += len(self._buffer)
+            self._buffer = []
+
+    def close(self):
+        """Writes the last block and records the file in the stats."""
+        self._flush()
+        self._handle.close()
+        self._stats.files += 1
+        self._stats.rows += self.rows
+        self._stats.bytes += os.path.getsize(self.path)
+        return self
+
+    def __iter__(self):
+        """Yields the records one block at a time, then deletes the file."""
+        try:
+            with open(self.path, "rb") as handle:
+                while True:
+                    try:
+                        block = pickle.load(handle)
+                    except EOFError:
+                        return
+                    yield from block
+        finally:
+            os.remove(self.path)
+
+
+def _spill_directory(directory):
+    """Returns a new directory for one operator's spill files."""
+    return tempfile.mkdtemp(prefix="emr_spill_", dir=directory)
+
+
+# ============================================================================
+# EXTERNAL MERGE SORT
+# ============================================================================
+
+def external_sort(records, key=None, reverse=False, memory_rows=None, stats=None,
+                  directory=None):
+    """
+    Sorts records of any number within a memory budget.
+
+    Input that fits in memory is sorted there and nothing is written.
+    Otherwise every `memory_rows` records become one sorted run file and the
+    runs are k-way merged. The sort is stable, like sorted().
+
+    Parameters:
+        records (iterable): Records to sort (picklable)
+        key (function): Sort key, as for sorted()
+        reverse (bool): Descending order
+        memory_rows (int): Records held at once. Default is MEMORY_ROWS.
+        stats (SpillStats): Receives the spill volume (optional)
+        directory (str): Where spill files go. Default is the system
+                         temporary directory.
+
+    Yields:
+        Records in sorted order
+
+    Example:
+        >>> list(external_sort([3, 1, 2], memory_rows=2))
+        [1, 2, 3]
+    """
+    memory_rows = max(1, memory_rows or MEMORY_ROWS)
+    stats = stats if stats is not None else SpillStats()
+    # Merging MAX_FAN_IN runs holds one block of each
+    block_rows = min(BLOCK_ROWS, max(1, memory_rows // MAX_FAN_IN))
+    spill_directory = None
+    runs = []
+    buffer = []
+    try:
+        for record in records:
+            if len(buffer) == memory_rows:
+                if spill_directory is None:
+                    spill_directory = _spill_directory(directory)
+                buffer.sort(key=key, reverse=reverse)
+                run = SpillFile(spill_directory, block_rows, stats)
+                run.extend(buffer)
+                runs.append(run.close())
+                stats.runs += 1
+                buffer = []
+            buffer.append(record)
+        buffer.sort(key=key, reverse=reverse)
+        if not runs:
+            yield from buffer
+            return
+        if buffer:
+            run = SpillFile(spill_directory, block_rows, stats)
+            run.extend(buffer)
+            runs.append(run.close())
+            stats.runs += 1
+            buffer = []
+
+        # Too many runs to read at once: merge groups of them into longer runs
+        while len(runs) > MAX_FAN_IN:
+            stats.passes += 1
+            merged = []
+            for first in range(0, len(runs), MAX_FAN_IN):
+                run = SpillFile(spill_directory, block_rows, stats)
+                run.extend(heapq.merge(*runs[first:first + MAX_FAN_IN], key=key,
+                                       reverse=reverse))
+                merged.append(run.close())
+            runs = merged
+        yield from heapq.merge(*runs, key=key, reverse=reverse)
+    finally:
+        if spill_directory is not None:
+            shutil.rmtree(spill_directory, ignore_errors=True)
+
+
+# ============================================================================
+# GRACE HASH JOIN
+# ============================================================================
+
+def _join_in_memory(probe, build, probe_key, build_key):
+    """Hash join with the whole build side in one dict."""
+    table = {}
+    for record in build:
+        value = build_key(record)
+        if value is not None:
+            table.setdefault(value, []).append(record)
+    for record in probe:
+        for match in table.get(probe_key(record), ()):
+            yield record, match
+
+
+def _partition(records, key, level, directory, block_rows, stats):
+    """Writes records to JOIN_PARTITIONS files by the hash of their key."""
+    files = [SpillFile(directory, block_rows, stats) for _ in range(JOIN_PARTITIONS)]
+    for record in records:
+        value = key(record)
+        if value is not None:
+            files[hash((level, value)) % JOIN_PARTITIONS].append(record)
+    stats.partitions += JOIN_PARTITIONS
+    return [spill.close() for spill in files]
+
+
+def _grace_join(probe, build, probe_key, build_key, memory_rows, stats, directory, level):
+    """Joins one pair of inputs, partitioning while the build side does not fit."""
+    build = iter(build)
+    held = list(itertools.islice(build, memory_rows + 1))
+    if len(held) <= memory_rows:
+        yield from _join_in_memory(probe, held, probe_key, build_key)
+        return
+    if level >= MAX_JOIN_DEPTH:
+        # Partitioning no longer splits the build side: one key is too common
+        held.extend(build)
+        yield from _join_in_memory(probe, held, probe_key, build_key)
+        return
+
+    # Matching keys hash to the same partition on both sides
+    block_rows = min(BLOCK_ROWS, max(1, memory_rows // JOIN_PARTITIONS))
+    build_parts = _partition(itertools.chain(held, build), build_key, level, directory,
+                             block_rows, stats)
+    del held
+    probe_parts = _partition(probe, probe_key, level, directory, block_rows, stats)
+    for build_part, probe_part in zip(build_parts, probe_parts):
+        if build_part.rows == 0:
+            os.remove(build_part.path)
+            os.remove(probe_part.path)
+            continue
+        yield from _grace_join(probe_part, build_part, probe_key, build_key, memory_rows,
+                               stats, directory, level + 1)
+
+
+def grace_hash_join(probe, build, probe_key, build_key, memory_rows=None, stats=None,
+                    directory=None):
+    """
+    Equi-joins two inputs within a memory budget.
+
+    The build side (the smaller input) is hashed in memory when it fits;
+    otherwise both sides are spilled to partition files and joined one
+    partition at a time. Records whose key is None match nothing, as NULL
+    does in SQL. Output order is unspecified.
+
+    Parameters:
+        probe (iterable): Larger input, streamed
+        build (iterable): Smaller input, hashed
+        probe_key (function): Join key of a probe record
+        build_key (function): Join key of a build record
+        memory_rows (int): Build records held at once. Default is
+                           MEMORY_ROWS.
+        stats (SpillStats): Receives the spill volume (optional)
+        directory (str): Where spill files go. Default is the system
+                         temporary directory.
+
+    Yields:
+        tuple: (probe record, build record) for every matching pair
+
+    Example:
+        >>> sorted(grace_hash_join([(1, "a"), (2, "b")], [(1, "x")],
+        ...                        lambda r: r[0], lambda r: r[0], memory_rows=1))
+        [((1, 'a'), (1, 'x'))]
+    """
+    memory_rows = max(1, memory_rows or MEMORY_ROWS)
+    stats = stats if stats is not None else SpillStats()
+    spill_directory = _spill_directory(directory)
+    try:
+        yield from _grace_join(probe, build, probe_key, build_key, memory_rows, stats,
+                               spill_directory, 0)
+    finally:
+        shutil.rmtree(spill_directory, ignore_errors=True)
+
+
+# ============================================================================
+# MODULE TEST (runs only when module is executed directly)
+# ============================================================================
+if __name__ == "__main__":
+    import random
+    import time
+    import tracemalloc
+
+    print("=== Spill Operators Module Test ===\n")
+
+    # Lab-like records streamed from a generator: (admission, time, value)
+    size = 300000
+    admissions = 30000
+
+    def lab_rows():
+        generator = random.Random(5)
+        for _ in range(size):
+            yield (generator.randrange(admissions),
+                   f"2025-{generator.randrange(1, 13):02d}-{generator.randrange(1, 29):02d}",
+                   round(generator.uniform(50, 300), 1))
+
+    def admission_rows():
+        for admission in range(admissions):
+            yield (admission, f"P{admission % 40000:06d}")
+
+    for memory_rows in (size, 20000):
+        stats = SpillStats()
+        tracemalloc.start()
+        start = time.perf_counter()
+        latest = None
+        for latest in external_sort(lab_rows(), key=lambda row: row[1], reverse=True,
+                                    memory_rows=memory_rows, stats=stats):
+            pass
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"Sort {size:,} rows, budget {memory_rows:,}: {elapsed:.1f} s, "
+              f"peak {peak / 1e6:.0f} MB, {stats.summary()}")
+
+    for memory_rows in (admissions, 2000):
+        stats = SpillStats()
+        tracemalloc.start()
+        start = time.perf_counter()
+        joined = sum(1 for _ in grace_hash_join(lab_rows(), admission_rows(),
+                                                lambda row: row[0], lambda row: row[0],
+                                                memory_rows=memory_rows, stats=stats))
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"Join {size:,} x {admissions:,}, budget {memory_rows:,}: {joined:,} rows in "
+              f"{elapsed:.1f} s, peak {peak / 1e6:.0f} MB, {stats.summary()}")
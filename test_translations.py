@@ -16,9 +16,37 @@ Date: 2026-01-31
 # ============================================================================
 # IMPORTS
 # ============================================================================
+import itertools
+import json
+import os
+import tempfile
+import threading
+
 import translation_module
 import medical_terms
 import utils
+import instrumentation
+import profiling
+import lazy_loading
+import autocomplete
+import search_index
+import bloom_filter
+import tiered_lexicon
+import glossary_layers
+import lexicon_store
+import glossary_reloader
+import inflection
+import patient_localization
+import column_translation
+import lab_catalog
+import lab_units
+import emr_analytics
+import patient_timeline
+import comorbidity
+import sketches
+import emr_query
+import spill_operators
+import emr_data
 
 
 # ============================================================================
@@ -74,8 +102,39 @@ def test_translation_module():
         print(f"  '{word}' → {result}")
     print()
     
-    # Test 5: Get supported languages
-    print("Test 5: get_supported_languages()")
+    # Test 5: Direct translation between two non-English languages
+    print("Test 5: translate() - any language pair")
+    print("-" * 70)
+    pairs = [("dolor de cabeza", "spanish", "french"), ("médecin", "french", "spanish")]
+    for word, source, target in pairs:
+        result = translation_module.translate(word, source, target)
+        print(f"  '{word}' ({source} → {target}) → {result}")
+    print()
+    
+    # Test 5a: Source language detection
+    print("Test 5a: detect_language()")
+    print("-" * 70)
+    # "toux" and "leucocytes" are only in the medical glossary
+    detection_cases = [("dolor de cabeza", "spanish"), ("mal de tête", "french"),
+                       ("blood pressure", "english"), ("toux", "french"),
+                       ("leucocytes", "french")]
+    checks_before = translation_module.get_filter_stats()
+    for phrase, expected in detection_cases:
+        detected = translation_module.detect_language(phrase)
+        print(f"  '{phrase}' → {detected}")
+        assert detected == expected
+    # Detection is not a lookup: the Bloom filter counters stay put
+    assert translation_module.get_filter_stats() == checks_before
+    # The profiles learn from an evenly spaced, repeatable sample
+    sample_source = lexicon_store.build_snapshot(
+        [{"english": f"term {i}", "spanish": f"término {i}"} for i in range(10)],
+        ["english", "spanish"])
+    assert sample_source.sample_forms("spanish", 4) == ["término 0", "término 3",
+                                                        "término 6", "término 9"]
+    print()
+    
+    # Test 5b: Get supported languages
+    print("Test 5b: get_supported_languages()")
     print("-" * 70)
     languages = translation_module.get_supported_languages()
     print(f"  Supported languages: {languages}")
@@ -199,6 +258,28 @@ def test_utils():
         print(f"  Request: '{request}'")
         print(f"    Success: {success}, Text: '{text}', Direction: '{direction}', Language: '{language}'")
     print()
+    
+    # Test 5: parse_translation_pair
+    print("Test 5: parse_translation_pair()")
+    print("-" * 70)
+    test_requests = [
+        '"hello" to spanish',
+        '"bonjour" from french',
+        '"dolor de cabeza" from spanish to french',
+        '"dolor de cabeza"',
+    ]
+    for request in test_requests:
+        success, text, source, target = utils.parse_translation_pair(request)
+        print(f"  Request: '{request}'")
+        print(f"    Success: {success}, Text: '{text}', Source: '{source}', Target: '{target}'")
+    
+    # " to " and " from " inside the quotes are part of the phrase
+    assert utils.parse_translation_pair('"hello to you"') == (True, "hello to you", "auto", "auto")
+    assert utils.parse_translation_pair('"pain from fall"') == \
+        (True, "pain from fall", "auto", "auto")
+    assert utils.parse_translation_pair('"pain from fall" from english to french') == \
+        (True, "pain from fall", "english", "french")
+    print()
 
 
 def test_error_handling():
@@ -237,6 +318,962 @@ def test_error_handling():
     print()
 
 
+def test_concurrent_updates():
+    """
+    Tests that readers never see a half-applied custom translation.
+    
+    This demonstrates:
+    - Threads reading snapshots while another thread publishes updates
+    - Every English phrase visible in Spanish is also visible in French
+    """
+    print("=" * 70)
+    print("TESTING CONCURRENT GLOSSARY UPDATES")
+    print("=" * 70)
+    print()
+    
+    # Data Type: list - problems found by reader threads
+    problems = []
+    done = threading.Event()
+    
+    def reader():
+        while not done.is_set():
+            snapshot = translation_module._LEXICON.snapshot()
+            for english in snapshot.phrases("english"):
+                spanish = snapshot.translate("english", "spanish", english)
+                french = snapshot.translate("english", "french", english)
+                if (spanish is None) != (french is None):
+                    problems.append(english)
+    
+    readers = [threading.Thread(target=reader) for _ in range(4)]
+    for thread in readers:
+        thread.start()
+    
+    for i in range(500):
+        translation_module.add_custom_translation(
+            f"concurrent term {i}", f"término {i}", f"terme {i}")
+    done.set()
+    for thread in readers:
+        thread.join()
+    
+    print(f"  Lexicon version after 500 adds: {translation_module._LEXICON.snapshot().version}")
+    print(f"  Inconsistent reads: {len(problems)}")
+    assert not problems
+    print()
+
+
+def test_translation_journal():
+    """
+    Tests that custom translations survive a restart and a torn write.
+    
+    This demonstrates:
+    - enable_journal() / close_journal() around add_custom_translation()
+    - Replaying the journal after a simulated crash mid-record
+    """
+    print("=" * 70)
+    print("TESTING TRANSLATION JOURNAL")
+    print("=" * 70)
+    print()
+    
+    with tempfile.TemporaryDirectory() as directory:
+        translation_module.enable_journal(directory)
+        translation_module.add_custom_translation("rash", "erupción", "éruption")
+        translation_module.close_journal()
+        
+        # Simulate a crash that left half a record at the end of the journal
+        journal_path = os.path.join(directory, "custom_translations.journal")
+        with open(journal_path, "ab") as handle:
+            handle.write(b"0badc0de\t[\"half")
+        
+        restored = translation_module.enable_journal(directory)
+        journal = translation_module._JOURNAL
+        translation_module.close_journal()
+        
+        print(f"  Restored translations: {restored}")
+        print(f"  Torn bytes discarded: {journal.bytes_truncated}")
+        print(f"  'rash' -> {translation_module.translate_to_french('rash')}")
+        assert restored == 1
+        assert journal.bytes_truncated > 0
+    print()
+
+
+def test_instrumentation():
+    """
+    Tests the latency counters and histograms.
+    
+    This demonstrates:
+    - enable() wraps the hot paths; disable() restores them
+    - Hit/miss counting and percentile reporting
+    """
+    print("=" * 70)
+    print("TESTING INSTRUMENTATION")
+    print("=" * 70)
+    print()
+    
+    original = translation_module.translate
+    instrumentation.reset()
+    instrumentation.enable()
+    for word in ["hello", "patient", "xyz123"]:
+        translation_module.translate_to_spanish(word)
+    medical_terms.get_medical_translation("fever", "french")
+    # The translate command's lookups (general glossary, then medical)
+    for word in ["hello", "bonjour", "leucocytes"]:
+        if translation_module.find_translation(word, "french", "english") is None:
+            medical_terms.find_medical_translation(word, "english", "all", "french")
+    instrumentation.disable()
+    
+    metrics = {item["name"]: item for item in instrumentation.snapshot()["metrics"]}
+    translate_stats = metrics["translation_module.translate"]
+    print(f"  translate calls: {translate_stats['calls']}, hits: {translate_stats['hits']}, "
+          f"misses: {translate_stats['misses']}, p99: {translate_stats['p99_ns']} ns")
+    assert translate_stats["calls"] == 3 and translate_stats["misses"] == 1
+    find_stats = metrics["translation_module.find_translation"]
+    assert find_stats["calls"] == 3 and find_stats["hits"] == 1
+    medical_stats = metrics["medical_terms.find_medical_translation"]
+    assert medical_stats["calls"] == 3 and medical_stats["hits"] == 2
+    assert translation_module.translate is original
+    
+    # Allocation tracking leaves tracemalloc running if someone else
+    # (the profiler) started it
+    import tracemalloc
+    tracemalloc.start()
+    try:
+        instrumentation.enable(track_allocations=True)
+        instrumentation.disable()
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+    instrumentation.enable(track_allocations=True)
+    instrumentation.disable()
+    assert not tracemalloc.is_tracing()
+    instrumentation.reset()
+    print()
+
+
+def test_profiling():
+    """
+    Tests the command profiler in both modes.
+    
+    This demonstrates:
+    - Sampling mode writing collapsed stacks for flame graph tools
+    - Deterministic mode writing cProfile statistics
+    - Both writing a tracemalloc memory report
+    """
+    print("=" * 70)
+    print("TESTING PROFILING")
+    print("=" * 70)
+    print()
+    
+    import time
+    
+    with tempfile.TemporaryDirectory() as directory:
+        for mode, stats_suffix in (("sampling", ".collapsed"), ("deterministic", ".pstats")):
+            session = profiling.start(directory, mode, interval=0.001)
+            profiling.command_started()
+            finish = time.perf_counter() + 0.05
+            while time.perf_counter() < finish:
+                translation_module.translate_to_spanish("hello")
+            profiling.command_finished()
+            written = profiling.stop()
+            assert not profiling.is_active() and session.commands == 1
+            for suffix in (stats_suffix, ".memory.txt"):
+                path = session.output_prefix + suffix
+                assert path in written and os.path.getsize(path) > 0, path
+            print(f"  {mode}: {', '.join(os.path.basename(path) for path in written)}")
+    print()
+
+
+def test_lazy_loading():
+    """
+    Tests deferred initialization of module-level data.
+    
+    This demonstrates:
+    - A LazyGlobal builds its value once, on first use
+    - The proxy replaces itself in its module afterwards
+    - EMR tables are loaded column by column with typed values
+    """
+    print("=" * 70)
+    print("TESTING LAZY LOADING")
+    print("=" * 70)
+    print()
+    
+    import types
+    import sys
+    
+    module = types.ModuleType("lazy_test_module")
+    sys.modules[module.__name__] = module
+    calls = []
+    module.TABLE = lazy_loading.LazyGlobal(module.__name__, "TABLE",
+                                           lambda: calls.append(1) or {"a": 1})
+    try:
+        print(f"  Before use: {module.TABLE!r}")
+        assert not lazy_loading.is_materialized(module.TABLE)
+        assert module.TABLE["a"] == 1 and "a" in module.TABLE and len(module.TABLE) == 1
+        print(f"  After use: {module.TABLE!r} (factory calls: {len(calls)})")
+        assert module.TABLE == {"a": 1} and calls == [1]
+    finally:
+        del sys.modules[module.__name__]
+    
+    patients = emr_data.get_table("patients")
+    print(f"  Patients table: {len(patients)} rows, columns {patients.columns[:3]}...")
+    assert len(patients) == 500
+    assert isinstance(emr_data.get_table("labs").column("LabValue")[0], float)
+    print()
+
+
+def test_autocomplete():
+    """
+    Tests prefix completion of glossary phrases.
+    
+    This demonstrates:
+    - Binary search over a sorted array of phrases
+    - Used phrases ranked ahead of alphabetical order
+    """
+    print("=" * 70)
+    print("TESTING AUTOCOMPLETE")
+    print("=" * 70)
+    print()
+    
+    index = autocomplete.CompletionIndex(["blood pressure", "blood test", "blue", "fever"])
+    print(f"  'blo' -> {index.complete('blo')}")
+    assert index.complete("blo") == ["blood pressure", "blood test"]
+    
+    index.record_use("blood test")
+    assert not index.record_use("not indexed")
+    print(f"  'bl' after using 'blood test' -> {index.complete('bl', 2)}")
+    assert index.complete("bl", 2) == ["blood test", "blood pressure"]
+    
+    index.add("bloating")
+    assert index.complete("bloa") == ["bloating"]
+    assert "blood pressure" in autocomplete.complete("BLO")
+    assert autocomplete.readline_matches('translate "blo', 11, "blo") == \
+        ["blood pressure", "blood test"]
+    print(f"  Commands for 'tr' -> {autocomplete.complete_command('tr')}")
+    # Completion offers every command the chatbot accepts
+    assert autocomplete.complete_command("by") == ["bye"]
+    print()
+
+
+def test_search_index():
+    """
+    Tests the inverted index and its compressed posting lists.
+    
+    This demonstrates:
+    - Delta + varint encoding round trip
+    - Multi-word queries (posting-list intersection)
+    - Accent-insensitive matching and replaced documents
+    """
+    print("=" * 70)
+    print("TESTING SEARCH INDEX")
+    print("=" * 70)
+    print()
+    
+    encoded = bytearray()
+    for gap in (3, 1, 200, 70000):
+        search_index.encode_varint(gap, encoded)
+    assert search_index.decode_postings(encoded) == [3, 4, 204, 70204]
+    print(f"  4 postings encoded in {len(encoded)} bytes")
+    
+    index = search_index.SearchIndex()
+    index.add("glossary", "headache", ["headache", "dolor de cabeza", "mal de tête"], key="headache")
+    index.add("glossary", "back pain", ["back pain", "dolor de espalda", "mal de dos"], key="back pain")
+    index.add("diagnosis", "Chest pain, unspecified", ["Chest pain, unspecified"])
+    
+    total, results = index.search("pain")
+    print(f"  'pain' -> {[title for _, title, _ in results]}")
+    assert total == 2
+    assert index.search("dolor espalda")[0] == 1
+    assert index.search("TETE")[0] == 1
+    assert index.search("dolor unknownword") == (0, [])
+    
+    index.add("glossary", "headache", ["headache", "cefalea", "céphalée"], key="headache")
+    assert index.search("cabeza")[0] == 0 and index.search("cefalea")[0] == 1
+    
+    total, results = search_index.search("pain")
+    print(f"  Glossary + diagnoses: {total} entries contain 'pain'")
+    assert any(kind == "diagnosis" for kind, _, _ in results)
+    print()
+
+
+def test_bloom_filters():
+    """
+    Tests the Bloom filters that reject unknown phrases.
+    
+    This demonstrates:
+    - No false negatives for added phrases
+    - A false-positive rate close to the configured target
+    - Misses counted per language in the lexicon's filters
+    """
+    print("=" * 70)
+    print("TESTING BLOOM FILTERS")
+    print("=" * 70)
+    print()
+    
+    bloom = bloom_filter.BloomFilter(5000, 0.02)
+    bloom.update(f"term {number}" for number in range(5000))
+    assert all(f"term {number}" in bloom for number in range(5000))
+    passed = sum(1 for number in range(20000) if f"other {number}" in bloom)
+    print(f"  Target 2%: {passed / 20000:.2%} of 20000 unknown phrases passed, "
+          f"{bloom.stats()['bytes']} bytes")
+    assert passed / 20000 < 0.04
+    
+    before = translation_module.get_filter_stats()["spanish"]
+    translation_module.translate_from_spanish("palabra desconocida")
+    translation_module.translate_from_spanish("hola")
+    after = translation_module.get_filter_stats()["spanish"]
+    print(f"  Spanish filter: {after['checks']} checks, {after['rejected']} rejected")
+    assert after["checks"] == before["checks"] + 2
+    assert after["rejected"] + after["false_positives"] == \
+        before["rejected"] + before["false_positives"] + 1
+    
+    translation_module.add_custom_translation("filter test", "prueba de filtro", "test de filtre")
+    assert translation_module.translate_from_spanish("prueba de filtro") == "filter test"
+    print()
+
+
+def test_tiered_lexicon():
+    """
+    Tests the hot/cold glossary tiers.
+    
+    This demonstrates:
+    - Binary search over a memory-mapped, sorted cold store
+    - Promotion to the hot tier after repeated cold hits, and LRU eviction
+    - translation_module falling back to the cold tier
+    """
+    print("=" * 70)
+    print("TESTING TIERED LEXICON")
+    print("=" * 70)
+    print()
+    
+    languages = ["english", "spanish", "french"]
+    rows = [
+        {"english": "essential hypertension", "spanish": "hipertensión esencial",
+         "french": "hypertension essentielle"},
+        {"english": "asthma", "spanish": "asma", "french": "asthme"},
+        {"english": "low back pain", "spanish": "lumbalgia"},
+    ]
+    with tempfile.TemporaryDirectory() as directory:
+        assert tiered_lexicon.write_cold_store(directory, rows, languages) == 3
+        tiers = tiered_lexicon.TieredLexicon(directory, hot_capacity=1, promote_after=2)
+        try:
+            assert tiers.translate("spanish", "french", "asma") == "asthme"
+            assert tiers.translate("english", "french", "low back pain") is None
+            assert tiers.translate("english", "spanish", "zebra") is None
+            tiers.translate("english", "spanish", "asthma")
+            tiers.translate("english", "spanish", "essential hypertension")
+            tiers.translate("english", "spanish", "essential hypertension")
+            tiers.translate("english", "spanish", "essential hypertension")
+            stats = tiers.stats()
+            print(f"  hot hits {stats['hot_hits']}, cold hits {stats['cold_hits']}, "
+                  f"promotions {stats['promotions']}, evictions {stats['evictions']}")
+            assert stats["promotions"] == 2 and stats["evictions"] == 1
+            assert stats["hot_hits"] == 1 and stats["hot_size"] == 1
+        finally:
+            tiers.close()
+        
+        translation_module.enable_cold_tier(directory)
+        try:
+            result = translation_module.translate("Hipertensión esencial", "spanish", "english")
+            print(f"  Cold-tier fallback: 'hipertensión esencial' -> {result}")
+            assert result == "essential hypertension"
+            assert translation_module.translate("hola", "spanish", "english") == "hello"
+        finally:
+            translation_module.disable_cold_tier()
+    
+    # A shared form answers the same from both tiers (the lowest concept
+    # ID owns it), even when a later concept is promoted first
+    shared_rows = [{"english": "cold", "spanish": "frío", "french": "froid"},
+                   {"english": "chills", "spanish": "frío", "french": "frissons"}]
+    with tempfile.TemporaryDirectory() as directory:
+        tiered_lexicon.write_cold_store(directory, shared_rows, languages)
+        tiers = tiered_lexicon.TieredLexicon(directory, hot_capacity=4, promote_after=1)
+        try:
+            assert tiers.translate("english", "spanish", "chills") == "frío"
+            assert tiers.translate("spanish", "english", "frío") == "cold"
+            assert tiers.translate("spanish", "english", "frío") == "cold"
+            assert tiers.stats()["hot_hits"] == 1
+        finally:
+            tiers.close()
+    print()
+
+
+def test_glossary_layers():
+    """
+    Tests overlay layers (base -> region -> site -> user).
+    
+    This demonstrates:
+    - Overrides visible only through their layer and layers above it
+    - Partial overrides inheriting the other languages
+    - Incremental updates when a lower layer changes
+    """
+    print("=" * 70)
+    print("TESTING GLOSSARY LAYERS")
+    print("=" * 70)
+    print()
+    
+    # The base layer reads a lexicon snapshot; it changes through the lexicon
+    languages = ["english", "spanish", "french"]
+    lexicon = lexicon_store.VersionedLexicon(lexicon_store.build_snapshot(
+        [{"english": "discharge", "spanish": "alta", "french": "sortie"}], languages))
+    glossary = glossary_layers.LayeredGlossary(languages, lexicon.snapshot())
+    glossary.create_layer("region")
+    glossary.create_layer("site", "region")
+    glossary.create_layer("user", "site")
+    
+    glossary.set_entry("site", {"english": "discharge", "spanish": "egreso"})
+    for layer in ["base", "region", "site", "user"]:
+        print(f"  {layer:<7} discharge -> {glossary.translate(layer, 'english', 'spanish', 'discharge')}")
+    assert glossary.translate("region", "english", "spanish", "discharge") == "alta"
+    assert glossary.translate("user", "english", "spanish", "discharge") == "egreso"
+    assert glossary.translate("user", "spanish", "french", "egreso") == "sortie"
+    assert glossary.translate("user", "spanish", "english", "alta") is None
+    
+    published = lexicon.apply_batch([{"english": "discharge", "french": "congé"}])
+    glossary.update_base(published, ["discharge"])
+    assert glossary.translate("user", "english", "french", "discharge") == "congé"
+    assert glossary.translate("user", "french", "english", "sortie") is None
+    glossary.remove_entry("site", "discharge")
+    assert glossary.translate("user", "english", "spanish", "discharge") == "alta"
+    
+    # A shared form passes to the next entry when its owner is overridden
+    shared_lexicon = lexicon_store.VersionedLexicon(lexicon_store.build_snapshot(
+        [{"english": "discharge", "spanish": "alta"}, {"english": "high", "spanish": "alta"}],
+        ["english", "spanish"]))
+    shared = glossary_layers.LayeredGlossary(["english", "spanish"], shared_lexicon.snapshot())
+    shared.create_layer("site")
+    shared.set_entry("site", {"english": "discharge", "spanish": "egreso"})
+    assert shared.translate("site", "spanish", "english", "alta") == "high"
+    assert shared.translate("base", "spanish", "english", "alta") == "discharge"
+    # ...and the layer follows when the next holder leaves it in the lexicon
+    shared.update_base(shared_lexicon.apply_batch([{"english": "high", "spanish": "elevado"}]),
+                       ["high"])
+    assert shared.translate("site", "spanish", "english", "alta") is None
+    assert shared.translate("site", "spanish", "english", "elevado") == "high"
+    shared.remove_entry("site", "discharge")
+    assert shared.translate("site", "spanish", "english", "alta") == "discharge"
+    assert shared.stats()[1]["differs_from_base"] == 0
+    
+    # Batch-added chatbot translations reach existing layers too
+    if not translation_module.has_layer("test-batch-site"):
+        translation_module.create_layer("test-batch-site")
+    translation_module.add_custom_translations([("layer batch check", "prueba por lotes",
+                                                 "test par lots")])
+    assert translation_module.translate("layer batch check", "english", "spanish",
+                                        layer="test-batch-site") == "prueba por lotes"
+    # Plurals of stored phrases translate through a layer as they do without one
+    assert translation_module.translate("headaches", "english", "spanish",
+                                        layer="test-batch-site") == "dolores de cabeza"
+    print(f"  Layer path: {glossary.layer_path('user')}")
+    print()
+
+
+def test_glossary_reloader():
+    """
+    Tests reloading glossary files while the chatbot is running.
+    
+    This demonstrates:
+    - Debouncing: a change is loaded on the scan after it settles
+    - An atomic swap: an old snapshot keeps answering with old data
+    - Custom translations surviving a reload; a broken file keeping the
+      previous glossary
+    """
+    print("=" * 70)
+    print("TESTING GLOSSARY RELOADER")
+    print("=" * 70)
+    print()
+    
+    translation_module.add_custom_translation("reload check", "prueba de recarga", "test de rechargement")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "site.csv")
+        with open(path, "w", encoding="utf-8") as handle:
+            handle.write("English,Spanish,Notes\nward round,pase de sala,daily\n")
+        reloader = glossary_reloader.GlossaryReloader(directory)
+        before = translation_module._LEXICON.snapshot()
+        assert reloader.reload_now()
+        assert translation_module.translate("pase de sala", "spanish", "english") == "ward round"
+        assert before.translate("english", "spanish", "ward round") is None
+        assert translation_module.translate("reload check", "english", "french") == "test de rechargement"
+        for line in glossary_reloader.format_report(reloader.stats()).splitlines():
+            print(f"  {line}")
+        
+        with open(path, "a", encoding="utf-8") as handle:
+            handle.write("hand hygiene,higiene de manos,\n")
+        assert not reloader.check()
+        assert reloader.check()
+        assert translation_module.translate("hand hygiene", "english", "spanish") == "higiene de manos"
+        
+        with open(path, "w", encoding="utf-8") as handle:
+            handle.write("spanish,french\nalta,sortie\n")
+        assert not reloader.reload_now() and reloader.failures == 1
+        print(f"  Broken file: {reloader.last_error}")
+        assert translation_module.translate("ward round", "english", "spanish") == "pase de sala"
+        
+        # An empty directory restores the built-in glossary
+        os.remove(path)
+        assert reloader.reload_now()
+        assert "translation not available" in translation_module.translate("ward round", "english", "spanish")
+        assert translation_module.translate("hello", "english", "spanish") == "hola"
+    print()
+
+
+def test_inflection():
+    """
+    Tests plural forms finding their dictionary entries.
+    
+    This demonstrates:
+    - Rule-based plurals in English, Spanish and French
+    - Plural input translated to plural output
+    - Plurals of custom translations recognized right away
+    """
+    print("=" * 70)
+    print("TESTING INFLECTION")
+    print("=" * 70)
+    print()
+    
+    assert inflection.pluralize("dolor de cabeza", "spanish") == "dolores de cabeza"
+    assert inflection.pluralize("mal de tête", "french") == "maux de tête"
+    assert inflection.pluralize("infección", "spanish") == "infecciones"
+    assert inflection.pluralize("análisis", "spanish") == "análisis"
+    assert inflection.pluralize("shortness of breath", "english") == "shortnesses of breath"
+    
+    cases = [
+        ("headaches", "english", "spanish", "dolores de cabeza"),
+        ("nurses", "english", "french", "infirmières"),
+        ("doctores", "spanish", "english", "doctors"),
+        ("médecins", "french", "spanish", "doctores"),
+    ]
+    for text, source, target, expected in cases:
+        result = translation_module.translate(text, source, target)
+        print(f"  '{text}' ({source} -> {target}): {result}")
+        assert result == expected
+    assert medical_terms.get_medical_translation("headaches", "french") == "maux de tête"
+    assert translation_module.translate("hola", "spanish", "english") == "hello"
+    
+    translation_module.add_custom_translation("ward clerk", "secretario de planta", "secrétaire de service")
+    assert translation_module.translate("ward clerks", "english", "spanish") == "secretarios de planta"
+    print()
+
+
+def test_patient_localization():
+    """
+    Tests localizing every patient's packet in the patient's language.
+    
+    This demonstrates:
+    - The one-byte-per-patient language array
+    - Diagnoses, lab names and flags translated in a single pass
+    - Coverage gaps for languages without a glossary
+    """
+    print("=" * 70)
+    print("TESTING PATIENT LOCALIZATION")
+    print("=" * 70)
+    print()
+    
+    language_map = patient_localization.PatientLanguageMap(
+        ["P000001", "P000002", "P000004"], ["English", "Spanish", "Other"])
+    assert language_map.language("P000002") == "spanish"
+    assert language_map.language("P000003") is None and language_map.language("P000004") is None
+    assert language_map.size_in_bytes() == 5
+    assert patient_localization.lab_flag("Glucose", 212.0, "mg/dL") == "high"
+    assert patient_localization.lab_flag("Glucose", 212.0, "mmol/L") is None
+    
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "packets.jsonl")
+        report = patient_localization.run(path)
+        with open(path, "r", encoding="utf-8") as handle:
+            packets = [json.loads(line) for line in handle]
+    assert len(packets) == len(emr_data.get_table("patients"))
+    spanish = next(packet for packet in packets if packet["language"] == "spanish")
+    assert spanish["output_language"] == "spanish"
+    assert "plaquetas" in {lab["name"] for lab in spanish["labs"]} \
+        or "glucosa" in {lab["name"] for lab in spanish["labs"]}
+    hindi = next(packet for packet in packets if packet["language"] == "hindi")
+    assert hindi["output_language"] == "english"
+    assert report["spanish"]["localized"] == report["spanish"]["items"]
+    assert report["hindi"]["localized"] == 0 and report["hindi"]["patients"] == 31
+    for line in patient_localization.coverage_report(report).splitlines()[:4]:
+        print(f"  {line}")
+    print()
+
+
+def test_column_translation():
+    """
+    Tests dictionary-encoded column translation.
+    
+    This demonstrates:
+    - One code per row, one dictionary entry per distinct value
+    - Translating the distinct values only; the codes array is shared
+    - Medical glossary first, general glossary second, misses kept as-is
+    """
+    print("=" * 70)
+    print("TESTING COLUMN TRANSLATION")
+    print("=" * 70)
+    print()
+    
+    column = column_translation.encode(["Glucose", "Sodium", "Glucose", "Tropinin X"])
+    assert column.dictionary == ["Glucose", "Sodium", "Tropinin X"]
+    assert list(column.codes) == [0, 1, 0, 2] and column.codes.typecode == "B"
+    translated, missing = column_translation.translate_column(column, "spanish", category="labs")
+    assert translated.codes is column.codes
+    assert translated.decode() == ["glucosa", "sodio", "glucosa", "Tropinin X"]
+    assert missing == ["Tropinin X"]
+    
+    wide = column_translation.encode_chunks([[str(n) for n in range(200)],
+                                             [str(n) for n in range(400)]])
+    assert wide.codes.typecode == "H" and wide[599] == "399"
+    
+    patients = emr_data.get_table("patients")
+    results = column_translation.translate_table_columns(
+        patients, ["PatientGender", "PatientMaritalStatus"], "spanish")
+    for name, (translated, missing) in results.items():
+        assert missing == [] and len(translated) == len(patients)
+        print(f"  {name}: {', '.join(translated.dictionary)}")
+    print()
+
+
+def test_lab_catalog():
+    """
+    Tests canonical lab IDs across CSV names, SQL names and aliases.
+    
+    This demonstrates:
+    - Normalization of case, spacing and panel prefixes
+    - LabID resolved once when the labs table is loaded
+    - Filtering by integer ID finding the rows a SQL name refers to
+    """
+    print("=" * 70)
+    print("TESTING LAB CATALOG")
+    print("=" * 70)
+    print()
+    
+    glucose = lab_catalog.resolve("Glucose")
+    assert lab_catalog.resolve("METABOLIC: GLUCOSE") == glucose
+    assert lab_catalog.resolve("  metabolic:glucose ") == glucose
+    assert lab_catalog.resolve("CBC: GLUCOSE") is None
+    assert lab_catalog.resolve("Troponin") is None
+    assert lab_catalog.resolve("sgpt") == lab_catalog.resolve("ALT")
+    assert lab_catalog.sql_name(lab_catalog.resolve("WBC")) == "CBC: WHITE BLOOD CELL COUNT"
+    
+    ids, unknown = lab_catalog.resolve_column(["WBC", "Troponin", "Hemoglobin", "WBC"])
+    assert list(ids) == [lab_catalog.resolve("WBC"), lab_catalog.UNKNOWN_LAB,
+                         lab_catalog.resolve("HGB"), lab_catalog.resolve("WBC")]
+    assert unknown == ["Troponin"]
+    
+    labs = emr_data.get_table("labs")
+    rows = lab_catalog.matching_rows(labs.column("LabID"), "METABOLIC: GLUCOSE")
+    names = labs.column("LabName")
+    assert rows and all(names[row] == "Glucose" for row in rows)
+    assert len(rows) == names.count("Glucose")
+    assert lab_catalog.UNKNOWN_LAB not in labs.column("LabID")
+    print(f"  'METABOLIC: GLUCOSE' -> lab ID {glucose}, {len(rows)} rows")
+    print()
+
+
+def test_lab_units():
+    """
+    Tests converting lab values into each lab's canonical unit.
+    
+    This demonstrates:
+    - Unit spellings normalized before lookup
+    - One factor per distinct (lab, unit) pair, applied to the whole column
+    - Unknown units and missing values flagged instead of guessed
+    """
+    print("=" * 70)
+    print("TESTING LAB UNITS")
+    print("=" * 70)
+    print()
+    
+    glucose = lab_catalog.resolve("Glucose")
+    wbc = lab_catalog.resolve("WBC")
+    assert lab_units.normalize_unit(" MG/DL ") == "mg/dL"
+    assert lab_units.conversion_factor(glucose, "mmol/l") == 18.016
+    assert lab_units.conversion_factor(glucose, "mg%") is None
+    assert lab_units.canonical_unit(wbc) == "10^3/uL"
+    
+    values, flags, unknown = lab_units.convert_column(
+        [glucose, glucose, wbc, wbc, glucose],
+        ["mg/dL", "mmol/L", "10^9/L", "cells", "mg/dL"],
+        [100.0, 5.0, 7.5, 7.5, None])
+    assert values[0] == 100.0 and abs(values[1] - 90.08) < 1e-9 and values[2] == 7.5
+    assert values[3] != values[3] and values[4] != values[4]
+    assert list(flags) == [lab_units.CONVERTED, lab_units.CONVERTED, lab_units.CONVERTED,
+                           lab_units.UNKNOWN_UNIT, lab_units.MISSING_VALUE]
+    assert unknown == {(wbc, "cells"): 1}
+    print(f"  {lab_units.format_unknown(unknown)}")
+    
+    labs = emr_data.get_table("labs")
+    assert labs.column("LabUnitFlag").count(lab_units.CONVERTED) == len(labs)
+    assert list(labs.column("LabValueCanonical")[:5]) == labs.column("LabValue")[:5]
+    print(f"  Labs table: {len(labs):,} values in canonical units")
+    print()
+
+
+def test_emr_analytics():
+    """
+    Tests length of stay and readmissions over CSR admission arrays.
+    
+    This demonstrates:
+    - Admissions sorted once by patient and start time
+    - Gaps never crossing from one patient to the next
+    - Readmission flags for gaps within the window, overlaps excluded
+    """
+    print("=" * 70)
+    print("TESTING EMR ANALYTICS")
+    print("=" * 70)
+    print()
+    
+    history = emr_analytics.AdmissionHistory(
+        ["P2", "P1", "P1", "P2", "P1"],
+        [5, 2, 1, 4, 3],
+        ["2020-03-01 00:00:00", "2020-01-20 00:00:00", "2020-01-01 00:00:00",
+         "2020-01-01 00:00:00", "2020-06-01 00:00:00"],
+        ["2020-03-02 00:00:00", "2020-01-25 00:00:00", "2020-01-10 00:00:00",
+         "2020-03-05 00:00:00", "2020-06-03 00:00:00"])
+    assert history.patients == ["P1", "P2"]
+    assert list(history.offsets) == [0, 3, 5]
+    assert list(history.admission_ids) == [1, 2, 3, 4, 5]
+    assert list(history.length_of_stay()) == [9.0, 5.0, 2.0, 64.0, 1.0]
+    gaps = history.gaps()
+    assert gaps[0] == 10.0 and gaps[1] == 128.0 and gaps[3] == -4.0
+    assert gaps[2] != gaps[2] and gaps[4] != gaps[4]
+    assert list(history.readmissions(30)) == [1, 0, 0, 0, 0]
+    assert list(history.readmissions(200)) == [1, 1, 0, 0, 0]
+    stats = emr_analytics.summary(history)
+    assert stats["readmissions"] == 1 and stats["overlaps"] == 1
+    assert stats["top_patients"] == [("P1", 1)]
+    assert "(readmission)" in emr_analytics.format_patient(history, "P1")
+    assert emr_analytics.format_patient(history, "P3") is None
+    
+    emr = emr_analytics.get_history()
+    assert len(emr) == len(emr_data.get_table("admissions"))
+    print(f"  {emr_analytics.format_summary(emr_analytics.summary(emr)).splitlines()[3]}")
+    print()
+
+
+def test_patient_timeline():
+    """
+    Tests chronological timelines merged from admissions, diagnoses and labs.
+    
+    This demonstrates:
+    - Per-patient sorted slices from a CSR index
+    - A lazy heap merge of the slices
+    - A single pass producing every patient's timeline
+    """
+    print("=" * 70)
+    print("TESTING PATIENT TIMELINE")
+    print("=" * 70)
+    print()
+    
+    index = patient_timeline.PatientIndex(["P2", "P1", "P2", "P1"],
+                                          ["2021", "2020", "2019", "2018"])
+    assert index.patients == ["P1", "P2"]
+    assert list(index.patient_rows("P1")) == [3, 1]
+    assert list(index.patient_rows("P9")) == []
+    assert [patient for patient, _ in index.runs()] == ["P1", "P2"]
+    
+    events = list(patient_timeline.patient_timeline("P000001"))
+    assert events == sorted(events)
+    kinds = [event[3] for event in events]
+    assert kinds[0] == "admission" and kinds[1] == "diagnosis" and kinds[-1] == "discharge"
+    labs = emr_data.get_table("labs")
+    assert kinds.count("lab") == labs.column("PatientID").count("P000001")
+    assert list(patient_timeline.patient_timeline("P999999")) == []
+    
+    everything = patient_timeline.all_timelines()
+    first = [event for patient, event in itertools.takewhile(
+        lambda item: item[0] == "P000001", everything)]
+    assert first == events
+    for event in events[:3]:
+        print(f"  {patient_timeline.format_event(event)}")
+    print()
+
+
+def test_comorbidity():
+    """
+    Tests the sparse comorbidity matrix and its incremental updates.
+    
+    This demonstrates:
+    - CSR incidence with integer-coded ICD codes
+    - Co-occurrence counts per patient (repeated diagnoses count once)
+    - Incremental rows giving the same counts as a full rebuild
+    """
+    print("=" * 70)
+    print("TESTING COMORBIDITY")
+    print("=" * 70)
+    print()
+    
+    patients = ["P1", "P1", "P1", "P2", "P2", "P3"]
+    codes = ["I10", "E11.9", "I10", "I10", "J45", "E11.9"]
+    matrix = comorbidity.ComorbidityMatrix(patients, codes, ["Hypertension", "Diabetes", "Hypertension",
+                                                             "Hypertension", "Asthma", "Diabetes"])
+    assert matrix.patients == ["P1", "P2", "P3"] and list(matrix.offsets) == [0, 2, 4, 5]
+    assert matrix.patient_count("I10") == 2
+    assert matrix.top_cooccurring("I10") == [("J45", 1, 50.0), ("E11.9", 1, 50.0)]
+    assert matrix.find_codes("hyper") == ["I10"] and matrix.find_codes("i10") == ["I10"]
+    
+    assert matrix.add_diagnosis("P3", "I10") is True
+    assert matrix.add_diagnosis("P3", "I10") is False
+    assert matrix.add_diagnosis("P4", "Z99", "New code") is True
+    rebuilt = comorbidity.ComorbidityMatrix(patients + ["P3", "P4"], codes + ["I10", "Z99"])
+    for code in ["I10", "E11.9", "J45", "Z99"]:
+        assert matrix.top_cooccurring(code) == rebuilt.top_cooccurring(code)
+    matrix.compact()
+    assert matrix.delta == {} and matrix.patients == ["P1", "P2", "P3", "P4"]
+    assert matrix.patient_codes("P3") == rebuilt.patient_codes("P3")
+    
+    emr = comorbidity.get_matrix()
+    top = emr.top_cooccurring("I10", 3)
+    assert len(top) == 3 and top[0][1] >= top[-1][1]
+    print(f"  {comorbidity.format_top(emr, 'I10', 2)}")
+    print()
+
+
+def test_sketches():
+    """
+    Tests the distinct-count, quantile and frequency sketches.
+    
+    This demonstrates:
+    - Estimates within their stated error bounds
+    - Merging partition sketches giving the same kind of answer as one sketch
+    - EMR sketches agreeing with exact counts on the sample tables
+    """
+    print("=" * 70)
+    print("TESTING SKETCHES")
+    print("=" * 70)
+    print()
+    
+    halves = [sketches.HyperLogLog(), sketches.HyperLogLog()]
+    halves[0].update(f"P{number}" for number in range(0, 30000))
+    halves[1].update(f"P{number}" for number in range(20000, 50000))
+    halves[0].merge(halves[1])
+    assert abs(halves[0].count() - 50000) < 50000 * 4 * halves[0].relative_error()
+    
+    parts = [sketches.KLLSketch(seed=1), sketches.KLLSketch(seed=2)]
+    parts[0].update(range(0, 50000))
+    parts[1].update(range(50000, 100000))
+    parts[0].merge(parts[1])
+    assert parts[0].count == 100000 and parts[0].retained() < 1000
+    assert abs(parts[0].quantile(0.5) - 50000) < 100000 * 3 * parts[0].rank_error()
+    assert parts[0].quantile(0) == 0 and parts[0].quantile(1) == 99999
+    
+    frequent = sketches.CountMinSketch()
+    other = sketches.CountMinSketch()
+    frequent.update(["I10"] * 50 + ["E11.9"] * 20 + [f"R{n}" for n in range(500)])
+    other.update(["I10"] * 10 + ["J45"] * 40)
+    frequent.merge(other)
+    assert frequent.estimate("I10") >= 60 and frequent.estimate("J45") >= 40
+    assert frequent.estimate("I10") <= 60 + frequent.error_bound() + 1
+    assert [code for code, _ in frequent.heavy_hitters(2)] == ["I10", "J45"]
+    
+    emr = sketches.build_sketches(partitions=3)
+    labs = emr_data.get_table("labs")
+    wbc = lab_catalog.resolve("WBC")
+    exact = len({patient for patient, lab in zip(labs.column("PatientID"), labs.column("LabID"))
+                 if lab == wbc})
+    assert abs(emr.distinct_patients(wbc) - exact) <= exact * 0.05
+    assert emr.lab_rows == len(labs)
+    diagnoses = emr_data.get_table("diagnoses").column("PrimaryDiagnosisCode")
+    top_code, top_count = emr.diagnoses.heavy_hitters(1)[0]
+    assert top_count >= diagnoses.count(top_code) == max(map(diagnoses.count, set(diagnoses)))
+    print(f"  Patients with a WBC test: ~{emr.distinct_patients(wbc)} (exact {exact})")
+    print()
+
+
+def test_emr_query():
+    """
+    Tests ORDER BY ... LIMIT queries.
+    
+    This demonstrates:
+    - Index, heap and sort plans returning the same rows as a full sort
+    - The index plan stopping early (fewer rows scanned than in the table)
+    - Unsupported statements raising ValueError
+    """
+    print("=" * 70)
+    print("TESTING EMR QUERIES")
+    print("=" * 70)
+    print()
+    
+    labs = emr_data.get_table("labs")
+    glucose = lab_catalog.resolve("glucose")
+    expected = sorted((time for time, lab, value in zip(labs.column("LabDateTime"),
+                                                        labs.column("LabID"),
+                                                        labs.column("LabValue"))
+                       if lab == glucose and value is not None and value > 150),
+                      reverse=True)[:10]
+    result = emr_query.query("SELECT LabDateTime FROM LAB_OBSERVATION L "
+                             "WHERE L.LabName = 'METABOLIC: GLUCOSE' AND L.LabValue > 150 "
+                             "ORDER BY L.LabDateTime DESC LIMIT 10")
+    assert result["plan"] == "index" and result["scanned"] < len(labs)
+    assert [row[0] for row in result["rows"]] == expected
+    
+    heap = emr_query.query("SELECT LabValue FROM labs ORDER BY LabValue DESC LIMIT 3")
+    full = emr_query.query("SELECT LabValue FROM labs ORDER BY LabValue DESC")
+    assert heap["plan"] == "heap" and full["plan"] == "sort"
+    assert heap["rows"] == full["rows"][:3] and full["returned"] == len(labs)
+    
+    cohort = emr_query.query("SELECT PatientRace FROM admissions "
+                             "WHERE PatientRace = 'Asian' LIMIT 4")
+    assert cohort["plan"] == "scan" and cohort["rows"] == [("Asian",)] * 4
+    assert emr_query.query("SELECT LabValue FROM labs ORDER BY LabDateTime DESC "
+                           "LIMIT 0")["returned"] == 0
+    assert emr_query.query("SELECT AdmissionID FROM admissions "
+                           "WHERE AdmissionID = '100001'")["returned"] == 1
+    for statement in ("DELETE FROM labs", "SELECT * FROM nowhere",
+                      "SELECT Missing FROM labs", "SELECT * FROM labs WHERE PatientID > 5",
+                      "SELECT * FROM labs WHERE LabValue > 'abc'"):
+        try:
+            emr_query.query(statement)
+            assert False, statement
+        except ValueError:
+            pass
+    print(f"  Latest high glucose: {result['returned']} rows from "
+          f"{result['scanned']} scanned of {len(labs)}")
+    print()
+
+
+def test_spill_operators():
+    """
+    Tests the memory-budgeted sort and join.
+    
+    This demonstrates:
+    - External sort and grace hash join matching sorted() and an in-memory
+      join while spilling under a tiny budget
+    - Multi-pass merging and re-partitioning of a skewed key
+    - A three-table query giving the same rows with and without spilling
+    """
+    print("=" * 70)
+    print("TESTING SPILL OPERATORS")
+    print("=" * 70)
+    print()
+    
+    records = [(number * 7919 % 1000, number) for number in range(5000)]
+    stats = spill_operators.SpillStats()
+    ordered = list(spill_operators.external_sort(records, key=lambda record: record[0],
+                                                 reverse=True, memory_rows=50, stats=stats))
+    assert ordered == sorted(records, key=lambda record: record[0], reverse=True)
+    assert stats.runs == 100 and stats.passes == 1 and stats.bytes > 0
+    assert list(spill_operators.external_sort([3, 1, 2], memory_rows=3)) == [1, 2, 3]
+    
+    build = [(key % 300, f"b{key}") for key in range(600)] + [(7, "skew")] * 200
+    probe = [(key % 400, key) for key in range(2000)] + [(None, "null")]
+    expected = sorted((p, b) for p in probe for b in build if p[0] == b[0])
+    stats = spill_operators.SpillStats()
+    joined = sorted(spill_operators.grace_hash_join(probe, build, lambda r: r[0],
+                                                    lambda r: r[0], memory_rows=40,
+                                                    stats=stats))
+    assert joined == expected and stats.partitions > 32
+    
+    statement = ("SELECT L.LabValue, A.AdmissionStartDate, P.PatientGender "
+                 "FROM LAB_OBSERVATION L JOIN ADMISSION A ON L.AdmissionID = A.AdmissionID "
+                 "JOIN PATIENT P ON A.PatientID = P.PatientID "
+                 "WHERE P.PatientGender = 'Female' AND L.LabName = 'glucose' "
+                 "ORDER BY L.LabDateTime")
+    in_memory = emr_query.query(statement)
+    spilled = emr_query.query(statement, memory_rows=100)
+    assert in_memory["spilled_rows"] == 0 and spilled["spilled_rows"] > 0
+    assert spilled["rows"] == in_memory["rows"] and in_memory["returned"] > 0
+    print(f"  Join + sort of {spilled['returned']} rows with 100 rows of memory: "
+          f"{spilled['spill']}")
+    print()
+
+
 def test_data_types():
     """Demonstrates data types used in the chatbot."""
     print("=" * 70)
@@ -349,6 +1386,28 @@ def run_all_tests():
     test_medical_terms()
     test_utils()
     test_error_handling()
+    test_concurrent_updates()
+    test_translation_journal()
+    test_instrumentation()
+    test_profiling()
+    test_lazy_loading()
+    test_autocomplete()
+    test_search_index()
+    test_bloom_filters()
+    test_tiered_lexicon()
+    test_glossary_layers()
+    test_glossary_reloader()
+    test_inflection()
+    test_patient_localization()
+    test_column_translation()
+    test_lab_catalog()
+    test_lab_units()
+    test_emr_analytics()
+    test_patient_timeline()
+    test_comorbidity()
+    test_sketches()
+    test_emr_query()
+    test_spill_operators()
     test_data_types()
     test_sample_interactions()
     
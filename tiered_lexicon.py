@@ -0,0 +1,526 @@
+"""
+Tiered Lexicon Module for EMR Chatbot
+======================================
+This module stores very large terminologies (millions of concepts in three
+languages) on disk and keeps only the frequently used part in memory.
+It demonstrates:
+- A cold tier: sorted, memory-mapped files searched with binary search, so
+  opening a multi-million-entry glossary reads almost nothing from disk
+- A hot tier: an in-memory LRU dictionary of recently promoted concepts
+- Frequency-based promotion: a concept moves to the hot tier after
+  PROMOTE_AFTER cold hits; the least recently used hot concept is evicted
+- Bloom filters (saved with the files) that reject unknown phrases before
+  any page of the cold tier is touched
+- Statistics: hits per tier, promotions, evictions and cold-hit latency
+
+Files in a cold-tier directory (written by write_cold_store()):
+    manifest.json          - languages, counts, Bloom filter settings
+    concepts.dat / .idx    - one line per concept ("en<US>es<US>fr"),
+                             plus an array of line offsets
+    <language>.keys / .idx - "form<US>concept ID" lines sorted by form,
+                             plus an array of line offsets
+    <language>.bloom       - Bloom filter bits for that language's forms
+(<US> is the ASCII unit separator, 0x1F, which never appears in phrases.)
+
+Author: EMR Chatbot Team
+Date: 2026-10-19
+"""
+
+import array
+import json
+import mmap
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import bloom_filter
+import instrumentation
+
+
+# ============================================================================
+# MODULE-LEVEL CONSTANTS
+# ============================================================================
+
+# Concepts kept in memory by default
+# Data Type: int
+DEFAULT_HOT_CAPACITY = 50000
+
+# Cold hits needed before a concept is promoted to the hot tier
+# Data Type: int
+PROMOTE_AFTER = 2
+
+# Field and record separators in the data files
+# Data Type: bytes
+_FIELD = b"\x1f"
+_RECORD = b"\n"
+
+# Version of the file layout written by write_cold_store()
+# Data Type: int
+FORMAT_VERSION = 1
+
+# Data Type: str - offsets are stored as unsigned 64-bit integers
+_OFFSET_TYPE = "Q"
+
+
+# ============================================================================
+# WRITING A COLD STORE
+# ============================================================================
+
+def _write_offsets(path, offsets):
+    """Writes a list of file offsets as a native uint64 array."""
+    with open(path, "wb") as handle:
+        array.array(_OFFSET_TYPE, offsets).tofile(handle)
+
+
+def write_cold_store(directory, rows, languages,
+                     false_positive_rate=bloom_filter.DEFAULT_FALSE_POSITIVE_RATE):
+    """
+    Writes concept rows as a cold-tier directory.
+
+    This function demonstrates:
+    - Sorting once at build time so lookups can binary-search
+    - Writing fixed-width offset arrays next to variable-length records
+
+    Parameters:
+        directory (str): Output directory (created if needed)
+        rows (iterable): One dict per concept, language -> surface form
+                         (normalized: lowercase, trimmed)
+        languages (list): Languages to store, pivot first
+        false_positive_rate (float): Target rate of the Bloom filters
+
+    Returns:
+        int: Number of concepts written
+
+    Example:
+        >>> write_cold_store("icd10", [{"english": "fever", "spanish": "fiebre"}],
+        ...                  ["english", "spanish"])
+        1
+    """
+    os.makedirs(directory, exist_ok=True)
+    # Data Type: dict - language -> list of (form bytes, concept ID)
+    keys = {language: [] for language in languages}
+
+    offsets = [0]
+    with open(os.path.join(directory, "concepts.dat"), "wb") as handle:
+        concept = 0
+        for row in rows:
+            encoded = [(row.get(language) or "").encode("utf-8") for language in languages]
+            record = _FIELD.join(encoded) + _RECORD
+            handle.write(record)
+            offsets.append(offsets[-1] + len(record))
+            for language, form in zip(languages, encoded):
+                if form:
+                    keys[language].append((form, concept))
+            concept += 1
+    _write_offsets(os.path.join(directory, "concepts.idx"), offsets)
+
+    filters = {}
+    for language in languages:
+        # Sorting by (form, concept) keeps the first concept of a shared
+        # form first, matching lexicon_store.build_snapshot()
+        entries = sorted(keys[language])
+        keys[language] = None
+        bloom = bloom_filter.BloomFilter(max(1, len(entries)), false_positive_rate,
+                                         bloom_filter.stable_hash)
+        offsets = [0]
+        previous = None
+        with open(os.path.join(directory, f"{language}.keys"), "wb") as handle:
+            for form, concept_id in entries:
+                if form == previous:
+                    continue
+                previous = form
+                record = form + _FIELD + str(concept_id).encode("ascii") + _RECORD
+                handle.write(record)
+                offsets.append(offsets[-1] + len(record))
+                bloom.add(form.decode("utf-8"))
+        _write_offsets(os.path.join(directory, f"{language}.idx"), offsets)
+        with open(os.path.join(directory, f"{language}.bloom"), "wb") as handle:
+            handle.write(bloom.to_bytes())
+        filters[language] = {"capacity": bloom.capacity, "items": bloom.items}
+
+    manifest = {
+        "format": FORMAT_VERSION,
+        "languages": list(languages),
+        "concepts": concept,
+        "false_positive_rate": false_positive_rate,
+        "filters": filters,
+    }
+    with open(os.path.join(directory, "manifest.json"), "w", encoding="utf-8") as handle:
+        json.dump(manifest, handle, indent=2)
+    return concept
+
+
+# ============================================================================
+# READING A COLD STORE
+# ============================================================================
+
+class _MappedTable:
+    """A memory-mapped data file plus its memory-mapped offset array."""
+
+    def __init__(self, data_path, index_path):
+        self._handles = []
+        self.data = self._map(data_path)
+        # The offset array always holds at least one entry (0), so it is
+        # never empty and can always be mapped
+        self._index = self._map(index_path)
+        # Data Type: memoryview of uint64 - record i spans
+        # offsets[i]..offsets[i + 1]
+        self.offsets = memoryview(self._index).cast(_OFFSET_TYPE)
+        self.count = len(self.offsets) - 1
+
+    def _map(self, path):
+        """Memory-maps a file read-only (an empty file maps to b"")."""
+        handle = open(path, "rb")
+        self._handles.append(handle)
+        if os.fstat(handle.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self):
+        """Releases the mappings and file handles."""
+        self.offsets.release()
+        for mapped in (self.data, self._index):
+            if isinstance(mapped, mmap.mmap):
+                mapped.close()
+        for handle in self._handles:
+            handle.close()
+
+
+class ColdStore:
+    """
+    Read-only, memory-mapped concept store written by write_cold_store().
+
+    Attributes:
+        languages (tuple): Stored languages, pivot first
+        filters (dict): Language -> BloomFilter over that language's forms
+    """
+
+    def __init__(self, directory):
+        with open(os.path.join(directory, "manifest.json"), "r", encoding="utf-8") as handle:
+            manifest = json.load(handle)
+        if manifest.get("format") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported cold store format in {directory}")
+        self.directory = directory
+        self.languages = tuple(manifest["languages"])
+        self._positions = {language: position
+                           for position, language in enumerate(self.languages)}
+        self._concepts = _MappedTable(os.path.join(directory, "concepts.dat"),
+                                      os.path.join(directory, "concepts.idx"))
+        self._keys = {}
+        self.filters = {}
+        for language in self.languages:
+            self._keys[language] = _MappedTable(
+                os.path.join(directory, f"{language}.keys"),
+                os.path.join(directory, f"{language}.idx"))
+            settings = manifest["filters"][language]
+            with open(os.path.join(directory, f"{language}.bloom"), "rb") as handle:
+                self.filters[language] = bloom_filter.BloomFilter.from_bytes(
+                    handle.read(), settings["capacity"],
+                    manifest["false_positive_rate"], settings["items"])
+
+    def __len__(self):
+        return self._concepts.count
+
+    def concept_id(self, language, text):
+        """
+        Binary-searches one language's sorted keys.
+
+        Parameters:
+            language (str): Language of the text
+            text (str): Normalized phrase
+
+        Returns:
+            int or None: The concept ID, or None if not found
+        """
+        table = self._keys[language]
+        data = table.data
+        offsets = table.offsets
+        key = text.encode("utf-8")
+        low, high = 0, table.count
+        while low < high:
+            middle = (low + high) // 2
+            start = offsets[middle]
+            if data[start:data.find(_FIELD, start)] < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low == table.count:
+            return None
+        start = offsets[low]
+        separator = data.find(_FIELD, start)
+        if data[start:separator] != key:
+            return None
+        return int(data[separator + 1:offsets[low + 1] - 1])
+
+    def forms(self, concept):
+        """
+        Returns every surface form of a concept.
+
+        Parameters:
+            concept (int): Concept ID
+
+        Returns:
+            tuple: One form (or None) per language, in self.languages order
+        """
+        table = self._concepts
+        record = table.data[table.offsets[concept]:table.offsets[concept + 1] - 1]
+        return tuple(form.decode("utf-8") or None for form in record.split(_FIELD))
+
+    def close(self):
+        """Unmaps every file."""
+        self._concepts.close()
+        for table in self._keys.values():
+            table.close()
+
+
+# ============================================================================
+# TIERED LEXICON (hot dict in front of the cold store)
+# ============================================================================
+
+class TieredLexicon:
+    """
+    Hot/cold translation store.
+
+    Lookup order:
+    1. Hot tier: dict probe of recently promoted concepts
+    2. Bloom filter: unknown phrases stop here without touching the disk
+    3. Cold tier: binary search over the memory-mapped files; after
+       PROMOTE_AFTER cold hits the concept is copied into the hot tier
+
+    Attributes:
+        languages (tuple): Stored languages
+        hot_capacity (int): Maximum number of concepts in the hot tier
+    """
+
+    def __init__(self, directory, hot_capacity=DEFAULT_HOT_CAPACITY,
+                 promote_after=PROMOTE_AFTER):
+        self.cold = ColdStore(directory)
+        self.languages = self.cold.languages
+        self.hot_capacity = hot_capacity
+        self.promote_after = promote_after
+        self._positions = {language: position
+                           for position, language in enumerate(self.languages)}
+        self._lock = threading.Lock()
+
+        # Data Type: OrderedDict - concept ID -> forms tuple (LRU order)
+        self._hot = OrderedDict()
+        # Data Type: dict - (language, form) -> concept ID, for hot concepts
+        self._hot_index = {}
+        # Data Type: dict - concept ID -> cold hits so far (not yet promoted)
+        self._candidates = {}
+
+        self.hot_hits = 0
+        self.cold_hits = 0
+        self.misses = 0
+        self.promotions = 0
+        self.evictions = 0
+        self.cold_latency = instrumentation.LatencyHistogram()
+
+    def __len__(self):
+        return len(self.cold)
+
+    def translate(self, source_language, target_language, text):
+        """
+        Translates a normalized phrase between two stored languages.
+
+        Parameters:
+            source_language (str): Language of the text
+            target_language (str): Language to translate into
+            text (str): Normalized phrase
+
+        Returns:
+            str or None: The translation, or None if not found
+
+        Example:
+            >>> tiers.translate("english", "spanish", "essential hypertension")
+            'hipertensión esencial'
+        """
+        target = self._positions[target_language]
+
+        # Step 1: hot tier
+        with self._lock:
+            concept = self._hot_index.get((source_language, text))
+            if concept is not None:
+                self._hot.move_to_end(concept)
+                self.hot_hits += 1
+                return self._hot[concept][target]
+
+        # Step 2: Bloom filter - most misses end here
+        bloom = self.cold.filters[source_language]
+        if text not in bloom:
+            self.misses += 1
+            return None
+
+        # Step 3: cold tier
+        started = time.perf_counter_ns()
+        concept = self.cold.concept_id(source_language, text)
+        if concept is None:
+            bloom.record_false_positive()
+            self.misses += 1
+            return None
+        forms = self.cold.forms(concept)
+        self.cold_latency.record(time.perf_counter_ns() - started)
+        self.cold_hits += 1
+        self._count_cold_hit(concept, forms)
+        return forms[target]
+
+    def _count_cold_hit(self, concept, forms):
+        """Promotes a concept once it has been read from disk often enough."""
+        with self._lock:
+            if concept in self._hot:
+                return
+            hits = self._candidates.get(concept, 0) + 1
+            if hits < self.promote_after:
+                self._candidates[concept] = hits
+                # Age the counts so one-off lookups do not pile up forever
+                if len(self._candidates) > 4 * self.hot_capacity:
+                    self._candidates = {key: value // 2
+                                        for key, value in self._candidates.items()
+                                        if value > 1}
+                return
+            self._candidates.pop(concept, None)
+            if self.hot_capacity <= 0:
+                return
+            while len(self._hot) >= self.hot_capacity:
+                self._evict_oldest()
+            self._hot[concept] = forms
+            for language, form in zip(self.languages, forms):
+                # A form shared by several concepts belongs to the one the
+                # cold tier returns (the lowest ID); the others stay cold
+                # for it, so both tiers give the same answer
+                if form is not None and self.cold.concept_id(language, form) == concept:
+                    self._hot_index[(language, form)] = concept
+            self.promotions += 1
+
+    def _evict_oldest(self):
+        """Drops the least recently used hot concept (called under lock)."""
+        concept, forms = self._hot.popitem(last=False)
+        for language, form in zip(self.languages, forms):
+            if self._hot_index.get((language, form)) == concept:
+                del self._hot_index[(language, form)]
+        self.evictions += 1
+
+    def stats(self):
+        """
+        Returns tier sizes, hit counters and cold-hit latency.
+
+        Returns:
+            dict: JSON-friendly statistics
+        """
+        lookups = self.hot_hits + self.cold_hits + self.misses
+        rejected = sum(bloom.rejected for bloom in self.cold.filters.values())
+        return {
+            "concepts": len(self.cold),
+            "hot_size": len(self._hot),
+            "hot_capacity": self.hot_capacity,
+            "hot_hits": self.hot_hits,
+            "cold_hits": self.cold_hits,
+            "misses": self.misses,
+            "bloom_rejected": rejected,
+            "hot_hit_ratio": round(self.hot_hits / lookups, 4) if lookups else None,
+            "promotions": self.promotions,
+            "evictions": self.evictions,
+            "cold_p50_ns": self.cold_latency.percentile(0.50),
+            "cold_p99_ns": self.cold_latency.percentile(0.99),
+            "cold_max_ns": self.cold_latency.max_value,
+        }
+
+    def close(self):
+        """Releases the memory-mapped files."""
+        self.cold.close()
+
+
+def format_report(stats):
+    """
+    Formats TieredLexicon.stats() for the `stats tiers` command.
+
+    Parameters:
+        stats (dict): Statistics from TieredLexicon.stats()
+
+    Returns:
+        str: Multi-line report
+    """
+    ratio = stats["hot_hit_ratio"]
+    ratio_text = f"{ratio * 100:.1f}%" if ratio is not None else "-"
+    return "\n".join([
+        f"  concepts on disk   {stats['concepts']:>10,}",
+        f"  hot tier           {stats['hot_size']:>10,} / {stats['hot_capacity']:,}",
+        f"  hot hits           {stats['hot_hits']:>10,}  ({ratio_text} of lookups)",
+        f"  cold hits          {stats['cold_hits']:>10,}",
+        f"  misses             {stats['misses']:>10,}  ({stats['bloom_rejected']:,} rejected by Bloom filter)",
+        f"  promotions         {stats['promotions']:>10,}",
+        f"  evictions          {stats['evictions']:>10,}",
+        f"  cold hit latency   p50 {stats['cold_p50_ns'] / 1000:.1f} µs, "
+        f"p99 {stats['cold_p99_ns'] / 1000:.1f} µs, max {stats['cold_max_ns'] / 1000:.1f} µs",
+    ])
+
+
+def build_from_csv(csv_path, directory, languages=("english", "spanish", "french")):
+    """
+    Builds a cold store from a CSV file with one column per language.
+
+    Parameters:
+        csv_path (str): Input file whose header names the languages
+        directory (str): Output directory
+        languages (tuple): Columns to store, pivot first
+
+    Returns:
+        int: Number of concepts written
+    """
+    import csv
+
+    def rows():
+        with open(csv_path, "r", encoding="utf-8", newline="") as handle:
+            for record in csv.DictReader(handle):
+                row = {language: record[language].lower().strip()
+                       for language in languages if record.get(language)}
+                if row.get(languages[0]):
+                    yield row
+
+    return write_cold_store(directory, rows(), list(languages))
+
+
+# ============================================================================
+# MODULE TEST (runs only when module is executed directly)
+# ============================================================================
+if __name__ == "__main__":
+    import random
+    import sys
+    import tempfile
+
+    # Usage: python tiered_lexicon.py build glossary.csv output_directory
+    if len(sys.argv) == 4 and sys.argv[1] == "build":
+        count = build_from_csv(sys.argv[2], sys.argv[3])
+        print(f"Wrote {count:,} concepts to {sys.argv[3]}")
+        sys.exit(0)
+
+    print("=== Tiered Lexicon Module Test ===\n")
+
+    size = 200000
+    rows = ({"english": f"condition {number:06d}",
+             "spanish": f"condición {number:06d}",
+             "french": f"affection {number:06d}"} for number in range(size))
+
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        write_cold_store(directory, rows, ["english", "spanish", "french"])
+        print(f"Wrote {size:,} concepts in {time.perf_counter() - start:.1f} s")
+
+        tiers = TieredLexicon(directory, hot_capacity=5000)
+        print(f"  'condición 000042' -> {tiers.translate('spanish', 'french', 'condición 000042')}")
+
+        # Skewed workload: 90% of lookups hit 2% of the concepts
+        generator = random.Random(7)
+        popular = [generator.randrange(size) for _ in range(4000)]
+        for _ in range(100000):
+            if generator.random() < 0.9:
+                number = generator.choice(popular)
+            else:
+                number = generator.randrange(size)
+            tiers.translate("english", "spanish", f"condition {number:06d}")
+        for number in range(20000):
+            tiers.translate("english", "spanish", f"unknown term {number}")
+
+        print(format_report(tiers.stats()))
+        tiers.close()
@@ -0,0 +1,333 @@
+"""
+Translation Journal Module for EMR Chatbot
+===========================================
+This module makes custom translations survive a restart.
+It demonstrates:
+- Write-ahead logging: each custom translation is appended to a journal
+  file before it is published to the lexicon
+- Group commit: the journal is fsync'ed once per batch of records (or once
+  per short time interval) instead of once per record
+- Crash-consistent recovery: every record carries a CRC32 checksum, and a
+  torn or corrupt tail left by a crash is detected and truncated on replay
+- Compaction: the journal is periodically folded into a snapshot file
+
+Files (inside the journal directory):
+    custom_translations.snapshot.json  - compacted custom translations
+    custom_translations.journal        - records added since the snapshot
+
+Author: EMR Chatbot Team
+Date: 2026-10-19
+"""
+
+import json
+import os
+import threading
+import time
+import zlib
+
+
+# ============================================================================
+# MODULE-LEVEL CONSTANTS
+# ============================================================================
+
+# File names used inside the journal directory
+# Data Type: str
+JOURNAL_FILE_NAME = "custom_translations.journal"
+SNAPSHOT_FILE_NAME = "custom_translations.snapshot.json"
+
+# Group-commit defaults: fsync after this many records or this many seconds
+# Data Type: int / float
+DEFAULT_SYNC_EVERY = 512
+DEFAULT_SYNC_INTERVAL = 0.05
+
+# Compact the journal into the snapshot after this many records
+# Data Type: int
+DEFAULT_COMPACT_EVERY = 100000
+
+
+# ============================================================================
+# RECORD ENCODING
+# ============================================================================
+
+def encode_record(forms):
+    """
+    Encodes one custom translation as a checksummed journal line.
+
+    Format: 8 hex digits of CRC32, a tab, a JSON object, and a newline.
+
+    Parameters:
+        forms (dict): Language -> surface form, e.g.
+                      {"english": "cough", "spanish": "tos", "french": "toux"}
+
+    Returns:
+        bytes: The encoded journal line
+
+    Example:
+        >>> encode_record({"english": "cough", "spanish": "tos"})
+        b'...\\t{"english":"cough","spanish":"tos"}\\n'
+    """
+    payload = json.dumps(forms, ensure_ascii=False,
+                         separators=(",", ":")).encode("utf-8")
+    checksum = zlib.crc32(payload) & 0xFFFFFFFF
+    return b"%08x\t%s\n" % (checksum, payload)
+
+
+def decode_record(line):
+    """
+    Decodes one journal line, verifying its checksum.
+
+    Parameters:
+        line (bytes): A complete journal line, including the newline
+
+    Returns:
+        dict or None: Language -> surface form, or None if the line is torn
+                      or corrupt
+    """
+    if not line.endswith(b"\n") or len(line) < 10 or line[8:9] != b"\t":
+        return None
+    payload = line[9:-1]
+    try:
+        if int(line[:8], 16) != zlib.crc32(payload) & 0xFFFFFFFF:
+            return None
+        return json.loads(payload.decode("utf-8"))
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+# ============================================================================
+# JOURNAL
+# ============================================================================
+
+class TranslationJournal:
+    """
+    Append-only, fsync-batched journal of custom translations.
+
+    Typical use:
+        journal = TranslationJournal("data")
+        entries = journal.recover()     # replay snapshot + journal
+        journal.append({"english": "cough", "spanish": "tos"})
+        journal.close()                 # final fsync
+
+    Attributes:
+        directory (str): Directory holding the journal and snapshot files
+        records_replayed (int): Journal records recovered by recover()
+        bytes_truncated (int): Bytes of torn tail discarded by recover()
+    """
+
+    def __init__(self, directory, sync_every=DEFAULT_SYNC_EVERY,
+                 sync_interval=DEFAULT_SYNC_INTERVAL,
+                 compact_every=DEFAULT_COMPACT_EVERY, key_language="english"):
+        self.directory = directory
+        self.key_language = key_language
+        self.journal_path = os.path.join(directory, JOURNAL_FILE_NAME)
+        self.snapshot_path = os.path.join(directory, SNAPSHOT_FILE_NAME)
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.compact_every = compact_every
+
+        self.records_replayed = 0
+        self.bytes_truncated = 0
+
+        # Latest forms per concept (what the snapshot will hold)
+        # Data Type: dict - key-language phrase -> {language: form}
+        self._entries = {}
+        self._file = None
+        self._lock = threading.Lock()
+        self._unsynced = 0
+        self._since_compaction = 0
+        self._last_sync = time.monotonic()
+        self._flusher = None
+        self._closed = threading.Event()
+
+    # ------------------------------------------------------------------
+    # Recovery
+    # ------------------------------------------------------------------
+
+    def recover(self):
+        """
+        Loads the snapshot, replays the journal and opens it for appending.
+
+        A torn record at the end of the journal (from a crash mid-write) is
+        truncated so new records are never appended after garbage.
+
+        Returns:
+            list: One {language: form} dict per concept, oldest first
+        """
+        os.makedirs(self.directory, exist_ok=True)
+
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, "r", encoding="utf-8") as handle:
+                for forms in json.load(handle):
+                    self._remember(forms)
+
+        good_offset = 0
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, "rb") as handle:
+                for line in handle:
+                    record = decode_record(line)
+                    if record is None:
+                        break
+                    self._remember(record)
+                    good_offset += len(line)
+                    self.records_replayed += 1
+            size = os.path.getsize(self.journal_path)
+            if size > good_offset:
+                self.bytes_truncated = size - good_offset
+                with open(self.journal_path, "r+b") as handle:
+                    handle.truncate(good_offset)
+                    os.fsync(handle.fileno())
+
+        self._since_compaction = self.records_replayed
+        self._file = open(self.journal_path, "ab", buffering=1024 * 1024)
+        self._start_flusher()
+        return list(self._entries.values())
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def append(self, forms):
+        """
+        Appends one custom translation to the journal.
+
+        The record is buffered and made durable by the next group commit
+        (after sync_every records or sync_interval seconds). Call sync() to
+        force it to disk immediately.
+
+        Parameters:
+            forms (dict): Normalized language -> surface form mapping; must
+                          contain the key language
+        """
+        record = encode_record(forms)
+        with self._lock:
+            self._file.write(record)
+            self._remember(forms)
+            self._unsynced += 1
+            self._since_compaction += 1
+            if self._unsynced >= self.sync_every:
+                self._sync_locked()
+            if self._since_compaction >= self.compact_every:
+                self._compact_locked()
+
+    def append_many(self, entries):
+        """
+        Appends several translations with a single group commit.
+
+        Parameters:
+            entries (list): {language: form} dicts
+        """
+        with self._lock:
+            self._file.write(b"".join(encode_record(forms) for forms in entries))
+            for forms in entries:
+                self._remember(forms)
+            self._since_compaction += len(entries)
+            self._unsynced += len(entries)
+            self._sync_locked()
+            if self._since_compaction >= self.compact_every:
+                self._compact_locked()
+
+    def sync(self):
+        """Flushes buffered records and fsyncs the journal file."""
+        with self._lock:
+            self._sync_locked()
+
+    def compact(self):
+        """Writes all entries to the snapshot file and empties the journal."""
+        with self._lock:
+            self._compact_locked()
+
+    def close(self):
+        """Stops the background flusher and makes all records durable."""
+        self._closed.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        with self._lock:
+            if self._file is not None:
+                self._sync_locked()
+                self._file.close()
+                self._file = None
+
+    def entry_count(self):
+        """Returns the number of distinct custom translations recorded."""
+        return len(self._entries)
+
+    # ------------------------------------------------------------------
+    # Internal helpers (called with self._lock held)
+    # ------------------------------------------------------------------
+
+    def _remember(self, forms):
+        key = forms[self.key_language]
+        if key in self._entries:
+            self._entries[key].update(forms)
+        else:
+            self._entries[key] = dict(forms)
+
+    def _sync_locked(self):
+        if self._unsynced:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def _compact_locked(self):
+        # 1. Write the new snapshot to a temporary file and fsync it
+        temp_path = self.snapshot_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as handle:
+            json.dump(list(self._entries.values()), handle, ensure_ascii=False)
+            handle.flush()
+            os.fsync(handle.fileno())
+        # 2. Atomically replace the old snapshot
+        os.replace(temp_path, self.snapshot_path)
+        # 3. Only now is it safe to empty the journal
+        self._file.flush()
+        self._file.truncate(0)
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._since_compaction = 0
+
+    def _start_flusher(self):
+        """Starts a daemon thread that group-commits idle buffered records."""
+        def flush_loop():
+            while not self._closed.wait(self.sync_interval):
+                with self._lock:
+                    if self._unsynced and self._file is not None:
+                        self._sync_locked()
+
+        self._flusher = threading.Thread(target=flush_loop, daemon=True,
+                                         name="translation-journal-flusher")
+        self._flusher.start()
+
+
+# ============================================================================
+# MODULE TEST (runs only when module is executed directly)
+# ============================================================================
+if __name__ == "__main__":
+    import tempfile
+
+    print("=== Translation Journal Module Test ===\n")
+
+    with tempfile.TemporaryDirectory() as directory:
+        journal = TranslationJournal(directory)
+        journal.recover()
+
+        count = 50000
+        start = time.perf_counter()
+        for i in range(count):
+            journal.append({"english": f"term {i}", "spanish": f"término {i}",
+                            "french": f"terme {i}"})
+        journal.sync()
+        elapsed = time.perf_counter() - start
+        print(f"Appended {count} records in {elapsed:.3f}s "
+              f"({count / elapsed:,.0f} adds/sec)")
+        journal.close()
+
+        # Simulate a crash in the middle of a record
+        with open(os.path.join(directory, JOURNAL_FILE_NAME), "ab") as handle:
+            handle.write(encode_record({"english": "torn", "spanish": "roto"})[:12])
+
+        recovered = TranslationJournal(directory)
+        entries = recovered.recover()
+        print(f"Recovered {len(entries)} entries, "
+              f"truncated {recovered.bytes_truncated} torn bytes")
+        recovered.compact()
+        recovered.close()
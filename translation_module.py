@@ -8,11 +8,20 @@ It demonstrates:
 - Functions: Translation functions with parameters and return values
 - Scope: Module-level data accessible by all functions
 - Modularization: Reusable translation functions
+- Thread safety: lookups read an immutable lexicon snapshot (lexicon_store)
+- Persistence: custom translations can be journaled to disk (translation_journal)
 
 Author: EMR Chatbot Team
 Date: 2026-01-31
 """
 
+import glossary_layers
+import inflection
+import lazy_loading
+import lexicon_store
+import medical_terms
+import translation_journal
+
 # ============================================================================
 # MODULE-LEVEL VARIABLES (Global Scope)
 # ============================================================================
@@ -53,6 +62,17 @@ ENGLISH_TO_SPANISH = {
     "discharge": "alta",
     "surgery": "cirugía",
     "laboratory": "laboratorio",
+    
+    # Patient demographics (EMR patient table values)
+    "male": "masculino",
+    "female": "femenino",
+    "other": "otro",
+    "unknown": "desconocido",
+    "married": "casado(a)",
+    "single": "soltero(a)",
+    "divorced": "divorciado(a)",
+    "widowed": "viudo(a)",
+    "separated": "separado(a)",
 }
 
 # English to French translation dictionary
@@ -89,16 +109,194 @@ ENGLISH_TO_FRENCH = {
     "discharge": "sortie",
     "surgery": "chirurgie",
     "laboratory": "laboratoire",
+    
+    # Patient demographics (EMR patient table values)
+    "male": "masculin",
+    "female": "féminin",
+    "other": "autre",
+    "unknown": "inconnu",
+    "married": "marié(e)",
+    "single": "célibataire",
+    "divorced": "divorcé(e)",
+    "widowed": "veuf (veuve)",
+    "separated": "séparé(e)",
+}
+
+# Data Type: dict - language name -> English-to-language dictionary
+# Adding a language only needs one more ENGLISH_TO_X dictionary here; every
+# translation function below works for any pair of these languages.
+TRANSLATION_TABLES = {
+    "spanish": ENGLISH_TO_SPANISH,
+    "french": ENGLISH_TO_FRENCH,
 }
 
+# Data Type: str - the language whose phrase identifies each concept
+PIVOT_LANGUAGE = "english"
+
 # Data Type: list - stores supported language names
-SUPPORTED_LANGUAGES = ["english", "spanish", "french"]
+SUPPORTED_LANGUAGES = [PIVOT_LANGUAGE] + list(TRANSLATION_TABLES)
+
+# Target false-positive rate of the per-language Bloom filters that reject
+# unknown phrases before the lexicon is probed (change it before the first
+# translation; the filters are built with the lexicon)
+# Data Type: float
+BLOOM_FALSE_POSITIVE_RATE = 0.01
+
+# Custom translations restored from the journal before the lexicon was
+# built; _build_lexicon() applies them
+# Data Type: list of dict
+_RESTORED_ENTRIES = []
+
+# Every custom translation of this session (including the ones restored
+# from the journal); replace_glossary() re-applies them on top of a
+# reloaded glossary so they are not lost
+# Data Type: list of dict
+_CUSTOM_ENTRIES = []
+
+
+def _build_lexicon():
+    """Builds the concept store on first use (see _LEXICON below)."""
+    lexicon = lexicon_store.VersionedLexicon(lexicon_store.build_snapshot(
+        lexicon_store.rows_from_tables(PIVOT_LANGUAGE, TRANSLATION_TABLES),
+        SUPPORTED_LANGUAGES,
+        false_positive_rate=BLOOM_FALSE_POSITIVE_RATE,
+    ))
+    if _RESTORED_ENTRIES:
+        lexicon.apply_batch(_RESTORED_ENTRIES)
+        _RESTORED_ENTRIES.clear()
+    return lexicon
+
+
+# Versioned copy-on-write concept store seeded from the dictionaries above.
+# Each concept keeps one surface form per language, so any language pair
+# (e.g. Spanish -> French) is one index probe plus one form lookup. The
+# ENGLISH_TO_X dictionaries stay as the base glossary; every lookup and
+# every custom translation goes through this store instead.
+# The store is built on first use, so commands that never translate
+# (help, quit, EMR queries) do not pay for it at startup.
+# Data Type: lexicon_store.VersionedLexicon (a LazyGlobal until first use)
+_LEXICON = lazy_loading.LazyGlobal(__name__, "_LEXICON", _build_lexicon)
+
+# Write-ahead journal for custom translations (None until enable_journal())
+# Data Type: translation_journal.TranslationJournal or None
+_JOURNAL = None
+
+# Optional disk-backed terminology consulted when the lexicon has no
+# translation (None until enable_cold_tier())
+# Data Type: tiered_lexicon.TieredLexicon or None
+_COLD_TIER = None
+
+# Per-region/site/user overlay layers on top of the lexicon, built on the
+# first create_layer() call
+# Data Type: glossary_layers.LayeredGlossary or None
+_LAYERS = None
+
+# Source-language detector, built on first use from the base glossary
+# Data Type: language_detector.LanguageDetector or None
+_DETECTOR = None
 
 
 # ============================================================================
 # TRANSLATION FUNCTIONS
 # ============================================================================
 
+def translate(text, source_language, target_language, layer=None):
+    """
+    Translates text between any two supported languages.
+    
+    This function demonstrates:
+    - Multiple parameters: text, source_language, target_language
+    - Language-agnostic lookup through concept IDs
+    - Variable scope: Uses the module-level lexicon
+    - Error handling for unsupported languages
+    
+    Parameters:
+        text (str): The text to translate
+        source_language (str): Language of the text (e.g. "spanish")
+        target_language (str): Language to translate into (e.g. "french")
+        layer (str): Overlay layer whose view is used (see create_layer()).
+                     Default is None (the shared glossary).
+    
+    Returns:
+        str: The translation if found, otherwise the original text with a note
+        
+    Example:
+        >>> translate("dolor de cabeza", "spanish", "french")
+        'mal de tête'
+        >>> translate("hello", "english", "spanish")
+        'hola'
+    """
+    # Local variables with function scope
+    # Data Type: str
+    normalized_text = text.lower().strip()
+    source = source_language.lower().strip()
+    target = target_language.lower().strip()
+    
+    # Read one consistent snapshot for the whole lookup
+    snapshot = _LEXICON.snapshot()
+    for language in (source, target):
+        if language not in snapshot.languages:
+            return f"Language '{language}' not supported"
+    
+    translation = _lookup(snapshot, source, target, normalized_text, layer)
+    if translation is not None:
+        return translation
+    else:
+        # Return original text if no translation found
+        return f"{text} (translation not available)"
+
+
+def _lookup(snapshot, source, target, normalized_text, layer):
+    """Looks a normalized phrase up in a layer or the snapshot, then the cold tier."""
+    # translate() returns None when the phrase is not in the glossary
+    if layer is None or layer == glossary_layers.BASE_LAYER or _LAYERS is None:
+        translation = snapshot.translate(source, target, normalized_text)
+    else:
+        translation = _LAYERS.translate(layer, source, target, normalized_text)
+        if translation is None:
+            # A plural of a stored phrase: translate the singular through
+            # the layer and pluralize it, as LexiconSnapshot.translate does
+            lemma = snapshot.lemma(source, normalized_text)
+            if lemma is not None:
+                translation = _LAYERS.translate(layer, source, target, lemma)
+                if translation is not None:
+                    translation = inflection.pluralize(translation, target)
+    
+    # Fall back to the large on-disk terminology, if one is attached
+    cold_tier = _COLD_TIER
+    if translation is None and cold_tier is not None \
+            and source in cold_tier.languages and target in cold_tier.languages:
+        translation = cold_tier.translate(source, target, normalized_text)
+    return translation
+
+
+def find_translation(text, source_language, target_language, layer=None):
+    """
+    Same lookup as translate(), returning None instead of a message when
+    there is no translation (for callers that translate data, not chat).
+    
+    Parameters:
+        text (str): The text to translate
+        source_language (str): Language of the text
+        target_language (str): Language to translate into
+        layer (str): Overlay layer whose view is used. Default is None.
+    
+    Returns:
+        str or None: The translation, or None if the phrase or either
+                     language is unknown
+    
+    Example:
+        >>> find_translation("Married", "english", "spanish")
+        'casado(a)'
+    """
+    source = source_language.lower().strip()
+    target = target_language.lower().strip()
+    snapshot = _LEXICON.snapshot()
+    if source not in snapshot.languages or target not in snapshot.languages:
+        return None
+    return _lookup(snapshot, source, target, text.lower().strip(), layer)
+
+
 def translate_to_spanish(text):
     """
     Translates English text to Spanish.
@@ -106,8 +304,7 @@ def translate_to_spanish(text):
     This function demonstrates:
     - Function parameters: text (str) - the English text to translate
     - Return values: str - the Spanish translation or original text
-    - Variable scope: Uses module-level ENGLISH_TO_SPANISH dictionary
-    - Local variables: normalized_text has function scope
+    - Code reusability: a thin wrapper around translate()
     
     Parameters:
         text (str): The English text to translate
@@ -121,17 +318,7 @@ def translate_to_spanish(text):
         >>> translate_to_spanish("patient")
         'paciente'
     """
-    # Local variable - exists only within this function (function scope)
-    # Data Type: str (string)
-    normalized_text = text.lower().strip()
-    
-    # Check if translation exists in dictionary
-    # The .get() method returns the value if key exists, otherwise returns the default
-    if normalized_text in ENGLISH_TO_SPANISH:
-        return ENGLISH_TO_SPANISH[normalized_text]
-    else:
-        # Return original text if no translation found
-        return f"{text} (translation not available)"
+    return translate(text, PIVOT_LANGUAGE, "spanish")
 
 
 def translate_to_french(text):
@@ -141,7 +328,6 @@ def translate_to_french(text):
     This function demonstrates:
     - Function parameters: text (str) - the English text to translate
     - Return values: str - the French translation or original text
-    - Variable scope: Uses module-level ENGLISH_TO_FRENCH dictionary
     - Code reusability: Similar structure to translate_to_spanish
     
     Parameters:
@@ -156,14 +342,7 @@ def translate_to_french(text):
         >>> translate_to_french("doctor")
         'médecin'
     """
-    # Local variable with function scope
-    normalized_text = text.lower().strip()
-    
-    # Dictionary lookup with error handling
-    if normalized_text in ENGLISH_TO_FRENCH:
-        return ENGLISH_TO_FRENCH[normalized_text]
-    else:
-        return f"{text} (translation not available)"
+    return translate(text, PIVOT_LANGUAGE, "french")
 
 
 def translate_from_spanish(text):
@@ -171,9 +350,8 @@ def translate_from_spanish(text):
     Translates Spanish text to English (reverse translation).
     
     This function demonstrates:
-    - Reverse dictionary lookup
-    - Iteration through dictionary items
-    - Multiple return points based on conditions
+    - Reverse lookup through the Spanish surface-form index
+    - Code reusability: a thin wrapper around translate()
     
     Parameters:
         text (str): The Spanish text to translate
@@ -187,17 +365,7 @@ def translate_from_spanish(text):
         >>> translate_from_spanish("paciente")
         'patient'
     """
-    # Local variable with function scope
-    normalized_text = text.lower().strip()
-    
-    # Iterate through dictionary to find matching Spanish value
-    # This demonstrates reverse lookup: finding key by value
-    for english, spanish in ENGLISH_TO_SPANISH.items():
-        if spanish == normalized_text:
-            return english
-    
-    # If no match found, return original text
-    return f"{text} (translation not available)"
+    return translate(text, "spanish", PIVOT_LANGUAGE)
 
 
 def translate_from_french(text):
@@ -205,7 +373,7 @@ def translate_from_french(text):
     Translates French text to English (reverse translation).
     
     This function demonstrates:
-    - Reverse dictionary lookup (similar to translate_from_spanish)
+    - Reverse lookup (similar to translate_from_spanish)
     - Code modularity and reusability
     
     Parameters:
@@ -220,14 +388,40 @@ def translate_from_french(text):
         >>> translate_from_french("médecin")
         'doctor'
     """
-    normalized_text = text.lower().strip()
+    return translate(text, "french", PIVOT_LANGUAGE)
+
+
+def detect_language(text):
+    """
+    Guesses the language of a phrase.
+    
+    This function demonstrates:
+    - Lazy initialization of a module-level variable
+    - Delegating to another module (language_detector)
     
-    # Reverse lookup in French dictionary
-    for english, french in ENGLISH_TO_FRENCH.items():
-        if french == normalized_text:
-            return english
+    Parameters:
+        text (str): The phrase to inspect
     
-    return f"{text} (translation not available)"
+    Returns:
+        str: The most likely supported language
+        
+    Example:
+        >>> detect_language("dolor de cabeza")
+        'spanish'
+    """
+    global _DETECTOR
+    
+    # Trigram profiles are built once; membership checks always use the
+    # current snapshot, so custom translations are recognized immediately.
+    # Medical terms count too ("toux" is French even though only the
+    # symptoms glossary has it).
+    snapshot = _LEXICON.snapshot()
+    if _DETECTOR is None:
+        # Imported here: most sessions never need the detector
+        import language_detector
+        _DETECTOR = language_detector.LanguageDetector(snapshot)
+    return _DETECTOR.detect(text.lower().strip(), snapshot,
+                            medical_terms.iter_category_stores())
 
 
 def get_supported_languages():
@@ -251,6 +445,74 @@ def get_supported_languages():
     return SUPPORTED_LANGUAGES.copy()
 
 
+def _publish(updates):
+    """
+    Journals new translations and makes them visible everywhere.
+    
+    Both add paths go through here, so the journal, the lexicon and the
+    overlay layers never disagree about what was added.
+    
+    Parameters:
+        updates (list): Normalized {language: phrase} dicts
+    """
+    # Write-ahead: record the translations before publishing them (a single
+    # entry waits for the next group commit, a batch is synced at once)
+    if _JOURNAL is not None:
+        if len(updates) == 1:
+            _JOURNAL.append(updates[0])
+        else:
+            _JOURNAL.append_many(updates)
+    _CUSTOM_ENTRIES.extend(updates)
+    
+    # Publish every language in one atomic update, so no reader can see the
+    # Spanish entry without the French one
+    published = _LEXICON.apply_batch(updates)
+    # Layers stacked on the shared glossary see the change as well
+    if _LAYERS is not None:
+        _LAYERS.update_base(published, [forms[PIVOT_LANGUAGE] for forms in updates])
+
+
+def add_translation(forms):
+    """
+    Adds (or updates) one concept given its forms in any languages.
+    
+    This function demonstrates:
+    - Dictionary parameter: language -> phrase
+    - Return value: bool (boolean) data type for success/failure
+    - Write-ahead journaling before publishing to the lexicon
+    
+    Parameters:
+        forms (dict): Language -> phrase. Must include English, which
+                      identifies the concept; other languages are optional.
+    
+    Returns:
+        bool: True if translation added successfully, False otherwise
+        
+    Example:
+        >>> add_translation({"english": "rash", "spanish": "erupción"})
+        True
+    """
+    try:
+        # Input validation - English phrase plus known, non-empty languages
+        if not forms.get(PIVOT_LANGUAGE):
+            return False
+        # Data Type: dict - normalized language -> normalized phrase
+        normalized = {}
+        for language, phrase in forms.items():
+            language = language.lower().strip()
+            if language not in SUPPORTED_LANGUAGES or not phrase:
+                return False
+            normalized[language] = phrase.lower().strip()
+        
+        _publish([normalized])
+        return True
+        
+    except Exception as e:
+        # Error handling - return False if any error occurs
+        print(f"Error adding translation: {e}")
+        return False
+
+
 def add_custom_translation(english, spanish, french):
     """
     Adds a new translation to all language dictionaries.
@@ -258,9 +520,8 @@ def add_custom_translation(english, spanish, french):
     This function demonstrates:
     - Multiple parameters (3 parameters)
     - Return value: bool (boolean) data type for success/failure
-    - Modifying module-level variables
-    - Error handling with try-except
     - Input validation
+    - Code reusability: delegates to add_translation()
     
     Parameters:
         english (str): The English phrase
@@ -274,29 +535,281 @@ def add_custom_translation(english, spanish, french):
         >>> add_custom_translation("headache", "dolor de cabeza", "mal de tête")
         True
     """
-    try:
-        # Input validation - check that all parameters are non-empty strings
-        # Data Type: bool (boolean) - result of validation check
-        if not english or not spanish or not french:
-            return False
-        
-        # Normalize all inputs (local variables with function scope)
-        english_normalized = english.lower().strip()
-        spanish_normalized = spanish.lower().strip()
-        french_normalized = french.lower().strip()
+    # Input validation - check that all parameters are non-empty strings
+    # Data Type: bool (boolean) - result of validation check
+    if not english or not spanish or not french:
+        return False
+    
+    return add_translation({
+        PIVOT_LANGUAGE: english,
+        "spanish": spanish,
+        "french": french,
+    })
+
+
+def add_custom_translations(entries):
+    """
+    Adds several translations and publishes them as a single update.
+    
+    This function demonstrates:
+    - Batching: one lexicon version for many new phrases
+    - Iterating over a list of tuples
+    - Skipping invalid entries instead of failing the whole batch
+    
+    Parameters:
+        entries (list): List of (english, spanish, french) tuples
+    
+    Returns:
+        int: Number of translations added
         
-        # Add to both dictionaries (modifying module-level variables)
-        ENGLISH_TO_SPANISH[english_normalized] = spanish_normalized
-        ENGLISH_TO_FRENCH[english_normalized] = french_normalized
+    Example:
+        >>> add_custom_translations([("cough", "tos", "toux"), ("rash", "erupción", "éruption")])
+        2
+    """
+    # Data Type: list of dict
+    updates = []
+    for english, spanish, french in entries:
+        if not english or not spanish or not french:
+            continue
+        updates.append({
+            PIVOT_LANGUAGE: english.lower().strip(),
+            "spanish": spanish.lower().strip(),
+            "french": french.lower().strip(),
+        })
+    
+    if updates:
+        _publish(updates)
+    return len(updates)
+
+
+def enable_journal(directory, **options):
+    """
+    Restores saved custom translations and journals all future ones.
+    
+    This function demonstrates:
+    - Modifying a module-level variable with the global keyword
+    - Keyword arguments passed through (**options)
+    - Replaying saved data in a single batch
+    
+    Parameters:
+        directory (str): Directory for the journal and snapshot files
+        **options: Extra TranslationJournal settings (sync_every, ...)
+    
+    Returns:
+        int: Number of custom translations restored
         
-        # Return success
-        # Data Type: bool
-        return True
+    Example:
+        >>> enable_journal("custom_translations")
+        3
+    """
+    global _JOURNAL
+    
+    if _JOURNAL is not None:
+        _JOURNAL.close()
+    
+    journal = translation_journal.TranslationJournal(
+        directory, key_language=PIVOT_LANGUAGE, **options)
+    # Data Type: list of dict
+    entries = journal.recover()
+    _CUSTOM_ENTRIES.extend(entries)
+    if entries:
+        if lazy_loading.is_materialized(_LEXICON):
+            _LEXICON.apply_batch(entries)
+        else:
+            # Applied together with the base glossary on first use
+            _RESTORED_ENTRIES.extend(entries)
+    _JOURNAL = journal
+    return len(entries)
+
+
+def close_journal():
+    """
+    Makes every journaled translation durable and stops journaling.
+    
+    Returns:
+        None
+    """
+    global _JOURNAL
+    
+    if _JOURNAL is not None:
+        _JOURNAL.close()
+        _JOURNAL = None
+
+
+def replace_glossary(rows):
+    """
+    Rebuilds the lexicon from the base glossary plus extra entries (e.g.
+    read from glossary files) and swaps it in atomically.
+    
+    This function demonstrates:
+    - Building a new snapshot without any lock while readers keep using
+      the current one
+    - Publishing it with one reference assignment (VersionedLexicon.publish)
+    - Rebuilding derived structures (detector, layers) before swapping them
+    
+    Parameters:
+        rows (iterable): Normalized {language: phrase} dicts. An entry whose
+                         English phrase is already in the base glossary
+                         overrides the languages it gives.
+    
+    Returns:
+        int: Number of concepts in the new lexicon
+    """
+    global _DETECTOR
+    
+    # Data Type: dict - English phrase -> merged row
+    merged = {row[PIVOT_LANGUAGE]: row
+              for row in lexicon_store.rows_from_tables(PIVOT_LANGUAGE, TRANSLATION_TABLES)}
+    for row in rows:
+        key = row[PIVOT_LANGUAGE]
+        base = merged.get(key)
+        merged[key] = dict(base, **row) if base is not None else row
+    snapshot = lexicon_store.build_snapshot(
+        merged.values(), SUPPORTED_LANGUAGES,
+        false_positive_rate=BLOOM_FALSE_POSITIVE_RATE,
+    )
+    # Custom translations win over file entries, as they did before
+    published = _LEXICON.publish(snapshot, replay=_CUSTOM_ENTRIES)
+    
+    if _DETECTOR is not None:
+        import language_detector
+        _DETECTOR = language_detector.LanguageDetector(published)
+    if _LAYERS is not None:
+        _LAYERS.rebase(published)
+    return len(published)
+
+
+def _get_layers():
+    """Builds the layered glossary on the current lexicon on first use."""
+    global _LAYERS
+    
+    if _LAYERS is None:
+        # The base layer reads the lexicon snapshot; nothing is copied
+        _LAYERS = glossary_layers.LayeredGlossary(SUPPORTED_LANGUAGES, _LEXICON.snapshot())
+    return _LAYERS
+
+
+def create_layer(name, parent=glossary_layers.BASE_LAYER):
+    """
+    Creates a named overlay layer (e.g. a region, site or user glossary).
+    
+    Translations added to a layer are seen through that layer and every
+    layer stacked on it, and by nobody else.
+    
+    Parameters:
+        name (str): New layer name
+        parent (str): Layer to stack on. Default is "base" (the shared
+                      glossary).
+    
+    Returns:
+        list: Layer names from the base up to the new layer
         
-    except Exception as e:
-        # Error handling - return False if any error occurs
-        print(f"Error adding translation: {e}")
+    Example:
+        >>> create_layer("region-latam")
+        ['base', 'region-latam']
+        >>> create_layer("site-bogota", "region-latam")
+        ['base', 'region-latam', 'site-bogota']
+    """
+    layers = _get_layers()
+    layers.create_layer(name.strip(), parent.strip())
+    return layers.layer_path(name.strip())
+
+
+def has_layer(name):
+    """Returns True if an overlay layer with this name exists."""
+    return name == glossary_layers.BASE_LAYER or (
+        _LAYERS is not None and _LAYERS.has_layer(name))
+
+
+def add_layer_translation(layer, forms):
+    """
+    Adds or overrides a translation in one overlay layer only.
+    
+    Parameters:
+        layer (str): Layer name (use add_translation() for the shared base)
+        forms (dict): Language -> phrase. Must include English; languages
+                      left out are inherited from the layers underneath.
+    
+    Returns:
+        bool: True if the translation was added
+    """
+    if not forms.get(PIVOT_LANGUAGE) or not has_layer(layer):
+        return False
+    normalized = {language.lower().strip(): phrase.lower().strip()
+                  for language, phrase in forms.items() if phrase}
+    if any(language not in SUPPORTED_LANGUAGES for language in normalized):
         return False
+    _get_layers().set_entry(layer, normalized)
+    return True
+
+
+def remove_layer_translation(layer, english):
+    """
+    Removes a layer's own translation so the one underneath shows through.
+    
+    Parameters:
+        layer (str): Layer name
+        english (str): English phrase of the entry
+    
+    Returns:
+        bool: True if the layer had such an entry
+    """
+    if _LAYERS is None or not _LAYERS.has_layer(layer):
+        return False
+    return _LAYERS.remove_entry(layer, english.lower().strip())
+
+
+def get_layer_stats():
+    """
+    Returns entry counts and sharing for every overlay layer.
+    
+    Returns:
+        list: glossary_layers.LayeredGlossary.stats() (empty before the
+              first layer is created)
+    """
+    return _LAYERS.stats() if _LAYERS is not None else []
+
+
+def enable_cold_tier(directory, **options):
+    """
+    Attaches a disk-backed terminology (see tiered_lexicon.py).
+    
+    Phrases missing from the in-memory lexicon are looked up there; the
+    most used ones are promoted to an in-memory hot tier.
+    
+    Parameters:
+        directory (str): Directory written by tiered_lexicon.write_cold_store()
+        **options: TieredLexicon settings (hot_capacity, promote_after)
+    
+    Returns:
+        int: Number of concepts in the terminology
+    """
+    global _COLD_TIER
+    import tiered_lexicon
+    
+    tiers = tiered_lexicon.TieredLexicon(directory, **options)
+    disable_cold_tier()
+    _COLD_TIER = tiers
+    return len(tiers)
+
+
+def disable_cold_tier():
+    """Detaches the disk-backed terminology, if any."""
+    global _COLD_TIER
+    
+    tiers, _COLD_TIER = _COLD_TIER, None
+    if tiers is not None:
+        tiers.close()
+
+
+def get_tier_stats():
+    """
+    Returns hot/cold tier statistics.
+    
+    Returns:
+        dict or None: TieredLexicon.stats(), or None without a cold tier
+    """
+    return _COLD_TIER.stats() if _COLD_TIER is not None else None
 
 
 def get_translation_count():
@@ -309,14 +822,16 @@ def get_translation_count():
     - Using built-in len() function
     
     Returns:
-        int: Number of translations in the Spanish dictionary
+        int: Number of concepts in the current lexicon (plus the
+             disk-backed terminology, when one is attached)
         
     Example:
         >>> get_translation_count()
         20
     """
     # Data Type: int (integer) - result of len() function
-    return len(ENGLISH_TO_SPANISH)
+    cold_count = len(_COLD_TIER) if _COLD_TIER is not None else 0
+    return len(_LEXICON.snapshot()) + cold_count
 
 
 def list_all_translations():
@@ -326,7 +841,7 @@ def list_all_translations():
     This function demonstrates:
     - No parameters
     - Return value: list of strings
-    - Converting dictionary keys to list
+    - Reading one consistent snapshot while other threads add phrases
     
     Returns:
         list: All English phrases available for translation
@@ -335,8 +850,50 @@ def list_all_translations():
         >>> list_all_translations()
         ['hello', 'goodbye', 'patient', 'doctor', ...]
     """
-    # Data Type: list - sorted list of dictionary keys
-    return sorted(ENGLISH_TO_SPANISH.keys())
+    # Data Type: list - sorted list of English phrases
+    return sorted(_LEXICON.snapshot().phrases(PIVOT_LANGUAGE))
+
+
+def get_filter_stats():
+    """
+    Returns the Bloom filter statistics of the general lexicon.
+    
+    Returns:
+        dict: Language -> statistics (items, bytes, checks, rejected,
+              false positives, target/expected/observed false-positive rate)
+    """
+    return _LEXICON.snapshot().filter_stats()
+
+
+def list_all_entries():
+    """
+    Returns every translation entry with its forms in each language.
+    
+    Returns:
+        list: One dict per entry, e.g.
+              {"english": "hello", "spanish": "hola", "french": "bonjour"}
+    """
+    # Data Type: list of dict
+    return [forms for _, forms in _LEXICON.snapshot().concepts()]
+
+
+def list_all_phrases():
+    """
+    Returns every phrase known in any supported language.
+    
+    Returns:
+        set: Surface forms in English, Spanish and French
+        
+    Example:
+        >>> "hola" in list_all_phrases()
+        True
+    """
+    snapshot = _LEXICON.snapshot()
+    # Data Type: set
+    phrases = set()
+    for language in snapshot.languages:
+        phrases.update(snapshot.phrases(language))
+    return phrases
 
 
 # ============================================================================
@@ -357,6 +914,11 @@ if __name__ == "__main__":
     print(f"  'doctor' -> {translate_to_french('doctor')}")
     print()
     
+    # Test a direct Spanish -> French translation
+    print("Testing translate:")
+    print(f"  'dolor de cabeza' (spanish -> french) -> {translate('dolor de cabeza', 'spanish', 'french')}")
+    print()
+    
     # Test reverse translations
     print("Testing translate_from_spanish:")
     print(f"  'hola' -> {translate_from_spanish('hola')}")
@@ -13,6 +13,21 @@ Author: EMR Chatbot Team
 Date: 2026-01-31
 """
 
+# ============================================================================
+# MODULE-LEVEL CONSTANTS
+# ============================================================================
+
+# Every command name the chatbot accepts, in the order they are offered for
+# completion (main.KNOWN_COMMANDS and autocomplete.COMMANDS come from this)
+# Data Type: tuple
+COMMAND_NAMES = (
+    "translate", "medical", "help", "languages", "list", "count", "add",
+    "categories", "stats", "profile", "search", "layer", "reload", "localize",
+    "los", "readmissions", "timeline", "comorbid", "approx", "query",
+    "quit", "exit", "bye",
+)
+
+
 # ============================================================================
 # TEXT PROCESSING FUNCTIONS
 # ============================================================================
@@ -202,30 +217,108 @@ def parse_translation_request(arguments):
         return (False, "", "", "")
 
 
-# ============================================================================
-# DISPLAY FUNCTIONS
-# ============================================================================
+def strip_quotes(text):
+    """
+    Removes one pair of matching quotes around a phrase.
+    
+    Parameters:
+        text (str): Text such as '"hello"' or "'hello'"
+    
+    Returns:
+        str: The text without surrounding quotes
+        
+    Example:
+        >>> strip_quotes('"dolor de cabeza"')
+        'dolor de cabeza'
+    """
+    text = text.strip()
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in "\"'":
+        return text[1:-1].strip()
+    return text
 
-def display_help():
+
+def parse_translation_pair(arguments, pivot_language="english"):
     """
-    Displays help information about available commands.
+    Parses translation arguments into a source and target language.
     
     This function demonstrates:
-    - No parameters (void parameter list)
-    - No return value (returns None implicitly)
-    - Side effects: prints to console
-    - Multi-line string formatting
+    - Default parameter value: pivot_language
+    - Parsing from the right (language names are the last words)
+    - Multiple return values via tuple
+    
+    Accepted formats:
+        "text"                             (source and target are "auto")
+        "text to <target>"                 (source is "auto")
+        "text from <source>"               (target is the pivot language)
+        "text from <source> to <target>"   (any language pair)
+    
+    A language of "auto" means the caller should detect it from the text.
+    
+    Parameters:
+        arguments (str): The translation command arguments
+        pivot_language (str): Target used with "from <source>".
+                              Default is "english".
     
     Returns:
-        None
+        tuple: (success, text, source_language, target_language)
         
     Example:
-        >>> display_help()
-        (prints help text to console)
+        >>> parse_translation_pair('"dolor" from spanish to french')
+        (True, 'dolor', 'spanish', 'french')
+        >>> parse_translation_pair('"hola" to french')
+        (True, 'hola', 'auto', 'french')
+        >>> parse_translation_pair('"dolor de cabeza"')
+        (True, 'dolor de cabeza', 'auto', 'auto')
+        >>> parse_translation_pair('"pain from fall" to spanish')
+        (True, 'pain from fall', 'auto', 'spanish')
     """
-    # Multi-line string with help information
     # Data Type: str
-    help_text = """
+    lowered = arguments.lower().strip()
+    source = "auto"
+    target = "auto"
+    
+    # A quoted phrase may itself contain " to " or " from " ("hello to
+    # you"), so it is taken first and only the rest names languages
+    # Data Type: str or None
+    quoted = None
+    if lowered[:1] in ("\"", "'"):
+        closing = lowered.find(lowered[0], 1)
+        if closing > 0:
+            quoted = lowered[1:closing]
+            lowered = " " + lowered[closing + 1:]
+    
+    if " to " in lowered:
+        head, _, target = lowered.rpartition(" to ")
+        if " from " in head:
+            head, _, source = head.rpartition(" from ")
+    elif " from " in lowered:
+        head, _, source = lowered.rpartition(" from ")
+        target = pivot_language
+    else:
+        head = lowered
+    
+    # Data Type: str - text and language names without quotes/whitespace
+    if quoted is not None:
+        # Nothing but language names may follow the closing quote
+        text = quoted.strip() if not head.strip() else ""
+    else:
+        text = strip_quotes(head)
+    source = source.strip()
+    target = target.strip()
+    
+    if text and source and target:
+        return (True, text, source, target)
+    return (False, "", "", "")
+
+
+# ============================================================================
+# DISPLAY FUNCTIONS
+# ============================================================================
+
+# Banners are built once when the module is loaded; display functions only
+# print them
+# Data Type: str
+HELP_TEXT = """
 ╔══════════════════════════════════════════════════════════════╗
 ║              EMR CHATBOT - AVAILABLE COMMANDS                ║
 ╠══════════════════════════════════════════════════════════════╣
@@ -233,6 +326,8 @@ def display_help():
 ║  TRANSLATION COMMANDS:                                       ║
 ║    translate "text" to <language>                            ║
 ║    translate "text" from <language>                          ║
+║    translate "text" from <language> to <language>            ║
+║    translate "text"        (source language detected)        ║
 ║                                                              ║
 ║    Supported languages: spanish, french                      ║
 ║                                                              ║
@@ -241,19 +336,64 @@ def display_help():
 ║    languages         - List supported languages              ║
 ║    list              - List all available translations       ║
 ║    count             - Show number of translations           ║
+║    search <words>    - Search glossary and diagnoses         ║
+║    layer [use|create] - Site/user glossary overlay layers    ║
+║    reload            - Reload glossary files now             ║
+║    localize [file]   - Patient packets in each own language  ║
+║    los [patient]     - Length of stay, all or one patient    ║
+║    readmissions [days] - Readmissions within N days (30)     ║
+║    timeline <patient> - Patient events in time order         ║
+║    comorbid <code>   - Diagnoses that co-occur with a code   ║
+║    approx <query>    - Sketch answers (distinct/median/top)  ║
+║    query <SELECT>    - SQL with JOIN, ORDER BY and LIMIT     ║
 ║    add               - Add custom translation                ║
+║    stats [on|off]    - Show or control latency statistics    ║
+║    profile on|off    - Start/stop the command profiler       ║
 ║    quit / exit       - Exit the chatbot                      ║
 ║                                                              ║
 ║  EXAMPLES:                                                   ║
 ║    translate "hello" to spanish                              ║
 ║    translate "bonjour" from french                           ║
+║    translate "dolor" from spanish to french                  ║
 ║    translate "patient" to spanish                            ║
 ║                                                              ║
 ╚══════════════════════════════════════════════════════════════╝
     """
+
+# Data Type: str
+WELCOME_TEXT = """
+╔══════════════════════════════════════════════════════════════╗
+║          WELCOME TO EMR TRANSLATION CHATBOT                  ║
+╠══════════════════════════════════════════════════════════════╣
+║                                                              ║
+║  This chatbot can translate medical and common phrases       ║
+║  between English, Spanish, and French.                       ║
+║                                                              ║
+║  Type 'help' for available commands.                         ║
+║  Type 'quit' to exit.                                        ║
+║                                                              ║
+╚══════════════════════════════════════════════════════════════╝
+    """
+
+
+def display_help():
+    """
+    Displays help information about available commands.
+    
+    This function demonstrates:
+    - No parameters (void parameter list)
+    - No return value (returns None implicitly)
+    - Side effects: prints to console
+    - Multi-line string formatting
     
-    # Print help text (side effect - no return value)
-    print(help_text)
+    Returns:
+        None
+        
+    Example:
+        >>> display_help()
+        (prints help text to console)
+    """
+    print(HELP_TEXT)
 
 
 def display_welcome():
@@ -268,20 +408,7 @@ def display_welcome():
     Returns:
         None
     """
-    welcome_text = """
-╔══════════════════════════════════════════════════════════════╗
-║          WELCOME TO EMR TRANSLATION CHATBOT                  ║
-╠══════════════════════════════════════════════════════════════╣
-║                                                              ║
-║  This chatbot can translate medical and common phrases       ║
-║  between English, Spanish, and French.                       ║
-║                                                              ║
-║  Type 'help' for available commands.                         ║
-║  Type 'quit' to exit.                                        ║
-║                                                              ║
-╚══════════════════════════════════════════════════════════════╝
-    """
-    print(welcome_text)
+    print(WELCOME_TEXT)
 
 
 def display_separator():